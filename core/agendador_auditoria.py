@@ -0,0 +1,435 @@
+import os
+import json
+import time
+import shutil
+import logging
+import tempfile
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+if TYPE_CHECKING:
+    from core.auditor import ECDAuditor
+
+# Logger local para uso interno do módulo (não configura nível globalmente)
+logger = logging.getLogger(__name__)
+
+
+class ModeloCustoAuditoria:
+    """
+    Estimativa do custo (segundos) de cada teste da auditoria.
+
+    O custo é modelado como taxa × volume, onde o volume é a soma das linhas
+    dos insumos do teste (Diário, balancete e/ou plano, conforme
+    ECDAuditor.TESTES) e a taxa é a média móvel exponencial dos segundos por
+    mil linhas observados nas execuções anteriores (telemetria). Sem histórico,
+    vale a taxa inicial de CUSTO_INICIAL, medida em ECDs reais.
+    """
+
+    # Segundos por mil linhas de insumo, antes de qualquer aprendizado
+    CUSTO_INICIAL: Dict[str, float] = {
+        "1.1_Cruzamento_Diario_Balancete": 0.5,
+        "1.2_Validacao_Hierarquia": 0.1,
+        "4.1_Lei_Benford": 3.0,
+        "4.2_Duplicidades": 1.0,
+        "4.4_Quase_Duplicidades": 1.5,
+        "5.4_Consistencia_PL_Resultado": 0.1,
+    }
+    CUSTO_PADRAO = 0.01
+
+    # Componente sob o qual o agendador grava a duração de cada teste
+    COMPONENTE = "AgendadorAuditoria"
+
+    def __init__(self, taxas: Optional[Dict[str, float]] = None, alfa: float = 0.3):
+        self.taxas: Dict[str, float] = dict(taxas or {})
+        self.alfa = alfa
+
+    @staticmethod
+    def volume(insumos: Iterable[str], volumes: Dict[str, int]) -> int:
+        return sum(volumes.get(insumo, 0) for insumo in insumos)
+
+    def taxa(self, nome: str) -> float:
+        return self.taxas.get(nome, self.CUSTO_INICIAL.get(nome, self.CUSTO_PADRAO))
+
+    def estimar(self, nome: str, volume: int) -> float:
+        """Custo estimado em segundos para um volume (linhas) de insumo."""
+        return self.taxa(nome) * max(volume, 1) / 1000.0
+
+    def registrar(self, nome: str, duracao: float, volume: int) -> None:
+        """Atualiza a taxa do teste com uma nova observação."""
+        if volume <= 0:
+            return
+        observada = duracao * 1000.0 / volume
+        if nome in self.taxas:
+            observada = self.alfa * observada + (1 - self.alfa) * self.taxas[nome]
+        self.taxas[nome] = observada
+
+    def aprender(self, dados_telemetria: Dict[str, Any]) -> None:
+        """
+        Aprende com a telemetria do lote (TelemetryCollector.data): durações
+        gravadas pelo agendador e volumes dos insumos de cada ECD.
+        """
+        from core.auditor import ECDAuditor
+
+        for dados in dados_telemetria.values():
+            duracoes = dados.get("metrics", {}).get(self.COMPONENTE, {})
+            volumes = dados.get("volumes", {})
+            for nome, duracao in duracoes.items():
+                if nome in ECDAuditor.TESTES:
+                    insumos = ECDAuditor.TESTES[nome][1]
+                    self.registrar(nome, float(duracao), self.volume(insumos, volumes))
+
+    @classmethod
+    def carregar(cls, caminho: str) -> "ModeloCustoAuditoria":
+        if not os.path.exists(caminho):
+            return cls()
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                return cls({k: float(v) for k, v in json.load(f).items()})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Modelo de custos da auditoria ignorado ({e}).")
+            return cls()
+
+    def salvar(self, caminho: str) -> None:
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(self.taxas, f, indent=2, sort_keys=True)
+
+
+# Históricos de anos anteriores (atributos do ECDAuditor) que alguns testes
+# leem além dos quatro insumos: vão ao processo filho junto com eles
+HISTORICOS_AUDITOR: Tuple[str, ...] = ("historico_balancete", "historico_fluxos")
+
+
+def _executar_teste_isolado(
+    nome: str,
+    caminhos: Dict[str, str],
+    manter_arrow: bool,
+    limiares: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Executa um teste em outro processo sobre os insumos em Arrow IPC.
+
+    Os arquivos são mapeados em memória: colunas numéricas sem nulos e
+    textos (ArrowDtype) são lidos sem cópia. O processo filho monta seu
+    próprio ECDAuditor (com naturezas, mapeamento e os históricos de
+    HISTORICOS_AUDITOR, se exportados) e devolve só os resultados do teste.
+    """
+    import pyarrow as pa
+
+    from core.auditor import ECDAuditor
+
+    def _ler(caminho: str) -> pd.DataFrame:
+        with pa.memory_map(caminho, "r") as fonte:
+            tabela = pa.ipc.open_file(fonte).read_all()
+        return tabela.to_pandas(
+            types_mapper=lambda t: (
+                pd.ArrowDtype(t)
+                if pa.types.is_string(t) or pa.types.is_large_string(t)
+                else None
+            )
+        )
+
+    insumos = {chave: _ler(caminho) for chave, caminho in caminhos.items()}
+    auditor = ECDAuditor(
+        df_diario=insumos["diario"],
+        df_balancete=insumos["balancete"],
+        df_plano=insumos["plano"],
+        df_naturezas=insumos.get("naturezas"),
+        df_mapeamento=insumos.get("mapeamento"),
+    )
+    for atributo in HISTORICOS_AUDITOR:
+        if atributo in insumos:
+            setattr(auditor, atributo, insumos[atributo])
+    if limiares is not None:
+        auditor.limiares = limiares
+    auditor.executar_testes([nome])
+    resultados = auditor.resultados
+    if not manter_arrow:
+        resultados = _textos_para_objeto(resultados)
+    return resultados
+
+
+def _cronometrar(funcao: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    """
+    Executa `funcao` no próprio worker e devolve (retorno, segundos). A
+    duração não inclui a espera na fila do pool: é o que o modelo de custos
+    aprende.
+    """
+    inicio = time.perf_counter()
+    retorno = funcao(*args)
+    return retorno, time.perf_counter() - inicio
+
+
+def _textos_para_objeto(valor: Any) -> Any:
+    """Devolve colunas texto ArrowDtype como object (modo clássico do pipeline)."""
+    if isinstance(valor, dict):
+        return {k: _textos_para_objeto(v) for k, v in valor.items()}
+    if isinstance(valor, pd.DataFrame):
+        colunas = [
+            c
+            for c in valor.columns
+            if isinstance(valor[c].dtype, pd.ArrowDtype)
+            and pd.api.types.is_string_dtype(valor[c].dtype)
+        ]
+        if colunas:
+            valor = valor.astype({c: object for c in colunas})
+    return valor
+
+
+class AgendadorAuditoria:
+    """
+    Agenda os testes do ECDAuditor individualmente, do mais caro para o mais
+    barato (lista LPT), respeitando dependências entre testes: a prioridade
+    é o custo do caminho mais longo que parte de cada teste.
+
+    Os grupos fixos de antes escondiam que Benford e duplicidades dominam o
+    tempo: um grupo pesado terminava muito depois dos demais. Aqui cada
+    teste é uma tarefa; assim que um termina, o próximo pronto e mais caro
+    ocupa a vaga. Testes cuja estimativa passa de `limiar_processo` segundos
+    podem rodar num pool de processos (fora do GIL), lendo os insumos de
+    arquivos Arrow IPC mapeados em memória.
+    """
+
+    def __init__(
+        self,
+        auditor: "ECDAuditor",
+        modelo: Optional[ModeloCustoAuditoria] = None,
+        max_workers: int = 5,
+        usar_processos: bool = False,
+        max_processos: Optional[int] = None,
+        limiar_processo: float = 1.0,
+    ):
+        self.auditor = auditor
+        self.modelo = modelo or ModeloCustoAuditoria()
+        self.max_workers = max(1, max_workers)
+        self.usar_processos = usar_processos
+        self.max_processos = max_processos or max(1, (os.cpu_count() or 2) - 1)
+        self.limiar_processo = limiar_processo
+        # Duração medida de cada teste na última execução
+        self.duracoes: Dict[str, float] = {}
+
+    def volumes(self) -> Dict[str, int]:
+        """Linhas de cada insumo (chaves de ECDAuditor.TESTES)."""
+        ctx = self.auditor.contexto
+        return {
+            "diario": len(ctx.diario),
+            "saldos": len(ctx.balancete),
+            "plano": len(ctx.plano),
+        }
+
+    def estimativas(self, nomes: Iterable[str]) -> Dict[str, float]:
+        volumes = self.volumes()
+        return {
+            nome: self.modelo.estimar(
+                nome, self.modelo.volume(self.auditor.TESTES[nome][1], volumes)
+            )
+            for nome in nomes
+        }
+
+    def plano_execucao(self, nomes: Iterable[str]) -> List[Tuple[str, float]]:
+        """Ordem de despacho (sem concorrência): prontos, maior prioridade primeiro."""
+        pendentes = list(dict.fromkeys(nomes))
+        custos = self.estimativas(pendentes)
+        dependencias = self._dependencias(pendentes)
+        prioridades = self._prioridades(custos, dependencias)
+        ordem: List[Tuple[str, float]] = []
+        feitos: Set[str] = set()
+        while pendentes:
+            prontos = [n for n in pendentes if dependencias[n] <= feitos]
+            if not prontos:
+                raise ValueError(f"Dependência circular entre testes: {pendentes}")
+            escolhido = max(prontos, key=lambda n: prioridades[n])
+            ordem.append((escolhido, custos[escolhido]))
+            feitos.add(escolhido)
+            pendentes.remove(escolhido)
+        return ordem
+
+    @staticmethod
+    def _prioridades(
+        custos: Dict[str, float], dependencias: Dict[str, Set[str]]
+    ) -> Dict[str, float]:
+        """
+        Custo do caminho mais longo que parte de cada teste: o próprio custo
+        mais o do dependente mais caro. Sem dependências, é o próprio custo
+        (LPT puro); com elas, um teste barato que libera um caro sai antes.
+        """
+        dependentes: Dict[str, List[str]] = {n: [] for n in custos}
+        for nome, requisitos in dependencias.items():
+            for requisito in requisitos:
+                dependentes[requisito].append(nome)
+
+        prioridades: Dict[str, float] = {}
+
+        def _caminho(nome: str, visitando: Set[str]) -> float:
+            if nome in prioridades:
+                return prioridades[nome]
+            if nome in visitando:
+                raise ValueError(f"Dependência circular entre testes: {nome}")
+            visitando.add(nome)
+            seguinte = max(
+                (_caminho(d, visitando) for d in dependentes[nome]), default=0.0
+            )
+            visitando.discard(nome)
+            prioridades[nome] = custos[nome] + seguinte
+            return prioridades[nome]
+
+        for nome in custos:
+            _caminho(nome, set())
+        return prioridades
+
+    def _dependencias(self, nomes: List[str]) -> Dict[str, Set[str]]:
+        # Dependências fora da seleção não bloqueiam (ex.: reprocessamento parcial)
+        selecionados = set(nomes)
+        return {
+            nome: set(self.auditor.DEPENDENCIAS.get(nome, ())) & selecionados
+            for nome in nomes
+        }
+
+    def executar(self, nomes: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Executa os testes (todos, se omitido) e devolve auditor.resultados."""
+        pendentes = list(dict.fromkeys(nomes if nomes is not None else self.auditor.TESTES))
+        custos = self.estimativas(pendentes)
+        dependencias = self._dependencias(pendentes)
+        prioridades = self._prioridades(custos, dependencias)
+
+        pesados = {
+            n for n in pendentes if self.usar_processos and custos[n] >= self.limiar_processo
+        }
+        dir_ipc = self._exportar_insumos() if pesados else None
+        if dir_ipc is None:
+            pesados = set()
+
+        threads = ThreadPoolExecutor(max_workers=self.max_workers)
+        processos: Optional[Executor] = (
+            ProcessPoolExecutor(max_workers=min(self.max_processos, len(pesados)))
+            if pesados
+            else None
+        )
+        em_execucao: Dict[Future, str] = {}
+        feitos: Set[str] = set()
+        try:
+            while pendentes or em_execucao:
+                prontos = sorted(
+                    (n for n in pendentes if dependencias[n] <= feitos),
+                    key=lambda n: prioridades[n],
+                    reverse=True,
+                )
+                for nome in prontos:
+                    pendentes.remove(nome)
+                    if nome in pesados and processos is not None and dir_ipc is not None:
+                        futuro = processos.submit(
+                            _cronometrar,
+                            _executar_teste_isolado,
+                            nome,
+                            dir_ipc[1],
+                            self._modo_arrow(),
+                            self.auditor.limiares,
+                        )
+                    else:
+                        futuro = threads.submit(
+                            _cronometrar, self.auditor.executar_testes, [nome]
+                        )
+                    em_execucao[futuro] = nome
+
+                if not em_execucao:
+                    raise ValueError(f"Dependência circular entre testes: {pendentes}")
+
+                concluidos, _ = wait(list(em_execucao), return_when=FIRST_COMPLETED)
+                for futuro in concluidos:
+                    nome = em_execucao.pop(futuro)
+                    self._concluir(nome, futuro)
+                    feitos.add(nome)
+        finally:
+            threads.shutdown(wait=True)
+            if processos is not None:
+                processos.shutdown(wait=True)
+            if dir_ipc is not None:
+                shutil.rmtree(dir_ipc[0], ignore_errors=True)
+
+        self._registrar_volumes()
+        self._ordenar_resultados()
+        return self.auditor.resultados
+
+    # --- Auxiliares ---
+
+    def _concluir(self, nome: str, futuro: Future) -> None:
+        try:
+            retorno, duracao = futuro.result()
+        except Exception as exc:
+            logger.error(f"[Auditoria] Teste '{nome}' falhou: {exc}", exc_info=True)
+            return
+        if retorno is not self.auditor.resultados:
+            # Resultado vindo de outro processo: evidências voltam como
+            # predicado e são religadas ao Diário deste processo
+            self.auditor.vincular_evidencias(retorno)
+            self.auditor.resultados.update(retorno)
+
+        self.duracoes[nome] = duracao
+        telemetry = self.auditor.telemetry
+        if telemetry and self.auditor.current_ecd_id:
+            telemetry.record_metric(
+                self.auditor.current_ecd_id, ModeloCustoAuditoria.COMPONENTE, nome, duracao
+            )
+
+    def _registrar_volumes(self) -> None:
+        telemetry = self.auditor.telemetry
+        if telemetry and self.auditor.current_ecd_id:
+            for insumo, linhas in self.volumes().items():
+                telemetry.record_volume(self.auditor.current_ecd_id, insumo, linhas)
+
+    def _ordenar_resultados(self) -> None:
+        """Ordem estável no scorecard (a de TESTES), independente da conclusão."""
+        resultados = self.auditor.resultados
+        ordem = [n for n in self.auditor.TESTES if n in resultados]
+        ordem += [n for n in resultados if n not in self.auditor.TESTES]
+        self.auditor.resultados = {n: resultados[n] for n in ordem}
+
+    def _modo_arrow(self) -> bool:
+        diario = self.auditor.contexto.diario
+        return any(isinstance(dtype, pd.ArrowDtype) for dtype in diario.dtypes)
+
+    def _exportar_insumos(self) -> Optional[Tuple[str, Dict[str, str]]]:
+        """Grava os insumos em Arrow IPC (sem compressão) para os processos."""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            logger.warning("pyarrow indisponível: testes pesados seguem em threads.")
+            return None
+
+        auditor = self.auditor
+        quadros = {
+            "diario": auditor.df_diario,
+            "balancete": auditor.df_balancete,
+            "plano": auditor.df_plano,
+        }
+        opcionais = {
+            "naturezas": auditor.df_naturezas,
+            "mapeamento": auditor.df_mapeamento,
+            **{atributo: getattr(auditor, atributo) for atributo in HISTORICOS_AUDITOR},
+        }
+        quadros.update({chave: df for chave, df in opcionais.items() if df is not None})
+
+        diretorio = tempfile.mkdtemp(prefix="auditoria_ipc_")
+        caminhos: Dict[str, str] = {}
+        try:
+            for chave, df in quadros.items():
+                caminho = os.path.join(diretorio, f"{chave}.arrow")
+                tabela = pa.Table.from_pandas(df, preserve_index=False)
+                with pa.OSFile(caminho, "wb") as destino:
+                    with pa.ipc.new_file(destino, tabela.schema) as escritor:
+                        escritor.write_table(tabela)
+                caminhos[chave] = caminho
+        except Exception as e:
+            logger.warning(f"Insumos não exportados para Arrow ({e}): testes seguem em threads.")
+            shutil.rmtree(diretorio, ignore_errors=True)
+            return None
+        return diretorio, caminhos
@@ -0,0 +1,336 @@
+import math
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.special import chdtri, ndtri
+
+# Logger local para uso interno do módulo (não configura nível globalmente)
+logger = logging.getLogger(__name__)
+
+
+def unidades_conta_dia(
+    df_diario: pd.DataFrame, datas: pd.Series
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Unidades amostrais do Diário: conta × dia (COD_CTA, DT_LCTO).
+
+    Duplicidades exatas (mesma conta, data e valor) caem sempre na mesma
+    unidade, e a chave conta × mês da evidência do 1.1 é uma união delas.
+
+    Returns:
+        (unidade de cada linha, valor contábil da unidade = soma de |VL_SINAL|)
+    """
+    codigo_conta, _ = pd.factorize(df_diario["COD_CTA"], sort=False)
+    codigo_dia, _ = pd.factorize(datas, sort=False)
+    chave = codigo_conta.astype(np.int64) * (int(codigo_dia.max(initial=0)) + 2) + (
+        codigo_dia + 1
+    )
+    unidade, _ = pd.factorize(chave, sort=False)
+    valor = np.abs(df_diario["VL_SINAL"].to_numpy(dtype="float64", na_value=0.0))
+    valor_unidade = np.bincount(unidade, weights=valor, minlength=unidade.max(initial=-1) + 1)
+    return unidade, valor_unidade
+
+
+@dataclass
+class AmostraAuditoria:
+    """Unidades selecionadas e o que é preciso para projetar a distorção."""
+
+    metodo: str
+    unidades: np.ndarray  # Índices das unidades selecionadas (ordem crescente)
+    valores: np.ndarray  # Valor contábil de cada unidade selecionada
+    unidades_populacao: int
+    valor_populacao: float
+    intervalo: float = 0.0  # MUS: intervalo amostral (J)
+    estrato: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    tamanho_estrato: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self.unidades)
+
+
+class AmostragemAuditoria(ABC):
+    """
+    Base dos planos de amostragem do ECDAuditor: confiança, erro tolerável
+    e teto de unidades examinadas (o que limita o tempo dos testes, seja
+    qual for o tamanho do Diário).
+    """
+
+    METODO = ""
+
+    def __init__(
+        self,
+        confianca: float = 0.95,
+        erro_toleravel: Optional[float] = None,
+        erro_toleravel_rel: float = 0.01,
+        tamanho_maximo: int = 2000,
+        semente: int = 0,
+    ):
+        """
+        Args:
+            confianca: Nível de confiança dos limites (ex: 0.95).
+            erro_toleravel: Distorção tolerável em R$. Se omitida, vale
+                `erro_toleravel_rel` × valor contábil da população.
+            erro_toleravel_rel: Distorção tolerável relativa (padrão 1%).
+            tamanho_maximo: Máximo de unidades na amostra.
+            semente: Semente do sorteio (amostra reprodutível).
+        """
+        if not 0 < confianca < 1:
+            raise ValueError(f"Confiança deve estar entre 0 e 1: {confianca}")
+        self.confianca = confianca
+        self.erro_toleravel = erro_toleravel
+        self.erro_toleravel_rel = erro_toleravel_rel
+        self.tamanho_maximo = tamanho_maximo
+        self.semente = semente
+
+    def toleravel(self, valor_populacao: float) -> float:
+        if self.erro_toleravel is not None:
+            return float(self.erro_toleravel)
+        return float(self.erro_toleravel_rel * valor_populacao)
+
+    @abstractmethod
+    def selecionar(self, valores: np.ndarray) -> AmostraAuditoria:
+        """Sorteia as unidades da amostra a partir do valor de cada unidade."""
+
+    @abstractmethod
+    def projetar(self, amostra: AmostraAuditoria, distorcoes: np.ndarray) -> Dict[str, Any]:
+        """Projeta para a população as distorções medidas nas unidades da amostra."""
+
+    def _resumo(
+        self,
+        amostra: AmostraAuditoria,
+        distorcoes: np.ndarray,
+        projetada: float,
+        inferior: float,
+        superior: float,
+    ) -> Dict[str, Any]:
+        toleravel = self.toleravel(amostra.valor_populacao)
+        return {
+            "metodo": self.METODO,
+            "confianca": self.confianca,
+            "unidades_populacao": amostra.unidades_populacao,
+            "unidades_amostra": len(amostra),
+            "valor_populacao": amostra.valor_populacao,
+            "valor_amostra": float(amostra.valores.sum()),
+            "erro_toleravel": toleravel,
+            "distorcoes_amostra": int(np.count_nonzero(distorcoes)),
+            "distorcao_observada": float(distorcoes.sum()),
+            "distorcao_projetada": float(projetada),
+            "limite_inferior": float(inferior),
+            "limite_superior": float(superior),
+            "conclusao": "ACEITAVEL" if superior <= toleravel else "NAO_ACEITAVEL",
+        }
+
+
+class AmostragemMonetaria(AmostragemAuditoria):
+    """
+    Amostragem por unidade monetária (MUS/PPS): cada real do Diário tem a
+    mesma chance de ser sorteado, então unidades de valor alto entram com
+    probabilidade proporcional ao valor, e as de valor >= intervalo entram
+    sempre (estrato superior, examinado por inteiro).
+
+    Seleção sistemática com início aleatório, vetorizada (soma acumulada +
+    searchsorted). Tamanho para zero erro esperado: n = V × F(0) / TM, com
+    F(k) o limite superior de Poisson para k erros na confiança pedida.
+    Projeção e limite superior pelo método de Stringer (ver `projetar`).
+    """
+
+    METODO = "MUS"
+
+    def fator_poisson(self, erros: int) -> float:
+        """Limite superior da média de Poisson com `erros` ocorrências."""
+        return float(chdtri(2 * (erros + 1), 1 - self.confianca) / 2)
+
+    def tamanho(self, valor_populacao: float) -> int:
+        toleravel = self.toleravel(valor_populacao)
+        if valor_populacao <= 0:
+            return 0
+        if toleravel <= 0:
+            return self.tamanho_maximo
+        n = math.ceil(valor_populacao * self.fator_poisson(0) / toleravel)
+        return int(min(max(n, 1), self.tamanho_maximo))
+
+    def selecionar(self, valores: np.ndarray) -> AmostraAuditoria:
+        valores = np.asarray(valores, dtype="float64")
+        total = float(valores.sum())
+        n = self.tamanho(total)
+        if n == 0:
+            return AmostraAuditoria(
+                self.METODO, np.zeros(0, dtype=np.int64), np.zeros(0), len(valores), total
+            )
+        intervalo = total / n
+        inicio = np.random.default_rng(self.semente).uniform(0, intervalo)
+        pontos = inicio + intervalo * np.arange(n)
+        acumulado = np.cumsum(valores)
+        unidades = np.unique(np.searchsorted(acumulado, pontos, side="right"))
+        unidades = unidades[unidades < len(valores)]
+        return AmostraAuditoria(
+            self.METODO, unidades, valores[unidades], len(valores), total, intervalo=intervalo
+        )
+
+    def projetar(self, amostra: AmostraAuditoria, distorcoes: np.ndarray) -> Dict[str, Any]:
+        """
+        Distorção projetada e limite superior (Stringer).
+
+        - Estrato superior (valor >= J): a distorção é conhecida e somada
+          como está (também é o limite inferior: distorção certa).
+        - Demais: contaminação t = distorção / valor (até 1), projetada como
+          t × J; limite superior = J × F(0) (precisão básica) + Σ t(k) × J ×
+          [F(k) − F(k−1)], com as contaminações em ordem decrescente.
+        """
+        distorcoes = np.minimum(np.abs(np.asarray(distorcoes, dtype="float64")), amostra.valores)
+        j = amostra.intervalo
+        if len(amostra) == 0 or j <= 0:
+            return self._resumo(amostra, distorcoes, 0.0, 0.0, 0.0)
+        superior_estrato = amostra.valores >= j
+        conhecida = float(distorcoes[superior_estrato].sum())
+
+        base = amostra.valores[~superior_estrato]
+        contaminacao = np.divide(
+            distorcoes[~superior_estrato], base, out=np.zeros(len(base)), where=base > 0
+        )
+        contaminacao = np.sort(contaminacao[contaminacao > 0])[::-1]
+        projetada = conhecida + j * float(contaminacao.sum())
+
+        fatores = np.array([self.fator_poisson(k) for k in range(len(contaminacao) + 1)])
+        limite = conhecida + j * fatores[0] + j * float(
+            (contaminacao * np.diff(fatores)).sum()
+        )
+        return self._resumo(amostra, distorcoes, projetada, conhecida, limite)
+
+
+class AmostragemEstratificada(AmostragemAuditoria):
+    """
+    Amostragem aleatória estratificada por valor: as unidades com valor são
+    divididas em `estratos` faixas de mesmo valor total, a amostra é
+    repartida por Neyman (n_h ∝ N_h × S_h) e sorteada sem reposição em cada
+    faixa. A distorção total é estimada pela média por unidade de cada
+    estrato, com limites normais na confiança pedida.
+
+    Ao contrário do MUS, preserva a distribuição de valores dentro de cada
+    faixa (útil para Benford na amostra). Com distorções raras e muito
+    concentradas, a aproximação normal subestima o limite superior: para
+    concluir sobre o erro tolerável, prefira o MUS.
+    """
+
+    METODO = "ESTRATIFICADA"
+
+    def __init__(
+        self, *args: Any, estratos: int = 5, minimo_estrato: int = 30, **kwargs: Any
+    ):
+        """
+        Args:
+            estratos: Número de faixas de valor.
+            minimo_estrato: Unidades mínimas por faixa (a aproximação normal
+                dos limites precisa de algumas dezenas de observações).
+        """
+        super().__init__(*args, **kwargs)
+        self.estratos = estratos
+        self.minimo_estrato = minimo_estrato
+
+    def _z(self) -> float:
+        return float(ndtri((1 + self.confianca) / 2))
+
+    def _estratificar(self, valores: np.ndarray) -> np.ndarray:
+        """Estrato de cada unidade (-1 = sem valor, fora da população)."""
+        estrato = np.full(len(valores), -1, dtype=np.int64)
+        com_valor = np.flatnonzero(valores > 0)
+        if len(com_valor) == 0:
+            return estrato
+        ordem = com_valor[np.argsort(valores[com_valor], kind="stable")]
+        acumulado = np.cumsum(valores[ordem])
+        faixa = np.minimum(
+            (acumulado / acumulado[-1] * self.estratos).astype(np.int64), self.estratos - 1
+        )
+        estrato[ordem] = faixa
+        return estrato
+
+    def selecionar(self, valores: np.ndarray) -> AmostraAuditoria:
+        valores = np.asarray(valores, dtype="float64")
+        total = float(valores.sum())
+        estrato = self._estratificar(valores)
+        faixas = [np.flatnonzero(estrato == h) for h in range(self.estratos)]
+        tamanho_estrato = np.array([len(f) for f in faixas], dtype=np.int64)
+        desvio = np.array([valores[f].std() if len(f) > 1 else 0.0 for f in faixas])
+
+        # Tamanho para estimar o total com precisão TM (alocação de Neyman)
+        z = self._z()
+        toleravel = self.toleravel(total)
+        peso = tamanho_estrato * desvio
+        if toleravel > 0 and peso.sum() > 0:
+            n = math.ceil(
+                (z * peso.sum()) ** 2
+                / (toleravel**2 + z**2 * float((tamanho_estrato * desvio**2).sum()))
+            )
+        else:
+            n = self.tamanho_maximo
+        minimo = np.minimum(self.minimo_estrato, tamanho_estrato)
+        n = int(min(max(n, int(minimo.sum())), self.tamanho_maximo))
+
+        if peso.sum() > 0:
+            alocacao = np.floor(n * peso / peso.sum()).astype(np.int64)
+        else:
+            alocacao = np.floor(n * tamanho_estrato / max(tamanho_estrato.sum(), 1)).astype(np.int64)
+        alocacao = np.minimum(np.maximum(alocacao, minimo), tamanho_estrato)
+
+        rng = np.random.default_rng(self.semente)
+        partes = [
+            np.sort(rng.choice(f, size=int(a), replace=False))
+            for f, a in zip(faixas, alocacao)
+            if a > 0
+        ]
+        # Unidades em ordem crescente (como no MUS), para busca binária
+        unidades = np.sort(np.concatenate(partes)) if partes else np.zeros(0, dtype=np.int64)
+        return AmostraAuditoria(
+            self.METODO,
+            unidades,
+            valores[unidades],
+            len(valores),
+            total,
+            estrato=estrato[unidades],
+            tamanho_estrato=tamanho_estrato,
+        )
+
+    def projetar(self, amostra: AmostraAuditoria, distorcoes: np.ndarray) -> Dict[str, Any]:
+        """Total estimado Σ N_h × média_h, com erro padrão estratificado."""
+        distorcoes = np.abs(np.asarray(distorcoes, dtype="float64"))
+        projetada = 0.0
+        variancia = 0.0
+        for h, populacao in enumerate(amostra.tamanho_estrato):
+            observadas = distorcoes[amostra.estrato == h]
+            n_h = len(observadas)
+            if n_h == 0:
+                continue
+            projetada += populacao * observadas.mean()
+            if n_h > 1:
+                variancia += (
+                    populacao**2 * (1 - n_h / populacao) * observadas.var(ddof=1) / n_h
+                )
+        margem = self._z() * math.sqrt(variancia)
+        observada = float(distorcoes.sum())
+        return self._resumo(
+            amostra,
+            distorcoes,
+            projetada,
+            max(projetada - margem, observada),
+            max(projetada + margem, observada),
+        )
+
+
+METODOS_AMOSTRAGEM = {
+    "mus": AmostragemMonetaria,
+    "estratificada": AmostragemEstratificada,
+}
+
+
+def criar_amostragem(metodo: str, **parametros: Any) -> AmostragemAuditoria:
+    """Plano de amostragem pelo nome ("mus" ou "estratificada")."""
+    chave = str(metodo).strip().lower()
+    if chave not in METODOS_AMOSTRAGEM:
+        raise ValueError(
+            f"Método de amostragem inválido: {metodo} (use {', '.join(METODOS_AMOSTRAGEM)})"
+        )
+    return METODOS_AMOSTRAGEM[chave](**parametros)
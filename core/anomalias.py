@@ -0,0 +1,287 @@
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.tensor_balancete import TensorBalancete
+
+# Logger local para uso interno do módulo (não configura nível globalmente)
+logger = logging.getLogger(__name__)
+
+# Escore z modificado (Iglewicz & Hoaglin): 0,6745 × (x − centro) / MAD.
+# Com MAD nulo (mais da metade dos meses iguais), usa o desvio absoluto
+# médio: (x − centro) / (1,253314 × média |x − centro|).
+FATOR_MAD = 0.6745
+FATOR_MEDIO = 1.253314
+
+
+def mediana_linhas(matriz: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mediana de cada linha ignorando NaN (uma ordenação por linha, sem o
+    laço interno do np.nanmedian).
+
+    Returns:
+        (mediana de cada linha ou NaN se vazia, quantidade de valores)
+    """
+    validos = ~np.isnan(matriz)
+    quantidade = validos.sum(axis=1)
+    ordenada = np.sort(np.where(validos, matriz, np.inf), axis=1)
+    mediana = np.full(len(matriz), np.nan)
+    cheias = np.flatnonzero(quantidade)
+    q = quantidade[cheias]
+    mediana[cheias] = (ordenada[cheias, (q - 1) // 2] + ordenada[cheias, q // 2]) / 2
+    return mediana, quantidade
+
+
+def escore_robusto(valores: np.ndarray, grupo: np.ndarray) -> np.ndarray:
+    """
+    Escore z robusto de cada valor em relação ao seu grupo (códigos 0..n−1,
+    ex: pd.factorize).
+
+    Grupos pequenos e numerosos (contas irmãs × mês) viram uma matriz
+    grupo × posição completada com NaN, e a mediana sai de `mediana_linhas`;
+    com um grupo muito maior que os demais, a matriz seria quase toda vazia
+    e a mediana sai de uma ordenação global por (grupo, valor).
+
+    Returns:
+        Escore de cada valor (0 em grupos sem dispersão alguma).
+    """
+    valores = np.asarray(valores, dtype="float64")
+    escore = np.zeros(len(valores))
+    if len(valores) == 0:
+        return escore
+    contagem = np.bincount(grupo)
+    inicio = np.cumsum(contagem) - contagem
+    ordem = np.argsort(grupo, kind="stable")
+    largura = int(contagem.max())
+
+    if len(contagem) * largura <= 4 * len(valores):
+        posicao = np.empty(len(valores), dtype=np.int64)
+        posicao[ordem] = np.arange(len(valores)) - inicio[grupo[ordem]]
+
+        def _mediana(x: np.ndarray) -> np.ndarray:
+            matriz = np.full((len(contagem), largura), np.nan)
+            matriz[grupo, posicao] = x
+            return mediana_linhas(matriz)[0]
+
+    else:
+
+        def _mediana(x: np.ndarray) -> np.ndarray:
+            por_valor = np.argsort(x, kind="stable")
+            ordenados = x[por_valor[np.argsort(grupo[por_valor], kind="stable")]]
+            return (
+                ordenados[inicio + (contagem - 1) // 2] + ordenados[inicio + contagem // 2]
+            ) / 2
+
+    desvio = valores - _mediana(valores)[grupo]
+    absoluto = np.abs(desvio)
+    mad = _mediana(absoluto)[grupo]
+    medio = (np.bincount(grupo, weights=absoluto) / contagem)[grupo]
+
+    com_mad = mad > 0
+    escore[com_mad] = FATOR_MAD * desvio[com_mad] / mad[com_mad]
+    so_medio = ~com_mad & (medio > 0)
+    escore[so_medio] = desvio[so_medio] / (FATOR_MEDIO * medio[so_medio])
+    return escore
+
+
+class EscoreAnomalias:
+    """
+    Pontua cada conta analítica × mês pelo quanto o movimento do mês
+    (VL_DEB − VL_CRED) foge do padrão, em vez de limites fixos em reais.
+
+    - Histórico da própria conta: escore z robusto (mediana/MAD) sobre os
+      meses do ECD e, se houver, dos anos anteriores do mesmo CNPJ. Com ao
+      menos `minimo_anos_sazonal` anos anteriores, o esperado de cada mês é
+      a mediana do mesmo mês nesses anos (sazonalidade: 13º, balanço,
+      safra) e a escala é o MAD dos desvios em torno desse esperado.
+    - Pares: o escore da conta é comparado com o das contas irmãs (mesma
+      COD_CTA_SUP) no mesmo mês. Um choque comum ao grupo (ex: dissídio em
+      todas as contas de salário) não conta como anomalia da conta.
+
+    O escore final é o menor dos dois (em módulo) quando o grupo de pares
+    tem ao menos `minimo_pares` contas; senão, vale o da própria conta.
+
+    Tudo é feito sobre o TensorBalancete (conta × mês): a mediana e o MAD
+    são ordenações por linha de matrizes (conta × meses; conta superior ×
+    mês × irmãs), sem groupby. Dezenas de milhares de contas × 12 meses
+    levam milissegundos.
+    """
+
+    def __init__(
+        self,
+        limiar: float = 3.5,
+        minimo_historico: int = 6,
+        minimo_pares: int = 5,
+        minimo_anos_sazonal: int = 2,
+        valor_minimo: float = 1000.0,
+    ):
+        """
+        Args:
+            limiar: Escore a partir do qual o mês é anômalo (3,5 é o corte
+                usual do z modificado).
+            minimo_historico: Meses mínimos da conta para pontuá-la.
+            minimo_pares: Contas mínimas sob a mesma COD_CTA_SUP no mês para
+                usar a comparação com os pares.
+            minimo_anos_sazonal: Anos anteriores mínimos para usar o esperado
+                sazonal (mesmo mês) em vez da mediana da conta.
+            valor_minimo: Desvio mínimo em reais (|movimento − esperado|)
+                para apontar o mês: escore alto em conta irrisória é ruído.
+        """
+        self.limiar = limiar
+        self.minimo_historico = minimo_historico
+        self.minimo_pares = minimo_pares
+        self.minimo_anos_sazonal = minimo_anos_sazonal
+        self.valor_minimo = valor_minimo
+
+    @staticmethod
+    def _datas(coluna: pd.Series) -> pd.DatetimeIndex:
+        # Poucas datas distintas (meses): converte cada uma só uma vez
+        codigos, unicos = pd.factorize(coluna, sort=False)
+        convertidas = pd.to_datetime(pd.Series(unicos), errors="coerce").to_numpy()
+        return pd.DatetimeIndex(convertidas[codigos])
+
+    # Colunas do histórico (03_Balancetes_Mensais de anos anteriores)
+    COLUNAS_HISTORICO = ["CNPJ", "COD_CTA", "DT_FIN", "VL_DEB", "VL_CRED"]
+
+    def _historico(
+        self, tensor: TensorBalancete, historico: pd.DataFrame, inicio: pd.Timestamp
+    ) -> np.ndarray:
+        """
+        Movimentos dos anos anteriores alinhados às contas do tensor:
+        array conta × ano × mês do calendário (NaN onde não há saldo).
+        """
+        colunas = {"COD_CTA", "DT_FIN", "VL_DEB", "VL_CRED"}
+        vazio = np.full((len(tensor.contas), 0, 12), np.nan)
+        if not colunas.issubset(historico.columns):
+            return vazio
+
+        mantidas = np.ones(len(historico), dtype=bool)
+        cnpj_atual = tensor.df_balancete.get("CNPJ")
+        if "CNPJ" in historico.columns and cnpj_atual is not None:
+            mantidas &= historico["CNPJ"].isin(cnpj_atual.unique()).to_numpy()
+        conta = pd.Index(tensor.contas).get_indexer(historico["COD_CTA"])
+        datas = self._datas(historico["DT_FIN"])
+        mantidas &= (conta >= 0) & (datas < inicio)
+        if not mantidas.any():
+            return vazio
+
+        datas = datas[mantidas]
+        ano, _ = pd.factorize(datas.year, sort=True)
+        movimento = pd.to_numeric(historico["VL_DEB"], errors="coerce").fillna(0.0).to_numpy(
+            dtype="float64"
+        ) - pd.to_numeric(historico["VL_CRED"], errors="coerce").fillna(0.0).to_numpy(
+            dtype="float64"
+        )
+        matriz = np.full((len(tensor.contas), ano.max() + 1, 12), np.nan)
+        matriz[conta[mantidas], ano, datas.month - 1] = movimento[mantidas]
+        return matriz
+
+    def pontuar(
+        self, tensor: TensorBalancete, historico: Optional[pd.DataFrame] = None
+    ) -> pd.DataFrame:
+        """
+        Escores de cada conta analítica × mês do balancete.
+
+        Args:
+            tensor: Balancete mensal do ECD em forma densa.
+            historico: Balancetes mensais de anos anteriores, no formato do
+                03_Balancetes_Mensais (ex: o consolidado da carteira). Só
+                entram os meses anteriores ao ECD e, havendo a coluna CNPJ,
+                do mesmo CNPJ.
+
+        Returns:
+            Uma linha por conta analítica × mês presente, com MOVIMENTO,
+            ESPERADO, Z_PROPRIO, Z_PARES, ESCORE, BASE ("SAZONAL"/"CONTA")
+            e ANOMALA. LINHA é a posição (iloc) no balancete.
+        """
+        if tensor.vazio:
+            return pd.DataFrame()
+
+        valores = tensor.valores
+        movimento = np.where(
+            tensor.presente, valores[:, :, tensor.DEB] - valores[:, :, tensor.CRED], np.nan
+        )
+        datas = self._datas(pd.Series(tensor.meses))
+        mes = datas.month.to_numpy() - 1
+
+        anterior = (
+            self._historico(tensor, historico, datas.min())
+            if historico is not None and not historico.empty
+            else np.full((len(tensor.contas), 0, 12), np.nan)
+        )
+
+        # Esperado: mediana do mesmo mês nos anos anteriores, se houver anos
+        # suficientes; senão, mediana de todos os meses da conta
+        n_contas = len(tensor.contas)
+        todos = np.concatenate([movimento, anterior.reshape(n_contas, -1)], axis=1)
+        mediana_conta, meses_conta = mediana_linhas(todos)
+        mediana_mes, anos = mediana_linhas(
+            anterior.transpose(0, 2, 1).reshape(n_contas * 12, -1)
+        )
+        sazonal = (anos >= self.minimo_anos_sazonal).reshape(n_contas, 12)
+        esperado_mes = np.where(
+            sazonal, mediana_mes.reshape(n_contas, 12), mediana_conta[:, None]
+        )
+
+        # Escala: MAD dos desvios em torno do esperado (ECD + anos anteriores)
+        esperado = esperado_mes[:, mes]
+        desvio = movimento - esperado
+        absoluto = np.abs(
+            np.concatenate(
+                [desvio, (anterior - esperado_mes[:, None, :]).reshape(n_contas, -1)],
+                axis=1,
+            )
+        )
+        mad, _ = mediana_linhas(absoluto)
+        medio = np.nansum(absoluto, axis=1) / np.maximum(meses_conta, 1)
+
+        z_proprio = np.zeros(movimento.shape)
+        com_mad = mad > 0
+        z_proprio[com_mad] = FATOR_MAD * desvio[com_mad] / mad[com_mad, None]
+        so_medio = ~com_mad & (medio > 0)
+        z_proprio[so_medio] = desvio[so_medio] / (FATOR_MEDIO * medio[so_medio, None])
+        z_proprio[~tensor.presente | (meses_conta < self.minimo_historico)[:, None]] = np.nan
+
+        # Só contas analíticas com escore; pares = irmãs da mesma conta superior
+        conta, periodo = np.nonzero(tensor.analitica[:, None] & ~np.isnan(z_proprio))
+        z = z_proprio[conta, periodo]
+
+        z_pares = np.full(len(z), np.nan)
+        superior, nomes = pd.factorize(tensor.superior[conta])
+        sem_superior = np.flatnonzero(pd.Index(nomes).astype(str).str.strip() == "")
+        com_superior = (superior >= 0) & ~np.isin(superior, sem_superior)
+        if com_superior.any():
+            grupo, _ = pd.factorize(
+                superior[com_superior].astype(np.int64) * len(tensor.meses)
+                + periodo[com_superior]
+            )
+            pares = escore_robusto(z[com_superior], grupo)
+            pares[np.bincount(grupo)[grupo] < self.minimo_pares] = np.nan
+            z_pares[com_superior] = pares
+
+        escore = np.abs(z)
+        com_pares = ~np.isnan(z_pares)
+        escore[com_pares] = np.minimum(escore[com_pares], np.abs(z_pares[com_pares]))
+        movimento = movimento[conta, periodo]
+        esperado = esperado[conta, periodo]
+        return pd.DataFrame(
+            {
+                "LINHA": tensor.linha[conta, periodo],
+                "COD_CTA": tensor.contas[conta],
+                "CONTA": tensor.nome[conta],
+                "COD_CTA_SUP": tensor.superior[conta],
+                "DT_FIN": tensor.meses[periodo],
+                "VL_DEB": valores[conta, periodo, tensor.DEB],
+                "VL_CRED": valores[conta, periodo, tensor.CRED],
+                "MOVIMENTO": movimento,
+                "ESPERADO": esperado,
+                "Z_PROPRIO": z,
+                "Z_PARES": z_pares,
+                "ESCORE": escore,
+                "BASE": np.where(sazonal[conta, mes[periodo]], "SAZONAL", "CONTA"),
+                "ANOMALA": (escore > self.limiar)
+                & (np.abs(movimento - esperado) >= self.valor_minimo),
+            }
+        )
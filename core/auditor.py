@@ -1,8 +1,33 @@
+import numpy as np
 import pandas as pd
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Callable, Dict, Any, Optional, cast
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, cast
 from core.telemetry import monitor_task, TelemetryCollector
+from core.tensor_balancete import TensorBalancete
+from core.contexto_auditoria import ContextoAuditoria
+from core.agendador_auditoria import AgendadorAuditoria, ModeloCustoAuditoria
+from core.regras_auditoria import MotorRegras, mascara_termos
+from core.benford import AnaliseBenford
+from core.cache_auditoria import CacheResultadosAuditoria, impressao_dataframe
+from core.registro_testes import DefinicaoTeste, RegistroTestes
+from core.evidencia import EvidenciaAuditoria
+from core.amostragem import AmostragemAuditoria, unidades_conta_dia
+from core.anomalias import EscoreAnomalias
+from core.lancamentos_atipicos import (
+    ParesIncomuns,
+    centavos,
+    dias,
+    mascara_abaixo_alcada,
+    mascara_feriado,
+    mascara_fim_de_semana,
+    mascara_historico_curto,
+    mascara_valor_redondo,
+)
+from core.duplicidades import (
+    DetectorQuaseDuplicidades,
+    hash_linhas,
+    tamanho_grupo,
+)
 # Auditoria Forense Digital
 
 
@@ -15,6 +40,198 @@ class ECDAuditor:
     Realiza baterias de testes de integridade, continuidade e conformidade.
     """
 
+    # Registro dos testes: ID, método, insumos, classe de custo e limiares.
+    # Os insumos dizem o que obriga a refazer o teste e o que precisa existir
+    # para executá-lo: "diario" (I200/I250), "saldos" (I150/I155) e "plano"
+    # (I050/I051). O custo permite rodar só os baratos na triagem de entrada
+    # e deixar os caros para o lote noturno (ver RegistroTestes.selecionar).
+    REGISTRO = RegistroTestes(
+        [
+            DefinicaoTeste(
+                "1.1_Cruzamento_Diario_Balancete",
+                "_teste_cruzamento_diario_balancete",
+                ("diario", "saldos", "plano"),
+                custo="medio",
+                limiares={"tolerancia": 0.01},
+            ),
+            DefinicaoTeste(
+                "1.2_Validacao_Hierarquia",
+                "_teste_validacao_hierarquia",
+                ("saldos", "plano"),
+                limiares={"tolerancia": 0.01},
+            ),
+            DefinicaoTeste(
+                "3.1_Consistencia_Natureza", "_teste_consistencia_natureza", ("plano",)
+            ),
+            DefinicaoTeste("3.2_Contas_Orfas", "_teste_contas_orfas", ("saldos", "plano")),
+            DefinicaoTeste(
+                "4.1_Lei_Benford",
+                "_teste_lei_benford",
+                ("diario",),
+                custo="caro",
+                limiares={
+                    "amostra_minima": 100,
+                    "mad_alerta": AnaliseBenford.TESTES["PRIMEIRO"][3][0],
+                    "mad_reprovado": AnaliseBenford.TESTES["PRIMEIRO"][3][1],
+                    "desvio_suspeito": 0.01,
+                },
+                modulos=("core.benford",),
+                amostravel=True,
+            ),
+            DefinicaoTeste(
+                "4.2_Duplicidades",
+                "_teste_duplicidades",
+                ("diario", "plano"),
+                custo="medio",
+                limiares={"valor_ruido": 100.0, "lote_minimo": 5},
+                modulos=("core.duplicidades",),
+                parametros=("TERMOS_RUIDO", "_mascara_ruido"),
+                amostravel=True,
+            ),
+            DefinicaoTeste(
+                "4.3_Omissao_Encerramento",
+                "_teste_omissao_encerramento",
+                ("diario", "saldos", "plano"),
+                custo="medio",
+                limiares={"tolerancia": 0.01},
+                modulos=("core.tensor_balancete",),
+            ),
+            DefinicaoTeste(
+                "4.4_Quase_Duplicidades",
+                "_teste_quase_duplicidades",
+                ("diario", "plano"),
+                custo="caro",
+                limiares={"valor_ruido": 100.0},
+                modulos=("core.duplicidades",),
+                parametros=("TERMOS_RUIDO", "_mascara_ruido", "PARAMETROS_QUASE_DUPLICIDADE"),
+            ),
+            DefinicaoTeste(
+                "5.1_Inversao_Natureza",
+                "_teste_inversao_natureza",
+                ("saldos", "plano"),
+                modulos=("core.tensor_balancete",),
+            ),
+            DefinicaoTeste(
+                "5.2_Estouro_Caixa",
+                "_teste_estouro_caixa",
+                ("saldos", "plano"),
+                modulos=("core.tensor_balancete",),
+                parametros=("TERMOS_DISPONIBILIDADE",),
+            ),
+            DefinicaoTeste(
+                "5.3_Passivo_Ficticio",
+                "_teste_passivo_ficticio",
+                ("saldos", "plano"),
+                modulos=("core.tensor_balancete",),
+                limiares={"saldo_minimo": 1000.0},
+            ),
+            DefinicaoTeste(
+                "5.4_Consistencia_PL_Resultado",
+                "_teste_consistencia_pl_resultado",
+                ("diario", "saldos", "plano"),
+                custo="medio",
+                limiares={"tolerancia": 100.0},
+            ),
+            DefinicaoTeste(
+                "6.1_Anomalias_Movimento",
+                "_teste_anomalias_movimento",
+                ("saldos", "plano"),
+                limiares={
+                    "limiar": 3.5,
+                    "minimo_historico": 6,
+                    "minimo_pares": 5,
+                    "minimo_anos_sazonal": 2,
+                    "valor_minimo": 1000.0,
+                },
+                modulos=("core.anomalias", "core.tensor_balancete"),
+                parametros=("impressao_historico",),
+            ),
+            DefinicaoTeste(
+                "7.1_Fim_De_Semana_Feriado",
+                "_teste_fim_de_semana_feriado",
+                ("diario",),
+                custo="medio",
+                # Feriados locais: "MM-DD" (todo ano) ou "AAAA-MM-DD"
+                limiares={"feriados_extras": ()},
+                modulos=("core.lancamentos_atipicos",),
+                parametros=("_resultado_lancamentos",),
+            ),
+            DefinicaoTeste(
+                "7.2_Lancamento_Apos_Encerramento",
+                "_teste_lancamento_apos_encerramento",
+                ("diario", "saldos"),
+                custo="medio",
+                parametros=("_resultado_lancamentos",),
+            ),
+            DefinicaoTeste(
+                "7.3_Valores_Redondos",
+                "_teste_valores_redondos",
+                ("diario",),
+                custo="medio",
+                limiares={"multiplo": 1000.0, "valor_minimo": 10000.0},
+                modulos=("core.lancamentos_atipicos",),
+                parametros=("_resultado_lancamentos",),
+            ),
+            DefinicaoTeste(
+                "7.4_Abaixo_Alcada",
+                "_teste_abaixo_alcada",
+                ("diario",),
+                custo="medio",
+                limiares={
+                    "alcadas": (5000.0, 10000.0, 50000.0, 100000.0, 500000.0, 1000000.0),
+                    "faixa": 0.05,
+                },
+                modulos=("core.lancamentos_atipicos",),
+                parametros=("_resultado_lancamentos",),
+            ),
+            DefinicaoTeste(
+                "7.5_Pares_Incomuns",
+                "_teste_pares_incomuns",
+                ("diario",),
+                custo="medio",
+                limiares={"percentil": 1.0, "valor_minimo": 1000.0},
+                modulos=("core.lancamentos_atipicos", "core.contrapartidas"),
+                parametros=("impressao_fluxos", "_resultado_lancamentos"),
+            ),
+            DefinicaoTeste(
+                "7.6_Historico_Vazio",
+                "_teste_historico_vazio",
+                ("diario",),
+                custo="medio",
+                limiares={"minimo_caracteres": 5},
+                modulos=("core.lancamentos_atipicos",),
+                parametros=("_resultado_lancamentos",),
+            ),
+            DefinicaoTeste(
+                "7.7_Lancamento_Extemporaneo",
+                "_teste_lancamento_extemporaneo",
+                ("diario",),
+                custo="medio",
+                parametros=("_resultado_lancamentos",),
+            ),
+        ]
+    )
+
+    # Teste -> (método, insumos): visão do registro usada pelo agendador,
+    # pelo cache e pelo reprocessamento de retificadoras
+    TESTES: Dict[str, Tuple[str, Tuple[str, ...]]] = REGISTRO.tabela()
+
+    # Teste -> testes que precisam terminar antes dele (agendador respeita a ordem)
+    DEPENDENCIAS: Dict[str, Tuple[str, ...]] = {}
+
+    # Testes que exigem o Diário (I200/I250): adiados no modo triagem
+    TESTES_DIARIO = [nome for nome, (_, insumos) in TESTES.items() if "diario" in insumos]
+
+    # Versão de cada teste para o cache de resultados (CacheResultadosAuditoria):
+    # além do código do método, os módulos auxiliares e os atributos de classe
+    # que definem o resultado. Limiares e regras da tabela entram sozinhos.
+    MODULOS_TESTES: Dict[str, Tuple[str, ...]] = {
+        d.id: d.modulos for d in REGISTRO if d.modulos
+    }
+    PARAMETROS_TESTES: Dict[str, Tuple[str, ...]] = {
+        d.id: d.parametros for d in REGISTRO if d.parametros
+    }
+
     def __init__(
         self,
         df_diario: pd.DataFrame,
@@ -22,6 +239,7 @@ class ECDAuditor:
         df_plano: pd.DataFrame,
         df_naturezas: Optional[pd.DataFrame] = None,  # I050 original
         df_mapeamento: Optional[pd.DataFrame] = None,  # I051
+        tensor_balancete: Optional[TensorBalancete] = None,
     ):
         """
         Inicializa o auditor com os DataFrames processados pelo ECDProcessor.
@@ -32,45 +250,295 @@ class ECDAuditor:
             df_plano: Dataframe do plano de contas (I050).
             df_naturezas: Dataframe auxiliar de naturezas (opcional).
             df_mapeamento: Dataframe de mapeamento referencial (opcional).
+            tensor_balancete: Balancete denso (conta × mês × campo) já montado
+                pelo processor. Se omitido, é montado aqui a partir do balancete.
         """
         self.df_diario = df_diario
         self.df_balancete = df_balancete
         self.df_plano = df_plano
         self.df_naturezas = df_naturezas
         self.df_mapeamento = df_mapeamento
+        # Insumos enriquecidos uma única vez e compartilhados por todos os
+        # testes (somente leitura: nenhum teste copia ou altera os DataFrames)
+        self.contexto = ContextoAuditoria.montar(
+            df_diario, df_balancete, df_plano, df_mapeamento, tensor_balancete
+        )
+        # Base dos testes de saldo (4.3, 5.1, 5.2, 5.3): montada uma única vez
+        self.tensor_balancete = self.contexto.tensor
         self.telemetry: Optional[TelemetryCollector] = None
         self.current_ecd_id = ""
+        # Agendamento da auditoria completa: custos aprendidos da telemetria e
+        # opção de rodar os testes pesados em processos (fora do GIL)
+        self.modelo_custos: Optional[ModeloCustoAuditoria] = None
+        self.usar_processos = False
+        # Cache de resultados por teste (None = sempre executa)
+        self.cache_resultados: Optional[CacheResultadosAuditoria] = None
+        # Limiares de cada teste (padrões do REGISTRO, ajustáveis por instância)
+        self.limiares: Dict[str, Dict[str, Any]] = self.REGISTRO.limiares()
+        # Plano de amostragem do Diário (None = população inteira): os testes
+        # amostráveis do REGISTRO rodam sobre a amostra e projetam a distorção
+        self.amostragem: Optional[AmostragemAuditoria] = None
+        # Balancetes mensais de anos anteriores do mesmo CNPJ (ex: consolidado
+        # da execução anterior): histórico e sazonalidade do teste 6.1
+        self.historico_balancete: Optional[pd.DataFrame] = None
+        # Fluxos débito -> crédito de anos anteriores do mesmo CNPJ (ex:
+        # CONSOLIDADO_08_Fluxo_Contas): pares nunca vistos no teste 7.5
+        self.historico_fluxos: Optional[pd.DataFrame] = None
 
         # Armazena os resultados de todos os testes
         # Estrutura: { "Nome do Teste": { "status": "APROVADO/ALERTA/ERRO", "impacto": Decimal, "detalhes": DataFrame } }
         self.resultados: Dict[str, Any] = {}
 
     @monitor_task("ECDAuditor", "executar_auditoria_completa")
-    def executar_auditoria_completa(self) -> Dict[str, Any]:
-        """Executa todas as baterias de testes em paralelo (grupos independentes)."""
+    def executar_auditoria_completa(
+        self, testes: Optional[Iterable[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Executa os testes em paralelo, um a um, do mais caro para o mais
+        barato (ver AgendadorAuditoria).
+
+        Args:
+            testes: IDs a executar (ver REGISTRO.selecionar); todos, se omitido.
+                Testes cujos insumos não existem neste ECD recebem SKIPPED
+                sem chegar ao agendador nem ao cache.
+        """
         logger.info("Iniciando bateria de Auditoria Forense (paralela)...")
 
-        grupos: list[Callable[[], None]] = [
-            self.testar_integridade_estrutural,
-            self.testar_continuidade_cronologica,
-            self.testar_coerencia_referencial,
-            self.analisar_padroes_forenses,
-            self.testar_indicadores_profissionais,
-        ]
+        nomes = self._descartar_sem_insumos(self.TESTES if testes is None else testes)
+        amostrais: List[str] = []
+        if self.amostragem is not None:
+            amostrais = [n for n in nomes if self.REGISTRO[n].amostravel]
+            nomes = [n for n in nomes if n not in amostrais]
 
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            futures = {executor.submit(cast(Any, fn)): fn.__name__ for fn in grupos}
-            for future in as_completed(futures):
-                nome = futures[future]
-                try:
-                    future.result()
-                except Exception as exc:
-                    logger.error(
-                        f"[Auditoria] Grupo '{nome}' falhou: {exc}", exc_info=True
-                    )
+        agendador = AgendadorAuditoria(
+            self, self.modelo_custos, usar_processos=self.usar_processos
+        )
+        self._executar_com_cache(nomes, agendador.executar)
+        if self.amostragem is not None:
+            self._executar_amostral(amostrais)
+        return self.resultados
+
+    @monitor_task("ECDAuditor", "executar_triagem")
+    def executar_triagem(self) -> Dict[str, Any]:
+        """
+        Triagem rápida: apenas os testes de saldo (sem o Diário).
+
+        Roda 1.2, 3.x e 5.1–5.3 sobre balancete, plano e mapeamento. Os testes
+        que dependem de I200/I250 recebem status DEFERIDO, para que o scorecard
+        reduzido deixe claro o que ficou pendente da auditoria completa.
+        """
+        logger.info("Iniciando triagem de Auditoria (somente saldos)...")
+
+        self._executar_com_cache(
+            [nome for nome in self.TESTES if nome not in self.TESTES_DIARIO],
+            self.executar_testes,
+        )
 
+        for nome in self.TESTES_DIARIO:
+            self.resultados.setdefault(
+                nome,
+                {
+                    "status": "DEFERIDO",
+                    "impacto": 0.0,
+                    "msg": "Depende do Diário (I200/I250). Adiado no modo triagem.",
+                },
+            )
         return self.resultados
 
+    def insumos_disponiveis(self) -> Set[str]:
+        """Insumos presentes neste ECD (DataFrames não vazios)."""
+        fontes = {
+            "diario": self.df_diario,
+            "saldos": self.df_balancete,
+            "plano": self.df_plano,
+        }
+        return {nome for nome, df in fontes.items() if df is not None and not df.empty}
+
+    def _descartar_sem_insumos(self, nomes: Iterable[str]) -> List[str]:
+        """Marca SKIPPED os testes sem insumo e devolve os executáveis."""
+        executaveis, ignorados = self.REGISTRO.separar_por_insumos(
+            nomes, self.insumos_disponiveis()
+        )
+        for nome, faltantes in ignorados.items():
+            self.resultados[nome] = {
+                "status": "SKIPPED",
+                "impacto": 0.0,
+                "msg": f"Insumo ausente: {', '.join(faltantes)}.",
+            }
+        if ignorados:
+            logger.info(
+                f"[Auditoria] {len(ignorados)} teste(s) ignorado(s) por falta de insumo."
+            )
+        return executaveis
+
+    @property
+    def impressao_historico(self) -> str:
+        """Impressão do histórico de saldos (entra na versão do 6.1 no cache)."""
+        return impressao_dataframe(self.historico_balancete)
+
+    @property
+    def impressao_fluxos(self) -> str:
+        """Impressão do histórico de fluxos (entra na versão do 7.5 no cache)."""
+        return impressao_dataframe(self.historico_fluxos)
+
+    def limiar(self, nome: str, chave: str) -> Any:
+        """Limiar vigente de um teste (ver REGISTRO e self.limiares)."""
+        return self.limiares[nome][chave]
+
+    def executar_testes(self, nomes: Iterable[str]) -> Dict[str, Any]:
+        """
+        Executa apenas os testes informados (chaves de TESTES), em série.
+
+        Usado pela triagem e pelo reprocessamento de retificadoras, que
+        refazem só os testes cujos insumos mudaram.
+        """
+        for nome in nomes:
+            metodo = getattr(self, self.TESTES[nome][0])
+            try:
+                metodo()
+            except Exception as exc:
+                logger.error(f"[Auditoria] Teste '{nome}' falhou: {exc}", exc_info=True)
+        return self.resultados
+
+    def _executar_com_cache(
+        self, nomes: Iterable[str], executar: Callable[[List[str]], Any]
+    ) -> Dict[str, Any]:
+        """
+        Lê do cache os testes cuja chave (insumos + versão do teste) já tem
+        resultado, executa os demais com `executar` e grava os novos.
+        """
+        nomes = list(nomes)
+        if self.cache_resultados is None:
+            executar(nomes)
+            return self.resultados
+
+        cache = self.cache_resultados
+        chaves = cache.chaves(self, nomes)
+        pendentes = []
+        for nome in nomes:
+            resultado = cache.carregar(nome, chaves[nome])
+            if resultado is None:
+                pendentes.append(nome)
+            else:
+                self.resultados[nome] = resultado
+        self.vincular_evidencias(self.resultados)
+        logger.info(
+            f"[Auditoria] Cache: {len(nomes) - len(pendentes)} teste(s) reaproveitado(s), "
+            f"{len(pendentes)} a executar."
+        )
+
+        if pendentes:
+            executar(pendentes)
+        for nome in pendentes:
+            if nome in self.resultados:
+                cache.salvar(nome, chaves[nome], self.resultados[nome])
+
+        # Ordem do scorecard: a de TESTES, venha o resultado do cache ou não
+        self._ordenar_resultados()
+        return self.resultados
+
+    def vincular_evidencias(self, resultados: Dict[str, Any]) -> None:
+        """
+        Religa ao Diário as evidências desserializadas (cache de resultados,
+        retificadora, processos do agendador; ver EvidenciaAuditoria.vincular).
+        A evidência que não corresponder ao Diário é descartada com aviso.
+        """
+        ctx = self.contexto
+        for nome, resultado in resultados.items():
+            evidencia = resultado.get("evidencia") if isinstance(resultado, dict) else None
+            if not isinstance(evidencia, EvidenciaAuditoria) or evidencia.vinculada:
+                continue
+            try:
+                evidencia.vincular(ctx.diario, {"PERIODO": ctx.periodo_diario})
+            except (KeyError, ValueError) as e:
+                logger.warning(f"[Auditoria] Evidência de '{nome}' descartada: {e}")
+                del resultado["evidencia"]
+
+    def _ordenar_resultados(self) -> None:
+        ordem = [n for n in self.TESTES if n in self.resultados]
+        ordem += [n for n in self.resultados if n not in self.TESTES]
+        self.resultados = {n: self.resultados[n] for n in ordem}
+
+    def _executar_amostral(self, nomes: List[str]) -> None:
+        """
+        Roda os testes amostráveis sobre a amostra do Diário e projeta a
+        distorção para a população (ver core/amostragem.py).
+
+        A unidade amostral é conta × dia: duplicidades exatas ficam na mesma
+        unidade. Os testes rodam num ECDAuditor sobre as linhas das unidades
+        sorteadas, então o custo depende do tamanho da amostra (limitado por
+        `amostragem.tamanho_maximo`), não do Diário. A distorção de cada
+        unidade é a soma de |VL_SINAL| das linhas apontadas em "erros" (o
+        mesmo critério do impacto na população); o impacto do teste passa a
+        ser a distorção projetada, e os limites vão em "amostra". A evidência
+        do 1.1 é restrita às linhas da amostra.
+        """
+        plano = self.amostragem
+        assert plano is not None
+        ctx = self.contexto
+        unidade, valor_unidade = unidades_conta_dia(ctx.diario, ctx.dt_lcto)
+        amostra = plano.selecionar(valor_unidade)
+        na_amostra = np.isin(unidade, amostra.unidades)
+        linhas = np.flatnonzero(na_amostra)
+        logger.info(
+            f"[Auditoria] Amostra {amostra.metodo}: {len(amostra)} de "
+            f"{amostra.unidades_populacao} unidades conta-dia ({len(linhas)} linhas)."
+        )
+
+        evidencia = self.resultados.get("1.1_Cruzamento_Diario_Balancete", {}).get("evidencia")
+        if isinstance(evidencia, EvidenciaAuditoria):
+            evidencia.restringir(na_amostra)
+        if not nomes:
+            return
+
+        sub_auditor = type(self)(
+            ctx.diario.iloc[linhas].reset_index(drop=True),
+            self.df_balancete,
+            self.df_plano,
+            df_naturezas=self.df_naturezas,
+            df_mapeamento=self.df_mapeamento,
+            tensor_balancete=self.tensor_balancete,
+        )
+        sub_auditor.limiares = self.limiares
+        sub_auditor.executar_testes(nomes)
+        posicao_unidade = np.searchsorted(amostra.unidades, unidade[linhas])
+
+        for nome in nomes:
+            if nome not in sub_auditor.resultados:
+                continue
+            resultado = dict(sub_auditor.resultados[nome])
+            texto = (
+                f"Amostra {amostra.metodo}: {len(amostra)}/{amostra.unidades_populacao} "
+                f"unidades conta-dia ({len(linhas)} linhas)"
+            )
+            erros = resultado.get("erros")
+            if isinstance(erros, pd.DataFrame) and "VL_SINAL" in erros.columns:
+                distorcoes = np.zeros(len(amostra))
+                if not erros.empty:
+                    np.add.at(
+                        distorcoes,
+                        posicao_unidade[erros.index.to_numpy()],
+                        np.abs(erros["VL_SINAL"].to_numpy(dtype="float64", na_value=0.0)),
+                    )
+                resumo = plano.projetar(amostra, distorcoes)
+                resultado["impacto"] = resumo["distorcao_projetada"]
+                texto += (
+                    f"; distorção projetada R$ {resumo['distorcao_projetada']:,.2f}, "
+                    f"limite superior R$ {resumo['limite_superior']:,.2f} "
+                    f"({plano.confianca:.0%})"
+                )
+            else:
+                resumo = {
+                    "metodo": amostra.metodo,
+                    "unidades_populacao": amostra.unidades_populacao,
+                    "unidades_amostra": len(amostra),
+                }
+            resumo["linhas_amostra"] = int(len(linhas))
+            resultado["amostra"] = resumo
+            resultado["msg"] = f"{resultado.get('msg', '')} | {texto}".strip(" |")
+            self.resultados[nome] = resultado
+        self._ordenar_resultados()
+
     # -------------------------------------------------------------------------
     # GRUPO 1: Integridade Estrutural
     # -------------------------------------------------------------------------
@@ -93,47 +561,43 @@ class ECDAuditor:
             }
             return
 
-        # Preparação do Diário
-        df_d = self.df_diario.copy()
-        if not pd.api.types.is_datetime64_any_dtype(df_d["DT_LCTO"]):
-            df_d["DT_LCTO"] = pd.to_datetime(df_d["DT_LCTO"])
-
-        df_d["PERIODO"] = df_d["DT_LCTO"].dt.to_period("M")
+        ctx = self.contexto
 
         # --- AJUSTE FORENSE: Ignorar Lançamentos de Encerramento ('E') ---
         # Pois o balancete recebido do processor já teve esses saldos revertidos.
-        if "IND_LCTO" in df_d.columns:
-            df_d = df_d[df_d["IND_LCTO"].str.upper() != "E"].copy()
+        mask_d = ~ctx.encerramento
+        df_d = ctx.diario
 
-        # Agregação do Diário
+        # Agregação do Diário (sem copiar o Diário: agrupa pelas chaves alinhadas)
         agg_diario = (
-            df_d.groupby(["COD_CTA", "PERIODO"])
-            .agg({"VL_D": "sum", "VL_C": "sum"})
+            df_d.loc[mask_d, ["VL_D", "VL_C"]]
+            .groupby(
+                [
+                    df_d["COD_CTA"][mask_d].rename("COD_CTA"),
+                    ctx.periodo_diario[mask_d].rename("PERIODO"),
+                ]
+            )
+            .sum()
             .reset_index()
         )
 
-        # Preparação do Balancete
-        df_b = self.df_balancete.copy()
-        if not pd.api.types.is_datetime64_any_dtype(df_b["DT_FIN"]):
-            df_b["DT_FIN"] = pd.to_datetime(df_b["DT_FIN"])
-
-        df_b["PERIODO"] = df_b["DT_FIN"].dt.to_period("M")
-
         # --- AJUSTE FORENSE: Apenas contas Analíticas ---
         # Cruzamento sintético gera falso positivo pois não há lançamentos em grupos sintéticos
-        if "IND_CTA" not in df_b.columns and not self.df_plano.empty:
-            df_b = pd.merge(
-                df_b, self.df_plano[["COD_CTA", "IND_CTA"]], on="COD_CTA", how="left"
-            )
-
-        if "IND_CTA" in df_b.columns:
-            df_b = df_b[df_b["IND_CTA"].str.upper() == "A"].copy()
+        df_b = ctx.balancete
+        df_b_analit = pd.DataFrame(
+            {
+                "COD_CTA": df_b["COD_CTA"].to_numpy()[ctx.analitica],
+                "PERIODO": ctx.periodo_balancete.to_numpy()[ctx.analitica],
+                "VL_DEB": df_b["VL_DEB"].to_numpy()[ctx.analitica],
+                "VL_CRED": df_b["VL_CRED"].to_numpy()[ctx.analitica],
+            }
+        )
 
         # Merge para confronto
         # Usamos outer join para pegar lançamentos sem saldo e saldos sem lançamentos
         df_conf = pd.merge(
             agg_diario,
-            df_b[["COD_CTA", "PERIODO", "VL_DEB", "VL_CRED"]],
+            df_b_analit,
             on=["COD_CTA", "PERIODO"],
             how="outer",
             suffixes=("_DIARIO", "_RAZAO"),
@@ -144,17 +608,16 @@ class ECDAuditor:
         df_conf["DIF_CRED"] = df_conf["VL_C"] - df_conf["VL_CRED"]
 
         # Adiciona nome da conta para o relatório
-        if "CONTA" not in df_conf.columns and not self.df_plano.empty:
-            df_conf = pd.merge(
-                df_conf,
-                self.df_plano[["COD_CTA", "CONTA"]],
-                on="COD_CTA",
-                how="left",
-            )
+        nomes = ctx.atributo_conta("CONTA")
+        if nomes is not None:
+            df_conf["CONTA"] = df_conf["COD_CTA"].map(nomes)
 
         # Filtro de Erros (Diferença != 0)
         # Tolerância mínima para floating point issues (embora estejamos usando Decimal)
-        mask_erro = (abs(df_conf["DIF_DEB"]) > 0.01) | (abs(df_conf["DIF_CRED"]) > 0.01)
+        tolerancia = self.limiar("1.1_Cruzamento_Diario_Balancete", "tolerancia")
+        mask_erro = (abs(df_conf["DIF_DEB"]) > tolerancia) | (
+            abs(df_conf["DIF_CRED"]) > tolerancia
+        )
         erros = df_conf[mask_erro].copy()
 
         impacto_total = sum(abs(x) for x in erros["DIF_DEB"]) + sum(
@@ -174,10 +637,15 @@ class ECDAuditor:
                 pd.DataFrame, erros[["COD_CTA", "PERIODO"]]
             ).drop_duplicates()
 
-            # Filtramos o diário original para trazer apenas os lançamentos dessas contas nos meses com erro
-            # Isso cria o "Dossiê de Lançamentos" para auditoria detalhada
-            evidencia_detalhada = pd.merge(
-                df_d, chaves_erro, on=["COD_CTA", "PERIODO"], how="inner"
+            # Lançamentos dessas contas nos meses com erro: o "Dossiê de
+            # Lançamentos" fica como predicado sobre o Diário e só é copiado,
+            # em lotes, quando o AuditExporter o grava
+            evidencia_detalhada = EvidenciaAuditoria(
+                df_d,
+                chaves=chaves_erro,
+                colunas_chave={"COD_CTA": df_d["COD_CTA"], "PERIODO": ctx.periodo_diario},
+                filtro=np.asarray(mask_d, dtype=bool),
+                colunas_extras={"DT_LCTO": ctx.dt_lcto, "PERIODO": ctx.periodo_diario},
             )
 
             self.resultados["1.1_Cruzamento_Diario_Balancete"] = {
@@ -200,110 +668,71 @@ class ECDAuditor:
             }
             return
 
-        # Precisamos garantir que temos a estrutura hierárquica (NIVEL, COD_CTA_SUP)
-        # Se o balancete já veio do processor, ele pode ter essa info.
-        # Por via das dúvidas, fazemos merge com o plano se necessário.
-        df_b = self.df_balancete.copy()
-        cols_missing = [
-            c for c in ["NIVEL", "COD_CTA_SUP", "CONTA"] if c not in df_b.columns
-        ]
-
-        if cols_missing:
-            df_b = pd.merge(
-                df_b,
-                self.df_plano[["COD_CTA"] + cols_missing],
-                on="COD_CTA",
-                how="left",
-            )
-
-        # Garante integridade de tipos
-        if "NIVEL" in df_b.columns:
-            s_nivel = pd.to_numeric(df_b["NIVEL"], errors="coerce")
-            df_b["NIVEL"] = s_nivel.fillna(0).astype(int)
+        # A estrutura hierárquica (COD_CTA_SUP, CONTA) já vem do contexto,
+        # completada com o plano quando o balancete não a trouxer.
+        ctx = self.contexto
+        df_b = ctx.balancete
 
         # Isola contas Analíticas (assumindo que o Processor já calculou os sintéticos,
         # mas queremos testar se a MATEMÁTICA bate, caso o processor tenha propagado erro ou o input seja ruim)
         # Na verdade, o teste forense ideal é:
         # Pega as analíticas -> Recalcula tudo -> Compara com o que está lá.
 
-        # 1. Identificar Analíticas (Input Original)
-        # Como o df_balancete já pode ter sintéticas recalculadas, esse teste valida o PRÓPRIO ALGORITMO
-        # ou valida se houve manipulação pós-processamento.
-        # Para um teste forense "raiz", deveríamos usar apenas as linhas com IND_CTA = 'A'.
-
-        if "IND_CTA" not in df_b.columns:
-            df_b = pd.merge(
-                df_b, self.df_plano[["COD_CTA", "IND_CTA"]], on="COD_CTA", how="left"
-            )
-
-        mask_analiticas = df_b["IND_CTA"].str.upper() == "A"
-        df_analiticas = df_b[mask_analiticas].copy()
-
         # Se não tem analíticas, falha
-        if df_analiticas.empty:
+        if not ctx.analitica.any():
             return
 
-        # 2. Recálculo "Clean Room" (Simulação Paralela)
-        # Vamos reconstruir os saldos sintéticos do zero
-
-        # Loop de Agregação (Nível Máximo até 2)
-
-        # Dicionário para acumular saldos por conta (começa com analíticas)
-        # Mas precisamos preservar a dimensão TEMPORAL (DT_FIN)
-        # Estratégia: iterar por período para garantir isolamento
-
-        divergencias = []
-        periodos = df_b["DT_FIN"].unique()
-
-        for periodo in periodos:
-            df_mes = df_b[df_b["DT_FIN"] == periodo]
-            mask_sinteticas = df_mes["IND_CTA"].astype(str).str.upper() == "S"
-            df_sint = df_mes[mask_sinteticas]
-
-            if df_sint.empty:
-                continue
-
-            # Calculate sum of all children for each parent
-            df_filhos_agregados = df_mes.groupby("COD_CTA_SUP", as_index=False)[
-                "VL_SLD_FIN_SIG"
-            ].sum()
-            df_filhos_agregados = df_filhos_agregados.rename(
-                columns={"VL_SLD_FIN_SIG": "VL_CALCULADO", "COD_CTA_SUP": "COD_CTA"}
-            )
-
-            # Merge with synthetics
-            df_compare = pd.merge(
-                df_sint, df_filhos_agregados, on="COD_CTA", how="left"
-            )
-
-            # Filhos em branco = 0 calculado
-            df_compare["VL_CALCULADO"] = df_compare["VL_CALCULADO"].fillna(0.0)
+        # 2. Recálculo "Clean Room" de todos os períodos de uma vez
+        # Cada linha soma seu saldo na célula (conta pai, DT_FIN); o índice do
+        # pai é pré-computado por posição (COD_CTA_SUP -> código da conta).
+        idx_mes, periodos = pd.factorize(df_b["DT_FIN"])
+        contas = pd.Index(pd.unique(df_b["COD_CTA"]))
+        idx_conta = contas.get_indexer(df_b["COD_CTA"])
+        idx_pai = contas.get_indexer(df_b["COD_CTA_SUP"])
+        n_meses = len(periodos)
+        n_celulas = len(contas) * n_meses
+
+        saldo = pd.to_numeric(df_b["VL_SLD_FIN_SIG"], errors="coerce").to_numpy(
+            dtype="float64"
+        )
+        tem_pai = (idx_pai >= 0) & (idx_mes >= 0)
+        celula_pai = idx_pai[tem_pai] * n_meses + idx_mes[tem_pai]
+        soma_filhos = np.bincount(
+            celula_pai, weights=np.nan_to_num(saldo[tem_pai]), minlength=n_celulas
+        )
 
-            # Tolerancia
-            mask_diverge = (
-                abs(df_compare["VL_SLD_FIN_SIG"] - df_compare["VL_CALCULADO"]) > 0.01
-            )
-            df_erros_mes = df_compare[mask_diverge]
+        # 3. Confronto com as sintéticas informadas (tolerância de 1 centavo)
+        linhas_sint = np.flatnonzero(ctx.sintetica & (idx_mes >= 0))
+        celula = idx_conta[linhas_sint] * n_meses + idx_mes[linhas_sint]
+        informado = saldo[linhas_sint]
+        calculado = soma_filhos[celula]
+        diverge = np.abs(informado - calculado) > self.limiar(
+            "1.2_Validacao_Hierarquia", "tolerancia"
+        )
 
-            for _, row in df_erros_mes.iterrows():
-                tipo = (
-                    "Sintética sem filhos com saldo"
-                    if pd.isna(row.get("VL_CALCULADO")) and row["VL_SLD_FIN_SIG"] != 0
-                    else "Erro de Soma Hierárquica"
-                )
-                divergencias.append(
-                    {
-                        "COD_CTA": row["COD_CTA"],
-                        "CONTA": row.get("CONTA", "SEM_NOME"),
-                        "DT_FIN": periodo,
-                        "TIPO": tipo,
-                        "DIFERENCA": row["VL_SLD_FIN_SIG"] - row["VL_CALCULADO"],
-                        "VLR_INFORMADO": row["VL_SLD_FIN_SIG"],
-                        "VLR_CALCULADO": row["VL_CALCULADO"],
-                    }
-                )
+        # Ordem do relatório: período (ordem de aparição), depois linha original
+        linhas_erro = linhas_sint[diverge]
+        ordem = np.argsort(idx_mes[linhas_erro], kind="stable")
+        linhas_erro = linhas_erro[ordem]
+        informado = informado[diverge][ordem]
+        calculado = calculado[diverge][ordem]
 
-        df_div = pd.DataFrame(divergencias)
+        df_div = pd.DataFrame(
+            {
+                "COD_CTA": df_b["COD_CTA"].to_numpy()[linhas_erro],
+                "CONTA": (
+                    df_b["CONTA"].to_numpy()[linhas_erro]
+                    if "CONTA" in df_b.columns
+                    else "SEM_NOME"
+                ),
+                "DT_FIN": df_b["DT_FIN"].to_numpy()[linhas_erro],
+                # Sintética sem filhos conta como soma zero (mesma classificação)
+                "TIPO": "Erro de Soma Hierárquica",
+                "DIFERENCA": informado - calculado,
+                "VLR_INFORMADO": informado,
+                "VLR_CALCULADO": calculado,
+            }
+        )
 
         if df_div.empty:
             self.resultados["1.2_Validacao_Hierarquia"] = {
@@ -312,7 +741,7 @@ class ECDAuditor:
                 "erros": pd.DataFrame(),
             }
         else:
-            impacto = sum(abs(x) for x in df_div["DIFERENCA"])
+            impacto = float(np.abs(df_div["DIFERENCA"]).sum())
             self.resultados["1.2_Validacao_Hierarquia"] = {
                 "status": "REPROVADO",
                 "impacto": impacto,
@@ -357,42 +786,19 @@ class ECDAuditor:
             return
 
         # Prepara dados: COD_CTA, COD_NAT, COD_CTA_REF
-        df_check = self.df_plano.copy()
-
-        # Se COD_CTA_REF não estiver no plano, tentamos merge com mapeamento.
-        if "COD_CTA_REF" not in df_check.columns:
-            if self.df_mapeamento is not None:
-                # Blindagem p/ IDE: garante que self.df_mapeamento é DataFrame
-                tab_i051 = cast(pd.DataFrame, self.df_mapeamento).copy()
-                # Normalização pode ser necessária se I051 tiver prefixos
-                df_map_temp = tab_i051.copy()
-                if "I051_COD_CTA_REF" in df_map_temp.columns:
-                    df_map_temp.rename(
-                        columns={
-                            "I051_COD_CTA_REF": "COD_CTA_REF",
-                            "I051_FK_PAI": "FK_PAI",
-                        },
-                        inplace=True,
-                    )
-
-                df_check = pd.merge(
-                    df_check,
-                    df_map_temp[["FK_PAI", "COD_CTA_REF"]],
-                    left_on="PK",
-                    right_on="FK_PAI",
-                    how="left",
-                )
-            else:
-                self.resultados["3.1_Consistencia_Natureza"] = {
-                    "status": "SKIPPED",
-                    "msg": "Sem mapeamento referencial disponível.",
-                }
-                return
+        # (o contexto já buscou o COD_CTA_REF no I051 se o plano não o tiver)
+        df_plano = self.contexto.plano
+        if not self.contexto.tem_mapeamento:
+            self.resultados["3.1_Consistencia_Natureza"] = {
+                "status": "SKIPPED",
+                "msg": "Sem mapeamento referencial disponível.",
+            }
+            return
 
         # Filtra apenas contas Mapeadas
-        df_check = df_check[
-            df_check["COD_CTA_REF"].notna() & (df_check["COD_CTA_REF"] != "")
-        ].copy()
+        df_check = df_plano[
+            df_plano["COD_CTA_REF"].notna() & (df_plano["COD_CTA_REF"] != "")
+        ]
 
         if df_check.empty:
             self.resultados["3.1_Consistencia_Natureza"] = {
@@ -402,53 +808,34 @@ class ECDAuditor:
             }
             return
 
-        # Lógica de Validação:
+        # Lógica de Validação: tabela declarativa (data/reference/regras_auditoria.csv)
         # COD_NAT 01 (Ativo) -> REF deve começar com 1
-        # COD_NAT 02 (Passivo) -> REF deve começar com 2
-        # COD_NAT 03 (PL) -> REF deve começar com 2
-        # COD_NAT 04 (Resultado) -> REF deve começar com 3
-
-        def check_natureza(row):
-            nat = str(row.get("COD_NAT", "")).strip().zfill(2)
-            ref = str(row.get("COD_CTA_REF", "")).strip()
-
-            if not ref:
-                return None
-
-            erro = None
-            if nat == "01" and not ref.startswith("1"):
-                erro = "Ativo mapeado fora do Grupo 1"
-            elif nat == "02" and not ref.startswith("2"):
-                erro = "Passivo mapeado fora do Grupo 2"
-            elif nat == "03" and not ref.startswith("2"):
-                erro = "Patrimônio Líquido mapeado fora do Grupo 2"
-            elif nat in ["04", "05", "09"] and ref.startswith("1"):
-                erro = "Resultado/Outros mapeado no Ativo"
-            elif (
-                nat in ["04", "05", "09"]
-                and ref.startswith("2")
-                and not ref.startswith("2.03")
-            ):  # 2.03 as vezes é resultado acumulado? Nao, RFB Resultado é 3.
-                if not ref.startswith("3"):
-                    erro = "Resultado/Outros mapeado no Passivo"
-
-            if erro:
-                return {
-                    "COD_CTA": row.get("COD_CTA"),
-                    "CONTA": row.get("CONTA")
-                    or row.get("DESCRICAO")
-                    or row.get("NOME"),
-                    "COD_NAT_ECD": nat,
-                    "COD_CTA_REF": ref,
-                    "TIPO_ERRO": erro,
-                }
-            return None
-
-        # Aplica verificação
-        # Iterrows é lento mas seguro para lógica complexa condicional. Vectorized seria melhor se logica fosse simples.
-        erros_audit = df_check.apply(check_natureza, axis=1).dropna().tolist()
+        # COD_NAT 02 (Passivo) e 03 (PL) -> REF deve começar com 2
+        # COD_NAT 04/05/09 (Resultado/Outros) -> REF fora do 1 e do 2 (exceto 2.03)
+        # Compilada em máscaras vetorizadas; vale a primeira regra disparada.
+        natureza = ContextoAuditoria.natureza_de(df_check)
+        disparos = MotorRegras.padrao().avaliar("3.1", df_check, natureza)
+        mask_erro = (disparos["REGRA"] != "").to_numpy()
+
+        nome = pd.Series(None, index=df_check.index, dtype=object)
+        for col in ("CONTA", "DESCRICAO", "NOME"):
+            if col in df_check.columns:
+                nome = nome.where(
+                    nome.notna() & (nome != ""), df_check[col].astype(object)
+                )
 
-        df_erros = pd.DataFrame(erros_audit)
+        df_erros = pd.DataFrame(
+            {
+                "COD_CTA": df_check["COD_CTA"].to_numpy()[mask_erro],
+                "CONTA": nome.to_numpy()[mask_erro],
+                "COD_NAT_ECD": natureza[mask_erro],
+                "COD_CTA_REF": df_check["COD_CTA_REF"]
+                .astype(str)
+                .str.strip()
+                .to_numpy()[mask_erro],
+                "TIPO_ERRO": disparos["MENSAGEM"].to_numpy()[mask_erro],
+            }
+        )
 
         if df_erros.empty:
             self.resultados["3.1_Consistencia_Natureza"] = {
@@ -477,34 +864,13 @@ class ECDAuditor:
             return
 
         # 1. Identificar Analíticas com Mapeamento Faltante
-        df_b = self.df_balancete.copy()
-
-        # Merge com Plano para saber quem tem REF
-        # Se 'COD_CTA_REF' não estiver no balancete, buscamos no plano
-        cols_plano = ["COD_CTA"]
-        if "COD_CTA_REF" not in df_b.columns:
-            cols_plano.append("COD_CTA_REF")
-        if "ORIGEM_MAP" not in df_b.columns:
-            cols_plano.append(
-                "ORIGEM_MAP"
-            ) if "ORIGEM_MAP" in self.df_plano.columns else None
-
-        if len(cols_plano) > 1:
-            df_b = pd.merge(df_b, self.df_plano[cols_plano], on="COD_CTA", how="left")
-
-        # Garante que temos as colunas
-        if "COD_CTA_REF" not in df_b.columns:
-            df_b["COD_CTA_REF"] = None  # Assumimos vazio se não achou
+        # O balancete do contexto já traz COD_CTA_REF/IND_CTA (do plano, se preciso)
+        ctx = self.contexto
+        df_b = ctx.balancete
 
         # 2. Filtra Analíticas (Relevantes)
-        # Analitica = (IND_CTA = A ou NIVEL mais baixo). Vamos pelo plano se possivel
-        if "IND_CTA" not in df_b.columns:
-            df_b = pd.merge(
-                df_b, self.df_plano[["COD_CTA", "IND_CTA"]], on="COD_CTA", how="left"
-            )
-
         # Critério: É Analítica E (Tem Saldo Inicial != 0 OU Tem Debito != 0 OU Tem Credito != 0)
-        mask_relevante = (df_b["IND_CTA"].str.upper() == "A") & (
+        mask_relevante = ctx.analitica & (
             (df_b["VL_SLD_INI_SIG"] != 0)
             | (df_b["VL_DEB"] != 0)
             | (df_b["VL_CRED"] != 0)
@@ -516,14 +882,13 @@ class ECDAuditor:
         )
 
         # Interseção
-        df_orfas = df_b[mask_relevante & mask_orfa].copy()
+        df_orfas = df_b[mask_relevante & mask_orfa]
 
         # Agrupa por conta (pois a mesma conta aparece em 12 meses, não queremos reportar 12x)
         # Pegamos o maior saldo do período para mostrar impacto (Otimização Baseada em Index)
-        df_orfas_abs = df_orfas.copy()
-        df_orfas_abs["ABS_VAL"] = df_orfas_abs["VL_SLD_FIN_SIG"].abs()
-
-        idx_max = df_orfas_abs.groupby("COD_CTA")["ABS_VAL"].idxmax()
+        idx_max = (
+            df_orfas["VL_SLD_FIN_SIG"].abs().groupby(df_orfas["COD_CTA"]).idxmax()
+        )
         resumo_orfas = df_orfas.loc[idx_max, ["COD_CTA", "VL_SLD_FIN_SIG"]].reset_index(
             drop=True
         )
@@ -538,13 +903,9 @@ class ECDAuditor:
             impacto = sum(abs(x) for x in resumo_orfas["VL_SLD_FIN_SIG"])
 
             # Adiciona nome da conta para o relatório
-            if "CONTA" not in resumo_orfas.columns and not self.df_plano.empty:
-                resumo_orfas = pd.merge(
-                    resumo_orfas,
-                    self.df_plano[["COD_CTA", "CONTA"]],
-                    on="COD_CTA",
-                    how="left",
-                )
+            nomes = ctx.atributo_conta("CONTA")
+            if nomes is not None:
+                resumo_orfas["CONTA"] = resumo_orfas["COD_CTA"].map(nomes)
 
             self.resultados["3.2_Contas_Orfas"] = {
                 "status": "REPROVADO",
@@ -561,12 +922,17 @@ class ECDAuditor:
         self._teste_lei_benford()
         self._teste_duplicidades()
         self._teste_omissao_encerramento()
+        self._teste_quase_duplicidades()
 
     def _teste_lei_benford(self):
         """
-        4.1. Análise de Benford (Primeiro Dígito)
+        4.1. Análise de Benford
         Verifica se a distribuição dos primeiros dígitos dos valores monetários
         segue a Lei de Benford. Desvios significativos indicam manipulação.
+
+        O status segue o 1º dígito; a suíte completa (2º dígito, dois
+        primeiros, dois últimos e os recortes por conta e por mês) sai da
+        mesma extração de dígitos (ver core/benford.py).
         """
         if self.df_diario.empty:
             self.resultados["4.1_Lei_Benford"] = {
@@ -575,168 +941,115 @@ class ECDAuditor:
             }
             return
 
-        try:
-            from scipy.stats import chisquare
-            import numpy as np
-        except ImportError:
-            self.resultados["4.1_Lei_Benford"] = {
-                "status": "SKIPPED",
-                "msg": "Biblioteca Scipy não instalada.",
-            }
-            return
-
-        # 1. Preparar dados: Unificar Vl Debito e Vl Credito > 0
-        vals_d = self.df_diario[self.df_diario["VL_D"] > 0]["VL_D"]
-        vals_c = self.df_diario[self.df_diario["VL_C"] > 0]["VL_C"]
-
-        # Converte para string para pegar primeiro digito
-        # Importante: Precisamos de valores brutos, sem filtro.
-        series_vals = pd.concat([vals_d, vals_c])
-
-        if series_vals.empty:
+        # 1. População: débitos e créditos > 0, com conta e mês alinhados
+        valores, grupos = AnaliseBenford.populacao_diario(
+            self.contexto.diario, self.contexto.periodo_diario
+        )
+        if len(valores) == 0:
             return
 
-        # Pega primeiro digito (1-9). Ignora 0 (embora filtro >0 ja resolva).
-        # Remove caracteres nao numericos se houver, mas assumimos Decimal limpo.
-        digits = series_vals.astype(str).str.lstrip().str[0]
-        digits = digits[digits.isin([str(i) for i in range(1, 10)])].astype(int)
+        analise = AnaliseBenford(valores)
+        df_benford = analise.distribuicao("PRIMEIRO")
+        total = int(df_benford["CONTAGEM_OBS"].sum())
 
-        if len(digits) < 100:
+        limiares = self.limiares["4.1_Lei_Benford"]
+        if total < limiares["amostra_minima"]:
             self.resultados["4.1_Lei_Benford"] = {
                 "status": "SKIPPED",
-                "msg": "Amostra insuficiente para teste estatístico (<100).",
+                "msg": f"Amostra insuficiente para teste estatístico (<{limiares['amostra_minima']}).",
             }
             return
 
-        # 2. Calcular Frequências Observadas
-        counts = digits.value_counts().sort_index()
-        total = len(digits)
-        f_obs = []
-        for d in range(1, 10):
-            f_obs.append(counts.get(d, 0))
-
-        # 3. Calcular Frequências Esperadas (Benford)
-        # P(d) = log10(1 + 1/d)
-        benford_probs = [np.log10(1 + 1 / d) for d in range(1, 10)]
-        f_exp = [p * total for p in benford_probs]
-
-        # 4. Teste Qui-Quadrado
-        # Retorna estatística e p-valor.
-        # Null hypothesis: The data follows Benford's Law.
-        # High Chi-Square -> Low p-value -> Reject Null -> Anomalous.
-        chi_stat, p_val = chisquare(f_obs=f_obs, f_exp=f_exp)
-
-        # Cria DataFrame para o relatório
-        df_benford = pd.DataFrame(
-            {
-                "DIGITO": range(1, 10),
-                "CONTAGEM_OBS": f_obs,
-                "FREQ_OBS": [x / total for x in f_obs],
-                "FREQ_BENFORD": benford_probs,
-                "DESVIO": [
-                    o - e for o, e in zip([x / total for x in f_obs], benford_probs)
-                ],
-            }
-        )
-
-        # 4. Cálculo de Métricas Agregadas
-        mad = np.mean(np.abs(df_benford["FREQ_OBS"] - df_benford["FREQ_BENFORD"]))
-        status = "ALERTA" if mad > 0.012 else "APROVADO"
-        if mad > 0.020:
+        # 2. Métricas agregadas (status pelo 1º dígito)
+        mad = AnaliseBenford.mad(df_benford)
+        status = "ALERTA" if mad > limiares["mad_alerta"] else "APROVADO"
+        if mad > limiares["mad_reprovado"]:
             status = "REPROVADO"
 
-        # 5. Interpretação dos Resultados
-        def interpretar_desvio(row):
-            d = row["DESVIO"]
-            if abs(d) <= 0.005:
-                return "Dentro do esperado"
-            if d > 0.005:
-                return "Excesso de lançamentos"
-            return "Déficit de lançamentos"
-
-        df_benford["INTERPRETACAO"] = df_benford.apply(interpretar_desvio, axis=1)
+        # 3. Interpretação dos Resultados
+        desvio = df_benford["DESVIO"].to_numpy()
+        df_benford["INTERPRETACAO"] = np.select(
+            [np.abs(desvio) <= 0.005, desvio > 0.005],
+            ["Dentro do esperado", "Excesso de lançamentos"],
+            default="Déficit de lançamentos",
+        )
 
         # --- DIAGNÓSTICO DE SEGUNDA CAMADA (Drill-Down Multi-Dígito) ---
-        # Identifica TODOS os dígitos com anomalia positiva relevante (> 1%)
-        df_benford["DESVIO_ABS"] = df_benford["FREQ_OBS"] - df_benford["FREQ_BENFORD"]
-
-        # Coleta os dígitos suspeitos
-        suspeitos_list = df_benford[df_benford["DESVIO_ABS"] > 0.01]["DIGITO"].tolist()
-
-        # Se não houver nenhum acima de 1%, pega o maior apenas
-        if not suspeitos_list:
-            idx_max = df_benford["DESVIO_ABS"].idxmax()
-            suspeitos_list = [df_benford.loc[idx_max, "DIGITO"]]
-
-        # Casting explícito para garantir iterabilidade no loop (Linha 680)
-        digitos_suspeitos = suspeitos_list
-
-        df_lctos = self.df_diario.copy()
-
-        # Otimização Vetorial Matemática Ouro (Extrai 1º dígito usando log10 em Numpy em vez de Str Lstrip)
-        df_lctos["PRIMEIRO_DIGITO"] = None
-        mask_valid = df_lctos["VL_SINAL"] != 0
-        if mask_valid.any():
-            abs_vals = np.abs(df_lctos.loc[mask_valid, "VL_SINAL"])
-            # Extrai 1 dígito de x: floor(x / 10^{floor(log10(x))})
-            log_div = 10 ** np.floor(np.log10(abs_vals))
-            first_digits = np.floor(abs_vals / log_div)
-            df_lctos.loc[mask_valid, "PRIMEIRO_DIGITO"] = first_digits.astype(int)
-
-        analise_rows = []
-        for digito in digitos_suspeitos:
-            df_viciado = df_lctos[df_lctos["PRIMEIRO_DIGITO"] == digito].copy()
-            if df_viciado.empty:
-                continue
-
-            # Top 10 valores por dígito
-            top_valores = df_viciado["VL_DC"].value_counts().head(10).reset_index()
-            top_valores.columns = ["VALOR", "FREQUENCIA"]
-
-            for _, row_val in top_valores.iterrows():
-                val_exato = row_val["VALOR"]
-                subset = cast(
-                    pd.DataFrame, df_viciado[df_viciado["VL_DC"] == val_exato]
-                )
-
-                # Conta e Histórico mais comuns
-                conta_top = subset["COD_CTA"].value_counts().index[0]
-                if "CONTA" in subset.columns:
-                    conta_nome = subset["CONTA"].value_counts().index[0]
-                    conta_top = f"{conta_top} - {conta_nome}"
-
-                hist_col = (
-                    "HIST"
-                    if "HIST" in subset.columns
-                    else ("I250_HIST" if "I250_HIST" in subset.columns else None)
-                )
-                hist_top = (
-                    subset[hist_col].value_counts().index[0] if hist_col else "N/A"
-                )
-
-                analise_rows.append(
-                    {
-                        "DIGITO": digito,
-                        "VALOR": val_exato,
-                        "FREQUENCIA": row_val["FREQUENCIA"],
-                        "CONTA_PRINCIPAL": conta_top,
-                        "HISTORICO_PREDOMINANTE": hist_top,
-                    }
-                )
+        # Identifica TODOS os dígitos com anomalia positiva relevante (> 1%);
+        # se nenhum passar de 1%, pega apenas o maior
+        digitos_suspeitos = df_benford.loc[
+            desvio > limiares["desvio_suspeito"], "DIGITO"
+        ].tolist()
+        if not digitos_suspeitos:
+            digitos_suspeitos = [int(df_benford.loc[int(np.argmax(desvio)), "DIGITO"])]
+
+        # Dígito significativo de cada lançamento (|VL_SINAL|), alinhado ao
+        # Diário, e um único groupby (dígito, valor) para o detalhamento
+        df_lctos = self.contexto.diario
+        digito_lcto = AnaliseBenford.extrair_digitos(
+            df_lctos["VL_SINAL"].to_numpy(dtype="float64", na_value=np.nan)
+        )["SIGNIFICATIVO"]
+        df_drilldown = AnaliseBenford.detalhar_valores(
+            df_lctos, digito_lcto, digitos_suspeitos
+        )
 
-        df_drilldown = pd.DataFrame(analise_rows)
+        detalhes = {
+            "4.1_Benford_Frequencias": df_benford,
+            "4.1_Benford_Analise_Valores": df_drilldown,
+            "4.1_Benford_Resumo": analise.resumo(),
+            "4.1_Benford_Segundo_Digito": analise.distribuicao("SEGUNDO"),
+            "4.1_Benford_Dois_Digitos": analise.distribuicao("DOIS_PRIMEIROS"),
+            "4.1_Benford_Ultimos_Dois": analise.distribuicao("ULTIMOS_DOIS"),
+        }
+        if "COD_CTA" in grupos:
+            df_conta = analise.por_grupo(grupos["COD_CTA"], "COD_CTA")
+            mapa_nome = self.contexto.atributo_conta("CONTA")
+            if not df_conta.empty and mapa_nome is not None:
+                df_conta.insert(1, "CONTA", df_conta["COD_CTA"].map(mapa_nome))
+            detalhes["4.1_Benford_Por_Conta"] = df_conta
+        if "MES" in grupos:
+            detalhes["4.1_Benford_Por_Mes"] = analise.por_grupo(grupos["MES"], "MES")
 
         # Monta resultado final com múltiplas abas
         self.resultados["4.1_Lei_Benford"] = {
             "status": status,
             "impacto": float(mad),
             "msg": f"MAD: {mad:.5f} | Dígitos com Excesso: {digitos_suspeitos}",
-            "detalhes": {
-                "4.1_Benford_Frequencias": df_benford.drop(columns=["DESVIO_ABS"]),
-                "4.1_Benford_Analise_Valores": df_drilldown,
-            },
+            "detalhes": detalhes,
         }
 
+    # Nomes de conta que indicam disponibilidades (5.2), além do referencial
+    TERMOS_DISPONIBILIDADE = "CAIXA|BANCO|DISPONIBILIDADE|APLICAÇÃO|CASH"
+
+    # Critérios do 4.4 (ver DetectorQuaseDuplicidades)
+    PARAMETROS_QUASE_DUPLICIDADE: Dict[str, Any] = {
+        "dias": 3,
+        "tolerancia_abs": 0.0,
+        "tolerancia_rel": 0.0,
+        "janela": 5,
+    }
+
+    # Termos que marcam tarifas/taxas bancárias recorrentes (ruído do 4.2/4.4)
+    TERMOS_RUIDO = "BANCO|TARIFA|TAXA|TED|DOC|IOF|MANUTEN|FINANC|MENSAL|CONVEN|SERVIC|BOLETO|CADAST|PIX"
+
+    def _mascara_ruido(self, df: pd.DataFrame, valor_maximo: float = 100.0) -> np.ndarray:
+        """
+        Tarifas bancárias de baixo valor (< valor_maximo, padrão R$ 100,00):
+        termo de ruído na Conta ou no Histórico, ou conta do grupo 04.2.3. Os
+        termos são avaliados uma vez por nome de conta e por histórico distinto.
+        """
+        mask_texto = np.zeros(len(df), dtype=bool)
+        for coluna in ("CONTA", "HIST"):
+            if coluna in df.columns:
+                mask_texto |= mascara_termos(df[coluna], self.TERMOS_RUIDO)
+
+        # Checa se a conta começa com 04.2.3 (Grupo comum de Despesas Financeiras)
+        mask_grupo_financeiro = MotorRegras.padrao().selecionar(
+            "DESPESAS_FINANCEIRAS", df
+        )
+        valor = np.abs(df["VL_SINAL"].to_numpy(dtype="float64", na_value=np.nan))
+        return (valor < valor_maximo) & (mask_texto | mask_grupo_financeiro)
+
     @monitor_task("ECDAuditor", "4.2_Duplicidades")
     def _teste_duplicidades(self):
         """
@@ -744,48 +1057,35 @@ class ECDAuditor:
         """
         # --- AJUSTE FORENSE: Refinamento de Duplicidades ---
         # 1. Incluímos o Histórico (HIST) no confronto para diferenciar taxas bancárias idênticas mas de transações diferentes
+        df_diario = self.contexto.diario
         subset_cols = ["DT_LCTO", "COD_CTA", "VL_D", "VL_C"]
-        if "HIST" in self.df_diario.columns:
+        if "HIST" in df_diario.columns:
             subset_cols.append("HIST")
 
-        # Identifica potenciais duplicatas (mesma conta, data, valor e histórico)
-        df_dupl_raw = self.df_diario[
-            self.df_diario.duplicated(subset=subset_cols, keep=False)
-        ].copy()
+        # Identifica potenciais duplicatas (mesma conta, data, valor e
+        # histórico) por um hash de 64 bits da chave, sem comparar textos
+        chave = hash_linhas(df_diario, subset_cols)
+        mask_dupl = tamanho_grupo(chave) > 1
+        df_dupl_raw = df_diario[mask_dupl]
 
         # 2. Filtro de Materialidade e Ruído
         if not df_dupl_raw.empty:
             # Exclui valores zerados
-            df_dupl_raw = df_dupl_raw[df_dupl_raw["VL_SINAL"] != 0]
+            nao_zerado = (df_dupl_raw["VL_SINAL"] != 0).to_numpy(dtype=bool)
+            df_dupl_raw = df_dupl_raw[nao_zerado]
+            chave_dupl = chave[mask_dupl][nao_zerado]
 
             # Filtro A: Ignorar tarifas bancárias de baixo valor (< R$ 100,00)
             # Geralmente tarifas e taxas recorrentes ocorrem em massa e não são risco financeiro relevante
-            termos_ruido = "BANCO|TARIFA|TAXA|TED|DOC|IOF|MANUTEN|FINANC|MENSAL|CONVEN|SERVIC|BOLETO|CADAST|PIX"
-
-            # Checa se o termo está na Conta ou no Histórico
-            mask_conta_ruido = (
-                df_dupl_raw["CONTA"].str.upper().str.contains(termos_ruido, na=False)
-            )
-            mask_hist_ruido = (
-                df_dupl_raw["HIST"].str.upper().str.contains(termos_ruido, na=False)
-            )
-
-            # Checa se a conta começa com 04.2.3 (Grupo comum de Despesas Financeiras)
-            mask_grupo_financeiro = cast(
-                pd.Series, df_dupl_raw["COD_CTA"]
-            ).str.startswith("04.2.3")
-
-            mask_tarifa_pequena = (df_dupl_raw["VL_SINAL"].apply(abs) < 100) & (
-                mask_conta_ruido | mask_hist_ruido | mask_grupo_financeiro
-            )
+            limiares = self.limiares["4.2_Duplicidades"]
+            mask_tarifa_pequena = self._mascara_ruido(df_dupl_raw, limiares["valor_ruido"])
 
             # Filtro B: Ignorar Processamento em Lote (Batch)
             # Se uma conta tem MAIS DE 5 lançamentos idênticos no mesmo dia,
-            # assumimos que é um padrão operacional (ex: Folha, Tarifas em massa)
-            contagem_grupo = df_dupl_raw.groupby(subset_cols)[
-                df_dupl_raw.columns[0]
-            ].transform("count")
-            mask_batch = contagem_grupo > 5
+            # assumimos que é um padrão operacional (ex: Folha, Tarifas em massa).
+            # Chaves com nulo não formam lote (como no groupby, que as descarta)
+            chave_completa = df_dupl_raw[subset_cols].notna().all(axis=1).to_numpy()
+            mask_batch = (tamanho_grupo(chave_dupl) > limiares["lote_minimo"]) & chave_completa
 
             df_final_erros = df_dupl_raw[~(mask_tarifa_pequena | mask_batch)].copy()
         else:
@@ -805,13 +1105,9 @@ class ECDAuditor:
             }
         else:
             # Adiciona nome da conta para o relatório se ainda não tiver
-            if "CONTA" not in df_final_erros.columns and not self.df_plano.empty:
-                df_final_erros = pd.merge(
-                    df_final_erros,
-                    self.df_plano[["COD_CTA", "CONTA"]],
-                    on="COD_CTA",
-                    how="left",
-                )
+            nomes = self.contexto.atributo_conta("CONTA")
+            if "CONTA" not in df_final_erros.columns and nomes is not None:
+                df_final_erros["CONTA"] = df_final_erros["COD_CTA"].map(nomes)
 
             self.resultados["4.2_Duplicidades"] = {
                 "status": "ALERTA",
@@ -820,6 +1116,64 @@ class ECDAuditor:
                 "erros": df_final_erros.sort_values(["DT_LCTO", "COD_CTA", "VL_D"]),
             }
 
+    @monitor_task("ECDAuditor", "4.4_Quase_Duplicidades")
+    def _teste_quase_duplicidades(self):
+        """
+        4.4. Quase Duplicidades
+        Mesma conta e mesmo lado (D/C), em lançamentos diferentes, com o
+        mesmo valor (ou dentro da tolerância) a poucos dias de distância.
+        Pares idênticos ao 4.2, encerramentos e tarifas miúdas ficam de fora.
+        """
+        df_diario = self.contexto.diario
+        if df_diario.empty:
+            self.resultados["4.4_Quase_Duplicidades"] = {
+                "status": "SKIPPED",
+                "impacto": 0.0,
+            }
+            return
+
+        subset_cols = [
+            c for c in ["DT_LCTO", "COD_CTA", "VL_D", "VL_C", "HIST"] if c in df_diario.columns
+        ]
+        detector = DetectorQuaseDuplicidades(**self.PARAMETROS_QUASE_DUPLICIDADE)
+        df_pares = detector.detectar(
+            df_diario,
+            self.contexto.dt_lcto,
+            chave_exata=hash_linhas(df_diario, subset_cols),
+            ignorar=self.contexto.encerramento
+            | self._mascara_ruido(
+                df_diario, self.limiar("4.4_Quase_Duplicidades", "valor_ruido")
+            ),
+        )
+
+        if df_pares.empty:
+            self.resultados["4.4_Quase_Duplicidades"] = {
+                "status": "APROVADO",
+                "impacto": 0.0,
+                "erros": pd.DataFrame(),
+            }
+            return
+
+        nomes = self.contexto.atributo_conta("CONTA")
+        if "CONTA" not in df_pares.columns and nomes is not None:
+            df_pares.insert(1, "CONTA", df_pares["COD_CTA"].map(nomes))
+
+        # Impacto: a partida mais recente de cada par (a possível repetição),
+        # contada uma vez mesmo que participe de vários pares
+        colunas_b = [c for c in ("NUM_LCTO_B", "DT_LCTO_B", "HIST_B", "VALOR_B") if c in df_pares.columns]
+        impacto = float(
+            df_pares.drop_duplicates(["COD_CTA"] + colunas_b)["VALOR_B"].sum()
+        )
+        self.resultados["4.4_Quase_Duplicidades"] = {
+            "status": "ALERTA",
+            "impacto": impacto,
+            "msg": (
+                f"{len(df_pares)} pares de lançamentos quase duplicados "
+                f"(mesma conta e valor em até {detector.dias} dias)."
+            ),
+            "erros": df_pares,
+        }
+
     def _teste_omissao_encerramento(self):
         """
         4.3. Verificação de Omissão de Encerramento (DRE não zerada)
@@ -827,32 +1181,17 @@ class ECDAuditor:
         if self.df_balancete.empty:
             return
 
-        # Identificar contas de Resultado (Geralmente Natureza 04 no plano ou prefixo 3 no referencial)
-        # Vamos usar a info de NATUREZA se disponível
-        df_b = self.df_balancete.copy()
-
-        # Precisa ter natureza. Se não tiver, busca.
-        if "COD_NAT" not in df_b.columns and not self.df_plano.empty:
-            df_b = pd.merge(
-                df_b,
-                self.df_plano[["COD_CTA", "COD_NAT"]],
-                on="COD_CTA",
-                how="left",
-            )
-
-        if "COD_NAT" not in df_b.columns:
+        tensor = self.tensor_balancete
+        if not tensor.tem_natureza:
             self.resultados["4.3_Omissao_Encerramento"] = {
                 "status": "SKIPPED",
                 "msg": "Sem info de NaturezaConta",
             }
             return
 
-        # Filtra Resultado: COD_NAT '04' (versao antiga) ou conforme tabela da versão
-        # Simplificação: Contas com natureza '04'
-
-        # Garante que é uma Series booleana para satisfazer o IDE
-        has_res = (df_b["COD_NAT"] == "04").any()
-        if not has_res:
+        # Contas de resultado: COD_NAT '04'
+        conta_resultado = tensor.natureza == "04"
+        if not conta_resultado.any():
             self.resultados["4.3_Omissao_Encerramento"] = {
                 "status": "SKIPPED",
                 "msg": "Nenhuma conta de resultado (04) identificada.",
@@ -860,61 +1199,51 @@ class ECDAuditor:
             return
 
         # --- AJUSTE FORENSE: Apenas contas Analíticas ---
-        if "IND_CTA" not in df_b.columns and not self.df_plano.empty:
-            df_b = pd.merge(
-                df_b, self.df_plano[["COD_CTA", "IND_CTA"]], on="COD_CTA", how="left"
-            )
-
-        df_res = df_b[
-            (df_b["COD_NAT"] == "04") & (df_b["IND_CTA"].str.upper() == "A")
-        ].copy()
-
-        if df_res.empty:
+        mascara = (conta_resultado & tensor.analitica)[:, None] & tensor.presente
+        if not mascara.any():
             self.resultados["4.3_Omissao_Encerramento"] = {
                 "status": "SKIPPED",
                 "msg": "Nenhuma conta analítica de resultado identificada.",
             }
             return
 
-        # Verifica Saldo Final no ÚLTIMO MÊS do arquivo
-        ultima_data = df_res["DT_FIN"].max()
-        df_final = df_res[df_res["DT_FIN"] == ultima_data].copy()
+        # Saldo Final no ÚLTIMO MÊS com conta de resultado no arquivo
+        ultimo_mes = int(np.flatnonzero(mascara.any(axis=0))[-1])
+        contas_final = np.flatnonzero(mascara[:, ultimo_mes])
+        contas_final = contas_final[np.argsort(tensor.linha[contas_final, ultimo_mes])]
 
         # --- CONFRONTO COM LANÇAMENTOS 'E' DO DIÁRIO ---
-        # Como nosso df_final está REVERTIDO (Pré-Encerramento),
+        # Como o balancete está REVERTIDO (Pré-Encerramento),
         # a soma dele com os lançamentos 'E' do diário deve ser rigorosamente zero.
+        vl_encerramento = np.zeros(len(contas_final))
+        ctx = self.contexto
+        df_d = ctx.diario
+        if not df_d.empty and {"IND_LCTO", "COD_CTA", "VL_SINAL"}.issubset(df_d.columns):
+            total_e = df_d["VL_SINAL"][ctx.encerramento].groupby(
+                df_d["COD_CTA"][ctx.encerramento]
+            ).sum()
+            vl_encerramento = (
+                total_e.reindex(tensor.contas[contas_final]).fillna(0.0).to_numpy()
+            )
 
-        # 1. Agrega lançamentos do tipo 'E' por conta
-        df_d = self.df_diario.copy()
-        mask_e = df_d["IND_LCTO"].str.upper() == "E"
-        df_e_total = df_d[mask_e].groupby("COD_CTA")["VL_SINAL"].sum().reset_index()
-        df_e_total.rename(columns={"VL_SINAL": "VL_ENCERRAMENTO"}, inplace=True)
-
-        # 2. Merge com o Balancete de Dezembro
-        df_confronto = pd.merge(
-            df_final,
-            df_e_total,
-            on="COD_CTA",
-            how="left",
-        ).fillna(0.0)
+        saldo_fin = tensor.valores[contas_final, ultimo_mes, tensor.FIN]
+        saldo_restante = saldo_fin + vl_encerramento
 
-        # 3. Cálculo da Sobra: Saldo Pré-Encerramento + Lançamentos de Zeramento
-        df_confronto["SALDO_RESTANTE"] = df_confronto.apply(
-            lambda x: x["VL_SLD_FIN_SIG"] + x["VL_ENCERRAMENTO"], axis=1
+        df_confronto = pd.DataFrame(
+            {
+                "COD_CTA": tensor.contas[contas_final],
+                "CONTA": tensor.nome[contas_final],
+                "VL_SLD_FIN_SIG": saldo_fin,
+                "VL_ENCERRAMENTO": vl_encerramento,
+                "SALDO_RESTANTE": saldo_restante,
+            }
         )
 
-        # Adiciona nome da conta para o relatório
-        if "CONTA" not in df_confronto.columns and not self.df_plano.empty:
-            df_confronto = pd.merge(
-                df_confronto,
-                self.df_plano[["COD_CTA", "CONTA"]],
-                on="COD_CTA",
-                how="left",
-            )
-
         # Filtra onde a sobra != 0
-        erros = df_confronto[abs(df_confronto["SALDO_RESTANTE"]) > 0.01].copy()
-        soma_erros = sum(abs(x) for x in erros["SALDO_RESTANTE"])
+        erros = df_confronto[
+            np.abs(saldo_restante) > self.limiar("4.3_Omissao_Encerramento", "tolerancia")
+        ].copy()
+        soma_erros = float(np.abs(erros["SALDO_RESTANTE"]).sum())
 
         if erros.empty:
             self.resultados["4.3_Omissao_Encerramento"] = {
@@ -927,19 +1256,7 @@ class ECDAuditor:
                 "status": "REPROVADO",
                 "impacto": soma_erros,
                 "msg": f"{len(erros)} contas de resultado com encerramento falho ou omisso.",
-                "erros": erros[
-                    [
-                        "COD_CTA",
-                        "CONTA",
-                        "VL_SLD_FIN_SIG",
-                        "VL_ENCERRAMENTO",
-                        "SALDO_RESTANTE",
-                    ]
-                ]
-                if "CONTA" in erros.columns
-                else erros[
-                    ["COD_CTA", "VL_SLD_FIN_SIG", "VL_ENCERRAMENTO", "SALDO_RESTANTE"]
-                ],
+                "erros": erros,
             }
 
     # -------------------------------------------------------------------------
@@ -961,78 +1278,21 @@ class ECDAuditor:
         if self.df_balancete.empty:
             return
 
-        # Identificar contas caixa (Geralmente 1.01.01... ou Pelo nome 'CAIXA')
-        # Melhor usar COD_NAT = '01' e Nível 1 ou 2? Não muito preciso.
-        # Vamos usar regex no nome ou COD_CTA_REF começando com 1.01.01
-
-        df_b = self.df_balancete.copy()
-
-        # Merge com plano se precisar de nome
-        if "CONTA" not in df_b.columns and not self.df_plano.empty:
-            df_b = pd.merge(
-                df_b,
-                self.df_plano[["COD_CTA", "CONTA"]],
-                on="COD_CTA",
-                how="left",
-            )
-
-        if (
-            "COD_CTA_REF" not in df_b.columns
-            and self.df_plano is not None
-            and "COD_CTA_REF" in self.df_plano.columns
-        ):
-            df_b = pd.merge(
-                df_b,
-                self.df_plano[["COD_CTA", "COD_CTA_REF"]],
-                on="COD_CTA",
-                how="left",
-            )
-
-        # --- AJUSTE FORENSE: Apenas contas Analíticas ---
-        if "IND_CTA" not in df_b.columns and not self.df_plano.empty:
-            df_b = pd.merge(
-                df_b, self.df_plano[["COD_CTA", "IND_CTA"]], on="COD_CTA", how="left"
-            )
-
-        # --- AJUSTE FORENSE: Apenas Contas de Ativo (Natureza 01) ---
-        if "COD_NAT" not in df_b.columns and not self.df_plano.empty:
-            df_b = pd.merge(
-                df_b,
-                self.df_plano[["COD_CTA", "COD_NAT"]],
-                on="COD_CTA",
-                how="left",
-            )
-
-        # Filtro de Amostra: Apenas Analíticas de Ativo
-        mask_analitica_ativo = df_b["IND_CTA"].str.upper() == "A"
+        tensor = self.tensor_balancete
 
-        if "COD_NAT" in df_b.columns:
-            # Garante comparação segura independente de ser float, int ou str
-            mask_analitica_ativo &= df_b["COD_NAT"].astype(str).str.zfill(2) == "01"
+        # --- AJUSTE FORENSE: Apenas Analíticas de Ativo (Natureza 01) ---
+        conta_alvo = tensor.analitica.copy()
+        if tensor.tem_natureza:
+            conta_alvo &= tensor.natureza == "01"
 
-        df_b = df_b[mask_analitica_ativo].copy()
-
-        # Critério de Disponibilidades: (REF 1.01.01 ou Nome contendo CAIXA/BANCO/DISPONIBILIDADE)
-        mask_disponibilidade = pd.Series([False] * len(df_b), index=df_b.index)
-
-        # 1. Por Referencial (Plano Contas Referencial RFB - Grupo 1.01.01)
-        if "COD_CTA_REF" in df_b.columns:
-            mask_disponibilidade |= (
-                df_b["COD_CTA_REF"].astype(str).str.startswith("1.01.01")
-            )
-
-        # 2. Por Nome (Fallback para quando não há mapeamento)
-        if "CONTA" in df_b.columns:
-            keywords = ["CAIXA", "BANCO", "DISPONIBILIDADE", "APLICAÇÃO", "CASH"]
-            pattern = "|".join(keywords)
-            mask_disponibilidade |= (
-                df_b["CONTA"].str.upper().str.contains(pattern, na=False)
-            )
+        # Critério de Disponibilidades: REF 1.01.01 (RFB) ou nome CAIXA/BANCO/...
+        conta_alvo &= MotorRegras.padrao().selecionar(
+            "DISPONIBILIDADES", tensor.cod_cta_ref
+        ) | tensor.contas_com_nome(self.TERMOS_DISPONIBILIDADE)
 
         # Um 'Estouro' é um Ativo com saldo Credor (negativo no nosso sistema)
-        mask_estouro = mask_disponibilidade & (df_b["VL_SLD_FIN_SIG"] < 0)
-
-        erros = df_b[mask_estouro].copy()
+        mascara = conta_alvo[:, None] & (tensor.valores[:, :, tensor.FIN] < 0)
+        erros = tensor.linhas(mascara)
 
         if erros.empty:
             self.resultados["5.2_Estouro_Caixa"] = {
@@ -1040,8 +1300,7 @@ class ECDAuditor:
                 "impacto": 0.0,
             }
         else:
-            # Agrupar impacto (maior estouro)
-            impacto = sum(abs(x) for x in erros["VL_SLD_FIN_SIG"])
+            impacto = float(np.abs(erros["VL_SLD_FIN_SIG"]).sum())
             self.resultados["5.2_Estouro_Caixa"] = {
                 "status": "REPROVADO",
                 "impacto": impacto,
@@ -1057,89 +1316,51 @@ class ECDAuditor:
         if self.df_balancete.empty:
             return
 
-        # Filtrar Passivo (COD_NAT 02 ou REF 2)
-        df_b = self.df_balancete.copy()
-
-        if (
-            "COD_NAT" not in df_b.columns or "IND_CTA" not in df_b.columns
-        ) and not self.df_plano.empty:
-            cols_to_add = [
-                c
-                for c in ["COD_CTA", "COD_NAT", "IND_CTA"]
-                if c in self.df_plano.columns
-            ]
-            df_b = pd.merge(
-                df_b,
-                self.df_plano[cols_to_add],
-                on="COD_CTA",
-                how="left",
-                suffixes=("", "_extra"),
-            )
+        tensor = self.tensor_balancete
 
         # Filtro: Apenas Passivo (02) e apenas Analíticas (A)
-        mask_analitica_passivo = pd.Series([True] * len(df_b), index=df_b.index)
-
-        if "COD_NAT" in df_b.columns:
-            mask_analitica_passivo &= df_b["COD_NAT"].astype(str).str.zfill(2) == "02"
-
-        if "IND_CTA" in df_b.columns:
-            mask_analitica_passivo &= df_b["IND_CTA"].str.upper() == "A"
-
-        df_b_filtered = df_b[mask_analitica_passivo].copy()
+        conta_alvo = tensor.analitica & tensor.presente.any(axis=1)
+        if tensor.tem_natureza:
+            conta_alvo &= tensor.natureza == "02"
+
+        # Movimento do ano e saldo final do último mês presente de cada conta
+        vl_deb = tensor.valores[:, :, tensor.DEB].sum(axis=1)
+        vl_cred = tensor.valores[:, :, tensor.CRED].sum(axis=1)
+        n_meses = tensor.presente.shape[1]
+        ultimo = n_meses - 1 - np.argmax(tensor.presente[:, ::-1], axis=1)
+        saldo_fin = tensor.valores[np.arange(len(tensor.contas)), ultimo, tensor.FIN]
+
+        # Saldo relevante (> saldo_minimo) sem nem DEB nem CRED o ano todo
+        mask_estatico = (
+            conta_alvo
+            & (np.abs(saldo_fin) > self.limiar("5.3_Passivo_Ficticio", "saldo_minimo"))
+            & (vl_deb == 0)
+            & (vl_cred == 0)
+        )
 
-        if df_b_filtered.empty:
+        if not mask_estatico.any():
             self.resultados["5.3_Passivo_Ficticio"] = {
                 "status": "APROVADO",
                 "impacto": 0.0,
             }
             return
 
-        # Contas analíticas com saldo relevante que não tiveram nem DEB nem CRED o ano todo
-        agg_contas = (
-            df_b_filtered.groupby("COD_CTA")
-            .agg(
-                {
-                    "VL_DEB": "sum",
-                    "VL_CRED": "sum",
-                    "VL_SLD_FIN_SIG": "last",  # Saldo final do periodo
-                }
-            )
-            .reset_index()
-        )
-
-        agg_contas = agg_contas[
-            abs(agg_contas["VL_SLD_FIN_SIG"]) > 1000
-        ]  # Filtra saldo relevante > 1000
-
-        mask_estatico = (agg_contas["VL_DEB"] == 0) & (agg_contas["VL_CRED"] == 0)
-        estaticas = agg_contas[mask_estatico].copy()
-
-        # Adiciona nome da conta para o relatório
-        if "CONTA" not in estaticas.columns and not self.df_plano.empty:
-            estaticas = pd.merge(
-                estaticas,
-                self.df_plano[["COD_CTA", "CONTA"]],
-                on="COD_CTA",
-                how="left",
-            )
-
-        if estaticas.empty:
-            self.resultados["5.3_Passivo_Ficticio"] = {
-                "status": "APROVADO",
-                "impacto": 0.0,
-            }
-        else:
-            impacto = sum(abs(x) for x in estaticas["VL_SLD_FIN_SIG"])
-            self.resultados["5.3_Passivo_Ficticio"] = {
-                "status": "ALERTA",
-                "impacto": impacto,
-                "msg": f"{len(estaticas)} contas de passivo sem movimentação no período.",
-                "detalhes": estaticas[
-                    ["COD_CTA", "CONTA", "VL_DEB", "VL_CRED", "VL_SLD_FIN_SIG"]
-                ]
-                if "CONTA" in estaticas.columns
-                else estaticas,
+        estaticas = pd.DataFrame(
+            {
+                "COD_CTA": tensor.contas[mask_estatico],
+                "CONTA": tensor.nome[mask_estatico],
+                "VL_DEB": vl_deb[mask_estatico],
+                "VL_CRED": vl_cred[mask_estatico],
+                "VL_SLD_FIN_SIG": saldo_fin[mask_estatico],
             }
+        )
+        impacto = float(np.abs(estaticas["VL_SLD_FIN_SIG"]).sum())
+        self.resultados["5.3_Passivo_Ficticio"] = {
+            "status": "ALERTA",
+            "impacto": impacto,
+            "msg": f"{len(estaticas)} contas de passivo sem movimentação no período.",
+            "detalhes": estaticas,
+        }
 
     def _teste_inversao_natureza(self):
         """
@@ -1148,95 +1369,63 @@ class ECDAuditor:
         """
         if self.df_balancete.empty:
             return
-        df_b = self.df_balancete.copy()
-
-        # Merge info de natureza e conta
-        if "COD_NAT" not in df_b.columns and not self.df_plano.empty:
-            cols = (
-                ["COD_CTA", "COD_NAT", "CONTA"]
-                if "CONTA" in self.df_plano.columns
-                else ["COD_CTA", "COD_NAT"]
-            )
-            df_b = pd.merge(
-                df_b,
-                self.df_plano[cols],
-                on="COD_CTA",
-                how="left",
-            )
 
-        if "COD_NAT" not in df_b.columns:
+        tensor = self.tensor_balancete
+        if not tensor.tem_natureza:
             self.resultados["5.1_Inversao_Natureza"] = {
                 "status": "SKIPPED",
                 "msg": "Sem Natureza",
             }
             return
 
-        # --- AJUSTE FORENSE: Apenas Contas Analíticas ---
-        if "IND_CTA" not in df_b.columns and not self.df_plano.empty:
-            df_b = pd.merge(
-                df_b,
-                self.df_plano[["COD_CTA", "IND_CTA"]],
-                on="COD_CTA",
-                how="left",
-            )
-
-        if "IND_CTA" in df_b.columns:
-            df_b = df_b[df_b["IND_CTA"].str.upper() == "A"].copy()
-
-        # Detectar Redutoras (heuristicamente por nome ou sinal esperado?)
-        # 1. Por Nome: Palavras-chave de redutoras
-        mask_redutora = pd.Series([False] * len(df_b), index=df_b.index)
-        if "CONTA" in df_b.columns:
-            keywords_red = [
-                r"\(-",
-                "REDUTORA",
-                "DEDUÇÃO",
-                "PROVISÃO PARA DEPREC",
-                "AMORTIZAÇÃO",
-                "(-)",
-            ]
-            pattern_red = "|".join(keywords_red)
-            mask_redutora = (
-                df_b["CONTA"].str.upper().str.contains(pattern_red, na=False)
-            )
-
-        # Filtro de Inversão:
-        # ATIVO (01) deve ser Devedor (> 0 no nosso sistema). Se < 0 e não for redutora -> Inversão.
-        mask_ativo_errado = (
-            (df_b["COD_NAT"].astype(str).str.zfill(2) == "01")
-            & (df_b["VL_SLD_FIN_SIG"] < -5)
-            & (~mask_redutora)
-        )  # Tolerância de R$ 5
-
-        # PASSIVO (02 ou 03) deve ser Credor (< 0 no nosso sistema). Se > 0 e não for redutora -> Inversão.
-        mask_passivo_errado = (
-            (df_b["COD_NAT"].astype(str).str.zfill(2).isin(["02", "03"]))
-            & (df_b["VL_SLD_FIN_SIG"] > 5)
-            & (~mask_redutora)
-        )
-
-        erros_df = df_b[mask_ativo_errado | mask_passivo_errado].copy()
-
-        if erros_df.empty:
+        # Detectar Redutoras (heuristicamente por nome)
+        keywords_red = [
+            r"\(-",
+            "REDUTORA",
+            "DEDUÇÃO",
+            "PROVISÃO PARA DEPREC",
+            "AMORTIZAÇÃO",
+            "(-)",
+        ]
+        redutora = tensor.contas_com_nome("|".join(keywords_red))
+        conta_valida = tensor.analitica & ~redutora
+
+        # ATIVO (01) deve ser Devedor (> 0); PASSIVO/PL (02, 03) deve ser Credor (< 0).
+        # Tolerância de R$ 5
+        saldo_fin = tensor.valores[:, :, tensor.FIN]
+        ativo = (conta_valida & (tensor.natureza == "01"))[:, None]
+        passivo = (conta_valida & np.isin(tensor.natureza, ["02", "03"]))[:, None]
+        mascara = (
+            (ativo & (saldo_fin < -5)) | (passivo & (saldo_fin > 5))
+        ) & tensor.presente
+
+        contas_erro = np.flatnonzero(mascara.any(axis=1))
+        if len(contas_erro) == 0:
             self.resultados["5.1_Inversao_Natureza"] = {
                 "status": "APROVADO",
                 "impacto": 0.0,
             }
-        else:
-            # --- AJUSTE FORENSE: Evitar inflar impacto com saldo mensal ---
-            # Pegamos apenas a última ocorrência de inversão de cada conta para o relatório
-            ultimo_erro = (
-                erros_df.sort_values("DT_FIN").groupby("COD_CTA").last().reset_index()
-            )
+            return
+
+        # --- AJUSTE FORENSE: Evitar inflar impacto com saldo mensal ---
+        # Apenas a última ocorrência de inversão de cada conta vai para o relatório
+        n_meses = mascara.shape[1]
+        ultimo = n_meses - 1 - np.argmax(mascara[contas_erro, ::-1], axis=1)
+        ultimo_erro = tensor.df_balancete.iloc[
+            tensor.linha[contas_erro, ultimo]
+        ].reset_index(drop=True)
+        ultimo_erro = ultimo_erro[
+            ["COD_CTA"] + [c for c in ultimo_erro.columns if c != "COD_CTA"]
+        ]
 
-            impacto = sum(abs(x) for x in ultimo_erro["VL_SLD_FIN_SIG"])
+        impacto = float(np.abs(ultimo_erro["VL_SLD_FIN_SIG"]).sum())
 
-            self.resultados["5.1_Inversao_Natureza"] = {
-                "status": "ALERTA",
-                "impacto": impacto,
-                "msg": f"{len(ultimo_erro)} contas analíticas com saldo invertido detectadas.",
-                "detalhes": ultimo_erro,
-            }
+        self.resultados["5.1_Inversao_Natureza"] = {
+            "status": "ALERTA",
+            "impacto": impacto,
+            "msg": f"{len(ultimo_erro)} contas analíticas com saldo invertido detectadas.",
+            "detalhes": ultimo_erro,
+        }
 
     def _teste_consistencia_pl_resultado(self):
         if self.df_balancete.empty or self.df_diario.empty:
@@ -1246,54 +1435,26 @@ class ECDAuditor:
             }
             return
 
-        # 1. Identificar Naturezas
-        df_b = self.df_balancete.copy()
-        if "COD_NAT" not in df_b.columns and not self.df_plano.empty:
-            df_b = pd.merge(
-                df_b,
-                self.df_plano[["COD_CTA", "COD_NAT"]],
-                on="COD_CTA",
-                how="left",
-            )
+        # 1. Identificar Naturezas (já normalizadas no contexto)
+        ctx = self.contexto
+        df_b = ctx.balancete
 
         # 2. Calcular Lucro/Prejuízo Apurado (Natureza 04 - Antes do Zeramento)
         # O Processor restaura saldos pré-zeramento, então o VL_SLD_FIN_SIG de Dezembro de contas 04
         # representa o resultado acumulado do ano.
-        df_dez = df_b[df_b["DT_FIN"].astype(str).str.contains("-12-31")].copy()
+        mask_dez = ((ctx.dt_fin.dt.month == 12) & (ctx.dt_fin.dt.day == 31)).to_numpy()
 
         # Filtra apenas Analíticas de Resultado (04)
-        if "IND_CTA" not in df_dez.columns and not self.df_plano.empty:
-            df_dez = pd.merge(
-                df_dez,
-                self.df_plano[["COD_CTA", "IND_CTA"]],
-                on="COD_CTA",
-                how="left",
-            )
-
-        mask_resultado = (df_dez["COD_NAT"].astype(str).str.zfill(2) == "04") & (
-            df_dez["IND_CTA"].str.upper() == "A"
-        )
+        mask_resultado = mask_dez & (ctx.natureza_balancete == "04") & ctx.analitica
 
-        df_apura = df_dez[mask_resultado]
+        df_apura = df_b[mask_resultado]
         lucro_esperado = df_apura["VL_SLD_FIN_SIG"].sum()
 
         # 3. Identificar Destino no PL (Natureza 03) via Lançamentos de Encerramento (E)
-        df_d = self.df_diario.copy()
-        # Merge com plano para saber quem é 03
-        if "COD_NAT" not in df_d.columns and not self.df_plano.empty:
-            df_d = pd.merge(
-                df_d,
-                self.df_plano[["COD_CTA", "COD_NAT"]],
-                on="COD_CTA",
-                how="left",
-            )
-
         # Filtra lançamentos de encerramento (IND_LCTO = 'E') que atingiram o PL (03)
-        mask_transferencia = (df_d["IND_LCTO"] == "E") & (
-            df_d["COD_NAT"].fillna("").astype(str).str.zfill(2) == "03"
-        )
+        mask_transferencia = ctx.encerramento & (ctx.natureza_diario == "03")
 
-        df_transf = df_d[mask_transferencia].copy()
+        df_transf = ctx.diario[mask_transferencia]
         lucro_no_pl = df_transf["VL_SINAL"].sum()  # Saldo líquido transferido para o PL
 
         # 4. Confronto
@@ -1313,7 +1474,8 @@ class ECDAuditor:
             ]
         )
 
-        if divergencia < 100:  # Tolerância para arredondamentos ou pequenos ajustes
+        # Tolerância para arredondamentos ou pequenos ajustes
+        if divergencia < self.limiar("5.4_Consistencia_PL_Resultado", "tolerancia"):
             self.resultados["5.4_Consistencia_PL_Resultado"] = {
                 "status": "APROVADO",
                 "impacto": 0.0,
@@ -1333,3 +1495,266 @@ class ECDAuditor:
                     ],
                 },
             }
+
+    # -------------------------------------------------------------------------
+    # GRUPO 6: Análise Estatística
+    # -------------------------------------------------------------------------
+    def analisar_estatisticas(self):
+        """Executa os testes estatísticos sobre os saldos mensais."""
+        self._teste_anomalias_movimento()
+
+    @monitor_task("ECDAuditor", "6.1_Anomalias_Movimento")
+    def _teste_anomalias_movimento(self):
+        """
+        6.1. Anomalias de Movimento
+        Conta × mês cujo movimento (VL_DEB − VL_CRED) foge do histórico da
+        própria conta (mesmo mês de anos anteriores, havendo histórico) e do
+        comportamento das contas irmãs (mesma COD_CTA_SUP). Escore z robusto
+        (mediana/MAD), sem limites fixos em reais (ver core/anomalias.py).
+        """
+        if self.df_balancete.empty:
+            return
+
+        limiares = self.limiares["6.1_Anomalias_Movimento"]
+        escores = EscoreAnomalias(**limiares).pontuar(
+            self.tensor_balancete, self.historico_balancete
+        )
+        if escores.empty or not escores["ANOMALA"].any():
+            self.resultados["6.1_Anomalias_Movimento"] = {
+                "status": "APROVADO",
+                "impacto": 0.0,
+            }
+            return
+
+        anomalias = (
+            escores[escores["ANOMALA"]]
+            .drop(columns=["LINHA", "ANOMALA"])
+            .sort_values("ESCORE", ascending=False)
+            .reset_index(drop=True)
+        )
+        impacto = float((anomalias["MOVIMENTO"] - anomalias["ESPERADO"]).abs().sum())
+        sazonais = int((anomalias["BASE"] == "SAZONAL").sum())
+        self.resultados["6.1_Anomalias_Movimento"] = {
+            "status": "ALERTA",
+            "impacto": impacto,
+            "msg": (
+                f"{len(anomalias)} meses de {anomalias['COD_CTA'].nunique()} contas com "
+                f"movimento atípico (escore robusto > {limiares['limiar']}; "
+                f"{sazonais} contra o mesmo mês de anos anteriores)."
+            ),
+            "detalhes": anomalias,
+        }
+
+    # -------------------------------------------------------------------------
+    # GRUPO 7: Testes de Lançamentos (Journal Entry Testing)
+    # -------------------------------------------------------------------------
+    def analisar_lancamentos(self):
+        """Executa os testes clássicos de lançamentos manuais sobre o Diário."""
+        self._teste_fim_de_semana_feriado()
+        self._teste_lancamento_apos_encerramento()
+        self._teste_valores_redondos()
+        self._teste_abaixo_alcada()
+        self._teste_pares_incomuns()
+        self._teste_historico_vazio()
+        self._teste_lancamento_extemporaneo()
+
+    def _resultado_lancamentos(
+        self,
+        nome: str,
+        mascara: np.ndarray,
+        descricao: str,
+        colunas_extras: Optional[Dict[str, Any]] = None,
+        detalhes: Optional[pd.DataFrame] = None,
+        somente_debitos: bool = False,
+    ) -> None:
+        """
+        Resultado comum do Grupo 7: linhas marcadas do Diário (fora do
+        encerramento) resumidas por conta em `detalhes` (salvo resumo próprio
+        do teste), com as linhas em si como evidência (predicado sobre o
+        Diário, ver EvidenciaAuditoria). O impacto soma |VL_SINAL| das linhas
+        marcadas; com `somente_debitos` (testes que marcam o lançamento
+        inteiro), só o lado devedor, para não contar o valor duas vezes.
+        """
+        ctx = self.contexto
+        df_d = ctx.diario
+        mascara = np.asarray(mascara, dtype=bool) & ~ctx.encerramento
+        if not mascara.any():
+            self.resultados[nome] = {"status": "APROVADO", "impacto": 0.0}
+            return
+
+        valor = np.abs(df_d["VL_SINAL"].to_numpy(dtype="float64", na_value=np.nan))[mascara]
+        contas = df_d["COD_CTA"].to_numpy()[mascara]
+        resumo = (
+            pd.DataFrame({"COD_CTA": contas, "VALOR": np.nan_to_num(valor)})
+            .groupby("COD_CTA", sort=False)["VALOR"]
+            .agg(LINHAS="size", VALOR="sum")
+            .reset_index()
+        )
+        nomes = ctx.atributo_conta("CONTA")
+        if nomes is not None:
+            resumo.insert(1, "CONTA", resumo["COD_CTA"].map(nomes))
+        resumo = resumo.sort_values("VALOR", ascending=False, kind="stable").reset_index(drop=True)
+        if somente_debitos:
+            sinal = df_d["VL_SINAL"].to_numpy(dtype="float64", na_value=0.0)[mascara]
+            impacto = float(np.clip(sinal, 0.0, None).sum())
+        else:
+            impacto = float(resumo["VALOR"].sum())
+
+        self.resultados[nome] = {
+            "status": "ALERTA",
+            "impacto": impacto,
+            "msg": f"{int(mascara.sum())} linhas do Diário {descricao} ({len(resumo)} contas).",
+            "detalhes": resumo if detalhes is None else detalhes,
+            "evidencia": EvidenciaAuditoria(
+                df_d,
+                filtro=mascara,
+                colunas_extras={"DT_LCTO": ctx.dt_lcto, **(colunas_extras or {})},
+            ),
+        }
+
+    @monitor_task("ECDAuditor", "7.1_Fim_De_Semana_Feriado")
+    def _teste_fim_de_semana_feriado(self):
+        """
+        7.1. Lançamentos em Fim de Semana ou Feriado
+        Sábado/domingo pelo dia da semana aritmético e feriados nacionais
+        (fixos e móveis, tabela pré-calculada) mais os feriados locais dos
+        limiares, por pertinência vetorizada (ver core/lancamentos_atipicos.py).
+        """
+        dias_lcto = dias(self.contexto.dt_lcto)
+        fim_de_semana = mascara_fim_de_semana(dias_lcto)
+        feriado = mascara_feriado(
+            dias_lcto, self.limiar("7.1_Fim_De_Semana_Feriado", "feriados_extras")
+        )
+        motivo = np.where(feriado, "FERIADO", np.where(fim_de_semana, "FIM_DE_SEMANA", ""))
+        self._resultado_lancamentos(
+            "7.1_Fim_De_Semana_Feriado",
+            fim_de_semana | feriado,
+            "em fim de semana ou feriado",
+            {"MOTIVO": motivo},
+        )
+
+    @monitor_task("ECDAuditor", "7.2_Lancamento_Apos_Encerramento")
+    def _teste_lancamento_apos_encerramento(self):
+        """
+        7.2. Lançamentos Após o Encerramento
+        Lançamentos normais datados depois do fim do período: o último DT_FIN
+        do balancete ou, sem ele, a data do último lançamento de encerramento
+        ('E'). Encerramentos trimestrais não antecipam o fechamento.
+        """
+        ctx = self.contexto
+        fechamento = ctx.dt_fin.max()
+        if pd.isna(fechamento) and ctx.encerramento.any():
+            fechamento = ctx.dt_lcto[ctx.encerramento].max()
+        if pd.isna(fechamento):
+            self.resultados["7.2_Lancamento_Apos_Encerramento"] = {
+                "status": "SKIPPED",
+                "impacto": 0.0,
+                "msg": "Sem data de encerramento do período.",
+            }
+            return
+
+        mascara = (ctx.dt_lcto > fechamento).to_numpy(dtype=bool, na_value=False)
+        self._resultado_lancamentos(
+            "7.2_Lancamento_Apos_Encerramento",
+            mascara,
+            f"datadas após o encerramento ({fechamento:%d/%m/%Y})",
+        )
+
+    @monitor_task("ECDAuditor", "7.3_Valores_Redondos")
+    def _teste_valores_redondos(self):
+        """
+        7.3. Valores Redondos
+        Valores múltiplos exatos de um valor redondo (ex: R$ 1.000,00),
+        pelo resto da divisão em centavos inteiros (sem erro de ponto flutuante).
+        """
+        limiares = self.limiares["7.3_Valores_Redondos"]
+        mascara = mascara_valor_redondo(
+            centavos(self.contexto.diario["VL_SINAL"]),
+            limiares["multiplo"],
+            limiares["valor_minimo"],
+        )
+        self._resultado_lancamentos(
+            "7.3_Valores_Redondos",
+            mascara,
+            f"com valor múltiplo de R$ {limiares['multiplo']:,.2f}",
+        )
+
+    @monitor_task("ECDAuditor", "7.4_Abaixo_Alcada")
+    def _teste_abaixo_alcada(self):
+        """
+        7.4. Valores Logo Abaixo da Alçada
+        Valores até `faixa` abaixo de um limite de aprovação (ex: R$ 9.600 a
+        R$ 9.999,99 para a alçada de R$ 10 mil): fracionamento para escapar
+        da aprovação superior.
+        """
+        limiares = self.limiares["7.4_Abaixo_Alcada"]
+        mascara = mascara_abaixo_alcada(
+            centavos(self.contexto.diario["VL_SINAL"]),
+            limiares["alcadas"],
+            limiares["faixa"],
+        )
+        self._resultado_lancamentos(
+            "7.4_Abaixo_Alcada",
+            mascara,
+            f"até {limiares['faixa']:.0%} abaixo de uma alçada de aprovação",
+        )
+
+    @monitor_task("ECDAuditor", "7.5_Pares_Incomuns")
+    def _teste_pares_incomuns(self):
+        """
+        7.5. Pares de Contas Incomuns
+        Lançamentos com um par conta debitada × conta creditada raro no ano
+        (frequência até o percentil) ou nunca visto nos anos anteriores do
+        mesmo CNPJ (historico_fluxos). Pares por produto esparso e contados
+        por chave inteira (ver ParesIncomuns).
+        """
+        limiares = self.limiares["7.5_Pares_Incomuns"]
+        mascara, pares = ParesIncomuns(**limiares).pontuar(
+            self.contexto.diario, self.contexto.encerramento, self.historico_fluxos
+        )
+        novos = int(pares["NOVO"].sum()) if not pares.empty else 0
+        self._resultado_lancamentos(
+            "7.5_Pares_Incomuns",
+            mascara,
+            f"em lançamentos com par débito/crédito incomum: {len(pares)} pares, "
+            f"{novos} nunca vistos em anos anteriores",
+            detalhes=pares,
+            somente_debitos=True,
+        )
+
+    @monitor_task("ECDAuditor", "7.6_Historico_Vazio")
+    def _teste_historico_vazio(self):
+        """
+        7.6. Histórico Vazio ou Curto
+        HIST nulo ou com menos caracteres que o mínimo (avaliado uma vez
+        por histórico distinto).
+        """
+        df_d = self.contexto.diario
+        minimo = self.limiar("7.6_Historico_Vazio", "minimo_caracteres")
+        if "HIST" in df_d.columns:
+            mascara = mascara_historico_curto(df_d["HIST"], minimo)
+        else:
+            mascara = np.ones(len(df_d), dtype=bool)
+        self._resultado_lancamentos(
+            "7.6_Historico_Vazio",
+            mascara,
+            f"com histórico vazio ou com menos de {minimo} caracteres",
+        )
+
+    @monitor_task("ECDAuditor", "7.7_Lancamento_Extemporaneo")
+    def _teste_lancamento_extemporaneo(self):
+        """
+        7.7. Lançamentos Extemporâneos
+        IND_LCTO = 'X': lançamento extemporâneo, que altera fatos de
+        períodos já encerrados.
+        """
+        df_d = self.contexto.diario
+        if "IND_LCTO" in df_d.columns:
+            mascara = mascara_termos(df_d["IND_LCTO"], r"^\s*X\s*$")
+        else:
+            mascara = np.zeros(len(df_d), dtype=bool)
+        self._resultado_lancamentos(
+            "7.7_Lancamento_Extemporaneo",
+            mascara,
+            "com indicador de lançamento extemporâneo (IND_LCTO = 'X')",
+        )
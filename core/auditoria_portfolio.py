@@ -0,0 +1,405 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import duckdb
+import pandas as pd
+import pyarrow.parquet as pq
+
+from core.auditor import ECDAuditor
+from core.regras_auditoria import MotorRegras
+from exporters.csv_writer import gravar_csv
+
+# Logger local para uso interno do módulo (não configura nível globalmente)
+logger = logging.getLogger(__name__)
+
+
+class AuditorPortfolio:
+    """
+    Auditoria da carteira inteira, em SQL (DuckDB) sobre os Parquets
+    consolidados (consolidado/CONSOLIDADO_*.parquet).
+
+    O ECDAuditor enxerga um ECD por vez, na memória de um worker. Aqui os
+    testes rodam sobre todos os CNPJs e exercícios de uma vez, agrupados por
+    CNPJ e ano, sem carregar as tabelas no pandas: o DuckDB lê os Parquets
+    em colunas, paraleliza cada consulta e, com `memoria_limite`, despeja em
+    disco o que não couber (out-of-core). As consultas dos testes também
+    rodam em paralelo, cada uma em seu cursor.
+
+    Os critérios e limiares são os do ECDAuditor (regras da tabela de regras,
+    termos de ruído, limites do MAD de Benford), e o resultado tem o mesmo
+    esquema do scorecard de AuditExporter._gerar_scorecard_raw, precedido de
+    CNPJ e ANO. O teste 4.5 só existe aqui: o mesmo lançamento (data, conta,
+    valores e histórico) presente em ECDs diferentes do mesmo CNPJ.
+    """
+
+    # Insumo -> tabela consolidada
+    TABELAS: Dict[str, str] = {
+        "diario": "CONSOLIDADO_06_Lancamentos_Contabeis.parquet",
+        "saldos": "CONSOLIDADO_03_Balancetes_Mensais.parquet",
+    }
+
+    # Colunas usadas pelos testes (ausentes viram NULL na view)
+    COLUNAS: Dict[str, Dict[str, str]] = {
+        "diario": {
+            "CNPJ": "VARCHAR",
+            "ORIGEM_PERIODO": "VARCHAR",
+            "DT_LCTO": "DATE",
+            "IND_LCTO": "VARCHAR",
+            "COD_CTA": "VARCHAR",
+            "CONTA": "VARCHAR",
+            "HIST": "VARCHAR",
+            "VL_D": "DOUBLE",
+            "VL_C": "DOUBLE",
+            "VL_SINAL": "DOUBLE",
+        },
+        "saldos": {
+            "CNPJ": "VARCHAR",
+            "ORIGEM_PERIODO": "VARCHAR",
+            "DT_FIN": "DATE",
+            "COD_CTA": "VARCHAR",
+            "CONTA": "VARCHAR",
+            "IND_CTA": "VARCHAR",
+            "COD_NAT": "VARCHAR",
+            "COD_CTA_REF": "VARCHAR",
+            "VL_DEB": "DOUBLE",
+            "VL_CRED": "DOUBLE",
+            "VL_SLD_FIN_SIG": "DOUBLE",
+        },
+    }
+
+    # Teste -> (método que monta o SQL, insumos)
+    TESTES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+        "1.1_Cruzamento_Diario_Balancete": ("_sql_cruzamento", ("diario", "saldos")),
+        "4.1_Lei_Benford": ("_sql_benford", ("diario",)),
+        "4.2_Duplicidades": ("_sql_duplicidades", ("diario",)),
+        "4.3_Omissao_Encerramento": ("_sql_omissao_encerramento", ("diario", "saldos")),
+        "4.5_Duplicidades_Entre_Periodos": ("_sql_duplicidades_entre_periodos", ("diario",)),
+        "5.2_Estouro_Caixa": ("_sql_estouro_caixa", ("saldos",)),
+    }
+
+    COLUNAS_SCORECARD = [
+        "CNPJ",
+        "ANO",
+        "Teste",
+        "Status",
+        "Impacto Financeiro Est.",
+        "Mensagem",
+    ]
+
+    def __init__(
+        self,
+        dir_consolidado: str,
+        max_workers: int = 4,
+        memoria_limite: Optional[str] = None,
+        dir_temp: Optional[str] = None,
+    ):
+        """
+        Args:
+            dir_consolidado: Pasta com os CONSOLIDADO_*.parquet.
+            max_workers: Testes executados ao mesmo tempo.
+            memoria_limite: Limite de memória do DuckDB (ex: "4GB"); acima
+                dele, junções e agregações vão para `dir_temp`.
+            dir_temp: Pasta de despejo (padrão: consolidado/.duckdb_tmp).
+        """
+        self.dir_consolidado = dir_consolidado
+        self.max_workers = max_workers
+        self.memoria_limite = memoria_limite
+        self.dir_temp = dir_temp or os.path.join(dir_consolidado, ".duckdb_tmp")
+
+    # --- Conexão e views ---
+
+    def insumos_disponiveis(self) -> Set[str]:
+        return {
+            insumo
+            for insumo, arquivo in self.TABELAS.items()
+            if os.path.exists(os.path.join(self.dir_consolidado, arquivo))
+        }
+
+    def _conectar(self, insumos: Iterable[str]) -> duckdb.DuckDBPyConnection:
+        con = duckdb.connect()
+        con.execute(f"SET temp_directory = '{self.dir_temp}'")
+        if self.memoria_limite:
+            con.execute(f"SET memory_limit = '{self.memoria_limite}'")
+        for insumo in insumos:
+            con.execute(self._sql_view(insumo))
+        return con
+
+    def _sql_view(self, insumo: str) -> str:
+        """View tipada do insumo: colunas ausentes no Parquet viram NULL."""
+        caminho = os.path.join(self.dir_consolidado, self.TABELAS[insumo])
+        existentes = set(pq.read_schema(caminho).names)
+        colunas = []
+        for nome, tipo in self.COLUNAS[insumo].items():
+            origem = f'"{nome}"' if nome in existentes else "NULL"
+            colunas.append(f"TRY_CAST({origem} AS {tipo}) AS {nome}")
+        data = "DT_LCTO" if insumo == "diario" else "DT_FIN"
+        caminho_sql = caminho.replace("'", "''")
+        return (
+            f"CREATE OR REPLACE VIEW {insumo} AS "
+            f"SELECT *, year({data}) AS ANO FROM ("
+            f"SELECT {', '.join(colunas)} FROM read_parquet('{caminho_sql}'))"
+        )
+
+    # --- Expressões compartilhadas ---
+
+    @staticmethod
+    def _literal(texto: str) -> str:
+        return "'" + texto.replace("'", "''") + "'"
+
+    def _contem(self, coluna: str, padrao: str) -> str:
+        # Mesmo critério de mascara_termos: regex sobre o texto em caixa alta
+        return f"coalesce(regexp_matches(upper({coluna}), {self._literal(padrao)}), false)"
+
+    @staticmethod
+    def _natureza() -> str:
+        return "lpad(trim(COD_NAT), 2, '0')"
+
+    @staticmethod
+    def _analitica() -> str:
+        # Sem IND_CTA (NULL em todas as linhas), nenhuma conta é descartada
+        return "(upper(trim(IND_CTA)) = 'A' OR IND_CTA IS NULL)"
+
+    @staticmethod
+    def _encerramento() -> str:
+        return "coalesce(upper(IND_LCTO) = 'E', false)"
+
+    @staticmethod
+    def _limiar(nome: str, chave: str) -> Any:
+        # Mesmos limiares padrão do ECDAuditor (registro de testes)
+        return ECDAuditor.REGISTRO[nome].limiares[chave]
+
+    # --- Testes (cada SQL devolve CNPJ, ANO, STATUS, IMPACTO, MENSAGEM) ---
+
+    def _sql_cruzamento(self) -> str:
+        tolerancia = self._limiar("1.1_Cruzamento_Diario_Balancete", "tolerancia")
+        return f"""
+        WITH d AS (
+            SELECT CNPJ, COD_CTA, date_trunc('month', DT_LCTO) AS MES,
+                   sum(VL_D) AS VL_D, sum(VL_C) AS VL_C
+            FROM diario WHERE NOT {self._encerramento()}
+            GROUP BY ALL
+        ), b AS (
+            SELECT CNPJ, COD_CTA, date_trunc('month', DT_FIN) AS MES,
+                   sum(VL_DEB) AS VL_DEB, sum(VL_CRED) AS VL_CRED
+            FROM saldos WHERE {self._analitica()}
+            GROUP BY ALL
+        ), c AS (
+            SELECT coalesce(d.CNPJ, b.CNPJ) AS CNPJ,
+                   year(coalesce(d.MES, b.MES)) AS ANO,
+                   coalesce(d.VL_D, 0) - coalesce(b.VL_DEB, 0) AS DIF_DEB,
+                   coalesce(d.VL_C, 0) - coalesce(b.VL_CRED, 0) AS DIF_CRED
+            FROM d FULL OUTER JOIN b
+              ON d.CNPJ = b.CNPJ AND d.COD_CTA = b.COD_CTA AND d.MES = b.MES
+        )
+        SELECT CNPJ, ANO,
+               CASE WHEN count(*) FILTER (erro) > 0 THEN 'REPROVADO' ELSE 'APROVADO' END AS STATUS,
+               coalesce(sum(abs(DIF_DEB) + abs(DIF_CRED)) FILTER (erro), 0) AS IMPACTO,
+               CASE WHEN count(*) FILTER (erro) > 0
+                    THEN count(*) FILTER (erro) || ' divergências encontradas.' ELSE '' END AS MENSAGEM
+        FROM (SELECT *, abs(DIF_DEB) > {tolerancia} OR abs(DIF_CRED) > {tolerancia} AS erro FROM c)
+        GROUP BY CNPJ, ANO
+        """
+
+    def _sql_benford(self) -> str:
+        limiares = ECDAuditor.REGISTRO["4.1_Lei_Benford"].limiares
+        alerta, reprovado = limiares["mad_alerta"], limiares["mad_reprovado"]
+        minimo = limiares["amostra_minima"]
+        # 1º dígito pelos centavos inteiros (como AnaliseBenford), valores >= 1
+        return f"""
+        WITH v AS (
+            SELECT CNPJ, ANO, VL_D AS V FROM diario WHERE VL_D >= 1
+            UNION ALL
+            SELECT CNPJ, ANO, VL_C AS V FROM diario WHERE VL_C >= 1
+        ), c AS (
+            SELECT CNPJ, ANO,
+                   CAST(left(CAST(CAST(round(V * 100) AS BIGINT) AS VARCHAR), 1) AS INTEGER) AS DIGITO,
+                   count(*) AS N
+            FROM v GROUP BY ALL
+        ), g AS (
+            SELECT CNPJ, ANO, sum(N) AS TOTAL FROM c GROUP BY ALL
+        ), f AS (
+            SELECT g.CNPJ, g.ANO, g.TOTAL,
+                   avg(abs(coalesce(c.N, 0) / g.TOTAL - log10(1 + 1 / d.DIGITO))) AS MAD
+            FROM g CROSS JOIN range(1, 10) AS d(DIGITO)
+            LEFT JOIN c ON c.CNPJ = g.CNPJ AND c.ANO = g.ANO AND c.DIGITO = d.DIGITO
+            GROUP BY ALL
+        )
+        SELECT CNPJ, ANO,
+               CASE WHEN TOTAL < {minimo} THEN 'SKIPPED'
+                    WHEN MAD > {reprovado} THEN 'REPROVADO'
+                    WHEN MAD > {alerta} THEN 'ALERTA'
+                    ELSE 'APROVADO' END AS STATUS,
+               CASE WHEN TOTAL < {minimo} THEN 0 ELSE MAD END AS IMPACTO,
+               CASE WHEN TOTAL < {minimo} THEN 'Amostra insuficiente para teste estatístico (<{minimo}).'
+                    ELSE 'MAD: ' || printf('%.5f', MAD) END AS MENSAGEM
+        FROM f
+        """
+
+    def _sql_duplicidades(self) -> str:
+        chave = "CNPJ, ORIGEM_PERIODO, DT_LCTO, COD_CTA, VL_D, VL_C, HIST"
+        financeiras = MotorRegras.padrao().regra("DESPESAS_FINANCEIRAS").para_sql()
+        limiares = ECDAuditor.REGISTRO["4.2_Duplicidades"].limiares
+        ruido = (
+            f"abs(VL_SINAL) < {limiares['valor_ruido']} AND ({self._contem('CONTA', ECDAuditor.TERMOS_RUIDO)}"
+            f" OR {self._contem('HIST', ECDAuditor.TERMOS_RUIDO)} OR {financeiras})"
+        )
+        completa = " AND ".join(f"{c.strip()} IS NOT NULL" for c in chave.split(","))
+        return f"""
+        WITH dup AS (
+            SELECT *, count(*) OVER (PARTITION BY {chave}) AS N
+            FROM diario
+        ), suspeitos AS (
+            SELECT CNPJ, ANO, VL_SINAL FROM dup
+            WHERE N > 1 AND VL_SINAL <> 0
+              AND NOT ({ruido})
+              AND NOT (N > {limiares['lote_minimo']} AND {completa})
+        )
+        SELECT g.CNPJ, g.ANO,
+               CASE WHEN count(s.VL_SINAL) > 0 THEN 'ALERTA' ELSE 'APROVADO' END AS STATUS,
+               coalesce(sum(abs(s.VL_SINAL)), 0) AS IMPACTO,
+               CASE WHEN count(s.VL_SINAL) > 0
+                    THEN count(s.VL_SINAL) || ' lançamentos duplicados suspeitos (filtrados por materialidade/histórico).'
+                    ELSE '' END AS MENSAGEM
+        FROM (SELECT DISTINCT CNPJ, ANO FROM diario) g
+        LEFT JOIN suspeitos s ON s.CNPJ = g.CNPJ AND s.ANO = g.ANO
+        GROUP BY ALL
+        """
+
+    def _sql_duplicidades_entre_periodos(self) -> str:
+        return """
+        WITH l AS (
+            SELECT CNPJ, ANO, DT_LCTO, COD_CTA, VL_D, VL_C, HIST,
+                   count(DISTINCT ORIGEM_PERIODO) AS PERIODOS,
+                   count(*) AS N
+            FROM diario
+            WHERE (VL_D <> 0 OR VL_C <> 0) AND ORIGEM_PERIODO IS NOT NULL
+            GROUP BY ALL
+        )
+        SELECT CNPJ, ANO,
+               CASE WHEN count(*) FILTER (PERIODOS > 1) > 0 THEN 'ALERTA' ELSE 'APROVADO' END AS STATUS,
+               coalesce(sum(abs(VL_D - VL_C) * (PERIODOS - 1)) FILTER (PERIODOS > 1), 0) AS IMPACTO,
+               CASE WHEN count(*) FILTER (PERIODOS > 1) > 0
+                    THEN count(*) FILTER (PERIODOS > 1) || ' lançamentos repetidos em ECDs diferentes do mesmo CNPJ.'
+                    ELSE '' END AS MENSAGEM
+        FROM l GROUP BY CNPJ, ANO
+        """
+
+    def _sql_omissao_encerramento(self) -> str:
+        tolerancia = self._limiar("4.3_Omissao_Encerramento", "tolerancia")
+        return f"""
+        WITH r AS (
+            SELECT CNPJ, ANO, DT_FIN, COD_CTA, VL_SLD_FIN_SIG
+            FROM saldos
+            WHERE {self._natureza()} = '04' AND {self._analitica()}
+        ), ultimo AS (
+            SELECT CNPJ, ANO, max(DT_FIN) AS DT_FIN FROM r GROUP BY ALL
+        ), e AS (
+            SELECT CNPJ, ANO, COD_CTA, sum(VL_SINAL) AS VL_ENCERRAMENTO
+            FROM diario WHERE {self._encerramento()}
+            GROUP BY ALL
+        ), c AS (
+            SELECT r.CNPJ, r.ANO,
+                   r.VL_SLD_FIN_SIG + coalesce(e.VL_ENCERRAMENTO, 0) AS SALDO_RESTANTE
+            FROM r JOIN ultimo USING (CNPJ, ANO, DT_FIN)
+            LEFT JOIN e USING (CNPJ, ANO, COD_CTA)
+        )
+        SELECT g.CNPJ, g.ANO,
+               CASE WHEN count(*) FILTER (abs(SALDO_RESTANTE) > {tolerancia}) > 0
+                    THEN 'REPROVADO' ELSE 'APROVADO' END AS STATUS,
+               coalesce(sum(abs(SALDO_RESTANTE)) FILTER (abs(SALDO_RESTANTE) > {tolerancia}), 0) AS IMPACTO,
+               CASE WHEN count(*) FILTER (abs(SALDO_RESTANTE) > {tolerancia}) > 0
+                    THEN count(*) FILTER (abs(SALDO_RESTANTE) > {tolerancia})
+                         || ' contas de resultado com encerramento falho ou omisso.'
+                    ELSE '' END AS MENSAGEM
+        FROM (SELECT DISTINCT CNPJ, ANO FROM saldos) g
+        LEFT JOIN c ON c.CNPJ = g.CNPJ AND c.ANO = g.ANO
+        GROUP BY ALL
+        """
+
+    def _sql_estouro_caixa(self) -> str:
+        disponibilidades = MotorRegras.padrao().regra("DISPONIBILIDADES").para_sql()
+        alvo = (
+            f"{self._analitica()} AND coalesce({self._natureza()} = '01', true)"
+            f" AND ({disponibilidades} OR {self._contem('CONTA', ECDAuditor.TERMOS_DISPONIBILIDADE)})"
+        )
+        return f"""
+        SELECT CNPJ, ANO,
+               CASE WHEN count(*) FILTER (estouro) > 0 THEN 'REPROVADO' ELSE 'APROVADO' END AS STATUS,
+               coalesce(sum(abs(VL_SLD_FIN_SIG)) FILTER (estouro), 0) AS IMPACTO,
+               CASE WHEN count(*) FILTER (estouro) > 0
+                    THEN count(*) FILTER (estouro) || ' ocorrências de caixa estourado (saldo credor).'
+                    ELSE '' END AS MENSAGEM
+        FROM (SELECT *, ({alvo}) AND VL_SLD_FIN_SIG < 0 AS estouro FROM saldos)
+        GROUP BY CNPJ, ANO
+        """
+
+    # --- Execução ---
+
+    def executar(self, testes: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Executa os testes (todos, se omitido) e devolve o scorecard da
+        carteira: uma linha por CNPJ, ano e teste.
+        """
+        disponiveis = self.insumos_disponiveis()
+        selecionados: List[str] = []
+        for nome in testes if testes is not None else self.TESTES:
+            faltantes = set(self.TESTES[nome][1]) - disponiveis
+            if faltantes:
+                logger.warning(
+                    f"[Portfolio] Teste '{nome}' ignorado: sem {', '.join(sorted(faltantes))}."
+                )
+            else:
+                selecionados.append(nome)
+        if not selecionados:
+            return pd.DataFrame(columns=self.COLUNAS_SCORECARD)
+
+        os.makedirs(self.dir_temp, exist_ok=True)
+        con = self._conectar(disponiveis)
+
+        def _rodar(nome: str) -> Optional[pd.DataFrame]:
+            cursor = con.cursor()
+            try:
+                df = cursor.execute(getattr(self, self.TESTES[nome][0])()).df()
+                df.insert(2, "Teste", nome)
+                return df
+            except Exception as exc:
+                logger.error(f"[Portfolio] Teste '{nome}' falhou: {exc}", exc_info=True)
+                return None
+            finally:
+                cursor.close()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                partes = [df for df in pool.map(_rodar, selecionados) if df is not None]
+        finally:
+            con.close()
+
+        if not partes:
+            return pd.DataFrame(columns=self.COLUNAS_SCORECARD)
+        scorecard = pd.concat(partes, ignore_index=True).rename(
+            columns={
+                "STATUS": "Status",
+                "IMPACTO": "Impacto Financeiro Est.",
+                "MENSAGEM": "Mensagem",
+            }
+        )
+        scorecard["Impacto Financeiro Est."] = scorecard["Impacto Financeiro Est."].astype(
+            "float64"
+        )
+        scorecard["ANO"] = scorecard["ANO"].astype("Int64")
+        ordem_teste = {nome: i for i, nome in enumerate(self.TESTES)}
+        return (
+            scorecard.assign(_ORDEM=scorecard["Teste"].map(ordem_teste))
+            .sort_values(["CNPJ", "ANO", "_ORDEM"], kind="stable")
+            .drop(columns="_ORDEM")
+            .reset_index(drop=True)[self.COLUNAS_SCORECARD]
+        )
+
+    def salvar(self, scorecard: pd.DataFrame) -> List[str]:
+        """Grava o scorecard da carteira (Parquet e CSV PT-BR) no consolidado."""
+        base = os.path.join(self.dir_consolidado, "PORTFOLIO_Auditoria_Scorecard")
+        scorecard.to_parquet(f"{base}.parquet", index=False)
+        gravar_csv(scorecard, f"{base}.csv")
+        return [f"{base}.parquet", f"{base}.csv"]
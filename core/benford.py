@@ -0,0 +1,326 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Logger local para uso interno do módulo (não configura nível globalmente)
+logger = logging.getLogger(__name__)
+
+
+def _esperado_primeiro() -> np.ndarray:
+    d = np.arange(1, 10)
+    return np.log10(1 + 1 / d)
+
+
+def _esperado_segundo() -> np.ndarray:
+    # P(d2) = soma em d1 de log10(1 + 1 / (10·d1 + d2))
+    d1 = np.arange(1, 10)[:, None]
+    d2 = np.arange(0, 10)[None, :]
+    return np.log10(1 + 1 / (10 * d1 + d2)).sum(axis=0)
+
+
+def _esperado_dois_primeiros() -> np.ndarray:
+    d = np.arange(10, 100)
+    return np.log10(1 + 1 / d)
+
+
+class AnaliseBenford:
+    """
+    Bateria completa da Lei de Benford sobre os valores do Diário.
+
+    Os dígitos são extraídos uma única vez, em aritmética inteira sobre os
+    centavos (sem conversão para texto), e cada distribuição sai de um único
+    `np.bincount`:
+
+    - PRIMEIRO: 1º dígito (1–9), base do status do teste 4.1;
+    - SEGUNDO: 2º dígito (0–9);
+    - DOIS_PRIMEIROS: dois primeiros dígitos (10–99);
+    - ULTIMOS_DOIS: dois últimos dígitos da parte inteira (00–99, uniforme),
+      sensível a arredondamentos e valores inventados.
+
+    A conformidade usa o MAD (desvio absoluto médio) com limites por teste
+    (Nigrini para os dígitos iniciais; heurístico para os finais). O
+    detalhamento por conta e por mês usa o mesmo bincount sobre a chave
+    combinada (grupo × dígito).
+    """
+
+    # Teste -> (primeiro código, distribuição esperada, valor mínimo, limites MAD)
+    TESTES: Dict[str, Tuple[int, np.ndarray, float, Tuple[float, float]]] = {
+        "PRIMEIRO": (1, _esperado_primeiro(), 1.0, (0.012, 0.020)),
+        "SEGUNDO": (0, _esperado_segundo(), 10.0, (0.010, 0.012)),
+        "DOIS_PRIMEIROS": (10, _esperado_dois_primeiros(), 10.0, (0.0018, 0.0022)),
+        "ULTIMOS_DOIS": (0, np.full(100, 0.01), 10.0, (0.0030, 0.0045)),
+    }
+
+    def __init__(self, valores: np.ndarray):
+        """
+        Args:
+            valores: Valores monetários da população (um por partida).
+        """
+        self.valores = np.asarray(valores, dtype="float64")
+        self.digitos = self.extrair_digitos(self.valores)
+
+    @staticmethod
+    def populacao_diario(
+        df_diario: pd.DataFrame, periodo: Optional[pd.Series] = None
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        População do teste: débitos e créditos positivos do Diário (VL_D e
+        VL_C concatenados), com COD_CTA e mês alinhados a cada valor.
+
+        Returns:
+            (valores, grupos), em que grupos tem "COD_CTA" e "MES" quando
+            disponíveis.
+        """
+        valores_partes, linhas_partes = [], []
+        for coluna in ("VL_D", "VL_C"):
+            if coluna in df_diario.columns:
+                vals = df_diario[coluna].to_numpy(dtype="float64", na_value=np.nan)
+                idx = np.flatnonzero(vals > 0)
+                valores_partes.append(vals[idx])
+                linhas_partes.append(idx)
+        if not valores_partes:
+            return np.array([], dtype="float64"), {}
+
+        valores = np.concatenate(valores_partes)
+        linhas = np.concatenate(linhas_partes)
+        grupos: Dict[str, np.ndarray] = {}
+        if "COD_CTA" in df_diario.columns:
+            grupos["COD_CTA"] = df_diario["COD_CTA"].to_numpy()[linhas]
+        if periodo is not None:
+            # Rótulo formatado uma vez por mês; datas inválidas ficam sem mês
+            codigos, unicos = pd.factorize(periodo, sort=True)
+            rotulos = np.append(np.asarray(unicos.astype(str), dtype=object), None)
+            grupos["MES"] = rotulos[codigos[linhas]]
+        return valores, grupos
+
+    @staticmethod
+    def extrair_digitos(valores: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Dígitos de cada valor (-1 onde o teste não se aplica).
+
+        PRIMEIRO vale para valores >= 1 (como o teste original, que ignorava
+        valores começando por zero); os demais exigem ao menos dois dígitos
+        na parte inteira (>= 10).
+        """
+        valores = np.abs(np.nan_to_num(np.asarray(valores, dtype="float64")))
+        centavos = np.rint(valores * 100).astype(np.int64)
+        positivos = centavos > 0
+        qtd = np.zeros(len(centavos), dtype=np.int64)
+        qtd[positivos] = np.floor(np.log10(centavos[positivos])).astype(np.int64) + 1
+        # Corrige a borda de potências de 10 sujeitas a arredondamento no log10
+        potencia = np.power(10, np.maximum(qtd - 1, 0))
+        qtd = np.where(positivos & (centavos < potencia), qtd - 1, qtd)
+        qtd = np.where(positivos & (centavos >= potencia * 10), qtd + 1, qtd)
+
+        escala = np.power(10, np.maximum(qtd - 2, 0))
+        dois_primeiros = np.where(qtd >= 2, centavos // escala, -1)
+        primeiro = np.where(
+            qtd >= 2, dois_primeiros // 10, np.where(positivos, centavos, -1)
+        )
+
+        ge_1 = centavos >= 100
+        ge_10 = centavos >= 1000
+        inteiro = centavos // 100
+        return {
+            "PRIMEIRO": np.where(ge_1, primeiro, -1),
+            "SEGUNDO": np.where(ge_10, dois_primeiros % 10, -1),
+            "DOIS_PRIMEIROS": np.where(ge_10, dois_primeiros, -1),
+            "ULTIMOS_DOIS": np.where(ge_10, inteiro % 100, -1),
+            # Dígito significativo de qualquer valor >= 0,01 (drill-down)
+            "SIGNIFICATIVO": np.where(positivos, primeiro, -1),
+        }
+
+    @staticmethod
+    def _conformidade(mad: float, limites: Tuple[float, float]) -> str:
+        if mad > limites[1]:
+            return "REPROVADO"
+        if mad > limites[0]:
+            return "ALERTA"
+        return "APROVADO"
+
+    def distribuicao(self, teste: str) -> pd.DataFrame:
+        """Frequências observadas x esperadas de um teste (um bincount)."""
+        inicio, esperado, _, _ = self.TESTES[teste]
+        codigos = self.digitos[teste]
+        codigos = codigos[codigos >= 0] - inicio
+        contagem = np.bincount(codigos, minlength=len(esperado))
+        total = int(contagem.sum())
+        freq = contagem / total if total else np.zeros(len(esperado))
+        return pd.DataFrame(
+            {
+                "DIGITO": np.arange(inicio, inicio + len(esperado)),
+                "CONTAGEM_OBS": contagem,
+                "FREQ_OBS": freq,
+                "FREQ_BENFORD": esperado,
+                "DESVIO": freq - esperado,
+            }
+        )
+
+    @staticmethod
+    def mad(df_distribuicao: pd.DataFrame) -> float:
+        return float(np.mean(np.abs(df_distribuicao["DESVIO"])))
+
+    def resumo(self) -> pd.DataFrame:
+        """Uma linha por teste: amostra, MAD, qui-quadrado e conformidade."""
+        try:
+            # scipy.special é bem mais leve de importar que scipy.stats
+            from scipy.special import chdtrc
+        except ImportError:
+            chdtrc = None
+
+        linhas = []
+        for teste, (_, esperado, minimo, limites) in self.TESTES.items():
+            dist = self.distribuicao(teste)
+            total = int(dist["CONTAGEM_OBS"].sum())
+            mad = self.mad(dist) if total else 0.0
+            estatistica = (
+                float(
+                    (
+                        (dist["CONTAGEM_OBS"] - esperado * total) ** 2
+                        / (esperado * total)
+                    ).sum()
+                )
+                if total
+                else 0.0
+            )
+            p_valor = (
+                float(chdtrc(len(esperado) - 1, estatistica))
+                if chdtrc is not None and total
+                else np.nan
+            )
+            linhas.append(
+                {
+                    "TESTE": teste,
+                    "VALOR_MINIMO": minimo,
+                    "AMOSTRA": total,
+                    "MAD": mad,
+                    "LIMITE_ALERTA": limites[0],
+                    "LIMITE_REPROVADO": limites[1],
+                    "QUI_QUADRADO": estatistica,
+                    "P_VALOR": p_valor,
+                    "CONFORMIDADE": self._conformidade(mad, limites),
+                }
+            )
+        return pd.DataFrame(linhas)
+
+    def por_grupo(
+        self, grupos: np.ndarray, nome_grupo: str, amostra_minima: int = 100
+    ) -> pd.DataFrame:
+        """
+        Benford do 1º dígito por grupo (conta ou mês), num único bincount
+        sobre a chave grupo × dígito. Grupos com amostra menor que o mínimo
+        ficam de fora; o resultado sai do maior para o menor MAD.
+        """
+        _, esperado, _, limites = self.TESTES["PRIMEIRO"]
+        digito = self.digitos["PRIMEIRO"]
+        validos = digito >= 0
+        codigos, rotulos = pd.factorize(pd.Series(grupos)[validos], sort=True)
+        if len(rotulos) == 0:
+            return pd.DataFrame()
+
+        chave = codigos.astype(np.int64) * 9 + (digito[validos] - 1)
+        contagem = np.bincount(chave[codigos >= 0], minlength=len(rotulos) * 9)
+        contagem = contagem.reshape(len(rotulos), 9)
+        totais = contagem.sum(axis=1)
+        manter = totais >= amostra_minima
+        if not manter.any():
+            return pd.DataFrame()
+
+        freq = contagem[manter] / totais[manter, None]
+        desvio = freq - esperado
+        mad = np.abs(desvio).mean(axis=1)
+        df = pd.DataFrame(
+            {
+                nome_grupo: np.asarray(rotulos)[manter],
+                "AMOSTRA": totais[manter],
+                "MAD": mad,
+                "DIGITO_MAIOR_EXCESSO": desvio.argmax(axis=1) + 1,
+                "EXCESSO": desvio.max(axis=1),
+                "CONFORMIDADE": [self._conformidade(m, limites) for m in mad],
+            }
+        )
+        return df.sort_values("MAD", ascending=False, kind="stable").reset_index(
+            drop=True
+        )
+
+    @staticmethod
+    def detalhar_valores(
+        df_lctos: pd.DataFrame,
+        digito: np.ndarray,
+        digitos_suspeitos: List[int],
+        top_n: int = 10,
+    ) -> pd.DataFrame:
+        """
+        Valores mais frequentes de cada dígito suspeito, com a conta e o
+        histórico predominantes, a partir de um único groupby (dígito, valor)
+        sobre os lançamentos desses dígitos, sem refiltrar o Diário por valor.
+        """
+        selecao = np.isin(digito, digitos_suspeitos)
+        if not selecao.any() or "VL_DC" not in df_lctos.columns:
+            return pd.DataFrame()
+
+        hist_col = (
+            "HIST"
+            if "HIST" in df_lctos.columns
+            else ("I250_HIST" if "I250_HIST" in df_lctos.columns else None)
+        )
+        colunas = {"COD_CTA": "COD_CTA", "CONTA": "CONTA", "HIST": hist_col}
+        base = pd.DataFrame(
+            {
+                "DIGITO": digito[selecao],
+                "VALOR": df_lctos["VL_DC"].to_numpy()[selecao],
+            }
+        )
+        for destino, origem in colunas.items():
+            if origem and origem in df_lctos.columns:
+                base[destino] = df_lctos[origem].to_numpy()[selecao]
+
+        frequencia = (
+            base.groupby(["DIGITO", "VALOR"], sort=False)
+            .size()
+            .sort_values(ascending=False, kind="stable")
+        )
+        top = frequencia.groupby(level="DIGITO", sort=False).head(top_n)
+        df_top = top.rename("FREQUENCIA").reset_index()
+
+        # Só as linhas dos (dígito, valor) escolhidos seguem para as modas
+        chaves_top = pd.MultiIndex.from_frame(df_top[["DIGITO", "VALOR"]])
+        base = base[
+            pd.MultiIndex.from_frame(base[["DIGITO", "VALOR"]]).isin(chaves_top)
+        ]
+
+        def _moda(coluna: str) -> pd.Series:
+            contagem = (
+                base.groupby(["DIGITO", "VALOR", coluna], sort=False)
+                .size()
+                .sort_values(ascending=False, kind="stable")
+            )
+            primeira = contagem.groupby(level=["DIGITO", "VALOR"], sort=False).head(1)
+            return primeira.reset_index(level=coluna)[coluna]
+
+        conta_top = _moda("COD_CTA").reindex(chaves_top).astype(str).to_numpy()
+        if "CONTA" in base.columns:
+            nome_top = _moda("CONTA").reindex(chaves_top).astype(str).to_numpy()
+            conta_top = (
+                pd.Series(conta_top, dtype=object) + " - " + pd.Series(nome_top, dtype=object)
+            ).to_numpy()
+        hist_top = (
+            _moda("HIST").reindex(chaves_top).to_numpy()
+            if "HIST" in base.columns
+            else np.full(len(df_top), "N/A", dtype=object)
+        )
+
+        # Ordem do relatório: dígitos na ordem informada, depois frequência
+        ordem_digito = {d: i for i, d in enumerate(digitos_suspeitos)}
+        df_top["CONTA_PRINCIPAL"] = conta_top
+        df_top["HISTORICO_PREDOMINANTE"] = hist_top
+        df_top["_ORDEM"] = df_top["DIGITO"].map(ordem_digito)
+        return (
+            df_top.sort_values(["_ORDEM", "FREQUENCIA"], ascending=[True, False], kind="stable")
+            .drop(columns="_ORDEM")
+            .reset_index(drop=True)[
+                ["DIGITO", "VALOR", "FREQUENCIA", "CONTA_PRINCIPAL", "HISTORICO_PREDOMINANTE"]
+            ]
+        )
@@ -0,0 +1,165 @@
+import os
+import pickle
+import hashlib
+import inspect
+import logging
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Logger local para uso interno do módulo (não configura nível globalmente)
+logger = logging.getLogger(__name__)
+
+# Colunas fora da impressão digital dos insumos:
+# - chaves técnicas (PK/FK/REG), que derivam da posição da linha no arquivo
+#   (LINHA_ORIGEM continua na impressão e já reflete a posição);
+# - VL_DC, o mesmo valor de VL_D/VL_C em Decimal (o hash de Decimal é o mais
+#   lento do Diário e não acrescenta informação).
+COLUNAS_IGNORADAS = {"PK", "PK_x", "PK_y", "FK_PAI", "REG", "VL_DC"}
+
+# Muda quando o formato das entradas do cache muda (invalida tudo)
+VERSAO_CACHE = "1"
+
+
+def impressao_dataframe(df: Optional[pd.DataFrame]) -> str:
+    """
+    Impressão digital do conteúdo de um DataFrame (colunas, dtypes e valores,
+    na ordem das linhas). Textos são fatorados antes do hash, então cada
+    valor distinto é processado uma única vez.
+    """
+    if df is None:
+        return "-"
+    resumo = hashlib.blake2b(digest_size=16)
+    resumo.update(str(len(df)).encode())
+    for coluna in df.columns:
+        if coluna in COLUNAS_IGNORADAS:
+            continue
+        resumo.update(f"|{coluna}:{df[coluna].dtype}".encode())
+        h = pd.util.hash_pandas_object(df[coluna], index=False, categorize=True)
+        resumo.update(np.ascontiguousarray(h.to_numpy(dtype=np.uint64)).tobytes())
+    return resumo.hexdigest()
+
+
+class CacheResultadosAuditoria:
+    """
+    Cache em disco dos resultados de cada teste do ECDAuditor.
+
+    A chave de um teste combina:
+
+    - a impressão digital de cada insumo que ele usa (ECDAuditor.TESTES):
+      Diário, balancete (saldos) e plano + mapeamento;
+    - a impressão do próprio teste: código do método, código dos módulos
+      auxiliares (ECDAuditor.MODULOS_TESTES, o ContextoAuditoria e a
+      EvidenciaAuditoria), o método limiar(), os
+      parâmetros declarados (ECDAuditor.PARAMETROS_TESTES), os limiares
+      vigentes (auditor.limiares) e as regras da tabela que pertencem a ele.
+
+    Mudar o limiar de um teste altera só a chave desse teste: no lote
+    seguinte ele é refeito e os demais são lidos do cache. A chave depende
+    do conteúdo, não do arquivo, então ECDs idênticos compartilham entradas.
+    """
+
+    # (classe do auditor, teste) -> código do teste e dos módulos auxiliares.
+    # O código não muda durante o processo e é inspecionado uma única vez;
+    # parâmetros e regras são lidos a cada chave (podem ser ajustados em uso).
+    _codigo_teste: Dict[Tuple[type, str], str] = {}
+
+    def __init__(self, dir_base: str):
+        self.dir_base = dir_base
+
+    # --- Chaves ---
+
+    @staticmethod
+    def impressoes_insumos(auditor: Any, insumos: Iterable[str]) -> Dict[str, str]:
+        """Impressão de cada insumo pedido (calculada uma vez por insumo)."""
+        fontes = {
+            "diario": lambda: impressao_dataframe(auditor.df_diario),
+            "saldos": lambda: impressao_dataframe(auditor.df_balancete),
+            "plano": lambda: impressao_dataframe(auditor.df_plano)
+            + impressao_dataframe(auditor.df_mapeamento),
+        }
+        return {insumo: fontes[insumo]() for insumo in set(insumos)}
+
+    @classmethod
+    def _codigo(cls, auditor: Any, nome: str) -> str:
+        memo = (type(auditor), nome)
+        if memo not in cls._codigo_teste:
+            metodo = getattr(type(auditor), auditor.TESTES[nome][0])
+            # limiar() é lido por todos os testes; contexto e evidência também
+            partes = [inspect.getsource(metodo), inspect.getsource(type(auditor).limiar)]
+            modulos = ("core.contexto_auditoria", "core.evidencia") + tuple(
+                auditor.MODULOS_TESTES.get(nome, ())
+            )
+            for modulo in modulos:
+                partes.append(inspect.getsource(__import__(modulo, fromlist=["_"])))
+            cls._codigo_teste[memo] = "\n".join(partes)
+        return cls._codigo_teste[memo]
+
+    @classmethod
+    def impressao_teste(cls, auditor: Any, nome: str) -> str:
+        """Versão do teste: código e parâmetros que definem o resultado."""
+        from core.regras_auditoria import MotorRegras
+
+        partes = [VERSAO_CACHE, nome, cls._codigo(auditor, nome)]
+        for atributo in auditor.PARAMETROS_TESTES.get(nome, ()):
+            valor = getattr(auditor, atributo)
+            # Métodos auxiliares entram pelo código; os demais, pelo repr
+            texto = inspect.getsource(valor) if callable(valor) else repr(valor)
+            partes.append(f"{atributo}={texto}")
+        limiares = getattr(auditor, "limiares", {}).get(nome)
+        if limiares:
+            partes.append(f"limiares={sorted(limiares.items())!r}")
+        codigo_teste = nome.split("_")[0]
+        for regra in MotorRegras.padrao().regras_do_teste(codigo_teste):
+            partes.append(repr(sorted(vars(regra).items())))
+        return hashlib.blake2b("\n".join(partes).encode(), digest_size=16).hexdigest()
+
+    @classmethod
+    def chaves(cls, auditor: Any, nomes: Iterable[str]) -> Dict[str, str]:
+        """
+        Chave de cache de cada teste. Também decide o reaproveitamento de
+        resultados das retificadoras (ver ReprocessadorRetificadora).
+        """
+        nomes = list(nomes)
+        insumos = {i for nome in nomes for i in auditor.TESTES[nome][1]}
+        impressoes = cls.impressoes_insumos(auditor, insumos)
+        chaves = {}
+        for nome in nomes:
+            partes = [cls.impressao_teste(auditor, nome)] + [
+                f"{i}={impressoes[i]}" for i in sorted(auditor.TESTES[nome][1])
+            ]
+            chaves[nome] = hashlib.blake2b(
+                "|".join(partes).encode(), digest_size=16
+            ).hexdigest()
+        return chaves
+
+    # --- Leitura e gravação ---
+
+    def _caminho(self, nome: str, chave: str) -> str:
+        return os.path.join(self.dir_base, nome, f"{chave}.pkl")
+
+    def carregar(self, nome: str, chave: str) -> Optional[Dict[str, Any]]:
+        caminho = self._caminho(nome, chave)
+        if not os.path.exists(caminho):
+            return None
+        try:
+            with open(caminho, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Cache de auditoria ilegível ({caminho}): {e}")
+            return None
+
+    def salvar(self, nome: str, chave: str, resultado: Dict[str, Any]) -> None:
+        caminho = self._caminho(nome, chave)
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            with open(temporario, "wb") as f:
+                pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+            # Troca atômica: workers do lote podem gravar a mesma chave
+            os.replace(temporario, caminho)
+        except Exception as e:
+            logger.warning(f"Falha ao gravar o cache de auditoria ({caminho}): {e}")
+            if os.path.exists(temporario):
+                os.remove(temporario)
@@ -0,0 +1,210 @@
+import logging
+from typing import Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.tensor_balancete import TensorBalancete
+
+# Logger local para uso interno do módulo (não configura nível globalmente)
+logger = logging.getLogger(__name__)
+
+
+class ContextoAuditoria:
+    """
+    Insumos da auditoria de um ECD, preparados uma única vez e compartilhados
+    (somente leitura) por todos os testes do ECDAuditor.
+
+    Antes, cada teste copiava o balancete ou o Diário e refazia o merge com o
+    plano para obter CONTA, IND_CTA, COD_NAT ou COD_CTA_REF, enquanto cinco
+    threads faziam o mesmo ao mesmo tempo. Aqui:
+
+    - `balancete` recebe, uma vez, os atributos do plano que lhe faltarem;
+    - `plano` recebe o COD_CTA_REF do I051 quando não o trouxer;
+    - `diario` é o DataFrame original (sem cópia). Os derivados por linha
+      (datas convertidas, período, natureza da conta, máscara de
+      encerramento) ficam em arrays alinhados, para que as evidências
+      continuem com as colunas originais do Diário.
+
+    Os arrays NumPy são marcados como não graváveis e os atributos não podem
+    ser reatribuídos após a montagem. Os DataFrames não têm essa proteção:
+    os testes devem filtrar/selecionar a partir deles, nunca alterá-los.
+    """
+
+    # Atributos do plano usados pelos testes sobre o balancete
+    COLUNAS_PLANO = [
+        "CONTA",
+        "IND_CTA",
+        "COD_NAT",
+        "NIVEL",
+        "COD_CTA_SUP",
+        "COD_CTA_REF",
+        "ORIGEM_MAP",
+    ]
+
+    def __init__(self, **campos: Any):
+        for nome, valor in campos.items():
+            if isinstance(valor, np.ndarray):
+                valor.setflags(write=False)
+            object.__setattr__(self, nome, valor)
+
+    def __setattr__(self, nome: str, valor: Any):
+        raise AttributeError(f"ContextoAuditoria é imutável (atributo '{nome}').")
+
+    # Declarações para o verificador de tipos (preenchidas em __init__)
+    diario: pd.DataFrame
+    balancete: pd.DataFrame
+    plano: pd.DataFrame
+    tensor: TensorBalancete
+    tem_mapeamento: bool
+    dt_lcto: pd.Series
+    periodo_diario: pd.Series
+    natureza_diario: np.ndarray
+    encerramento: np.ndarray
+    dt_fin: pd.Series
+    periodo_balancete: pd.Series
+    natureza_balancete: np.ndarray
+    analitica: np.ndarray
+    sintetica: np.ndarray
+
+    @classmethod
+    def montar(
+        cls,
+        df_diario: pd.DataFrame,
+        df_balancete: pd.DataFrame,
+        df_plano: pd.DataFrame,
+        df_mapeamento: Optional[pd.DataFrame] = None,
+        tensor_balancete: Optional[TensorBalancete] = None,
+    ) -> "ContextoAuditoria":
+        """
+        Monta o contexto a partir das saídas do ECDProcessor.
+
+        Args:
+            df_diario: Lançamentos (I200 + I250).
+            df_balancete: Saldos mensais (03_Balancetes_Mensais).
+            df_plano: Plano de contas processado.
+            df_mapeamento: I051 bruto (fallback do COD_CTA_REF do plano).
+            tensor_balancete: Tensor já montado pelo processor (opcional).
+        """
+        plano, tem_mapeamento = cls._plano_com_referencial(df_plano, df_mapeamento)
+        balancete = cls._balancete_com_plano(df_balancete, plano)
+
+        dt_lcto = cls._datas(df_diario, "DT_LCTO")
+        dt_fin = cls._datas(balancete, "DT_FIN")
+
+        return cls(
+            diario=df_diario,
+            balancete=balancete,
+            plano=plano,
+            tensor=(
+                tensor_balancete
+                if tensor_balancete is not None
+                else TensorBalancete.de_balancete(df_balancete, df_plano)
+            ),
+            tem_mapeamento=tem_mapeamento,
+            dt_lcto=dt_lcto,
+            periodo_diario=dt_lcto.dt.to_period("M"),
+            natureza_diario=cls.natureza_de(
+                df_diario, cls.atributo_conta_de(plano, "COD_NAT")
+            ),
+            encerramento=cls._texto_igual(df_diario, "IND_LCTO", "E", padrao=False),
+            dt_fin=dt_fin,
+            periodo_balancete=dt_fin.dt.to_period("M"),
+            natureza_balancete=cls.natureza_de(balancete),
+            # Sem IND_CTA, nenhuma conta é descartada pelo filtro de analíticas
+            analitica=cls._texto_igual(balancete, "IND_CTA", "A", padrao=True),
+            sintetica=cls._texto_igual(balancete, "IND_CTA", "S", padrao=False),
+        )
+
+    # --- Montagem ---
+
+    @staticmethod
+    def atributo_conta_de(plano: pd.DataFrame, coluna: str) -> Optional[pd.Series]:
+        """COD_CTA -> atributo do plano (primeira ocorrência), ou None."""
+        if plano.empty or "COD_CTA" not in plano.columns or coluna not in plano.columns:
+            return None
+        return plano.drop_duplicates("COD_CTA").set_index("COD_CTA")[coluna]
+
+    def atributo_conta(self, coluna: str) -> Optional[pd.Series]:
+        """Mapa COD_CTA -> atributo do plano, para enriquecer relatórios."""
+        return self.atributo_conta_de(self.plano, coluna)
+
+    @classmethod
+    def _plano_com_referencial(
+        cls, df_plano: pd.DataFrame, df_mapeamento: Optional[pd.DataFrame]
+    ):
+        if "COD_CTA_REF" in df_plano.columns:
+            return df_plano, True
+        if df_mapeamento is None or df_plano.empty:
+            return df_plano, False
+
+        df_map = df_mapeamento.rename(
+            columns={"I051_COD_CTA_REF": "COD_CTA_REF", "I051_FK_PAI": "FK_PAI"}
+        )
+        if not {"FK_PAI", "COD_CTA_REF"}.issubset(df_map.columns):
+            return df_plano, False
+        plano = pd.merge(
+            df_plano,
+            df_map[["FK_PAI", "COD_CTA_REF"]],
+            left_on="PK",
+            right_on="FK_PAI",
+            how="left",
+        )
+        return plano, True
+
+    @classmethod
+    def _balancete_com_plano(
+        cls, df_balancete: pd.DataFrame, plano: pd.DataFrame
+    ) -> pd.DataFrame:
+        faltantes: List[str] = [
+            c for c in cls.COLUNAS_PLANO if c not in df_balancete.columns
+        ]
+        if df_balancete.empty or "COD_CTA" not in df_balancete.columns:
+            return df_balancete
+
+        novas = {}
+        for coluna in faltantes:
+            mapa = cls.atributo_conta_de(plano, coluna)
+            if mapa is not None:
+                novas[coluna] = df_balancete["COD_CTA"].map(mapa)
+        if "COD_CTA_REF" not in df_balancete.columns and "COD_CTA_REF" not in novas:
+            # Sem referencial em lugar nenhum: todas as contas ficam "órfãs"
+            novas["COD_CTA_REF"] = pd.Series(None, index=df_balancete.index, dtype=object)
+        if not novas:
+            return df_balancete
+        # Cópia rasa: as colunas originais não são duplicadas em memória
+        return df_balancete.assign(**novas)
+
+    @staticmethod
+    def _datas(df: pd.DataFrame, coluna: str) -> pd.Series:
+        if coluna not in df.columns:
+            return pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+        datas = df[coluna]
+        if pd.api.types.is_datetime64_any_dtype(datas):
+            return datas
+        return pd.to_datetime(datas, errors="coerce")
+
+    @staticmethod
+    def _texto_igual(
+        df: pd.DataFrame, coluna: str, valor: str, padrao: bool
+    ) -> np.ndarray:
+        if coluna not in df.columns:
+            return np.full(len(df), padrao, dtype=bool)
+        return (
+            (df[coluna].astype(object).fillna("").astype(str).str.upper() == valor)
+            .to_numpy(dtype=bool)
+        )
+
+    @staticmethod
+    def natureza_de(
+        df: pd.DataFrame, mapa: Optional[pd.Series] = None
+    ) -> np.ndarray:
+        """COD_NAT normalizado em 2 dígitos por linha ('' se desconhecido)."""
+        if "COD_NAT" in df.columns:
+            natureza = df["COD_NAT"]
+        elif mapa is not None and "COD_CTA" in df.columns:
+            natureza = df["COD_CTA"].map(mapa)
+        else:
+            return np.full(len(df), "", dtype=object)
+        texto = natureza.astype(object).fillna("").astype(str).str.strip()
+        return np.where(texto != "", texto.str.zfill(2), "").astype(object)
@@ -0,0 +1,243 @@
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Logger local para uso interno do módulo (não configura nível globalmente)
+logger = logging.getLogger(__name__)
+
+
+class MatrizFluxos:
+    """
+    Matrizes esparsas conta × conta de fluxo mensal (débito -> crédito).
+
+    Para cada mês "AAAA-MM", `matrizes[mes][i, j]` é o valor que saiu a
+    crédito da conta `contas[j]` em contrapartida de débito em `contas[i]`.
+    A forma persistida é a lista de coordenadas (MES, COD_CTA_DEB,
+    COD_CTA_CRED, VL_FLUXO), gravada em Parquet pelo ECDExporter.
+    """
+
+    COLUNAS = ["MES", "COD_CTA_DEB", "COD_CTA_CRED", "VL_FLUXO"]
+
+    def __init__(self, contas: np.ndarray, matrizes: Dict[str, sparse.csr_matrix]):
+        self.contas = contas
+        self.matrizes = matrizes
+        self._posicao = {c: i for i, c in enumerate(contas)}
+
+    def fluxo(self, mes: str, conta_deb: str, conta_cred: str) -> float:
+        """Valor transferido de conta_cred para conta_deb no mês (0.0 se não houver)."""
+        matriz = self.matrizes.get(mes)
+        i = self._posicao.get(conta_deb)
+        j = self._posicao.get(conta_cred)
+        if matriz is None or i is None or j is None:
+            return 0.0
+        return float(matriz[i, j])
+
+    def para_dataframe(self, cnpj: str = "") -> pd.DataFrame:
+        """
+        Formato longo (coordenadas não nulas) para persistência em Parquet.
+
+        Args:
+            cnpj: Se informado, é incluído como segunda coluna (padrão das
+                tabelas exportadas, para a consolidação entre anos).
+        """
+        partes = []
+        for mes, matriz in self.matrizes.items():
+            coo = matriz.tocoo()
+            if coo.nnz == 0:
+                continue
+            partes.append(
+                pd.DataFrame(
+                    {
+                        "MES": mes,
+                        "COD_CTA_DEB": self.contas[coo.row],
+                        "COD_CTA_CRED": self.contas[coo.col],
+                        "VL_FLUXO": np.round(coo.data, 2),
+                    }
+                )
+            )
+        if not partes:
+            df = pd.DataFrame(columns=self.COLUNAS)
+        else:
+            df = (
+                pd.concat(partes, ignore_index=True)
+                .sort_values(["MES", "COD_CTA_DEB", "COD_CTA_CRED"], kind="stable")
+                .reset_index(drop=True)
+            )
+        if cnpj:
+            df.insert(1, "CNPJ", cnpj)
+        return df
+
+    @classmethod
+    def de_dataframe(cls, df: pd.DataFrame) -> "MatrizFluxos":
+        """Reconstrói as matrizes a partir do formato longo (ex: Parquet lido)."""
+        contas = np.unique(
+            np.concatenate(
+                [
+                    df["COD_CTA_DEB"].astype(str).to_numpy(),
+                    df["COD_CTA_CRED"].astype(str).to_numpy(),
+                ]
+            )
+        ).astype(object)
+        posicao = pd.Index(contas)
+        n = len(contas)
+        matrizes: Dict[str, sparse.csr_matrix] = {}
+        for mes, grupo in df.groupby("MES", sort=True):
+            matrizes[str(mes)] = sparse.csr_matrix(
+                (
+                    grupo["VL_FLUXO"].to_numpy(dtype="float64"),
+                    (
+                        posicao.get_indexer(grupo["COD_CTA_DEB"].astype(str)),
+                        posicao.get_indexer(grupo["COD_CTA_CRED"].astype(str)),
+                    ),
+                ),
+                shape=(n, n),
+            )
+        return cls(contas, matrizes)
+
+
+class ConstrutorContrapartidas:
+    """
+    Reconstrói as contrapartidas do Diário (I200 + I250) de forma vetorizada.
+
+    As partidas são agregadas por (lançamento, conta) em duas matrizes
+    esparsas lançamento × conta, uma para débitos (D) e outra para créditos
+    (C). Em lançamentos N:M, cada débito é rateado entre os créditos na
+    proporção do valor creditado (pro rata): fluxo = D · diag(1/T) · C, com
+    T = total creditado do lançamento. O produto esparso substitui o
+    self-join por lançamento do pandas, que explode em lançamentos grandes.
+    """
+
+    def __init__(self, df_lancamentos: pd.DataFrame, coluna_lcto: str = "PK_x"):
+        """
+        Args:
+            df_lancamentos: Saída de ECDProcessor.processar_lancamentos
+                (COD_CTA, DT_LCTO, VL_D, VL_C e a chave do I200).
+            coluna_lcto: Coluna que identifica o lançamento (PK do I200).
+        """
+        self.df = df_lancamentos
+        if coluna_lcto not in df_lancamentos.columns:
+            coluna_lcto = "PK" if "PK" in df_lancamentos.columns else "NUM_LCTO"
+        self.coluna_lcto = coluna_lcto
+
+        self._preparado = False
+        self.contas: np.ndarray = np.array([], dtype=object)
+        self.lctos: np.ndarray = np.array([], dtype=object)
+        self.mes_lcto: np.ndarray = np.array([], dtype=object)
+        self.dt_lcto: np.ndarray = np.array([], dtype=object)
+        self._deb: Optional[sparse.csr_matrix] = None
+        self._cred: Optional[sparse.csr_matrix] = None
+        self._peso: np.ndarray = np.array([], dtype="float64")
+
+    def _preparar(self) -> bool:
+        """Monta as matrizes lançamento × conta (uma única passada no Diário)."""
+        if self._preparado:
+            return self._deb is not None
+        self._preparado = True
+
+        df = self.df
+        if df.empty or not {"COD_CTA", "VL_D", "VL_C"}.issubset(df.columns):
+            return False
+
+        idx_lcto, self.lctos = pd.factorize(df[self.coluna_lcto], sort=False)
+        idx_conta, contas = pd.factorize(df["COD_CTA"].astype(str), sort=True)
+        self.contas = np.asarray(contas, dtype=object)
+        n_lctos, n_contas = len(self.lctos), len(self.contas)
+
+        vl_d = pd.to_numeric(df["VL_D"], errors="coerce").fillna(0.0).to_numpy("float64")
+        vl_c = pd.to_numeric(df["VL_C"], errors="coerce").fillna(0.0).to_numpy("float64")
+
+        # csr soma duplicatas: várias partidas da mesma conta no mesmo lançamento
+        forma = (n_lctos, n_contas)
+        self._deb = sparse.csr_matrix((vl_d, (idx_lcto, idx_conta)), shape=forma)
+        self._cred = sparse.csr_matrix((vl_c, (idx_lcto, idx_conta)), shape=forma)
+        self._deb.eliminate_zeros()
+        self._cred.eliminate_zeros()
+
+        total_cred = np.asarray(self._cred.sum(axis=1)).ravel()
+        self._peso = np.divide(
+            1.0, total_cred, out=np.zeros_like(total_cred), where=total_cred != 0
+        )
+
+        # Data/mês por lançamento (primeira ocorrência de cada I200)
+        _, primeira = np.unique(idx_lcto, return_index=True)
+        datas = df["DT_LCTO"] if "DT_LCTO" in df.columns else pd.Series([None] * len(df))
+        self.dt_lcto = datas.to_numpy(dtype=object)[primeira]
+        self.mes_lcto = (
+            pd.to_datetime(pd.Series(self.dt_lcto), errors="coerce")
+            .dt.strftime("%Y-%m")
+            .fillna("")
+            .to_numpy(dtype=object)
+        )
+        return True
+
+    def gerar_contrapartidas(self) -> pd.DataFrame:
+        """
+        Pares débito/crédito por lançamento, com rateio pro rata.
+
+        Cada linha (lançamento, conta débito) do produto esparso vira os pares
+        com as contas creditadas do mesmo lançamento. O resultado tem apenas
+        os pares existentes (Σ n_deb × n_cred de contas distintas), sem as
+        colunas replicadas de um merge.
+
+        Returns:
+            DataFrame com LCTO, DT_LCTO, MES, COD_CTA_DEB, COD_CTA_CRED, VL_FLUXO.
+        """
+        colunas = ["LCTO", "DT_LCTO", "MES", "COD_CTA_DEB", "COD_CTA_CRED", "VL_FLUXO"]
+        if not self._preparar() or self._deb is None or self._cred is None:
+            return pd.DataFrame(columns=colunas)
+
+        deb = self._deb.tocoo()
+        # Uma linha por (lançamento, conta débito): R[k, lcto] = valor debitado
+        rateio = sparse.csr_matrix(
+            (deb.data * self._peso[deb.row], (np.arange(deb.nnz), deb.row)),
+            shape=(deb.nnz, self._deb.shape[0]),
+        )
+        pares = (rateio @ self._cred).tocoo()
+
+        lcto = deb.row[pares.row]
+        return pd.DataFrame(
+            {
+                "LCTO": self.lctos[lcto],
+                "DT_LCTO": self.dt_lcto[lcto],
+                "MES": self.mes_lcto[lcto],
+                "COD_CTA_DEB": self.contas[deb.col[pares.row]],
+                "COD_CTA_CRED": self.contas[pares.col],
+                "VL_FLUXO": np.round(pares.data, 2),
+            },
+            columns=colunas,
+        ).sort_values(["LCTO", "COD_CTA_DEB", "COD_CTA_CRED"], kind="stable").reset_index(
+            drop=True
+        )
+
+    def gerar_matriz_fluxos(self) -> MatrizFluxos:
+        """
+        Matriz conta × conta por mês, sem materializar os pares por lançamento.
+
+        As linhas de D são reindexadas por (mês, conta débito), de modo que um
+        único produto esparso agrega todos os lançamentos do ano.
+        """
+        if not self._preparar() or self._deb is None or self._cred is None:
+            return MatrizFluxos(self.contas, {})
+
+        meses, idx_mes = np.unique(self.mes_lcto.astype(str), return_inverse=True)
+        n_contas = len(self.contas)
+
+        deb = self._deb.tocoo()
+        linhas = idx_mes[deb.row] * n_contas + deb.col
+        agregada = sparse.csr_matrix(
+            (deb.data * self._peso[deb.row], (linhas, deb.row)),
+            shape=(len(meses) * n_contas, self._deb.shape[0]),
+        )
+        fluxo = (agregada @ self._cred).tocsr()
+
+        matrizes: Dict[str, sparse.csr_matrix] = {}
+        for i, mes in enumerate(meses):
+            bloco = fluxo[i * n_contas : (i + 1) * n_contas]
+            bloco.eliminate_zeros()
+            if bloco.nnz:
+                matrizes[str(mes)] = bloco
+        return MatrizFluxos(self.contas, matrizes)
+
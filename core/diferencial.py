@@ -0,0 +1,564 @@
+import os
+import json
+import pickle
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from core.cache_auditoria import CacheResultadosAuditoria
+from core.contrapartidas import ConstrutorContrapartidas, MatrizFluxos
+
+# Logger local para uso interno do módulo (não configura nível globalmente)
+logger = logging.getLogger(__name__)
+
+# Colunas técnicas (dependem da posição da linha no arquivo, não do conteúdo)
+COLUNAS_TECNICAS = {"LINHA_ORIGEM", "PK", "FK_PAI", "REG"}
+
+
+def _hash_linhas(df: pd.DataFrame) -> np.ndarray:
+    """
+    Hash de conteúdo (uint64) por linha, independente do modo de leitura.
+
+    Cada valor não nulo entra como texto "COLUNA=valor" (datas e decimais têm
+    a mesma forma textual nos modos object e Arrow); nulos não contribuem.
+    Assim, colunas inteiramente nulas (descartadas no modo Arrow) não alteram
+    o hash.
+    """
+    total = np.zeros(len(df), dtype=np.uint64)
+    for col in df.columns:
+        if col in COLUNAS_TECNICAS:
+            continue
+        serie = df[col]
+        nulos = serie.isna().to_numpy(dtype=bool)
+        if nulos.all():
+            continue
+        texto = (col + "=" + serie.astype(str)).to_numpy(dtype=object)
+        h = pd.util.hash_array(texto)
+        h[nulos] = 0
+        total += h
+    return total
+
+
+def _chave_mes(datas: pd.Series) -> pd.Series:
+    """Chave mensal 'AAAA-MM' ('' se inválida), sem strftime linha a linha."""
+    convertidas = pd.to_datetime(datas.astype(object), errors="coerce")
+    meses = convertidas.to_numpy(dtype="datetime64[ns]").astype("datetime64[M]").astype(str)
+    return pd.Series(np.where(convertidas.isna(), "", meses), index=datas.index)
+
+
+def _misturar(valores: np.ndarray) -> np.ndarray:
+    """Re-hash de um array uint64 (espalha somas e combinações)."""
+    return pd.util.hash_array(valores.astype(np.uint64))
+
+
+class AssinaturaECD:
+    """
+    Assinatura de conteúdo de um ECD em nível de registro.
+
+    Cada unidade recebe um hash de 64 bits do registro e de todos os seus
+    filhos (na ordem do arquivo):
+
+    - I050: uma unidade por conta (com I051/I052/I053);
+    - I150: uma unidade por período (com os I155 do período);
+    - I157: uma unidade por conta transferida;
+    - I200: uma unidade por lançamento (com as partidas I250);
+    - J005: uma unidade por demonstração (com J100/J150/J210...).
+
+    Além dessas, PLANO guarda o hash do plano já processado (que também
+    depende da base histórica) e POSICAO a linha do primeiro I200, pois os
+    lançamentos exportados carregam LINHA_ORIGEM/PK.
+    """
+
+    COLUNAS = ["TIPO", "CHAVE", "HASH", "MES", "IND"]
+
+    # Registro da unidade -> (coluna-chave, coluna de data, descendentes em ordem de profundidade)
+    UNIDADES: Dict[str, Tuple[str, Optional[str], List[str]]] = {
+        "I050": ("COD_CTA", None, ["I051", "I052", "I053"]),
+        "I150": ("DT_FIN", "DT_FIN", ["I155"]),
+        "I157": ("COD_CTA", None, []),
+        "I200": ("NUM_LCTO", "DT_LCTO", ["I250"]),
+        "J005": ("ID_DEM", "DT_FIN", ["J100", "J150", "J210", "J215"]),
+    }
+
+    def __init__(self, tabela: pd.DataFrame):
+        self.tabela = tabela
+
+    @classmethod
+    def de_blocos(
+        cls,
+        blocos: Mapping[str, pd.DataFrame],
+        df_plano: Optional[pd.DataFrame] = None,
+    ) -> "AssinaturaECD":
+        """
+        Monta a assinatura a partir dos blocos separados pelo ECDProcessor.
+
+        Args:
+            blocos: Dicionário dfECD_<REG> (ECDProcessor.blocos).
+            df_plano: Plano processado; se informado, gera a unidade PLANO.
+        """
+        partes = []
+        for reg, (col_chave, col_data, descendentes) in cls.UNIDADES.items():
+            df_unidade = blocos.get(f"dfECD_{reg}")
+            if df_unidade is None or df_unidade.empty or col_chave not in df_unidade:
+                continue
+            partes.append(
+                cls._assinar_unidades(
+                    reg, df_unidade, col_data, col_chave, descendentes, blocos
+                )
+            )
+
+        extras = []
+        if df_plano is not None and not df_plano.empty:
+            h_plano = _hash_linhas(df_plano.reset_index(drop=True))
+            h_plano = _misturar(h_plano + np.arange(len(h_plano), dtype=np.uint64))
+            extras.append(("PLANO", "*", int(h_plano.sum(dtype=np.uint64)), "", ""))
+        df_i200 = blocos.get("dfECD_I200")
+        if df_i200 is not None and not df_i200.empty and "LINHA_ORIGEM" in df_i200:
+            primeira = int(pd.to_numeric(df_i200["LINHA_ORIGEM"]).min())
+            extras.append(("POSICAO", "I200", primeira, "", ""))
+        if extras:
+            df_extras = pd.DataFrame(extras, columns=cls.COLUNAS)
+            df_extras["HASH"] = np.array([e[2] for e in extras], dtype=np.uint64)
+            partes.append(df_extras)
+
+        if not partes:
+            return cls(pd.DataFrame(columns=cls.COLUNAS))
+        tabela = pd.concat(partes, ignore_index=True)
+        tabela["HASH"] = tabela["HASH"].astype(np.uint64)
+        return cls(tabela)
+
+    @classmethod
+    def _assinar_unidades(
+        cls,
+        reg: str,
+        df_unidade: pd.DataFrame,
+        col_data: Optional[str],
+        col_chave: str,
+        descendentes: List[str],
+        blocos: Mapping[str, pd.DataFrame],
+    ) -> pd.DataFrame:
+        """Hash por unidade: registro + soma posicional dos descendentes."""
+        hashes = _hash_linhas(df_unidade)
+        pks = pd.Index(df_unidade["PK"].to_numpy(dtype=object))
+
+        # Raiz (PK da unidade) de cada linha descendente, nível a nível
+        raiz = pd.Series(pks.to_numpy(), index=pks)
+        acumulado = np.zeros(len(df_unidade), dtype=np.uint64)
+        for reg_filho in descendentes:
+            df_filho = blocos.get(f"dfECD_{reg_filho}")
+            if df_filho is None or df_filho.empty or "FK_PAI" not in df_filho:
+                continue
+            raiz_filho = df_filho["FK_PAI"].astype(object).map(raiz)
+            validos = raiz_filho.notna().to_numpy(dtype=bool)
+            if not validos.any():
+                continue
+            grupos = raiz_filho.to_numpy(dtype=object)[validos]
+            raiz = pd.concat(
+                [
+                    raiz,
+                    pd.Series(grupos, index=df_filho["PK"].to_numpy(dtype=object)[validos]),
+                ]
+            )
+            # Posição do filho dentro da unidade: troca de ordem também é alteração
+            posicao = pd.Series(grupos).groupby(grupos, sort=False).cumcount()
+            h_filho = _misturar(
+                _hash_linhas(df_filho)[validos]
+                + posicao.to_numpy(dtype=np.uint64) * np.uint64(0x9E3779B1)
+            )
+            # Soma com overflow (mod 2^64) por unidade
+            np.add.at(acumulado, pks.get_indexer(grupos), h_filho)
+
+        total = _misturar(hashes + _misturar(acumulado))
+
+        # Chaves repetidas (ex: NUM_LCTO reaproveitado) recebem sufixo #n
+        chaves = df_unidade[col_chave].astype(str).str.strip()
+        ocorrencia = chaves.groupby(chaves, sort=False).cumcount()
+        chaves = chaves.where(ocorrencia == 0, chaves + "#" + ocorrencia.astype(str))
+        if reg == "J005" and "DT_FIN" in df_unidade.columns:
+            chaves = df_unidade["DT_FIN"].astype(str) + "|" + chaves
+
+        if col_data and col_data in df_unidade.columns:
+            mes = _chave_mes(df_unidade[col_data])
+        else:
+            mes = pd.Series("", index=df_unidade.index)
+        ind = (
+            df_unidade["IND_LCTO"].astype(object).fillna("").astype(str)
+            if "IND_LCTO" in df_unidade.columns
+            else pd.Series("", index=df_unidade.index)
+        )
+        return pd.DataFrame(
+            {
+                "TIPO": reg,
+                "CHAVE": chaves.to_numpy(dtype=object),
+                "HASH": total,
+                "MES": mes.to_numpy(dtype=object),
+                "IND": ind.to_numpy(dtype=object),
+            },
+            columns=cls.COLUNAS,
+        )
+
+    def comparar(self, anterior: "AssinaturaECD") -> "DiferencaECD":
+        """Compara com a assinatura de uma versão anterior do mesmo ECD."""
+        return DiferencaECD(anterior.tabela, self.tabela)
+
+    def salvar(self, caminho: str) -> None:
+        self.tabela.to_parquet(caminho, index=False)
+
+    @classmethod
+    def carregar(cls, caminho: str) -> "AssinaturaECD":
+        tabela = pd.read_parquet(caminho)
+        tabela["HASH"] = tabela["HASH"].astype(np.uint64)
+        return cls(tabela)
+
+
+class DiferencaECD:
+    """
+    Diferença entre duas versões do mesmo ECD (original x retificadora).
+
+    `tabela` lista as unidades incluídas, excluídas e alteradas (TIPO, CHAVE,
+    MES, ALTERACAO) e é exportada como registro do que mudou. As
+    propriedades derivadas dizem o que precisa ser recalculado.
+    """
+
+    def __init__(self, anterior: pd.DataFrame, atual: pd.DataFrame):
+        comparacao = pd.merge(
+            anterior,
+            atual,
+            on=["TIPO", "CHAVE"],
+            how="outer",
+            suffixes=("_ANT", "_ATU"),
+            indicator=True,
+        )
+        alteracao = np.select(
+            [
+                comparacao["_merge"] == "left_only",
+                comparacao["_merge"] == "right_only",
+                comparacao["HASH_ANT"] != comparacao["HASH_ATU"],
+            ],
+            ["EXCLUIDO", "INCLUIDO", "ALTERADO"],
+            default="",
+        )
+        comparacao["ALTERACAO"] = alteracao
+        alterados = comparacao[comparacao["ALTERACAO"] != ""]
+
+        self.meses_atuais: List[str] = sorted(
+            m for m in atual.loc[atual["TIPO"] == "I150", "MES"].unique() if m
+        )
+        self._alterados = alterados
+        self.tabela = pd.DataFrame(
+            {
+                "TIPO": alterados["TIPO"].to_numpy(dtype=object),
+                "CHAVE": alterados["CHAVE"].to_numpy(dtype=object),
+                "MES": alterados["MES_ATU"]
+                .fillna(alterados["MES_ANT"])
+                .fillna("")
+                .to_numpy(dtype=object),
+                "ALTERACAO": alterados["ALTERACAO"].to_numpy(dtype=object),
+            },
+            columns=["TIPO", "CHAVE", "MES", "ALTERACAO"],
+        )
+
+    def _tipo(self, tipo: str) -> pd.DataFrame:
+        return self._alterados[self._alterados["TIPO"] == tipo]
+
+    @staticmethod
+    def _meses(df: pd.DataFrame) -> Set[str]:
+        meses = set(df["MES_ANT"].dropna()) | set(df["MES_ATU"].dropna())
+        return {m for m in meses if m}
+
+    @property
+    def vazia(self) -> bool:
+        return self.tabela.empty
+
+    @property
+    def plano_alterado(self) -> bool:
+        """Plano do arquivo ou plano processado (base histórica) mudou."""
+        return not self._tipo("I050").empty or not self._tipo("PLANO").empty
+
+    @property
+    def diario_alterado(self) -> bool:
+        """Algum lançamento mudou ou o Diário mudou de posição no arquivo."""
+        return not self._tipo("I200").empty or not self._tipo("POSICAO").empty
+
+    @property
+    def demonstracoes_alteradas(self) -> bool:
+        return not self._tipo("J005").empty
+
+    @property
+    def meses_diario(self) -> Set[str]:
+        """Meses com lançamentos incluídos, excluídos ou alterados."""
+        return self._meses(self._tipo("I200"))
+
+    @property
+    def meses_saldos(self) -> Optional[Set[str]]:
+        """
+        Meses cujo balancete precisa ser refeito (None = todos).
+
+        Um período alterado afeta o próprio mês e o seguinte (o saldo inicial
+        vem do forward roll). Lançamentos de encerramento ('E') alterados
+        afetam a reversão do mês. Mudanças no plano ou no I157 exigem o ano
+        inteiro.
+        """
+        if self.plano_alterado or not self._tipo("I157").empty:
+            return None
+
+        i200 = self._tipo("I200")
+        encerramento = i200[(i200["IND_ANT"] == "E") | (i200["IND_ATU"] == "E")]
+        meses = self._meses(self._tipo("I150")) | self._meses(encerramento)
+
+        seguintes = set()
+        for mes in meses:
+            if mes in self.meses_atuais:
+                i = self.meses_atuais.index(mes)
+                if i + 1 < len(self.meses_atuais):
+                    seguintes.add(self.meses_atuais[i + 1])
+        return meses | seguintes
+
+    def insumos_alterados(self) -> Set[str]:
+        """Insumos de auditoria afetados (ver ECDAuditor.TESTES)."""
+        insumos = set()
+        if self.plano_alterado:
+            insumos.add("plano")
+        if self.diario_alterado:
+            insumos.add("diario")
+        meses = self.meses_saldos
+        if meses is None or meses:
+            insumos.add("saldos")
+        return insumos
+
+
+@dataclass
+class EstadoRetificacao:
+    """Tudo o que é guardado de uma versão processada do ECD."""
+
+    assinatura: AssinaturaECD
+    tabelas: Dict[str, pd.DataFrame] = field(default_factory=dict)
+    auditoria: Dict[str, Any] = field(default_factory=dict)
+    # Chave (CacheResultadosAuditoria.chaves) de cada resultado em `auditoria`
+    chaves_auditoria: Dict[str, str] = field(default_factory=dict)
+
+
+class CacheRetificacao:
+    """
+    Cache em disco da última versão processada de cada ECD (CNPJ + período).
+
+    Guarda a assinatura, as tabelas que podem ser reaproveitadas por mês
+    (balancetes, lançamentos e fluxos) e os resultados da auditoria. Fica
+    fora de data/output, que é limpa a cada lote.
+    """
+
+    TABELAS = [
+        "03_Balancetes_Mensais",
+        "04_Balancete_baseRFB",
+        "06_Lancamentos_Contabeis",
+        "08_Fluxo_Contas",
+    ]
+
+    def __init__(self, dir_base: str):
+        self.dir_base = dir_base
+
+    def _pasta(self, cnpj: str, periodo: str) -> str:
+        return os.path.join(self.dir_base, f"{cnpj or 'SEM_CNPJ'}_{periodo}")
+
+    @staticmethod
+    def _ler_tabela(caminho: str, usar_arrow: bool) -> pd.DataFrame:
+        """
+        Lê uma tabela do cache com os dtypes do pipeline.
+
+        Os metadados pandas do Parquet restauram datas/inteiros Arrow, mas
+        string[pyarrow] (ArrowDtype) volta como StringDtype; no modo Arrow
+        essas colunas são convertidas de volta.
+        """
+        df = pd.read_parquet(caminho)
+        if usar_arrow:
+            for col in df.columns:
+                if isinstance(df[col].dtype, pd.StringDtype):
+                    df[col] = df[col].astype(pd.ArrowDtype(pa.string()))
+        return df
+
+    def carregar(
+        self, cnpj: str, periodo: str, usar_arrow: bool = False
+    ) -> Optional[EstadoRetificacao]:
+        """
+        Estado da última versão processada (None se não houver cache válido).
+
+        Args:
+            usar_arrow: O pipeline atual roda no modo Arrow (ver ECDProcessor).
+        """
+        pasta = self._pasta(cnpj, periodo)
+        caminho_assinatura = os.path.join(pasta, "assinatura.parquet")
+        if not os.path.exists(caminho_assinatura):
+            return None
+
+        try:
+            estado = EstadoRetificacao(AssinaturaECD.carregar(caminho_assinatura))
+            for nome in self.TABELAS:
+                caminho = os.path.join(pasta, f"{nome}.parquet")
+                if os.path.exists(caminho):
+                    estado.tabelas[nome] = self._ler_tabela(caminho, usar_arrow)
+            caminho_auditoria = os.path.join(pasta, "auditoria.pkl")
+            if os.path.exists(caminho_auditoria):
+                with open(caminho_auditoria, "rb") as f:
+                    estado.auditoria = pickle.load(f)
+            # Sem as chaves (cache anterior a elas), nenhum resultado é reaproveitado
+            caminho_chaves = os.path.join(pasta, "auditoria_chaves.json")
+            if os.path.exists(caminho_chaves):
+                with open(caminho_chaves, "r", encoding="utf-8") as f:
+                    estado.chaves_auditoria = json.load(f)
+            return estado
+        except Exception as e:
+            logger.warning(f"Cache de retificação ilegível ({pasta}): {e}")
+            return None
+
+    def salvar(self, cnpj: str, periodo: str, estado: EstadoRetificacao) -> None:
+        pasta = self._pasta(cnpj, periodo)
+        os.makedirs(pasta, exist_ok=True)
+        caminho_assinatura = os.path.join(pasta, "assinatura.parquet")
+        try:
+            # Invalida a versão anterior antes de sobrescrever as tabelas
+            if os.path.exists(caminho_assinatura):
+                os.remove(caminho_assinatura)
+            for nome in self.TABELAS:
+                df = estado.tabelas.get(nome)
+                if df is not None:
+                    df.to_parquet(os.path.join(pasta, f"{nome}.parquet"), index=False)
+            with open(os.path.join(pasta, "auditoria.pkl"), "wb") as f:
+                pickle.dump(estado.auditoria, f)
+            with open(os.path.join(pasta, "auditoria_chaves.json"), "w", encoding="utf-8") as f:
+                json.dump(estado.chaves_auditoria, f, indent=2, sort_keys=True)
+            # A assinatura por último: sem ela, o cache não é considerado válido
+            estado.assinatura.salvar(caminho_assinatura)
+        except Exception as e:
+            logger.warning(f"Falha ao gravar o cache de retificação ({pasta}): {e}")
+
+
+class ReprocessadorRetificadora:
+    """
+    Reprocessa um ECD aproveitando a versão anterior guardada em cache.
+
+    Sem versão anterior (ou com plano alterado) tudo é calculado do zero.
+    Caso contrário, apenas o que a DiferencaECD aponta é refeito:
+
+    - balancetes: rollup só dos meses afetados (demais meses do cache);
+    - lançamentos: reaproveitados se o Diário não mudou;
+    - fluxos: contrapartidas só dos meses com lançamentos alterados;
+    - auditoria: só os testes cuja chave do CacheResultadosAuditoria mudou
+      (insumos, código, parâmetros, limiares ou históricos).
+    """
+
+    def __init__(self, processor: Any, anterior: Optional[EstadoRetificacao]):
+        """
+        Args:
+            processor: ECDProcessor da nova versão (blocos já separados).
+            anterior: Estado da versão anterior (CacheRetificacao.carregar).
+        """
+        self.processor = processor
+        self.anterior = anterior
+        self.assinatura = AssinaturaECD.de_blocos(
+            processor.blocos, processor.processar_plano_contas()
+        )
+        self.diferenca: Optional[DiferencaECD] = (
+            self.assinatura.comparar(anterior.assinatura) if anterior else None
+        )
+        # Chaves dos testes desta versão (preenchidas em `auditoria`)
+        self.chaves_auditoria: Dict[str, str] = {}
+
+    @property
+    def reaproveita(self) -> bool:
+        return self.diferenca is not None and not self.diferenca.plano_alterado
+
+    def _tabela_anterior(self, nome: str) -> Optional[pd.DataFrame]:
+        if not self.reaproveita or self.anterior is None:
+            return None
+        return self.anterior.tabelas.get(nome)
+
+    def lancamentos(self) -> pd.DataFrame:
+        df_plano = self.processor.processar_plano_contas()
+        anterior = self._tabela_anterior("06_Lancamentos_Contabeis")
+        if anterior is not None and self.diferenca and not self.diferenca.diario_alterado:
+            self.processor.definir_lancamentos(anterior)
+        return self.processor.processar_lancamentos(df_plano)
+
+    def balancetes(self) -> Dict[str, pd.DataFrame]:
+        if not self.reaproveita or self.diferenca is None or self.anterior is None:
+            return self.processor.gerar_balancetes()
+        return self.processor.gerar_balancetes(
+            meses_recalculo=self.diferenca.meses_saldos,
+            anteriores=self.anterior.tabelas,
+        )
+
+    def fluxos(self, df_lancamentos: pd.DataFrame) -> MatrizFluxos:
+        anterior = self._tabela_anterior("08_Fluxo_Contas")
+        if anterior is None or self.diferenca is None or df_lancamentos.empty:
+            return self.processor.gerar_fluxo_contas(df_lancamentos)
+
+        meses = self.diferenca.meses_diario
+        if not meses:
+            # Nenhum lançamento mudou de conteúdo: a matriz anterior vale inteira
+            return MatrizFluxos.de_dataframe(
+                anterior.drop(columns=["CNPJ"], errors="ignore")
+            )
+
+        mes_lcto = _chave_mes(df_lancamentos["DT_LCTO"])
+        novos = (
+            ConstrutorContrapartidas(df_lancamentos[mes_lcto.isin(meses).to_numpy()])
+            .gerar_matriz_fluxos()
+            .para_dataframe()
+        )
+        preservados = anterior[~anterior["MES"].isin(meses)].drop(
+            columns=["CNPJ"], errors="ignore"
+        )
+        partes = [d for d in (preservados, novos) if not d.empty]
+        if not partes:
+            return MatrizFluxos(np.array([], dtype=object), {})
+        return MatrizFluxos.de_dataframe(pd.concat(partes, ignore_index=True))
+
+    def auditoria(self, auditor: Any) -> Dict[str, Any]:
+        """
+        Reaproveita da versão anterior os resultados cuja chave do
+        CacheResultadosAuditoria não mudou (mesmos insumos, código do teste,
+        parâmetros, limiares e históricos); os demais passam por
+        `executar_auditoria_completa` (agendador, cache de resultados e
+        amostragem, como num processamento do zero).
+        """
+        self.chaves_auditoria = CacheResultadosAuditoria.chaves(auditor, auditor.TESTES)
+        anterior = self.anterior
+        reaproveitados: Dict[str, Any] = {}
+        if self.reaproveita and anterior is not None:
+            for nome, chave in self.chaves_auditoria.items():
+                # Com amostragem, os testes amostráveis dependem da amostra
+                amostral = auditor.amostragem is not None and auditor.REGISTRO[nome].amostravel
+                if (
+                    not amostral
+                    and nome in anterior.auditoria
+                    and anterior.chaves_auditoria.get(nome) == chave
+                ):
+                    reaproveitados[nome] = anterior.auditoria[nome]
+        refazer = [nome for nome in auditor.TESTES if nome not in reaproveitados]
+        logger.info(
+            f"Retificadora: {len(refazer)} teste(s) refeito(s), "
+            f"{len(reaproveitados)} reaproveitado(s)."
+        )
+
+        # Reaproveitados têm a mesma chave: o predicado vale no Diário atual
+        auditor.vincular_evidencias(reaproveitados)
+        auditor.resultados.update(reaproveitados)
+        if refazer:
+            auditor.executar_auditoria_completa(refazer)
+        auditor._ordenar_resultados()
+        return auditor.resultados
+
+    def estado(
+        self, tabelas: Dict[str, pd.DataFrame], resultados: Dict[str, Any]
+    ) -> EstadoRetificacao:
+        """Estado desta versão, para gravar no cache."""
+        return EstadoRetificacao(
+            self.assinatura,
+            {n: tabelas[n] for n in CacheRetificacao.TABELAS if n in tabelas},
+            resultados,
+            {n: c for n, c in self.chaves_auditoria.items() if n in resultados},
+        )
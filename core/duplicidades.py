@@ -0,0 +1,169 @@
+import logging
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Logger local para uso interno do módulo (não configura nível globalmente)
+logger = logging.getLogger(__name__)
+
+
+def hash_linhas(df: pd.DataFrame, colunas: List[str]) -> np.ndarray:
+    """
+    Hash de 64 bits por linha sobre as colunas-chave.
+
+    Colunas de texto (ex.: HIST) são fatoradas antes do hash, de modo que
+    cada texto distinto é processado uma única vez. Nulos têm hash próprio
+    (duas linhas com nulo na mesma coluna empatam, como em `duplicated`).
+    A chance de colisão é desprezível (~n² / 2⁶⁵) mesmo com dezenas de
+    milhões de linhas.
+    """
+    if df.empty:
+        return np.array([], dtype=np.uint64)
+    return pd.util.hash_pandas_object(
+        df[colunas], index=False, categorize=True
+    ).to_numpy(dtype=np.uint64)
+
+
+def tamanho_grupo(chaves: np.ndarray) -> np.ndarray:
+    """Quantas linhas compartilham a chave de cada linha (um bincount)."""
+    if len(chaves) == 0:
+        return np.array([], dtype=np.int64)
+    codigos, _ = pd.factorize(chaves, sort=False)
+    return np.bincount(codigos)[codigos]
+
+
+class DetectorQuaseDuplicidades:
+    """
+    Quase duplicidades: partidas da mesma conta e do mesmo lado (D/C), em
+    lançamentos diferentes, com valores iguais (ou dentro da tolerância) e
+    datas a até `dias` de distância.
+
+    Em vez de comparar todos os pares, as partidas são ordenadas por
+    (conta, D/C, valor, data) e cada uma é comparada apenas com as
+    `janela - 1` seguintes (vizinhança ordenada): O(n log n) da ordenação
+    mais O(n · janela) de comparações vetorizadas. Valores iguais ficam
+    consecutivos e em ordem de data, então toda partida com um par dentro
+    do prazo é encontrada; só grupos com mais de `janela` repetições no
+    prazo deixam de listar todas as combinações.
+    """
+
+    def __init__(
+        self,
+        dias: int = 3,
+        tolerancia_abs: float = 0.0,
+        tolerancia_rel: float = 0.0,
+        janela: int = 5,
+    ):
+        """
+        Args:
+            dias: Distância máxima entre as datas (inclusive).
+            tolerancia_abs: Diferença máxima de valor, em reais.
+            tolerancia_rel: Diferença máxima relativa ao maior dos dois valores.
+            janela: Tamanho da vizinhança comparada após a ordenação.
+        """
+        self.dias = dias
+        self.tolerancia_abs = tolerancia_abs
+        self.tolerancia_rel = tolerancia_rel
+        self.janela = max(2, janela)
+
+    def detectar(
+        self,
+        df: pd.DataFrame,
+        datas: pd.Series,
+        chave_exata: Optional[np.ndarray] = None,
+        ignorar: Optional[np.ndarray] = None,
+    ) -> pd.DataFrame:
+        """
+        Pares de quase duplicidades do Diário.
+
+        Args:
+            df: Diário (COD_CTA, VL_SINAL; NUM_LCTO, IND_DC e HIST se houver).
+            datas: DT_LCTO convertido (datetime), alinhado a `df`.
+            chave_exata: Hash das duplicidades exatas (pares idênticos ficam
+                com o teste 4.2 e não se repetem aqui).
+            ignorar: Linhas fora da análise (encerramento, ruído etc.).
+
+        Returns:
+            Uma linha por par (A = mais antigo, B = mais recente).
+        """
+        if df.empty or "COD_CTA" not in df.columns or "VL_SINAL" not in df.columns:
+            return pd.DataFrame()
+
+        valor = np.abs(df["VL_SINAL"].to_numpy(dtype="float64", na_value=np.nan))
+        dia = datas.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+        validos = ~np.isnat(dia) & (np.nan_to_num(valor) > 0)
+        if ignorar is not None:
+            validos &= ~ignorar
+        linhas = np.flatnonzero(validos)
+        if len(linhas) < 2:
+            return pd.DataFrame()
+
+        conta, _ = pd.factorize(df["COD_CTA"].to_numpy()[linhas])
+        lado = (
+            pd.factorize(df["IND_DC"].to_numpy()[linhas])[0]
+            if "IND_DC" in df.columns
+            else np.zeros(len(linhas), dtype=np.int64)
+        )
+        lcto = (
+            pd.factorize(df["NUM_LCTO"].to_numpy()[linhas])[0]
+            if "NUM_LCTO" in df.columns
+            else np.arange(len(linhas))
+        )
+        centavos = np.rint(valor[linhas] * 100).astype(np.int64)
+        dia_int = dia[linhas].astype(np.int64)
+        exata = chave_exata[linhas] if chave_exata is not None else None
+
+        ordem = np.lexsort((dia_int, centavos, lado, conta))
+        pares_a: List[np.ndarray] = []
+        pares_b: List[np.ndarray] = []
+        for passo in range(1, min(self.janela, len(ordem))):
+            a, b = ordem[:-passo], ordem[passo:]
+            dif_valor = np.abs(centavos[b] - centavos[a])
+            limite = np.maximum(
+                np.rint(self.tolerancia_abs * 100),
+                np.rint(self.tolerancia_rel * np.maximum(centavos[a], centavos[b])),
+            )
+            casa = (
+                (conta[a] == conta[b])
+                & (lado[a] == lado[b])
+                & (lcto[a] != lcto[b])
+                & (dif_valor <= limite)
+                & (np.abs(dia_int[b] - dia_int[a]) <= self.dias)
+            )
+            if exata is not None:
+                casa &= exata[a] != exata[b]
+            pares_a.append(a[casa])
+            pares_b.append(b[casa])
+
+        a = np.concatenate(pares_a)
+        b = np.concatenate(pares_b)
+        if len(a) == 0:
+            return pd.DataFrame()
+
+        # A = partida mais antiga do par
+        troca = dia_int[b] < dia_int[a]
+        a, b = np.where(troca, b, a), np.where(troca, a, b)
+        ia, ib = linhas[a], linhas[b]
+
+        def _coluna(nome: str, idx: np.ndarray) -> np.ndarray:
+            return df[nome].to_numpy()[idx]
+
+        pares = {"COD_CTA": _coluna("COD_CTA", ia)}
+        if "CONTA" in df.columns:
+            pares["CONTA"] = _coluna("CONTA", ia)
+        if "IND_DC" in df.columns:
+            pares["IND_DC"] = _coluna("IND_DC", ia)
+        for sufixo, idx in (("A", ia), ("B", ib)):
+            for nome in ("NUM_LCTO", "DT_LCTO", "HIST"):
+                if nome in df.columns:
+                    pares[f"{nome}_{sufixo}"] = _coluna(nome, idx)
+            pares[f"VALOR_{sufixo}"] = valor[idx]
+        pares["DIAS"] = dia_int[b] - dia_int[a]
+        pares["DIF_VALOR"] = np.abs(centavos[b] - centavos[a]) / 100
+
+        return (
+            pd.DataFrame(pares)
+            .sort_values(["COD_CTA", "VALOR_A", "DIAS"], kind="stable")
+            .reset_index(drop=True)
+        )
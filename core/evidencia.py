@@ -0,0 +1,310 @@
+import os
+import logging
+from typing import Any, Callable, Dict, Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from exporters.csv_writer import EscritorCSV
+from exporters.parquet_writer import Perfil, obter_perfil
+
+# Logger local para uso interno do módulo (não configura nível globalmente)
+logger = logging.getLogger(__name__)
+
+ArrayAlinhado = Union[pd.Series, np.ndarray]
+
+
+class EvidenciaAuditoria:
+    """
+    Evidência de um teste (dossiê de lançamentos) descrita como predicado
+    sobre o Diário, em vez de um DataFrame copiado em `resultados`.
+
+    O predicado é: `filtro` (máscara por linha, opcional) E a tupla das
+    `colunas_chave` (arrays alinhados ao Diário) presente em `chaves`
+    (ex: COD_CTA × PERIODO das divergências do 1.1). As linhas só são
+    localizadas quando alguém pede a evidência, e só são copiadas em lotes
+    de `tamanho_lote` na exportação (Parquet/CSV), com limite opcional de
+    linhas. Em um ECD muito quebrado, o dossiê deixa de duplicar o Diário
+    na memória do worker até o fim da auditoria.
+
+    Ao ser serializada (cache de resultados, retificadoras, processos do
+    agendador), a evidência guarda o predicado, não as linhas: `chaves`, o
+    `filtro` (um bit por linha), os nomes das `colunas_chave` e as colunas
+    extras só nas linhas selecionadas. Ao ser lida, fica desvinculada até
+    que `vincular` a religue ao Diário (o mesmo, pela chave do cache).
+    """
+
+    def __init__(
+        self,
+        fonte: pd.DataFrame,
+        chaves: Optional[pd.DataFrame] = None,
+        colunas_chave: Optional[Dict[str, ArrayAlinhado]] = None,
+        filtro: Optional[np.ndarray] = None,
+        colunas_extras: Optional[Dict[str, ArrayAlinhado]] = None,
+    ):
+        """
+        Args:
+            fonte: DataFrame de origem (não é copiado).
+            chaves: Combinações de chave que entram na evidência (None = sem
+                restrição de chave, vale só o filtro).
+            colunas_chave: Coluna de `chaves` -> valores alinhados à fonte.
+            filtro: Máscara booleana alinhada à fonte.
+            colunas_extras: Colunas derivadas alinhadas à fonte, anexadas (ou
+                substituídas) nas linhas materializadas (ex: DT_LCTO já
+                convertida, PERIODO).
+        """
+        self.fonte: Optional[pd.DataFrame] = fonte
+        self.chaves = chaves
+        self.colunas_chave = colunas_chave or {}
+        self.filtro = filtro
+        self.colunas_extras = colunas_extras or {}
+        self._posicoes: Optional[np.ndarray] = None
+        # Estado de uma evidência desserializada (ver __getstate__/vincular)
+        self._nomes_chave = list(self.colunas_chave)
+        self._linhas_fonte = len(fonte)
+        self._extras_gravados: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def de_dataframe(cls, df: pd.DataFrame) -> "EvidenciaAuditoria":
+        """Evidência já materializada (todas as linhas de `df`)."""
+        return cls(df)
+
+    # --- Predicado ---
+
+    @property
+    def vinculada(self) -> bool:
+        """False enquanto uma evidência desserializada não for religada à fonte."""
+        return self.fonte is not None
+
+    def vincular(
+        self, fonte: pd.DataFrame, colunas: Optional[Dict[str, ArrayAlinhado]] = None
+    ) -> "EvidenciaAuditoria":
+        """
+        Religa o predicado de uma evidência desserializada à fonte.
+
+        Args:
+            fonte: O Diário sobre o qual o predicado foi montado.
+            colunas: Colunas derivadas alinhadas à fonte usadas como chave
+                (ex: PERIODO); as demais chaves são lidas da própria fonte.
+
+        Raises:
+            ValueError: Fonte com outro número de linhas ou predicado que não
+                seleciona as mesmas linhas de antes.
+        """
+        if len(fonte) != self._linhas_fonte:
+            raise ValueError(
+                f"Evidência montada sobre {self._linhas_fonte} linhas, fonte com {len(fonte)}."
+            )
+        colunas = colunas or {}
+        self.fonte = fonte
+        self.colunas_chave = {
+            nome: colunas[nome] if nome in colunas else fonte[nome] for nome in self._nomes_chave
+        }
+        self._posicoes = None
+        selecionadas = len(self.posicoes())
+        if any(len(valores) != selecionadas for valores in self._extras_gravados.values()):
+            raise ValueError("Predicado religado não seleciona as mesmas linhas da evidência.")
+        return self
+
+    def restringir(self, mascara: np.ndarray) -> "EvidenciaAuditoria":
+        """
+        Restringe a evidência às linhas de `mascara` (alinhada à fonte), com
+        E lógico no filtro atual. As posições são recalculadas no próximo uso.
+        """
+        mascara = np.asarray(mascara, dtype=bool)
+        if self._extras_gravados:
+            mantidas = mascara[self.posicoes()]
+            self._extras_gravados = {
+                nome: valores[mantidas] for nome, valores in self._extras_gravados.items()
+            }
+        self.filtro = mascara if self.filtro is None else np.asarray(self.filtro, dtype=bool) & mascara
+        self._posicoes = None
+        return self
+
+    def posicoes(self) -> np.ndarray:
+        """Posições (iloc) das linhas da fonte que satisfazem o predicado."""
+        if self._posicoes is None:
+            if self.fonte is None:
+                raise ValueError("Evidência desvinculada da fonte: use vincular() antes.")
+            mascara = (
+                np.ones(len(self.fonte), dtype=bool)
+                if self.filtro is None
+                else np.asarray(self.filtro, dtype=bool).copy()
+            )
+            if self.chaves is not None:
+                if self.chaves.empty:
+                    mascara[:] = False
+                else:
+                    nomes = list(self.chaves.columns)
+                    alvo = pd.MultiIndex.from_frame(self.chaves[nomes])
+                    linhas = pd.MultiIndex.from_arrays(
+                        [np.asarray(self.colunas_chave[n]) for n in nomes], names=nomes
+                    )
+                    mascara &= linhas.isin(alvo)
+            self._posicoes = np.flatnonzero(mascara)
+        return self._posicoes
+
+    def __len__(self) -> int:
+        return len(self.posicoes())
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    # --- Materialização ---
+
+    def _linhas(self, posicoes: np.ndarray) -> pd.DataFrame:
+        assert self.fonte is not None
+        lote = self.fonte.iloc[posicoes]
+        if self.colunas_extras:
+            lote = lote.assign(
+                **{
+                    nome: np.asarray(valores)[posicoes]
+                    for nome, valores in self.colunas_extras.items()
+                }
+            )
+        if self._extras_gravados:
+            # Gravadas só nas linhas selecionadas, na ordem de posicoes()
+            indices = np.searchsorted(self.posicoes(), posicoes)
+            lote = lote.assign(
+                **{nome: valores[indices] for nome, valores in self._extras_gravados.items()}
+            )
+        return lote.reset_index(drop=True)
+
+    def lotes(
+        self, tamanho_lote: int = 100_000, limite: Optional[int] = None
+    ) -> Iterator[pd.DataFrame]:
+        """Linhas da evidência em lotes, na ordem da fonte (até `limite`)."""
+        posicoes = self.posicoes()
+        if limite is not None:
+            posicoes = posicoes[:limite]
+        for inicio in range(0, len(posicoes), max(int(tamanho_lote), 1)):
+            yield self._linhas(posicoes[inicio : inicio + tamanho_lote])
+
+    def materializar(self, limite: Optional[int] = None) -> pd.DataFrame:
+        """Toda a evidência (até `limite` linhas) em um DataFrame."""
+        posicoes = self.posicoes()
+        if limite is not None:
+            posicoes = posicoes[:limite]
+        return self._linhas(posicoes)
+
+    # --- Serialização ---
+
+    def __getstate__(self) -> Dict[str, Any]:
+        if self.chaves is None and self.filtro is None:
+            # Sem predicado a evidência é a própria fonte (ex: de_dataframe)
+            return {"fonte": self.fonte}
+        if self.fonte is None:
+            extras = self._extras_gravados
+        else:
+            posicoes = self.posicoes()
+            extras = {
+                **self._extras_gravados,
+                **{nome: np.asarray(valores)[posicoes] for nome, valores in self.colunas_extras.items()},
+            }
+        return {
+            "chaves": self.chaves,
+            "filtro": (
+                None if self.filtro is None else np.packbits(np.asarray(self.filtro, dtype=bool))
+            ),
+            "nomes_chave": self._nomes_chave,
+            "linhas_fonte": self._linhas_fonte,
+            "extras": extras,
+        }
+
+    def __setstate__(self, estado: Dict[str, Any]) -> None:
+        fonte = estado.get("fonte")
+        self.fonte = fonte
+        self.chaves = estado.get("chaves")
+        filtro = estado.get("filtro")
+        self._linhas_fonte = estado.get("linhas_fonte", len(fonte) if fonte is not None else 0)
+        self.filtro = (
+            None if filtro is None else np.unpackbits(filtro, count=self._linhas_fonte).astype(bool)
+        )
+        self.colunas_chave = {}
+        self.colunas_extras = {}
+        self._posicoes = None
+        self._nomes_chave = list(estado.get("nomes_chave", []))
+        self._extras_gravados = dict(estado.get("extras", {}))
+
+    # --- Exportação em fluxo ---
+
+    @staticmethod
+    def _esquema(lote: pd.DataFrame) -> pa.Schema:
+        # Coluna toda nula no 1º lote não fixa tipo: assume texto
+        esquema = pa.Schema.from_pandas(lote, preserve_index=False)
+        for i, campo in enumerate(esquema):
+            if pa.types.is_null(campo.type):
+                esquema = esquema.set(i, pa.field(campo.name, pa.string()))
+        return esquema
+
+    def gravar_parquet(
+        self,
+        caminho: str,
+        tamanho_lote: int = 100_000,
+        limite: Optional[int] = None,
+        perfil: Perfil = None,
+    ) -> int:
+        """
+        Grava a evidência em Parquet, um row group por lote, com a compressão
+        e os índices do `perfil` (exporters/parquet_writer.py). Em fluxo, as
+        linhas seguem a ordem do Diário. Retorna as linhas.
+        """
+        perfil_parquet = obter_perfil(perfil)
+        escritor: Optional[pq.ParquetWriter] = None
+        total = 0
+        try:
+            for lote in self.lotes(tamanho_lote, limite):
+                if escritor is None:
+                    esquema = self._esquema(lote)
+                    escritor = perfil_parquet.escritor(caminho, esquema)
+                escritor.write_table(
+                    pa.Table.from_pandas(lote, schema=esquema, preserve_index=False)
+                )
+                total += len(lote)
+        finally:
+            if escritor is not None:
+                escritor.close()
+        return total
+
+    def gravar_csv(
+        self,
+        caminho: str,
+        tamanho_lote: int = 100_000,
+        limite: Optional[int] = None,
+        formatar: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    ) -> int:
+        """
+        Grava a evidência em CSV PT-BR (';', vírgula decimal, DD/MM/AAAA,
+        UTF-8 com BOM), lote a lote, pelo EscritorCSV. `formatar`, se
+        informado, é aplicado a cada lote antes da gravação. Retorna as
+        linhas gravadas.
+        """
+        with EscritorCSV(caminho, tamanho_lote) as escritor:
+            for lote in self.lotes(tamanho_lote, limite):
+                escritor.escrever(lote if formatar is None else formatar(lote))
+        return escritor.linhas
+
+
+def gravar_evidencia(
+    evidencia: Union[EvidenciaAuditoria, pd.DataFrame],
+    caminho: str,
+    tamanho_lote: int = 100_000,
+    limite: Optional[int] = None,
+    formatar: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    perfil: Perfil = None,
+) -> int:
+    """
+    Grava uma evidência (lazy ou DataFrame) em Parquet ou CSV conforme a
+    extensão do caminho. Nada é gravado se não houver linhas. `perfil` é o
+    perfil de gravação do Parquet.
+    """
+    if isinstance(evidencia, pd.DataFrame):
+        evidencia = EvidenciaAuditoria.de_dataframe(evidencia)
+    if evidencia.empty:
+        return 0
+    if os.path.splitext(caminho)[1].lower() == ".parquet":
+        return evidencia.gravar_parquet(caminho, tamanho_lote, limite, perfil)
+    return evidencia.gravar_csv(caminho, tamanho_lote, limite, formatar)
@@ -0,0 +1,275 @@
+import logging
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from core.contrapartidas import ConstrutorContrapartidas
+from core.duplicidades import tamanho_grupo
+
+# Logger local para uso interno do módulo (não configura nível globalmente)
+logger = logging.getLogger(__name__)
+
+# Feriados nacionais de data fixa (MM-DD). Consciência Negra é nacional desde 2024.
+FERIADOS_FIXOS = ("01-01", "04-21", "05-01", "09-07", "10-12", "11-02", "11-15", "12-25")
+CONSCIENCIA_NEGRA = ("11-20", 2024)
+
+# Dias sem expediente bancário relativos à Páscoa: Carnaval (segunda e terça),
+# Sexta-feira Santa e Corpus Christi
+DESLOCAMENTOS_PASCOA = (-48, -47, -2, 60)
+
+# Mistura do hash da conta débito na chave do par (constante de Fibonacci, 2^64/φ)
+MULTIPLICADOR_PAR = np.uint64(0x9E3779B97F4A7C15)
+
+ArrayLike = Union[pd.Series, np.ndarray, Sequence]
+
+# Faixa da tabela pré-calculada (datas fora dela são completadas sob demanda)
+ANOS_TABELA = (1990, 2060)
+
+
+def pascoa(ano: int) -> date:
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher, calendário gregoriano)."""
+    a, b, c = ano % 19, ano // 100, ano % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes = (h + l - 7 * m + 114) // 31
+    dia = (h + l - 7 * m + 114) % 31 + 1
+    return date(ano, mes, dia)
+
+
+@lru_cache(maxsize=None)
+def feriados_nacionais(ano_inicial: int, ano_final: int) -> np.ndarray:
+    """Tabela ordenada (datetime64[D]) dos feriados nacionais e bancários do período."""
+    datas = []
+    for ano in range(ano_inicial, ano_final + 1):
+        datas += [np.datetime64(f"{ano}-{mm_dd}") for mm_dd in FERIADOS_FIXOS]
+        if ano >= CONSCIENCIA_NEGRA[1]:
+            datas.append(np.datetime64(f"{ano}-{CONSCIENCIA_NEGRA[0]}"))
+        domingo = pascoa(ano)
+        datas += [np.datetime64(domingo + timedelta(days=d)) for d in DESLOCAMENTOS_PASCOA]
+    return np.unique(np.array(datas, dtype="datetime64[D]"))
+
+
+def dias(datas: pd.Series) -> np.ndarray:
+    """Datas do Diário como datetime64[D] (NaT onde inválida)."""
+    return pd.to_datetime(datas, errors="coerce").to_numpy(dtype="datetime64[D]")
+
+
+def mascara_fim_de_semana(dias_lcto: np.ndarray) -> np.ndarray:
+    """Sábado ou domingo (aritmética sobre os dias desde 1970-01-01, uma quinta)."""
+    validos = ~np.isnat(dias_lcto)
+    dia_semana = (dias_lcto.astype("datetime64[D]").view("int64") + 3) % 7  # 0 = segunda
+    return validos & (dia_semana >= 5)
+
+
+def mascara_feriado(dias_lcto: np.ndarray, extras: Iterable[str] = ()) -> np.ndarray:
+    """
+    Feriado nacional (ver feriados_nacionais) ou data em `extras`: "AAAA-MM-DD"
+    para uma data específica ou "MM-DD" para um feriado local de todo ano.
+    """
+    validos = ~np.isnat(dias_lcto)
+    if not validos.any():
+        return validos
+    anos = dias_lcto[validos].astype("datetime64[Y]").astype(int) + 1970
+    inicio = min(ANOS_TABELA[0], int(anos.min()))
+    fim = max(ANOS_TABELA[1], int(anos.max()))
+    tabela = feriados_nacionais(inicio, fim)
+
+    extras = [str(e).strip() for e in extras if str(e).strip()]
+    anuais = [e for e in extras if len(e) == 5]
+    if extras:
+        adicionais = [np.datetime64(e) for e in extras if len(e) == 10]
+        adicionais += [
+            np.datetime64(f"{ano}-{mm_dd}") for ano in range(inicio, fim + 1) for mm_dd in anuais
+        ]
+        tabela = np.union1d(tabela, np.array(adicionais, dtype="datetime64[D]"))
+    return validos & np.isin(dias_lcto, tabela)
+
+
+def centavos(valores: pd.Series) -> np.ndarray:
+    """Valor absoluto em centavos inteiros (0 onde nulo), para aritmética exata."""
+    absoluto = np.abs(pd.to_numeric(valores, errors="coerce").to_numpy(dtype="float64"))
+    return np.rint(np.nan_to_num(absoluto) * 100).astype(np.int64)
+
+
+def mascara_valor_redondo(
+    valores_centavos: np.ndarray, multiplo: float = 1000.0, valor_minimo: float = 0.0
+) -> np.ndarray:
+    """Valor múltiplo exato de `multiplo` reais (e de ao menos `valor_minimo`)."""
+    passo = int(round(multiplo * 100))
+    minimo = max(int(round(valor_minimo * 100)), passo)
+    return (valores_centavos >= minimo) & (valores_centavos % passo == 0)
+
+
+def mascara_abaixo_alcada(
+    valores_centavos: np.ndarray, alcadas: Sequence[float], faixa: float = 0.05
+) -> np.ndarray:
+    """
+    Valor logo abaixo de uma alçada de aprovação: dentro de `faixa` (ex: 5%)
+    abaixo do próximo limite (ex: R$ 9.600 a R$ 9.999,99 com alçada de R$ 10 mil).
+    Uma busca binária por linha na tabela ordenada de alçadas.
+    """
+    limites = np.unique(np.rint(np.asarray(alcadas, dtype="float64") * 100).astype(np.int64))
+    if len(limites) == 0:
+        return np.zeros(len(valores_centavos), dtype=bool)
+    proxima = np.searchsorted(limites, valores_centavos, side="right")
+    tem_proxima = proxima < len(limites)
+    limite = limites[np.minimum(proxima, len(limites) - 1)]
+    return tem_proxima & (valores_centavos >= limite * (1 - faixa))
+
+
+def mascara_historico_curto(historicos: pd.Series, minimo_caracteres: int = 5) -> np.ndarray:
+    """Histórico vazio ou com menos de `minimo_caracteres` (avaliado por texto distinto)."""
+    codigos, distintos = pd.factorize(historicos, sort=False)
+    tamanho = (
+        pd.Series(distintos, dtype=object).astype(str).str.strip().str.len().to_numpy()
+        if len(distintos)
+        else np.zeros(0, dtype=np.int64)
+    )
+    curto = np.append(tamanho < minimo_caracteres, True)  # código -1 = nulo
+    return curto[codigos]
+
+
+def chave_par(debito: ArrayLike, credito: ArrayLike) -> np.ndarray:
+    """
+    Chave inteira (uint64) do par ordenado (conta débito, conta crédito).
+
+    Cada COD_CTA distinto é hasheado uma única vez (hash estável entre
+    execuções, comparável com os pares de anos anteriores) e os dois hashes
+    são combinados de forma assimétrica: (A, B) e (B, A) são pares diferentes.
+    """
+    debito = np.asarray(debito, dtype=object)
+    n = len(debito)
+    codigos, distintos = pd.factorize(
+        np.concatenate([debito, np.asarray(credito, dtype=object)]), sort=False
+    )
+    hashes = pd.util.hash_array(pd.Index(distintos).astype(str).to_numpy(dtype=object))
+    h = np.append(hashes, np.uint64(0))[codigos]  # código -1 (conta nula) -> 0
+    return h[:n] * MULTIPLICADOR_PAR ^ h[n:]
+
+
+class ParesIncomuns:
+    """
+    Pares débito/crédito incomuns no Diário.
+
+    Para cada lançamento (PK do I200), os pares conta debitada × conta
+    creditada vêm do produto esparso lançamento × conta de
+    ConstrutorContrapartidas (sem o self-merge por lançamento, quadrático
+    nos lançamentos de muitas linhas). Cada par vira uma chave inteira
+    (chave_par) e a frequência é o número de lançamentos com o par.
+
+    Um par é incomum quando:
+    - RARO: frequência até o `percentil` da distribuição das ocorrências de
+      pares do ano (ex: 1% = o 1% de ocorrências mais raras); ou
+    - NOVO: nunca apareceu nos anos anteriores do mesmo CNPJ (fluxos
+      consolidados de execuções anteriores), havendo esse histórico.
+
+    Só entram pares com fluxo rateado de ao menos `valor_minimo`.
+    """
+
+    # Colunas lidas do CONSOLIDADO_08_Fluxo_Contas (MatrizFluxos.para_dataframe)
+    COLUNAS_HISTORICO = ["CNPJ", "MES", "COD_CTA_DEB", "COD_CTA_CRED"]
+
+    def __init__(self, percentil: float = 1.0, valor_minimo: float = 1000.0):
+        self.percentil = percentil
+        self.valor_minimo = valor_minimo
+
+    def pontuar(
+        self,
+        df_diario: pd.DataFrame,
+        ignorar: Optional[np.ndarray] = None,
+        historico: Optional[pd.DataFrame] = None,
+    ) -> Tuple[np.ndarray, pd.DataFrame]:
+        """
+        Args:
+            df_diario: Lançamentos (I200 + I250) com a chave do I200.
+            ignorar: Linhas fora da análise (ex: encerramento).
+            historico: Fluxos de anos anteriores (COLUNAS_HISTORICO); só os
+                meses anteriores ao Diário e do mesmo CNPJ são considerados.
+
+        Returns:
+            (máscara das linhas do Diário nos lançamentos com par incomum,
+            pares incomuns agregados: COD_CTA_DEB, COD_CTA_CRED, OCORRENCIAS,
+            VALOR, NOVO, RARO)
+        """
+        colunas = ["COD_CTA_DEB", "COD_CTA_CRED", "OCORRENCIAS", "VALOR", "NOVO", "RARO"]
+        mascara = np.zeros(len(df_diario), dtype=bool)
+        vazio = (mascara, pd.DataFrame(columns=colunas))
+        considerar = np.ones(len(df_diario), dtype=bool) if ignorar is None else ~ignorar
+        if not considerar.any():
+            return vazio
+        diario = df_diario[considerar]
+        construtor = ConstrutorContrapartidas(diario)
+        pares = construtor.gerar_contrapartidas()
+        if pares.empty:
+            return vazio
+
+        chaves = chave_par(pares["COD_CTA_DEB"].to_numpy(), pares["COD_CTA_CRED"].to_numpy())
+        # Pares são únicos por lançamento: o tamanho do grupo é a frequência
+        ocorrencias = tamanho_grupo(chaves)
+        raro = ocorrencias <= np.percentile(ocorrencias, self.percentil, method="lower")
+
+        anteriores = self._chaves_historico(historico, diario, pares["MES"])
+        novo = (
+            ~np.isin(chaves, anteriores)
+            if anteriores is not None
+            else np.zeros(len(chaves), dtype=bool)
+        )
+        valor = pares["VL_FLUXO"].to_numpy(dtype="float64")
+        incomum = (raro | novo) & (valor >= self.valor_minimo)
+        if not incomum.any():
+            return vazio
+
+        lctos = pd.unique(pares["LCTO"].to_numpy()[incomum])
+        mascara[considerar] = diario[construtor.coluna_lcto].isin(lctos).to_numpy()
+
+        resumo = (
+            pd.DataFrame(
+                {
+                    "COD_CTA_DEB": pares["COD_CTA_DEB"].to_numpy()[incomum],
+                    "COD_CTA_CRED": pares["COD_CTA_CRED"].to_numpy()[incomum],
+                    "OCORRENCIAS": ocorrencias[incomum],
+                    "VALOR": valor[incomum],
+                    "NOVO": novo[incomum],
+                    "RARO": raro[incomum],
+                }
+            )
+            .groupby(["COD_CTA_DEB", "COD_CTA_CRED"], sort=False)
+            .agg(
+                OCORRENCIAS=("OCORRENCIAS", "first"),
+                VALOR=("VALOR", "sum"),
+                NOVO=("NOVO", "first"),
+                RARO=("RARO", "first"),
+            )
+            .reset_index()
+            .sort_values("VALOR", ascending=False, kind="stable")
+            .reset_index(drop=True)
+        )
+        return mascara, resumo[colunas]
+
+    def _chaves_historico(
+        self, historico: Optional[pd.DataFrame], diario: pd.DataFrame, meses: pd.Series
+    ) -> Optional[np.ndarray]:
+        """Chaves dos pares vistos antes do primeiro mês do Diário (mesmo CNPJ)."""
+        if historico is None or historico.empty:
+            return None
+        anterior = historico["MES"].astype(str).to_numpy() < str(meses.min())
+        if "CNPJ" in historico.columns and "CNPJ" in diario.columns:
+            cnpjs = pd.unique(diario["CNPJ"].dropna())
+            if len(cnpjs):
+                anterior &= historico["CNPJ"].isin(cnpjs).to_numpy()
+        if not anterior.any():
+            return None
+        return np.unique(
+            chave_par(
+                historico["COD_CTA_DEB"].to_numpy()[anterior],
+                historico["COD_CTA_CRED"].to_numpy()[anterior],
+            )
+        )
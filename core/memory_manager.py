@@ -0,0 +1,202 @@
+import os
+import shutil
+import logging
+import tempfile
+import weakref
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+# Logger local para uso interno do módulo (não configura nível globalmente)
+logger = logging.getLogger(__name__)
+
+
+class GerenciadorBlocos(MutableMapping):
+    """
+    Dicionário de blocos (dfECD_<REG>) com orçamento de RAM e spill em disco.
+
+    Cada tabela tem seu tamanho medido na inserção. Quando o total residente
+    passa do orçamento, as tabelas menos usadas recentemente são gravadas em
+    Arrow IPC (uma vez) e liberadas da memória. No próximo acesso, a tabela
+    é recarregada do arquivo via memory-map, sob demanda.
+
+    Os blocos são tratados como somente leitura após a separação (o processor
+    só faz merges/cópias sobre eles), por isso um arquivo já gravado continua
+    válido e não é regravado em spills seguintes.
+    """
+
+    def __init__(
+        self,
+        orcamento_mb: Optional[float] = None,
+        dir_spill: Optional[str] = None,
+    ):
+        """
+        Args:
+            orcamento_mb: Limite de RAM (MB) para as tabelas residentes.
+                None desativa o spill (comportamento de um dict comum).
+            dir_spill: Pasta para os arquivos .arrow. Se omitida, uma pasta
+                temporária é criada no primeiro spill e removida ao final.
+        """
+        self.orcamento_bytes = (
+            int(orcamento_mb * 1024 * 1024) if orcamento_mb is not None else None
+        )
+        self._dir_spill = dir_spill
+        self._dir_temporario = dir_spill is None
+
+        # Residentes em ordem LRU (mais antigo primeiro)
+        self._residentes: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._tamanhos: Dict[str, int] = {}
+        self._arquivos: Dict[str, str] = {}
+        self._arrow_nativo: Dict[str, bool] = {}
+        self._chaves: Dict[str, None] = {}  # Preserva a ordem de inserção
+
+        self.estatisticas = {"spills": 0, "recargas": 0}
+        self._finalizador: Optional[weakref.finalize] = None
+
+    # --- Interface de dicionário ---
+
+    def __setitem__(self, chave: str, df: pd.DataFrame) -> None:
+        self._descartar_arquivo(chave)
+        self._residentes[chave] = df
+        self._residentes.move_to_end(chave)
+        self._tamanhos[chave] = int(df.memory_usage(deep=True).sum())
+        self._arrow_nativo[chave] = bool(len(df.columns)) and all(
+            isinstance(dt, pd.ArrowDtype) for dt in df.dtypes
+        )
+        self._chaves[chave] = None
+        self._aplicar_orcamento(protegida=chave)
+
+    def __getitem__(self, chave: str) -> pd.DataFrame:
+        if chave in self._residentes:
+            self._residentes.move_to_end(chave)
+            return self._residentes[chave]
+        if chave not in self._arquivos:
+            raise KeyError(chave)
+
+        df = self._recarregar(chave)
+        self._residentes[chave] = df
+        self._aplicar_orcamento(protegida=chave)
+        return df
+
+    def __delitem__(self, chave: str) -> None:
+        if chave not in self._chaves:
+            raise KeyError(chave)
+        self._residentes.pop(chave, None)
+        self._tamanhos.pop(chave, None)
+        self._arrow_nativo.pop(chave, None)
+        self._descartar_arquivo(chave)
+        del self._chaves[chave]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._chaves))
+
+    def __len__(self) -> int:
+        return len(self._chaves)
+
+    def __contains__(self, chave: object) -> bool:
+        return chave in self._chaves
+
+    # --- Consultas ---
+
+    @property
+    def bytes_residentes(self) -> int:
+        """Total (bytes) das tabelas atualmente em memória."""
+        return sum(self._tamanhos[c] for c in self._residentes)
+
+    def residente(self, chave: str) -> bool:
+        """Indica se a tabela está em memória (False = apenas em disco)."""
+        return chave in self._residentes
+
+    def fechar(self) -> None:
+        """Remove os arquivos de spill (a pasta inteira, se temporária)."""
+        if self._finalizador is not None:
+            self._finalizador()
+            self._finalizador = None
+        self._arquivos.clear()
+
+    # --- Spill / Recarga ---
+
+    def _aplicar_orcamento(self, protegida: str) -> None:
+        """Libera tabelas frias (LRU) até o total residente caber no orçamento."""
+        if self.orcamento_bytes is None:
+            return
+
+        total = self.bytes_residentes
+        for chave in list(self._residentes):
+            if total <= self.orcamento_bytes:
+                break
+            if chave == protegida:
+                continue
+            if self._spill(chave):
+                total -= self._tamanhos[chave]
+
+    def _spill(self, chave: str) -> bool:
+        """Grava a tabela em Arrow IPC (se ainda não gravada) e a tira da RAM."""
+        if chave not in self._arquivos:
+            df = self._residentes[chave]
+            try:
+                tabela = pa.Table.from_pandas(df, preserve_index=False)
+            except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                # Colunas object com tipos mistos: a tabela permanece residente
+                logger.debug(f"Bloco {chave} não pôde ir para Arrow IPC: {e}")
+                return False
+
+            caminho = os.path.join(self._obter_dir_spill(), f"{chave}.arrow")
+            with pa.OSFile(caminho, "wb") as sink:
+                with ipc.new_file(sink, tabela.schema) as writer:
+                    writer.write_table(tabela)
+            self._arquivos[chave] = caminho
+
+        del self._residentes[chave]
+        self.estatisticas["spills"] += 1
+        logger.debug(f"Spill: {chave} ({self._tamanhos[chave] / 1024**2:.1f} MB)")
+        return True
+
+    def _recarregar(self, chave: str) -> pd.DataFrame:
+        """Recarrega a tabela do arquivo IPC via memory-map."""
+        # Sem cópia: os buffers da tabela apontam para o arquivo mapeado
+        fonte = pa.memory_map(self._arquivos[chave], "r")
+        tabela = ipc.open_file(fonte).read_all()
+        self.estatisticas["recargas"] += 1
+
+        if self._arrow_nativo.get(chave):
+            # Mantém os dtypes Arrow (e os buffers mapeados) sem conversão
+            return tabela.to_pandas(types_mapper=pd.ArrowDtype)
+        return tabela.to_pandas()
+
+    def _obter_dir_spill(self) -> str:
+        if self._dir_spill is None:
+            self._dir_spill = tempfile.mkdtemp(prefix="ecd_spill_")
+        os.makedirs(self._dir_spill, exist_ok=True)
+        if self._finalizador is None:
+            self._finalizador = weakref.finalize(
+                self,
+                GerenciadorBlocos._limpar,
+                self._dir_spill,
+                self._arquivos,
+                self._dir_temporario,
+            )
+        return self._dir_spill
+
+    def _descartar_arquivo(self, chave: str) -> None:
+        caminho = self._arquivos.pop(chave, None)
+        if caminho and os.path.exists(caminho):
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _limpar(pasta: str, arquivos: Dict[str, str], temporaria: bool) -> None:
+        if temporaria:
+            shutil.rmtree(pasta, ignore_errors=True)
+            return
+        for caminho in list(arquivos.values()):
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
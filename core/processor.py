@@ -3,8 +3,22 @@ import json
 import pandas as pd
 import logging
 import numpy as np
-
-from typing import Dict, List, Any, Optional, cast
+import pyarrow as pa
+
+from typing import (
+    Dict,
+    List,
+    Any,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Set,
+    cast,
+)
+from core.contrapartidas import ConstrutorContrapartidas, MatrizFluxos
+from core.memory_manager import GerenciadorBlocos
+from core.reader_ecd import ECDReader
+from core.tensor_balancete import TensorBalancete
 from core.telemetry import monitor_task, TelemetryCollector
 
 # Logger local para uso interno do módulo (não configura nível globalmente)
@@ -22,12 +36,23 @@ class ECDProcessor:
         cnpj: str = "",
         layout_versao: str = "",
         knowledge_base: Optional[Any] = None,
+        usar_arrow: bool = False,
+        orcamento_ram_mb: Optional[float] = None,
     ):
-        self.df_bruto = pd.DataFrame(registros) if registros else pd.DataFrame()
+        # Modo Arrow: os blocos nascem direto de tabelas Arrow (sem df_bruto de objetos)
+        self.usar_arrow = usar_arrow
+        self.df_bruto = (
+            pd.DataFrame(registros)
+            if registros and not usar_arrow
+            else pd.DataFrame()
+        )
         self.cnpj = cnpj
         self.layout_versao = layout_versao
         self.knowledge_base = knowledge_base
-        self.blocos: Dict[str, pd.DataFrame] = {}
+        # Blocos por registro com orçamento de RAM (spill em Arrow IPC); None = sem limite
+        self.blocos: MutableMapping[str, pd.DataFrame] = GerenciadorBlocos(
+            orcamento_mb=orcamento_ram_mb
+        )
         self.cod_plan_ref: Optional[str] = None
         self.ano_vigencia: Optional[int] = None
         self.telemetry: Optional[TelemetryCollector] = None
@@ -36,6 +61,7 @@ class ECDProcessor:
         # --- Cache interno (evita reprocessamento dentro do mesmo ECD) ---
         self._cache_plano: Optional[pd.DataFrame] = None
         self._cache_lancamentos: Optional[pd.DataFrame] = None
+        self._cache_fluxos: Optional[MatrizFluxos] = None
 
         # Path para o catálogo de planos referenciais
         self.catalog_path = os.path.normpath(
@@ -48,9 +74,15 @@ class ECDProcessor:
             )
         )
 
-        if not self.df_bruto.empty:
+        if self.usar_arrow and registros:
+            self._separar_blocos_arrow(registros)
+            self._identificar_metadados_referenciais()
+        elif not self.df_bruto.empty:
             self._separar_blocos()
             self._identificar_metadados_referenciais()
+            if orcamento_ram_mb is not None:
+                # Com orçamento, o df_bruto não sobrevive à separação
+                self.df_bruto = pd.DataFrame()
 
     def _obter_arquivos_referenciais(self) -> List[str]:
         """
@@ -144,6 +176,31 @@ class ECDProcessor:
             # Remove duplicatas de colunas que possam surgir na renomeação
             self.blocos[f"dfECD_{reg}"] = df_reg.loc[:, ~df_reg.columns.duplicated()]
 
+    def _separar_blocos_arrow(self, registros: List[Dict[str, Any]]) -> None:
+        """
+        Equivalente a _separar_blocos, mas com colunas Arrow (string[pyarrow],
+        date32, decimal128, int64) montadas uma única vez por registro.
+        """
+        for reg, tabela in ECDReader.registros_para_arrow(registros).items():
+            # Colunas 100% nulas (tipo null) equivalem ao dropna(axis=1, how="all")
+            campos = [
+                f.name
+                for f in tabela.schema
+                if f.name != "REG" and not pa.types.is_null(f.type)
+            ]
+            # Mesma ordem de colunas do df_bruto: chaves técnicas antes dos campos
+            tecnicas = [c for c in ["LINHA_ORIGEM", "PK", "FK_PAI"] if c in campos]
+            campos = tecnicas + [c for c in campos if c not in tecnicas]
+            df_reg = tabela.select(campos).to_pandas(types_mapper=pd.ArrowDtype)
+
+            prefixo = f"{reg}_"
+            df_reg = df_reg.rename(
+                columns=lambda c: (
+                    str(c).removeprefix(prefixo) if str(c).startswith(prefixo) else c
+                )
+            )
+            self.blocos[f"dfECD_{reg}"] = df_reg.loc[:, ~df_reg.columns.duplicated()]
+
     @monitor_task("ECDProcessor", "_identificar_metadados_referenciais")
     def _identificar_metadados_referenciais(self) -> None:
         """Determina o Ano e o Código da Instituição (Funil de Metadados)."""
@@ -234,8 +291,62 @@ class ECDProcessor:
     @staticmethod
     def _series_to_float(s: Any) -> pd.Series:
         """Converte uma Series inteira para float64 vetorialmente (sem .apply)."""
+        if isinstance(getattr(s, "dtype", None), pd.ArrowDtype):
+            tipo = s.dtype.pyarrow_dtype
+            if (
+                pa.types.is_decimal(tipo)
+                or pa.types.is_integer(tipo)
+                or pa.types.is_floating(tipo)
+            ):
+                # decimal128/int64 Arrow -> float64 numpy direto, sem passar por objetos
+                return pd.Series(
+                    s.to_numpy(dtype="float64", na_value=np.nan), index=s.index
+                ).fillna(0.0)
         return pd.to_numeric(s, errors="coerce").fillna(0.0)
 
+    @staticmethod
+    def _eh_coluna_texto(s: pd.Series) -> bool:
+        """Identifica colunas textuais (object numpy ou string/null Arrow)."""
+        if isinstance(s.dtype, pd.ArrowDtype):
+            tipo = s.dtype.pyarrow_dtype
+            return (
+                pa.types.is_string(tipo)
+                or pa.types.is_large_string(tipo)
+                or pa.types.is_null(tipo)
+            )
+        return s.dtype == object
+
+    @staticmethod
+    def _sanear_texto(s: pd.Series) -> pd.Series:
+        """Texto sem nulos, com ';' e quebras de linha trocados por espaço."""
+        codigos, distintos = pd.factorize(s, sort=False)
+        limpos = (
+            pd.Series(distintos, dtype=object)
+            .astype(str)
+            .str.replace(r"[;\r\n]", " ", regex=True)
+            .to_numpy(dtype=object)
+        )
+        return pd.Series(np.append(limpos, "")[codigos], index=s.index, dtype=object)
+
+    @staticmethod
+    def _chave_mes(s: pd.Series) -> pd.Series:
+        """Converte uma Series de datas em chave mensal 'AAAA-MM' ('' se inválida)."""
+        # Converte só as datas distintas (poucas centenas por ano), não o
+        # strftime linha a linha sobre o Diário inteiro
+        codigos, distintas = pd.factorize(s, sort=False)
+        meses = (
+            pd.to_datetime(pd.Series(distintas), errors="coerce")
+            .dt.strftime("%Y-%m")
+            .fillna("")
+            .to_numpy(dtype=object)
+        )
+        return pd.Series(np.append(meses, "")[codigos], index=s.index, dtype=object)
+
+    def fechar(self) -> None:
+        """Remove os arquivos de spill dos blocos (chamar ao fim de cada ECD)."""
+        if isinstance(self.blocos, GerenciadorBlocos):
+            self.blocos.fechar()
+
     @monitor_task("ECDProcessor", "processar_plano_contas")
     def processar_plano_contas(self) -> pd.DataFrame:
         """Processa o Plano de Contas da Empresa (I050) integrado com o Referencial (I051)."""
@@ -375,7 +486,7 @@ class ECDProcessor:
         df_lctos["VL_C"] = np.where(ind_c, vl_dc, 0.0)
         df_lctos["VL_SINAL"] = df_lctos["VL_D"] - df_lctos["VL_C"]
 
-        if not df_plano.empty:
+        if not df_plano.empty and "CONTA" in df_plano.columns:
             df_lctos = pd.merge(
                 df_lctos, df_plano[["COD_CTA", "CONTA"]], on="COD_CTA", how="left"
             )
@@ -383,10 +494,41 @@ class ECDProcessor:
         self._cache_lancamentos = df_lctos
         return df_lctos
 
+    def definir_lancamentos(self, df_lancamentos: pd.DataFrame) -> None:
+        """
+        Usa lançamentos já processados (ex.: reaproveitados do cache de uma
+        retificadora cujo Diário não mudou) no lugar de processar I200/I250.
+        """
+        self._cache_lancamentos = df_lancamentos
+
+    @monitor_task("ECDProcessor", "gerar_fluxo_contas")
+    def gerar_fluxo_contas(self, df_lancamentos: pd.DataFrame) -> MatrizFluxos:
+        """
+        Reconstrói as contrapartidas do Diário e monta a matriz mensal
+        conta × conta (scipy.sparse), com rateio pro rata em lançamentos N:M.
+        """
+        if self._cache_fluxos is not None:
+            return self._cache_fluxos
+
+        self._cache_fluxos = ConstrutorContrapartidas(
+            df_lancamentos
+        ).gerar_matriz_fluxos()
+        return self._cache_fluxos
+
     @monitor_task("ECDProcessor", "gerar_balancetes")
-    def gerar_balancetes(self) -> Dict[str, pd.DataFrame]:
+    def gerar_balancetes(
+        self,
+        meses_recalculo: Optional[Set[str]] = None,
+        anteriores: Optional[Dict[str, pd.DataFrame]] = None,
+    ) -> Dict[str, pd.DataFrame]:
         """
         Gera balancetes com Forward Roll, Reversão de Encerramento.
+
+        Args:
+            meses_recalculo: Meses ("AAAA-MM") cujo rollup deve ser refeito.
+                Só tem efeito junto com `anteriores`.
+            anteriores: Balancetes (03/04) de uma versão anterior do mesmo ECD.
+                Os meses fora de `meses_recalculo` são reaproveitados dele.
         """
         df_plano = self.processar_plano_contas()
         df_i150 = self.blocos.get("dfECD_I150")
@@ -485,13 +627,30 @@ class ECDProcessor:
         )
 
         # 5. Propagação Hierárquica (Plano da Empresa)
-        balancete_empresa = self._propagar_hierarquia(df_base, df_plano)
+        # Retificadora: só os meses afetados passam pelo rollup; os demais vêm
+        # da versão anterior (o forward roll acima continua sobre o ano todo)
+        parcial = meses_recalculo is not None and anteriores is not None
+        meses = meses_recalculo if meses_recalculo is not None else set()
+        chave_mes = self._chave_mes(cast(pd.Series, df_base["DT_FIN"]))
+        df_rollup = df_base[chave_mes.isin(meses)] if parcial else df_base
+        balancete_empresa = self._propagar_hierarquia(df_rollup, df_plano)
+        if parcial:
+            balancete_empresa = self._mesclar_meses(
+                balancete_empresa,
+                (anteriores or {}).get("03_Balancetes_Mensais"),
+                meses,
+                list(chave_mes.unique()),
+            )
         if not balancete_empresa.empty:
             for col in ["VL_SLD_INI_SIG", "VL_DEB", "VL_CRED", "VL_SLD_FIN_SIG"]:
                 balancete_empresa[col] = balancete_empresa[col].round(2)
 
         # 6. Balancete Referencial (baseRFB)
-        balancete_rfb = self.gerar_balancete_referencial(df_base)
+        balancete_rfb = self.gerar_balancete_referencial(
+            df_base,
+            meses_recalculo=meses_recalculo if parcial else None,
+            anterior=(anteriores or {}).get("04_Balancete_baseRFB"),
+        )
         if not balancete_rfb.empty:
             for col in ["VL_SLD_INI_SIG", "VL_DEB", "VL_CRED", "VL_SLD_FIN_SIG"]:
                 balancete_rfb[col] = balancete_rfb[col].round(2)
@@ -504,18 +663,18 @@ class ECDProcessor:
             drop_cols = ["PK", "FK_PAI", "CNPJ_x", "CNPJ_y"]
             d = df.drop(columns=[c for c in drop_cols if c in df.columns]).copy()
 
-            # Limpeza Ouro: Remove separadores que quebram o CSV
-            obj_cols = d.select_dtypes(include=["object"]).columns
-            d[obj_cols] = (
-                d[obj_cols]
-                .fillna("")
-                .astype(str)
-                .replace({";": " ", "\n": " ", "\r": " "}, regex=True)
-            )
+            # Limpeza Ouro: Remove separadores que quebram o CSV (uma vez
+            # por texto distinto: nomes de conta se repetem todo mês)
+            for c in d.columns:
+                if self._eh_coluna_texto(cast(pd.Series, d[c])):
+                    d[c] = self._sanear_texto(cast(pd.Series, d[c]))
 
-            # Garante CNPJ se estiver faltando
+            # Garante CNPJ se estiver faltando (ou vazio nos meses recalculados
+            # de uma retificadora, mesclados às linhas do cache)
             if "CNPJ" not in d.columns:
                 d["CNPJ"] = self.cnpj
+            elif self.cnpj:
+                d["CNPJ"] = d["CNPJ"].replace("", self.cnpj)
 
             # Reordena: DT_FIN e CNPJ primeiro
             cols = ["DT_FIN", "CNPJ"] + [
@@ -528,10 +687,41 @@ class ECDProcessor:
             "04_Balancete_baseRFB": _finalizar(balancete_rfb),
         }
 
+    @monitor_task("ECDProcessor", "gerar_tensor_balancete")
+    def gerar_tensor_balancete(
+        self, df_balancete: Optional[pd.DataFrame] = None
+    ) -> TensorBalancete:
+        """
+        Expõe o balancete mensal como tensor denso conta × mês × {ini, deb,
+        cred, fin}, com natureza, flag analítica e código referencial por conta.
+
+        Args:
+            df_balancete: Balancete mensal já gerado (03_Balancetes_Mensais).
+                Se omitido, gerar_balancetes() é executado.
+        """
+        if df_balancete is None:
+            df_balancete = self.gerar_balancetes().get(
+                "03_Balancetes_Mensais", pd.DataFrame()
+            )
+        return TensorBalancete.de_balancete(
+            df_balancete, self.processar_plano_contas()
+        )
+
     @monitor_task("ECDProcessor", "gerar_balancete_referencial")
-    def gerar_balancete_referencial(self, df_saldos: pd.DataFrame) -> pd.DataFrame:
+    def gerar_balancete_referencial(
+        self,
+        df_saldos: pd.DataFrame,
+        meses_recalculo: Optional[Set[str]] = None,
+        anterior: Optional[pd.DataFrame] = None,
+    ) -> pd.DataFrame:
         """
         Gera o balancete na visão do Plano Referencial da RFB.
+
+        Args:
+            df_saldos: Saldos analíticos da empresa (base do gerar_balancetes).
+            meses_recalculo: Se informado com `anterior`, só esses meses
+                ("AAAA-MM") são consolidados; os demais vêm de `anterior`.
+            anterior: Balancete referencial de uma versão anterior do ECD.
         """
         # 1. Localiza e unifica todos os blocos do Plano Referencial (Balanço + Resultado)
         caminhos = self._obter_arquivos_referenciais()
@@ -582,7 +772,51 @@ class ECDProcessor:
             .reset_index()
         )
 
-        # 3. Consolidação Hierárquica no Plano Referencial (Otimizado)
+        # 3. Consolidação Hierárquica no Plano Referencial
+        if meses_recalculo is None or anterior is None:
+            return self._consolidar_referencial(df_analitico_ref, df_ref_schema)
+
+        chave_mes = self._chave_mes(cast(pd.Series, df_analitico_ref["DT_FIN"]))
+        df_recalculo = df_analitico_ref[chave_mes.isin(meses_recalculo)]
+        recalculado = self._consolidar_referencial(df_recalculo, df_ref_schema)
+        return self._mesclar_meses(
+            recalculado, anterior, meses_recalculo, list(chave_mes.unique())
+        )
+
+    def _mesclar_meses(
+        self,
+        recalculado: pd.DataFrame,
+        anterior: Optional[pd.DataFrame],
+        meses_recalculo: Set[str],
+        ordem_meses: Sequence[str],
+    ) -> pd.DataFrame:
+        """
+        Junta os meses recalculados às linhas dos demais meses da versão
+        anterior, na mesma ordem de meses de um cálculo completo.
+        """
+        if anterior is None or anterior.empty or "DT_FIN" not in anterior.columns:
+            return recalculado
+
+        mes_anterior = self._chave_mes(cast(pd.Series, anterior["DT_FIN"]))
+        preservado = anterior[
+            mes_anterior.isin(ordem_meses) & ~mes_anterior.isin(meses_recalculo)
+        ]
+        partes = [d for d in (recalculado, preservado) if not d.empty]
+        if not partes:
+            return recalculado
+
+        df = pd.concat(partes, ignore_index=True)
+        posicao = {mes: i for i, mes in enumerate(ordem_meses)}
+        rank = self._chave_mes(cast(pd.Series, df["DT_FIN"])).map(posicao)
+        return df.iloc[np.argsort(rank.to_numpy(), kind="stable")].reset_index(drop=True)
+
+    def _consolidar_referencial(
+        self, df_analitico_ref: pd.DataFrame, df_ref_schema: pd.DataFrame
+    ) -> pd.DataFrame:
+        """Rollup Bottom-Up dos saldos analíticos no schema do Plano Referencial."""
+        cols_valores = ["VL_SLD_INI_SIG", "VL_DEB", "VL_CRED", "VL_SLD_FIN_SIG"]
+
+        # Consolidação Hierárquica no Plano Referencial (Otimizado)
         # Ao invés de iterar mês a mês (12 loops × N níveis = ~60 merges),
         # monta a tabela completa e usa DT_FIN como chave de isolamento
         # nos groupby/merge — resultado idêntico com ~N merges apenas.
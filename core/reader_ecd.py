@@ -3,13 +3,19 @@ import logging
 import os
 from datetime import datetime, date
 from decimal import Decimal, InvalidOperation
-from typing import Generator, Dict, Any, Optional, Tuple
+from typing import Generator, Dict, Any, Iterable, List, Optional, Tuple
+
+import pyarrow as pa
 from core.telemetry import monitor_task, TelemetryCollector
 
 # Configuração de Logs (Configurado via main.py ou __main__)
 
 
 class ECDReader:
+    # Modo triagem: abertura, plano (I050/I051), saldos (I150/I155/I157) e
+    # demonstrações (J). O Diário (I200/I250), 90%+ dos bytes, fica de fora.
+    BLOCOS_TRIAGEM = ["0", "I010", "I050", "I051", "I150", "I155", "I157", "J"]
+
     def __init__(self, caminho_arquivo: str):
         self.caminho_arquivo = caminho_arquivo
         self.layout_versao: Optional[str] = None
@@ -166,11 +172,9 @@ class ECDReader:
 
         for numero_linha, linha in self._iterar_linhas_seguras():
             try:
-                partes = linha.split("|")
-                if len(partes) < 2:
-                    continue
-
-                registro = partes[1]
+                # Nome do registro antes do split: linhas filtradas não são quebradas
+                fim_registro = linha.find("|", 1)
+                registro = linha[1:fim_registro] if fim_registro > 0 else linha[1:]
 
                 # --- FILTRAGEM OURO ---
                 # Se houver filtro, pula se o registro não começar com o prefixo desejado
@@ -184,6 +188,8 @@ class ECDReader:
                 if not self.schema or registro not in self.schema:
                     continue
 
+                partes = linha.split("|")
+
                 # Obter definição do schema
                 def_registro = self.schema[registro]
                 nivel = def_registro.get("nivel", 0)
@@ -278,6 +284,44 @@ class ECDReader:
                     logging.error(f"Erro fatal processando linha {numero_linha}: {e_linha}")
                     warnings_count += 1
 
+    @staticmethod
+    def registros_para_arrow(
+        registros: Iterable[Dict[str, Any]],
+    ) -> Dict[str, pa.Table]:
+        """
+        Agrupa os registros por REG e monta uma tabela Arrow por registro.
+
+        Cada coluna é convertida uma única vez, direto dos objetos Python
+        (Decimal -> decimal128, date -> date32, str -> string), sem passar pelo
+        DataFrame de objetos. Colunas com tipos mistos (ex: data inválida que
+        ficou como texto) caem para string.
+
+        Args:
+            registros: Registros gerados por processar_arquivo().
+
+        Returns:
+            Dicionário {REG: pa.Table}, na ordem de aparição no arquivo.
+        """
+        por_reg: Dict[str, List[Dict[str, Any]]] = {}
+        for reg in registros:
+            por_reg.setdefault(reg["REG"], []).append(reg)
+
+        tabelas: Dict[str, pa.Table] = {}
+        for nome_reg, linhas in por_reg.items():
+            # Todas as linhas de um mesmo REG seguem o mesmo layout (mesmas chaves)
+            colunas: Dict[str, pa.Array] = {}
+            for campo in linhas[0].keys():
+                valores = [linha.get(campo) for linha in linhas]
+                try:
+                    colunas[campo] = pa.array(valores)
+                except (pa.ArrowInvalid, pa.ArrowTypeError):
+                    colunas[campo] = pa.array(
+                        [None if v is None else str(v) for v in valores],
+                        type=pa.string(),
+                    )
+            tabelas[nome_reg] = pa.table(colunas)
+        return tabelas
+
 
 if __name__ == "__main__":
     # Configuração de log para execução direta do módulo
@@ -0,0 +1,151 @@
+import logging
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+# Logger local para uso interno do módulo (não configura nível globalmente)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DefinicaoTeste:
+    """Declaração de um teste de auditoria no registro."""
+
+    id: str  # Ex: "4.2_Duplicidades" (chave do scorecard)
+    metodo: str  # Método do auditor que executa o teste
+    insumos: Tuple[str, ...]  # "diario" (I200/I250), "saldos" (I150/I155), "plano" (I050/I051)
+    custo: str = "barato"  # Classe de custo (ver RegistroTestes.CLASSES_CUSTO)
+    limiares: Dict[str, Any] = field(default_factory=dict)  # Limiares padrão
+    modulos: Tuple[str, ...] = ()  # Módulos auxiliares (versão do teste no cache)
+    parametros: Tuple[str, ...] = ()  # Atributos do auditor que definem o resultado
+    amostravel: bool = False  # Pode rodar sobre a amostra do Diário (ECDAuditor.amostragem)
+
+    @property
+    def codigo(self) -> str:
+        """Código numérico do teste (ex: "4.2")."""
+        return self.id.split("_")[0]
+
+
+class RegistroTestes:
+    """
+    Registro dos testes de auditoria: cada teste declara seu ID, os insumos
+    de que depende, a classe de custo e os limiares padrão.
+
+    Permite rodar só parte da bateria, por nome e/ou por custo:
+
+    - padrões separados por vírgula, casados com o código ("1.1"), com o ID
+      completo ("4.2_Duplicidades") ou com curingas ("5.*", "4.?_*");
+    - custo máximo: "barato" roda só os testes de saldo na triagem de
+      entrada, "caro" (padrão) roda tudo (ex: no lote noturno).
+    """
+
+    CLASSES_CUSTO = ("barato", "medio", "caro")
+    # Aceita também os nomes em inglês (ex: --max-cost cheap)
+    SINONIMOS_CUSTO = {"cheap": "barato", "medium": "medio", "médio": "medio", "expensive": "caro"}
+
+    def __init__(self, definicoes: Iterable[DefinicaoTeste]):
+        self._definicoes: Dict[str, DefinicaoTeste] = {}
+        for definicao in definicoes:
+            self.registrar(definicao)
+
+    def registrar(self, definicao: DefinicaoTeste) -> None:
+        if definicao.id in self._definicoes:
+            raise ValueError(f"Teste já registrado: {definicao.id}")
+        definicao.custo = self.normalizar_custo(definicao.custo)
+        self._definicoes[definicao.id] = definicao
+
+    def __iter__(self) -> Iterator[DefinicaoTeste]:
+        return iter(self._definicoes.values())
+
+    def __len__(self) -> int:
+        return len(self._definicoes)
+
+    def __contains__(self, nome: object) -> bool:
+        return nome in self._definicoes
+
+    def __getitem__(self, nome: str) -> DefinicaoTeste:
+        return self._definicoes[nome]
+
+    @property
+    def nomes(self) -> List[str]:
+        return list(self._definicoes)
+
+    # --- Seleção ---
+
+    @classmethod
+    def normalizar_custo(cls, custo: str) -> str:
+        valor = str(custo).strip().lower()
+        valor = cls.SINONIMOS_CUSTO.get(valor, valor)
+        if valor not in cls.CLASSES_CUSTO:
+            raise ValueError(
+                f"Classe de custo inválida: {custo} (use {', '.join(cls.CLASSES_CUSTO)})"
+            )
+        return valor
+
+    @staticmethod
+    def _padroes(padroes: Union[str, Iterable[str]]) -> List[str]:
+        if isinstance(padroes, str):
+            padroes = padroes.split(",")
+        return [p.strip() for p in padroes if p and p.strip()]
+
+    def _casa(self, definicao: DefinicaoTeste, padrao: str) -> bool:
+        return (
+            definicao.id == padrao
+            or definicao.codigo == padrao
+            or fnmatchcase(definicao.id, padrao)
+            or fnmatchcase(definicao.codigo, padrao)
+        )
+
+    def selecionar(
+        self,
+        padroes: Optional[Union[str, Iterable[str]]] = None,
+        custo_maximo: Optional[str] = None,
+    ) -> List[str]:
+        """
+        IDs dos testes que casam com algum padrão (todos, se omitido) e cujo
+        custo não passa de `custo_maximo`, na ordem do registro.
+
+        Raises:
+            ValueError: padrão que não casa com nenhum teste (erro de
+                digitação na linha de comando) ou classe de custo inválida.
+        """
+        escolhidos = list(self)
+        if padroes is not None:
+            lista = self._padroes(padroes)
+            sem_teste = [p for p in lista if not any(self._casa(d, p) for d in escolhidos)]
+            if sem_teste:
+                raise ValueError(f"Nenhum teste de auditoria casa com: {', '.join(sem_teste)}")
+            escolhidos = [d for d in escolhidos if any(self._casa(d, p) for p in lista)]
+        if custo_maximo is not None:
+            teto = self.CLASSES_CUSTO.index(self.normalizar_custo(custo_maximo))
+            escolhidos = [d for d in escolhidos if self.CLASSES_CUSTO.index(d.custo) <= teto]
+        return [d.id for d in escolhidos]
+
+    def separar_por_insumos(
+        self, nomes: Iterable[str], disponiveis: Set[str]
+    ) -> Tuple[List[str], Dict[str, List[str]]]:
+        """
+        Divide os testes entre executáveis e ignorados por falta de insumo.
+
+        Returns:
+            (executáveis, {teste ignorado: insumos faltantes})
+        """
+        executaveis: List[str] = []
+        ignorados: Dict[str, List[str]] = {}
+        for nome in nomes:
+            faltantes = sorted(set(self[nome].insumos) - disponiveis)
+            if faltantes:
+                ignorados[nome] = faltantes
+            else:
+                executaveis.append(nome)
+        return executaveis, ignorados
+
+    # --- Visões derivadas ---
+
+    def tabela(self) -> Dict[str, Tuple[str, Tuple[str, ...]]]:
+        """Teste -> (método, insumos)."""
+        return {d.id: (d.metodo, d.insumos) for d in self}
+
+    def limiares(self) -> Dict[str, Dict[str, Any]]:
+        """Cópia dos limiares padrão de cada teste (ajustável por instância)."""
+        return {d.id: dict(d.limiares) for d in self if d.limiares}
@@ -0,0 +1,230 @@
+import os
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Logger local para uso interno do módulo (não configura nível globalmente)
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAMINHO_REGRAS = os.path.join(BASE_DIR, "data", "reference", "regras_auditoria.csv")
+
+
+def mascara_prefixos(
+    valores: Union[pd.Series, np.ndarray, Sequence], prefixos: Sequence[str]
+) -> np.ndarray:
+    """
+    Máscara "começa com algum dos prefixos", avaliada uma vez por valor
+    distinto (códigos de conta se repetem muito no Diário e no balancete).
+    """
+    codigos, distintos = pd.factorize(pd.Series(valores, dtype=object), sort=False)
+    if not prefixos or len(distintos) == 0:
+        return np.zeros(len(codigos), dtype=bool)
+    texto = pd.Series(distintos, dtype=object).astype(str).str.strip()
+    por_valor = texto.str.startswith(tuple(prefixos)).to_numpy(dtype=bool)
+    # factorize marca nulos com -1: nunca casam
+    return np.where(codigos >= 0, por_valor[codigos], False)
+
+
+def mascara_termos(
+    valores: Union[pd.Series, np.ndarray, Sequence], padrao: str
+) -> np.ndarray:
+    """
+    Máscara "contém o padrão (regex, sem diferenciar maiúsculas)", avaliada
+    uma vez por valor distinto (nomes de conta e históricos se repetem).
+    """
+    codigos, distintos = pd.factorize(pd.Series(valores, dtype=object), sort=False)
+    if len(distintos) == 0:
+        return np.zeros(len(codigos), dtype=bool)
+    texto = pd.Series(distintos, dtype=object).astype(str).str.upper()
+    por_valor = texto.str.contains(padrao, na=False).to_numpy(dtype=bool)
+    return np.where(codigos >= 0, por_valor[codigos], False)
+
+
+class RegraAuditoria:
+    """Uma linha da tabela de regras (ver data/reference/regras_auditoria.csv)."""
+
+    def __init__(
+        self,
+        id_regra: str,
+        teste: str,
+        campo: str,
+        mensagem: str,
+        cod_nat: Sequence[str] = (),
+        prefixo_dentro: Sequence[str] = (),
+        prefixo_fora: Sequence[str] = (),
+        exceto: Sequence[str] = (),
+    ):
+        self.id = id_regra
+        self.teste = teste
+        self.campo = campo
+        self.mensagem = mensagem
+        self.cod_nat = tuple(n.zfill(2) for n in cod_nat)
+        self.prefixo_dentro = tuple(prefixo_dentro)
+        self.prefixo_fora = tuple(prefixo_fora)
+        self.exceto = tuple(exceto)
+
+    def mascara(
+        self, valores: Union[pd.Series, np.ndarray], natureza: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Linhas em que a regra se aplica: natureza no conjunto (se houver),
+        valor começando por PREFIXO_DENTRO, não começando por PREFIXO_FORA e
+        não coberto por EXCETO. Valores vazios nunca casam.
+        """
+        # Prefixos avaliados uma vez por valor distinto; natureza por linha
+        codigos, distintos = pd.factorize(pd.Series(valores, dtype=object), sort=False)
+        if len(distintos) == 0:
+            return np.zeros(len(codigos), dtype=bool)
+        texto = pd.Series(distintos, dtype=object).astype(str).str.strip()
+        por_valor = (texto != "").to_numpy(dtype=bool)
+        if self.prefixo_dentro:
+            por_valor &= texto.str.startswith(self.prefixo_dentro).to_numpy(dtype=bool)
+        if self.prefixo_fora:
+            por_valor &= ~texto.str.startswith(self.prefixo_fora).to_numpy(dtype=bool)
+        if self.exceto:
+            por_valor &= ~texto.str.startswith(self.exceto).to_numpy(dtype=bool)
+        # factorize marca nulos com -1: nunca casam
+        mascara = np.where(codigos >= 0, por_valor[codigos], False)
+        if self.cod_nat:
+            if natureza is None:
+                return np.zeros(len(codigos), dtype=bool)
+            mascara &= np.isin(natureza, self.cod_nat)
+        return mascara
+
+    def para_sql(self, natureza: Optional[str] = None) -> str:
+        """
+        A mesma regra como expressão booleana SQL (DuckDB) sobre a coluna
+        CAMPO, para auditorias fora do pandas. `natureza` é a expressão SQL
+        do COD_NAT já normalizado em 2 dígitos.
+        """
+
+        def _literal(texto: str) -> str:
+            return "'" + texto.replace("'", "''") + "'"
+
+        coluna = f"trim(CAST({self.campo} AS VARCHAR))"
+
+        def _algum(prefixos: Tuple[str, ...]) -> str:
+            return "(" + " OR ".join(
+                f"starts_with({coluna}, {_literal(p)})" for p in prefixos
+            ) + ")"
+
+        condicoes = [f"{coluna} <> ''"]
+        if self.cod_nat:
+            if natureza is None:
+                return "false"
+            condicoes.append(
+                f"{natureza} IN ({', '.join(_literal(n) for n in self.cod_nat)})"
+            )
+        if self.prefixo_dentro:
+            condicoes.append(_algum(self.prefixo_dentro))
+        if self.prefixo_fora:
+            condicoes.append(f"NOT {_algum(self.prefixo_fora)}")
+        if self.exceto:
+            condicoes.append(f"NOT {_algum(self.exceto)}")
+        return f"coalesce({' AND '.join(condicoes)}, false)"
+
+
+class MotorRegras:
+    """
+    Regras de auditoria declaradas em tabela e avaliadas como máscaras
+    vetorizadas, sem `apply` linha a linha.
+
+    Cada regra diz a que teste pertence, sobre qual campo atua (COD_CTA,
+    COD_CTA_REF...), para quais naturezas vale e quais prefixos a disparam
+    ou a afastam. Novas regras entram por linha na tabela, sem código novo.
+
+    - Regras de violação (ex.: 3.1): `avaliar` devolve, por linha, a primeira
+      regra disparada (ordem da tabela) e sua mensagem.
+    - Seleções (ex.: grupo 04.2.3 no 4.2, disponibilidades 1.01.01 no 5.2):
+      `selecionar` devolve a máscara de uma regra pelo ID.
+    """
+
+    _padrao: Optional["MotorRegras"] = None
+
+    def __init__(self, regras: List[RegraAuditoria]):
+        self.regras = regras
+        self._por_id: Dict[str, RegraAuditoria] = {r.id: r for r in regras}
+
+    @classmethod
+    def padrao(cls) -> "MotorRegras":
+        """Tabela de data/reference, lida uma única vez por processo."""
+        if cls._padrao is None:
+            cls._padrao = cls.carregar(CAMINHO_REGRAS)
+        return cls._padrao
+
+    @classmethod
+    def carregar(cls, caminho: str) -> "MotorRegras":
+        if not os.path.exists(caminho):
+            raise FileNotFoundError(f"Tabela de regras de auditoria não encontrada: {caminho}")
+        df = pd.read_csv(caminho, sep=";", encoding="utf-8-sig", dtype=str).fillna("")
+        return cls.de_tabela(df)
+
+    @classmethod
+    def de_tabela(cls, df: pd.DataFrame) -> "MotorRegras":
+        """Compila a tabela (listas separadas por '|')."""
+
+        def _lista(valor: str) -> Tuple[str, ...]:
+            return tuple(p.strip() for p in str(valor).split("|") if p.strip())
+
+        regras = [
+            RegraAuditoria(
+                id_regra=str(linha["ID"]).strip(),
+                teste=str(linha["TESTE"]).strip(),
+                campo=str(linha["CAMPO"]).strip(),
+                mensagem=str(linha["MENSAGEM"]).strip(),
+                cod_nat=_lista(linha.get("COD_NAT", "")),
+                prefixo_dentro=_lista(linha.get("PREFIXO_DENTRO", "")),
+                prefixo_fora=_lista(linha.get("PREFIXO_FORA", "")),
+                exceto=_lista(linha.get("EXCETO", "")),
+            )
+            for _, linha in df.iterrows()
+        ]
+        return cls(regras)
+
+    def regra(self, id_regra: str) -> RegraAuditoria:
+        return self._por_id[id_regra]
+
+    def regras_do_teste(self, teste: str) -> List[RegraAuditoria]:
+        return [r for r in self.regras if r.teste == teste]
+
+    def selecionar(
+        self,
+        id_regra: str,
+        dados: Union[pd.DataFrame, pd.Series, np.ndarray],
+        natureza: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Máscara de uma regra de seleção pelo ID. `dados` é um DataFrame com o
+        CAMPO da regra ou diretamente os valores desse campo.
+        """
+        regra = self._por_id[id_regra]
+        if isinstance(dados, pd.DataFrame):
+            if regra.campo not in dados.columns:
+                return np.zeros(len(dados), dtype=bool)
+            dados = dados[regra.campo]
+        return regra.mascara(dados, natureza)
+
+    def avaliar(
+        self, teste: str, df: pd.DataFrame, natureza: Optional[np.ndarray] = None
+    ) -> pd.DataFrame:
+        """
+        Avalia as regras do teste sobre o DataFrame, em uma passada por regra.
+
+        Returns:
+            DataFrame alinhado ao de entrada com REGRA e MENSAGEM da primeira
+            regra disparada ('' onde nenhuma disparou).
+        """
+        regra_linha = np.full(len(df), "", dtype=object)
+        mensagem = np.full(len(df), "", dtype=object)
+        livre = np.ones(len(df), dtype=bool)
+        for regra in self.regras_do_teste(teste):
+            if regra.campo not in df.columns:
+                continue
+            dispara = livre & regra.mascara(df[regra.campo], natureza)
+            regra_linha[dispara] = regra.id
+            mensagem[dispara] = regra.mensagem
+            livre &= ~dispara
+        return pd.DataFrame({"REGRA": regra_linha, "MENSAGEM": mensagem}, index=df.index)
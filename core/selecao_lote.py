@@ -0,0 +1,177 @@
+import os
+import re
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# Logger local para uso interno do módulo (não configura nível globalmente)
+logger = logging.getLogger(__name__)
+
+# Hash SHA-1 do livro no nome padrão do SPED (…-DTINI-DTFIM-G-<HASH>-…)
+_RE_HASH_NOME = re.compile(r"-([0-9A-Fa-f]{40})-")
+
+
+@dataclass
+class ImpressaoECD:
+    """Identificação de um arquivo ECD obtida só do cabeçalho (0000/I010)."""
+
+    caminho: str
+    cnpj: str
+    dt_ini: str
+    dt_fin: str
+    tipo_livro: str  # I010.IND_ESC (G, R, A, B, Z)
+    ind_fin_esc: str  # 0000.IND_FIN_ESC (0 = original, 1 = substituta)
+    hash_substituido: str  # 0000.COD_HASH_SUB (livro que esta versão substitui)
+    hash_livro: str  # Hash do livro no nome do arquivo ('' se fora do padrão)
+    hash_conteudo: str  # Tamanho + início + fim do arquivo
+    modificado_em: float
+
+    @property
+    def chave(self) -> Tuple[str, str, str, str]:
+        """Mesmo contribuinte, período e tipo de livro = versões do mesmo ECD."""
+        return (self.cnpj, self.dt_ini, self.dt_fin, self.tipo_livro)
+
+
+class SeletorArquivosECD:
+    """
+    Etapa anterior ao agendamento do lote: identifica cópias e versões de um
+    mesmo ECD para que só uma delas seja processada.
+
+    Cada arquivo é identificado por CNPJ, DT_INI/DT_FIN, tipo de livro e um
+    hash de conteúdo da sonda (tamanho + primeiro e último bloco de bytes,
+    que inclui o bloco 9 com as contagens de registros). Cópias exatas são
+    descartadas; entre versões diferentes do mesmo CNPJ/período/livro, a
+    política escolhe a vigente:
+
+    - "retificadora": descarta livros substituídos via COD_HASH_SUB; entre os
+      restantes, prefere a substituta (IND_FIN_ESC = 1) e, depois, o arquivo
+      modificado mais recentemente;
+    - "modificacao": apenas o arquivo modificado mais recentemente.
+    """
+
+    POLITICAS = ("retificadora", "modificacao")
+
+    def __init__(self, politica: str = "retificadora", bytes_sonda: int = 1 << 20):
+        if politica not in self.POLITICAS:
+            raise ValueError(
+                f"Política de versões inválida: {politica} (use {', '.join(self.POLITICAS)})"
+            )
+        self.politica = politica
+        self.bytes_sonda = bytes_sonda
+
+    def sondar(self, caminho: str) -> Optional[ImpressaoECD]:
+        """Lê só o cabeçalho e as pontas do arquivo (None se não houver 0000)."""
+        campos_0000: List[str] = []
+        tipo_livro = ""
+        try:
+            with open(caminho, "r", encoding="latin-1", errors="replace") as f:
+                for linha in f:
+                    if linha.startswith("|0000|"):
+                        campos_0000 = linha.rstrip("\r\n").split("|")
+                    elif linha.startswith("|I010|"):
+                        partes = linha.split("|")
+                        tipo_livro = partes[2] if len(partes) > 2 else ""
+                        break
+                    elif campos_0000 and not linha.startswith(("|0", "|I001|")):
+                        break
+
+            tamanho = os.path.getsize(caminho)
+            digest = hashlib.blake2b(str(tamanho).encode(), digest_size=16)
+            with open(caminho, "rb") as f:
+                digest.update(f.read(self.bytes_sonda))
+                if tamanho > self.bytes_sonda:
+                    f.seek(max(self.bytes_sonda, tamanho - self.bytes_sonda))
+                    digest.update(f.read(self.bytes_sonda))
+        except OSError as e:
+            logger.warning(f"Não foi possível sondar {os.path.basename(caminho)}: {e}")
+            return None
+
+        if len(campos_0000) < 7:
+            return None
+
+        def _campo(i: int) -> str:
+            return campos_0000[i].strip() if i < len(campos_0000) else ""
+
+        match = _RE_HASH_NOME.search(os.path.basename(caminho))
+        return ImpressaoECD(
+            caminho=caminho,
+            cnpj=_campo(6),
+            dt_ini=_campo(3),
+            dt_fin=_campo(4),
+            tipo_livro=tipo_livro,
+            ind_fin_esc=_campo(14),
+            hash_substituido=_campo(15).upper(),
+            hash_livro=match.group(1).upper() if match else "",
+            hash_conteudo=digest.hexdigest(),
+            modificado_em=os.path.getmtime(caminho),
+        )
+
+    def _ordenar(self, versoes: List[ImpressaoECD]) -> List[ImpressaoECD]:
+        """Versões do mesmo ECD, da vigente para a mais antiga."""
+        if self.politica == "modificacao":
+            return sorted(versoes, key=lambda v: (v.modificado_em, v.caminho), reverse=True)
+
+        substituidos = {v.hash_substituido for v in versoes if v.hash_substituido}
+        return sorted(
+            versoes,
+            key=lambda v: (
+                not (v.hash_livro and v.hash_livro in substituidos),
+                v.ind_fin_esc == "1",
+                v.modificado_em,
+                v.caminho,
+            ),
+            reverse=True,
+        )
+
+    def selecionar(self, arquivos: List[str]) -> Tuple[List[str], pd.DataFrame]:
+        """
+        Separa os arquivos a processar dos descartáveis.
+
+        Returns:
+            (arquivos selecionados na ordem original, relatório dos ignorados
+            com ARQUIVO, MOTIVO, MANTIDO, CNPJ, DT_INI, DT_FIN e TIPO_LIVRO).
+        """
+        colunas = ["ARQUIVO", "MOTIVO", "MANTIDO", "CNPJ", "DT_INI", "DT_FIN", "TIPO_LIVRO"]
+        grupos: Dict[Tuple[str, str, str, str], List[ImpressaoECD]] = {}
+        sem_cabecalho = []
+        for arquivo in arquivos:
+            impressao = self.sondar(arquivo)
+            if impressao is None:
+                # Sem 0000 legível: segue para o pipeline, que registra a falha
+                sem_cabecalho.append(arquivo)
+            else:
+                grupos.setdefault(impressao.chave, []).append(impressao)
+
+        mantidos = set(sem_cabecalho)
+        ignorados = []
+        for versoes in grupos.values():
+            ordem = self._ordenar(versoes)
+            vigente = ordem[0]
+            mantidos.add(vigente.caminho)
+            # Entre cópias exatas, a recebida primeiro representa o conteúdo
+            representantes: Dict[str, ImpressaoECD] = {}
+            for versao in sorted(ordem, key=lambda v: (v.modificado_em, v.caminho)):
+                representantes.setdefault(versao.hash_conteudo, versao)
+            representantes[vigente.hash_conteudo] = vigente
+            for versao in ordem[1:]:
+                if representantes[versao.hash_conteudo] is versao:
+                    motivo = "SUBSTITUIDO"
+                else:
+                    motivo = "DUPLICADO"
+                ignorados.append(
+                    (
+                        os.path.basename(versao.caminho),
+                        motivo,
+                        os.path.basename(vigente.caminho),
+                        versao.cnpj,
+                        versao.dt_ini,
+                        versao.dt_fin,
+                        versao.tipo_livro,
+                    )
+                )
+
+        selecionados = [a for a in arquivos if a in mantidos]
+        return selecionados, pd.DataFrame(ignorados, columns=colunas)
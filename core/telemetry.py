@@ -33,6 +33,18 @@ class TelemetryCollector:
 
         self.data[ecd_id]["metrics"][component][method] = duration
 
+    def record_volume(self, ecd_id: str, name: str, rows: int):
+        """Registra o volume (linhas) de um insumo, base das estimativas de custo."""
+        if ecd_id not in self.data:
+            self.start_ecd(ecd_id)
+        self.data[ecd_id].setdefault("volumes", {})[name] = rows
+
+    def record_failure(self, ecd_id: str, message: str):
+        """Registra uma falha não fatal do ECD (ex: arquivo não gravado)."""
+        if ecd_id not in self.data:
+            self.start_ecd(ecd_id)
+        self.data[ecd_id].setdefault("falhas", []).append(message)
+
     def record_global(self, component: str, method: str, duration: float):
         """Registra métricas para processos globais (pós-processamento)."""
         if component not in self.global_stats:
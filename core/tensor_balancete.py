@@ -0,0 +1,182 @@
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Logger local para uso interno do módulo (não configura nível globalmente)
+logger = logging.getLogger(__name__)
+
+
+class TensorBalancete:
+    """
+    Balancete mensal em forma densa: conta × mês × {ini, deb, cred, fin}.
+
+    O balancete longo (uma linha por COD_CTA e DT_FIN) é reindexado uma única
+    vez para um array float64 `valores[conta, mes, campo]`, acompanhado de
+    arrays de atributos por conta (natureza, flag analítica, código
+    referencial, nome, conta superior). Os testes de saldo viram expressões
+    sobre esses arrays, sem filtros e groupby repetidos no DataFrame.
+
+    `presente[conta, mes]` indica se a linha existe no balancete original e
+    `linha[conta, mes]` guarda sua posição (iloc), para montar as evidências
+    a partir das linhas originais.
+    """
+
+    INI, DEB, CRED, FIN = 0, 1, 2, 3
+    CAMPOS = ["VL_SLD_INI_SIG", "VL_DEB", "VL_CRED", "VL_SLD_FIN_SIG"]
+
+    def __init__(
+        self,
+        df_balancete: pd.DataFrame,
+        contas: np.ndarray,
+        meses: np.ndarray,
+        valores: np.ndarray,
+        linha: np.ndarray,
+        atributos: Dict[str, np.ndarray],
+    ):
+        self.df_balancete = df_balancete
+        self.contas = contas
+        self.meses = meses
+        self.valores = valores
+        self.linha = linha
+        self.presente = linha >= 0
+
+        # Atributos por conta (mesmo comprimento de `contas`)
+        self.natureza: np.ndarray = atributos["COD_NAT"]
+        self.analitica: np.ndarray = atributos["ANALITICA"]
+        self.cod_cta_ref: np.ndarray = atributos["COD_CTA_REF"]
+        self.nome: np.ndarray = atributos["CONTA"]
+        self.superior: np.ndarray = atributos["COD_CTA_SUP"]
+        self.tem_natureza: bool = bool(atributos["TEM_NATUREZA"])
+
+    @property
+    def vazio(self) -> bool:
+        return self.valores.size == 0
+
+    @classmethod
+    def de_balancete(
+        cls, df_balancete: pd.DataFrame, df_plano: Optional[pd.DataFrame] = None
+    ) -> "TensorBalancete":
+        """
+        Monta o tensor a partir do balancete mensal (03_Balancetes_Mensais).
+
+        Args:
+            df_balancete: Balancete longo com COD_CTA, DT_FIN e os valores
+                assinados. Colunas de plano ausentes são buscadas no df_plano.
+            df_plano: Plano de contas processado (fallback dos atributos).
+        """
+        if df_balancete.empty or not {"COD_CTA", "DT_FIN"}.issubset(
+            df_balancete.columns
+        ):
+            vazio = np.array([], dtype=object)
+            return cls(
+                df_balancete,
+                vazio,
+                vazio,
+                np.zeros((0, 0, 4)),
+                np.zeros((0, 0), dtype=np.int64),
+                {
+                    "COD_NAT": vazio,
+                    "ANALITICA": np.array([], dtype=bool),
+                    "COD_CTA_REF": vazio,
+                    "CONTA": vazio,
+                    "COD_CTA_SUP": vazio,
+                    "TEM_NATUREZA": False,
+                },
+            )
+
+        idx_conta, contas = pd.factorize(df_balancete["COD_CTA"], sort=True)
+        idx_mes, meses = pd.factorize(df_balancete["DT_FIN"], sort=True)
+        n_contas, n_meses = len(contas), len(meses)
+
+        valores = np.zeros((n_contas, n_meses, 4), dtype="float64")
+        for k, campo in enumerate(cls.CAMPOS):
+            if campo in df_balancete.columns:
+                valores[idx_conta, idx_mes, k] = (
+                    pd.to_numeric(df_balancete[campo], errors="coerce")
+                    .fillna(0.0)
+                    .to_numpy(dtype="float64")
+                )
+
+        linha = np.full((n_contas, n_meses), -1, dtype=np.int64)
+        linha[idx_conta, idx_mes] = np.arange(len(df_balancete))
+
+        atributos = cls._atributos(df_balancete, df_plano, pd.Index(contas))
+        return cls(
+            df_balancete,
+            np.asarray(contas, dtype=object),
+            np.asarray(meses, dtype=object),
+            valores,
+            linha,
+            atributos,
+        )
+
+    @staticmethod
+    def _atributos(
+        df_balancete: pd.DataFrame,
+        df_plano: Optional[pd.DataFrame],
+        contas: pd.Index,
+    ) -> Dict[str, np.ndarray]:
+        """Primeiro valor de cada atributo por conta (balancete, depois plano)."""
+        colunas = ["COD_NAT", "IND_CTA", "COD_CTA_REF", "CONTA", "COD_CTA_SUP"]
+        fontes = [df_balancete]
+        if df_plano is not None and not df_plano.empty and "COD_CTA" in df_plano.columns:
+            fontes.append(df_plano)
+
+        brutos: Dict[str, pd.Series] = {}
+        for col in colunas:
+            for fonte in fontes:
+                if col in fonte.columns:
+                    por_conta = fonte.groupby("COD_CTA", sort=False)[col].first()
+                    brutos[col] = por_conta.reindex(contas)
+                    break
+
+        def _texto(col: str) -> pd.Series:
+            s = brutos.get(col)
+            if s is None:
+                return pd.Series([""] * len(contas), index=contas, dtype=object)
+            return s.astype(object).where(s.notna(), "").astype(str)
+
+        natureza = _texto("COD_NAT")
+        tem_natureza = "COD_NAT" in brutos
+        return {
+            "COD_NAT": np.where(
+                natureza.str.strip() != "", natureza.str.zfill(2), ""
+            ).astype(object),
+            # Sem IND_CTA, nenhuma conta é descartada pelo filtro de analíticas
+            "ANALITICA": (
+                (_texto("IND_CTA").str.upper() == "A").to_numpy()
+                if "IND_CTA" in brutos
+                else np.ones(len(contas), dtype=bool)
+            ),
+            "COD_CTA_REF": _texto("COD_CTA_REF").to_numpy(dtype=object),
+            "CONTA": _texto("CONTA").to_numpy(dtype=object),
+            "COD_CTA_SUP": _texto("COD_CTA_SUP").to_numpy(dtype=object),
+            "TEM_NATUREZA": np.bool_(tem_natureza),
+        }
+
+    # --- Seleções auxiliares ---
+
+    def contas_com_nome(self, padrao: str) -> np.ndarray:
+        """Máscara por conta: nome (CONTA) contém o padrão regex (caixa alta)."""
+        return (
+            pd.Series(self.nome, dtype=object)
+            .str.upper()
+            .str.contains(padrao, na=False)
+            .to_numpy(dtype=bool)
+        )
+
+    def contas_com_ref(self, prefixo: str) -> np.ndarray:
+        """Máscara por conta: código referencial começa com o prefixo."""
+        return (
+            pd.Series(self.cod_cta_ref, dtype=object)
+            .str.startswith(prefixo)
+            .fillna(False)
+            .to_numpy(dtype=bool)
+        )
+
+    def linhas(self, mascara: np.ndarray) -> pd.DataFrame:
+        """Linhas originais do balancete para uma máscara conta × mês (ordem original)."""
+        posicoes = np.sort(self.linha[mascara & self.presente])
+        return self.df_balancete.iloc[posicoes].copy()
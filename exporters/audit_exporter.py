@@ -1,8 +1,11 @@
 import pandas as pd
 import os
 import logging
-from typing import Dict, Any, List, cast
+from typing import Dict, Any, List, Optional, cast
+from core.evidencia import EvidenciaAuditoria, gravar_evidencia
 from exporters.formatting import apply_region_format
+from exporters.csv_writer import gravar_csv
+from exporters.parquet_writer import Perfil, gravar_parquet, obter_perfil
 
 logger = logging.getLogger(__name__)
 
@@ -23,14 +26,41 @@ class AuditExporter:
         "4.1_Lei_Benford": "Aplica teste estatístico de Benford no primeiro dígito dos valores. Desvios (MAD > 0.015) sugerem dados fabricados.",
         "4.2_Duplicidades": "Detecta lançamentos com mesma Data, Conta e Valor. Pode indicar erro de importação ou fraude para inflar números.",
         "4.3_Omissao_Encerramento": "Verifica se as contas de Resultado (Natureza 04) terminaram o exercício zeradas. Saldos remanescentes indicam erro grave de encerramento.",
+        "4.4_Quase_Duplicidades": "Detecta lançamentos da mesma Conta com o mesmo Valor (ou dentro da tolerância) a poucos dias de distância, em lançamentos diferentes. Pode indicar pagamento em duplicidade ou reapresentação de documento.",
         "5.1_Inversao_Natureza": "Aponta contas com saldo invertido (ex: Caixa credor, Fornecedor devedor) não identificadas como redutoras.",
         "5.2_Estouro_Caixa": "Sub-teste específico para detectar Saldo Credor em contas de Disponibilidade (Caixa/Bancos).",
         "5.3_Passivo_Ficticio": "Detecta contas de Obrigação (Passivo Circulante/Não Circulante) com saldo relevante e sem nenhuma movimentação no período.",
         "5.4_Consistencia_PL_Resultado": "Amarração do Lucro Líquido do exercício com a variação do Patrimônio Líquido.",
+        "6.1_Anomalias_Movimento": "Meses em que o movimento de uma conta foge do seu próprio histórico (e do mesmo mês em anos anteriores, se houver) e do comportamento das contas irmãs. Escore z robusto (mediana/MAD), sem valores fixos.",
+        "7.1_Fim_De_Semana_Feriado": "Lançamentos datados em sábado, domingo ou feriado nacional (fixo ou móvel) ou local informado nos limiares.",
+        "7.2_Lancamento_Apos_Encerramento": "Lançamentos normais datados depois do fim do período (último DT_FIN do balancete).",
+        "7.3_Valores_Redondos": "Lançamentos com valor múltiplo exato de um valor redondo (padrão: R$ 1.000,00, a partir de R$ 10.000,00).",
+        "7.4_Abaixo_Alcada": "Lançamentos com valor logo abaixo de uma alçada de aprovação (até 5% abaixo), indício de fracionamento.",
+        "7.5_Pares_Incomuns": "Lançamentos cujo par conta debitada × conta creditada é raro no ano (até o percentil de frequência) ou nunca apareceu nos anos anteriores do mesmo CNPJ.",
+        "7.6_Historico_Vazio": "Lançamentos com histórico (HIST) vazio ou curto demais para explicar o fato.",
+        "7.7_Lancamento_Extemporaneo": "Lançamentos com indicador extemporâneo (IND_LCTO = 'X'), que alteram períodos já encerrados.",
     }
 
-    def __init__(self, pasta_saida: str):
+    def __init__(
+        self,
+        pasta_saida: str,
+        limites_evidencia: Optional[Dict[str, int]] = None,
+        tamanho_lote: int = 100_000,
+        perfil_parquet: Perfil = None,
+    ):
+        """
+        Args:
+            pasta_saida: Pasta do ECD.
+            limites_evidencia: Teste -> máximo de linhas gravadas da evidência
+                ("evidencia" do resultado); testes ausentes não têm limite.
+            tamanho_lote: Linhas por lote ao gravar evidências em fluxo.
+            perfil_parquet: Perfil de gravação Parquet do scorecard, detalhes
+                e evidências (ver exporters/parquet_writer.py).
+        """
         self.pasta_saida = pasta_saida
+        self.limites_evidencia = limites_evidencia or {}
+        self.tamanho_lote = tamanho_lote
+        self.perfil_parquet = obter_perfil(perfil_parquet)
 
     def exportar_dashboard(
         self, resultados: Dict[str, Any], nome_projeto: str, prefixo: str = ""
@@ -72,13 +102,7 @@ class AuditExporter:
                 else "07_Auditoria_Scorecard.csv"
             )
             caminho_scorecard = os.path.join(self.pasta_saida, nome_scorecard)
-            df_unificado.to_csv(
-                caminho_scorecard,
-                index=False,
-                sep=";",
-                decimal=",",
-                encoding="utf-8-sig",
-            )
+            gravar_csv(df_unificado, caminho_scorecard)
             arquivos_gerados.append(f"CSV:     {nome_scorecard}")
 
             # --- 2. CSVs INDIVIDUAIS POR TESTE ---
@@ -90,13 +114,7 @@ class AuditExporter:
                         df_fmt = self.aplicar_formatacao_regional(df_erro)
                         nome_csv = self._montar_nome_csv(prefixo, teste)
                         caminho_csv = os.path.join(self.pasta_saida, nome_csv)
-                        df_fmt.to_csv(
-                            caminho_csv,
-                            index=False,
-                            sep=";",
-                            decimal=",",
-                            encoding="utf-8-sig",
-                        )
+                        gravar_csv(df_fmt, caminho_csv)
                         arquivos_gerados.append(f"CSV:     {nome_csv}")
 
                 elif isinstance(df_erro, dict):
@@ -108,15 +126,13 @@ class AuditExporter:
                                 prefixo, f"{teste}_{sub_nome}"
                             )
                             caminho_csv = os.path.join(self.pasta_saida, nome_csv)
-                            df_fmt.to_csv(
-                                caminho_csv,
-                                index=False,
-                                sep=";",
-                                decimal=",",
-                                encoding="utf-8-sig",
-                            )
+                            gravar_csv(df_fmt, caminho_csv)
                             arquivos_gerados.append(f"CSV:     {nome_csv}")
 
+                nome_csv = self._montar_nome_csv(prefixo, f"{teste}_Evidencia")
+                if self._exportar_evidencia(teste, res, nome_csv):
+                    arquivos_gerados.append(f"CSV:     {nome_csv}")
+
             logger.info(
                 f"Relatório de Auditoria CSV gerado: {len(arquivos_gerados)} arquivo(s)"
             )
@@ -144,7 +160,7 @@ class AuditExporter:
             else "07_Auditoria_Scorecard.parquet"
         )
         caminho_score = os.path.join(self.pasta_saida, nome_score)
-        df_scorecard.to_parquet(caminho_score, index=False)
+        gravar_parquet(df_scorecard, caminho_score, self.perfil_parquet)
         arquivos_gerados.append(f"PARQUET: {nome_score}")
 
         # 2. Exporta Detalhes de cada Teste
@@ -158,11 +174,41 @@ class AuditExporter:
                     nome_parquet = f"07_Auditoria_{teste}.parquet"
 
                 caminho = os.path.join(self.pasta_saida, nome_parquet)
-                df.to_parquet(caminho, index=False)
+                gravar_parquet(df, caminho, self.perfil_parquet)
                 arquivos_gerados.append(f"PARQUET: {nome_parquet}")
 
+            nome_evidencia = (
+                f"{prefixo}_07_Auditoria_{teste}_Evidencia.parquet"
+                if prefixo
+                else f"07_Auditoria_{teste}_Evidencia.parquet"
+            )
+            if self._exportar_evidencia(teste, res, nome_evidencia):
+                arquivos_gerados.append(f"PARQUET: {nome_evidencia}")
+
         return arquivos_gerados
 
+    def _exportar_evidencia(self, teste: str, res: Dict[str, Any], nome_arquivo: str) -> bool:
+        """
+        Grava a evidência do teste (Parquet ou CSV, pela extensão) em lotes,
+        materializando o predicado só agora. Retorna se algo foi gravado.
+        """
+        evidencia = res.get("evidencia")
+        if not isinstance(evidencia, (EvidenciaAuditoria, pd.DataFrame)):
+            return False
+        limite = self.limites_evidencia.get(teste)
+        linhas = gravar_evidencia(
+            evidencia,
+            os.path.join(self.pasta_saida, nome_arquivo),
+            tamanho_lote=self.tamanho_lote,
+            limite=limite,
+            perfil=self.perfil_parquet,
+        )
+        if limite is not None and len(evidencia) > limite:
+            logger.warning(
+                f"Evidência de {teste} limitada a {limite} de {len(evidencia)} linhas ({nome_arquivo})."
+            )
+        return linhas > 0
+
     def _gerar_scorecard_raw(self, resultados: Dict[str, Any]) -> pd.DataFrame:
         """Retorna o scorecard sem formatação regional (para merge com Descritivo)."""
         rows = []
@@ -4,6 +4,8 @@ import logging
 from typing import List, Set, Optional, Dict
 from core.telemetry import monitor_task, TelemetryCollector
 from exporters.formatting import ensure_numeric_vl_cols
+from exporters.csv_writer import gravar_csv, tabela_arrow
+from exporters.parquet_writer import Perfil, obter_perfil, perfil_gravado
 
 logger = logging.getLogger(__name__)
 
@@ -13,8 +15,18 @@ class ECDConsolidator:
     Consolida múltiplos outputs de períodos individuais em arquivos únicos de forma DINÂMICA.
     """
 
-    def __init__(self, output_dir: str):
+    def __init__(self, output_dir: str, perfil_parquet: Perfil = None):
+        """
+        Args:
+            output_dir: Pasta com as subpastas de período (data/output).
+            perfil_parquet: Perfil de gravação dos CONSOLIDADO_*.parquet (ver
+                exporters/parquet_writer.py); o perfil interativo ordena as
+                linhas por CNPJ, data e lançamento/conta para filtros no
+                PowerBI/DuckDB. Um consolidado gravado em outro perfil é
+                regravado mesmo que esteja atualizado.
+        """
         self.output_dir = output_dir
+        self.perfil_parquet = obter_perfil(perfil_parquet)
         self.consolidated_dir = os.path.join(output_dir, "consolidado")
         self.telemetry: Optional[TelemetryCollector] = None
         self.current_ecd_id = "GLOBAL"
@@ -91,11 +103,18 @@ class ECDConsolidator:
         # 3. Processamento por Tabela
         for tabela, caminhos in sorted(mapeamento_tabelas.items()):
             # --- Cache: pula tabela se consolidado já está atualizado ---
+            # (e gravado no mesmo perfil; trocar o perfil regrava o consolidado)
             parquet_path = os.path.join(self.consolidated_dir, f"CONSOLIDADO_{tabela}.parquet")
             if os.path.exists(parquet_path):
                 ts_consolidado = os.path.getmtime(parquet_path)
                 ts_mais_recente = max(os.path.getmtime(p) for p in caminhos)
-                if ts_consolidado >= ts_mais_recente:
+                perfil_anterior = perfil_gravado(parquet_path)
+                if perfil_anterior != self.perfil_parquet.nome:
+                    logger.info(
+                        f"      [Cache] {tabela}: gravado no perfil '{perfil_anterior}', "
+                        f"regravando em '{self.perfil_parquet.nome}'."
+                    )
+                elif ts_consolidado >= ts_mais_recente:
                     logger.info(f"      [Cache] {tabela}: consolidado atualizado, pulando.")
                     continue
 
@@ -120,8 +139,10 @@ class ECDConsolidator:
             df_final = pd.concat(dfs, ignore_index=True)
             del dfs  # Limpeza explícita para ajudar o GC em tabelas grandes
 
-            # A. Parquet Consolidado (Cru)
-            df_final.to_parquet(parquet_path, index=False, engine="pyarrow")
+            # A. Parquet Consolidado (Cru), no perfil de gravação escolhido.
+            # A ordem do perfil vale também para o CSV abaixo
+            tabela_final, ordenadas = self.perfil_parquet.ordenar(tabela_arrow(df_final))
+            self.perfil_parquet.gravar_tabela(tabela_final, parquet_path, ordenadas)
 
             # B. CSV Consolidado (Apenas se elegível)
             if any(tabela.startswith(pre) or pre in tabela for pre in self._excel_eligible_prefixes):
@@ -130,21 +151,17 @@ class ECDConsolidator:
                 # Para BP e DRE: garante que colunas VL_* são float64 antes do CSV
                 # para que decimal="," do pandas funcione corretamente.
                 # O Parquet (acima) preserva os dados sem regionalização.
-                df_csv = (
-                    ensure_numeric_vl_cols(df_final)
+                tabela_csv = (
+                    self.perfil_parquet.ordenar(
+                        tabela_arrow(ensure_numeric_vl_cols(df_final))
+                    )[0]
                     if any(t in tabela for t in ["BP", "DRE"])
-                    else df_final
+                    else tabela_final
                 )
 
-                # Padrão Ouro: Compatibilidade Excel PT-BR (BOM + sep=';')
-                # Mantemos o dado como float (ponto decimal) para não quebrar leituras futuras
-                df_csv.to_csv(
-                    csv_path,
-                    index=False,
-                    sep=";",
-                    decimal=",",
-                    encoding="utf-8-sig"
-                )
+                # Padrão Ouro: Compatibilidade Excel PT-BR (BOM + sep=';'),
+                # formatado em lotes pelo escritor CSV do Arrow
+                gravar_csv(tabela_csv, csv_path)
                 logger.info(f"      [CSV] Gerado: {os.path.basename(csv_path)}")
 
         logger.info(f"Consolidação finalizada com sucesso em: {self.consolidated_dir}")
@@ -0,0 +1,188 @@
+import logging
+from typing import IO, Iterator, List, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+# Logger local para uso interno do módulo (não configura nível globalmente)
+logger = logging.getLogger(__name__)
+
+# Padrão PT-BR (Excel): ';' como separador, vírgula decimal, UTF-8 com BOM
+SEPARADOR = ";"
+BOM = b"\xef\xbb\xbf"
+FORMATO_DATA = "%d/%m/%Y"
+FORMATO_DATA_HORA = "%d/%m/%Y %H:%M:%S"
+
+# Caracteres que quebrariam o CSV sem aspas: viram espaço (aspas viram apóstrofo)
+CARACTERES_ESTRUTURAIS = r"[;\r\n]"
+
+# Colunas textuais com data ISO (AAAA-MM-DD) convertidas para DD/MM/AAAA
+PREFIXOS_DATA = ("DT_",)
+COLUNAS_DATA = ("PERIODO",)
+
+TAMANHO_LOTE = 250_000
+
+Dados = Union[pd.DataFrame, pa.Table]
+
+
+def _eh_coluna_data(nome: str) -> bool:
+    nome = str(nome).upper()
+    return nome.startswith(PREFIXOS_DATA) or nome in COLUNAS_DATA
+
+
+def formatar_coluna(nome: str, coluna: Union[pa.Array, pa.ChunkedArray]) -> pa.ChunkedArray:
+    """
+    Uma coluna Arrow no texto PT-BR gravado no CSV (nulos continuam nulos):
+    números com vírgula decimal, datas em DD/MM/AAAA, textos sem ';',
+    quebras de linha nem aspas. Inteiros passam apenas a texto.
+    """
+    if isinstance(coluna, pa.Array):
+        coluna = pa.chunked_array([coluna], type=coluna.type)
+    tipo = coluna.type
+    if pa.types.is_dictionary(tipo):
+        coluna = pc.cast(coluna, tipo.value_type)
+        tipo = coluna.type
+
+    if pa.types.is_floating(tipo):
+        coluna = pc.if_else(pc.is_nan(coluna), pa.scalar(None, tipo), coluna)
+        return pc.replace_substring(pc.cast(coluna, pa.string()), ".", ",")
+    if pa.types.is_decimal(tipo):
+        return pc.replace_substring(pc.cast(coluna, pa.string()), ".", ",")
+    if pa.types.is_date(tipo):
+        return pc.strftime(coluna, FORMATO_DATA)
+    if pa.types.is_timestamp(tipo):
+        # Como no pandas: hora só aparece se algum valor não for meia-noite
+        # (em segundos: "%S" do Arrow traria as frações de ns)
+        coluna = pc.cast(coluna, pa.timestamp("s", tipo.tz), safe=False)
+        meia_noite = pc.all(pc.equal(pc.floor_temporal(coluna, unit="day"), coluna)).as_py()
+        return pc.strftime(coluna, FORMATO_DATA if meia_noite in (True, None) else FORMATO_DATA_HORA)
+    if pa.types.is_boolean(tipo):
+        # Mesmo texto do pandas (True/False)
+        return pc.if_else(coluna, "True", "False")
+    if pa.types.is_string(tipo) or pa.types.is_large_string(tipo):
+        coluna = pc.replace_substring(
+            pc.replace_substring_regex(coluna, CARACTERES_ESTRUTURAIS, " "), '"', "'"
+        )
+        if _eh_coluna_data(nome):
+            datas = pc.strptime(coluna, format="%Y-%m-%d", unit="s", error_is_null=True)
+            coluna = pc.coalesce(pc.strftime(datas, FORMATO_DATA), coluna)
+        return pc.cast(coluna, pa.string())
+    if pa.types.is_null(tipo):
+        return pa.chunked_array([pa.nulls(len(coluna), pa.string())])
+    # Inteiros e demais tipos: texto padrão do Arrow
+    return pc.cast(coluna, pa.string())
+
+
+def formatar_tabela(tabela: pa.Table) -> pa.Table:
+    """Tabela Arrow só de texto, pronta para o escritor CSV nativo."""
+    colunas = [formatar_coluna(nome, tabela.column(nome)) for nome in tabela.column_names]
+    return pa.Table.from_arrays(colunas, names=[str(n) for n in tabela.column_names])
+
+
+def tabela_arrow(lote: pd.DataFrame) -> pa.Table:
+    """
+    DataFrame (ou lote) -> Arrow, sem índice. Colunas object com tipos
+    mistos (ex: números e textos) que o Arrow recusa viram texto.
+    """
+    try:
+        return pa.Table.from_pandas(lote, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        mistas = {
+            c: lote[c].where(lote[c].isna(), lote[c].astype(str))
+            for c in lote.columns
+            if lote[c].dtype == object
+        }
+        return pa.Table.from_pandas(lote.assign(**mistas), preserve_index=False)
+
+
+def lotes_arrow(dados: Dados, tamanho_lote: int = TAMANHO_LOTE) -> Iterator[pa.Table]:
+    """Fatias de `tamanho_lote` linhas, já em Arrow (a fonte não é copiada inteira)."""
+    if isinstance(dados, pa.Table):
+        yield from (pa.Table.from_batches([b]) for b in dados.to_batches(tamanho_lote))
+        return
+    for inicio in range(0, len(dados), tamanho_lote):
+        yield tabela_arrow(dados.iloc[inicio : inicio + tamanho_lote])
+
+
+class EscritorCSV:
+    """
+    CSV PT-BR (';', vírgula decimal, DD/MM/AAAA, UTF-8 com BOM) gravado em
+    lotes pelo escritor CSV nativo do Arrow.
+
+    Cada lote é convertido para Arrow e formatado com funções vetorizadas
+    do Arrow compute (formatar_tabela), sem `astype(str)` nem regex do
+    pandas sobre o DataFrame inteiro e sem copiar a fonte. Como ';' e
+    quebras de linha são trocados por espaço e aspas por apóstrofo, os
+    valores são gravados sem aspas, como no `to_csv` do pandas.
+
+    Uso:
+        with EscritorCSV(caminho) as escritor:
+            for lote in lotes:
+                escritor.escrever(lote)
+    """
+
+    def __init__(self, caminho: str, tamanho_lote: int = TAMANHO_LOTE):
+        self.caminho = caminho
+        self.tamanho_lote = tamanho_lote
+        self.linhas = 0
+        self._arquivo: Optional[IO[bytes]] = None
+        self._escritor: Optional[pa_csv.CSVWriter] = None
+        self._colunas: List[str] = []
+
+    def __enter__(self) -> "EscritorCSV":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+    def _abrir(self, colunas: List[str]) -> None:
+        self._colunas = colunas
+        self._arquivo = open(self.caminho, "wb")
+        cabecalho = SEPARADOR.join(
+            pc.replace_substring_regex(pa.array(colunas), CARACTERES_ESTRUTURAIS, " ").to_pylist()
+        )
+        self._arquivo.write(BOM + cabecalho.encode("utf-8") + b"\n")
+        self._escritor = pa_csv.CSVWriter(
+            self._arquivo,
+            pa.schema([(c, pa.string()) for c in colunas]),
+            write_options=pa_csv.WriteOptions(
+                include_header=False, delimiter=SEPARADOR, quoting_style="none"
+            ),
+        )
+
+    def escrever(self, dados: Dados) -> int:
+        """Acrescenta as linhas de `dados` (mesmas colunas). Retorna as linhas gravadas."""
+        gravadas = 0
+        if self._escritor is None and len(dados) == 0:
+            # Sem linhas: só o cabeçalho
+            nomes = dados.column_names if isinstance(dados, pa.Table) else dados.columns
+            self._abrir([str(c) for c in nomes])
+        for lote in lotes_arrow(dados, self.tamanho_lote):
+            texto = formatar_tabela(lote)
+            if self._escritor is None:
+                self._abrir(texto.column_names)
+            elif texto.column_names != self._colunas:
+                raise ValueError(f"Colunas diferentes das do cabeçalho em {self.caminho}")
+            self._escritor.write_table(texto)
+            gravadas += texto.num_rows
+        self.linhas += gravadas
+        return gravadas
+
+    def fechar(self) -> None:
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
+
+
+def gravar_csv(dados: Dados, caminho: str, tamanho_lote: int = TAMANHO_LOTE) -> int:
+    """
+    Grava `dados` (DataFrame ou tabela Arrow) em CSV PT-BR. Sem linhas,
+    grava só o cabeçalho. Retorna as linhas gravadas.
+    """
+    with EscritorCSV(caminho, tamanho_lote) as escritor:
+        return escritor.escrever(dados)
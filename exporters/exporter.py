@@ -2,21 +2,57 @@ import pandas as pd
 import os
 import time
 import logging
+import threading
 from concurrent.futures import ThreadPoolExecutor, Future
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from exporters.formatting import apply_region_format, ensure_numeric_vl_cols
+from exporters.csv_writer import gravar_csv, tabela_arrow
+from exporters.parquet_writer import Perfil, obter_perfil
 from core.telemetry import monitor_task, TelemetryCollector
 
+# Threads de gravação do processo, compartilhadas entre ECDs: o Parquet e o
+# CSV (Arrow, fora do GIL) de um ECD são gravados em paralelo enquanto o
+# chamador segue. Ao sair, o processo espera essas threads.
+_pool_escrita: Optional[ThreadPoolExecutor] = None
+_exportacoes_pendentes: List["Future[List[str]]"] = []
+_trava_escrita = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _pool_escrita
+    with _trava_escrita:
+        if _pool_escrita is None:
+            _pool_escrita = ThreadPoolExecutor(thread_name_prefix="ECDExporter")
+        return _pool_escrita
+
+
+def aguardar_exportacoes() -> None:
+    """Bloqueia até terminarem as exportações em segundo plano deste processo."""
+    with _trava_escrita:
+        pendentes = list(_exportacoes_pendentes)
+        _exportacoes_pendentes.clear()
+    for futuro in pendentes:
+        futuro.result()
+
 
 class ECDExporter:
-    def __init__(self, path_saida: str):
+    # Tabelas que também saem em CSV (as demais, só em Parquet)
+    TERMOS_CSV = [
+        "BP", "DRE", "Balancete", "Plano_Contas",
+        "Lancamentos_Contabeis", "Saldos_Mensais", "baseRFB",
+    ]
+
+    def __init__(self, path_saida: str, perfil_parquet: Perfil = None):
         """
         Inicializa o exportador.
         Args:
             path_saida: Caminho base onde os arquivos serão salvos (ex: output/20211231).
+            perfil_parquet: Perfil de gravação Parquet ("padrao", "interativo"
+                ou "arquivo", ver exporters/parquet_writer.py); None = PERFIL_PADRAO.
         """
         self.path_saida = path_saida
+        self.perfil_parquet = obter_perfil(perfil_parquet)
         self.output_base = os.path.dirname(path_saida)
         self.id_folder = os.path.basename(path_saida)
         os.makedirs(self.path_saida, exist_ok=True)
@@ -38,61 +74,116 @@ class ECDExporter:
         prefixo: str = "",
         itens_adicionais: Optional[list] = None,
         tempo_inicio: Optional[float] = None,
-    ) -> None:
+        em_segundo_plano: bool = False,
+    ) -> "Future[List[str]]":
         """
         Exporta DataFrames para Parquet e CSV e centraliza logs.
+
+        Cada tabela é convertida para Arrow (e ordenada, se o perfil_parquet
+        pedir) uma única vez; o Parquet e o CSV (csv_writer) leem a mesma
+        tabela Arrow, sem cópia, em threads paralelas.
+
+        Args:
+            em_segundo_plano: Devolve logo após a conversão para Arrow; as
+                gravações e o log seguem nas threads do processo enquanto o
+                chamador continua. Antes, espera a exportação anterior
+                terminar, para manter no máximo um ECD em memória aguardando
+                gravação (ver aguardar_exportacoes). O chamador deve esperar
+                o Future antes de entregar a telemetria deste ECD: a métrica
+                "gravacao_arquivos" é registrada na conclusão.
+
+        Returns:
+            Future concluído quando todos os arquivos e o log foram gravados
+            (após a telemetria), com as gravações que falharam (vazia se
+            todas deram certo). Falhas não interrompem os demais arquivos.
         """
         if itens_adicionais is None:
             itens_adicionais = []
+        if em_segundo_plano:
+            aguardar_exportacoes()
 
         start_export = time.time()
-        log_gerados = []
-
-        # Escritas paralelas (I/O-bound = ideal para threads)
-        futures: list[tuple[Future[None], str]] = []
-
-        with ThreadPoolExecutor() as pool:
-            for nome_tabela, df in dicionario_dfs.items():
-                if df is None or df.empty:
-                    continue
-
-                nome_final = f"{prefixo}_{nome_tabela}" if prefixo else nome_tabela
-
-                # 1. Parquet (sempre)
-                caminho_parquet = os.path.join(self.path_saida, f"{nome_final}.parquet")
-                futures.append((
-                    pool.submit(df.to_parquet, caminho_parquet, index=False, engine="pyarrow"),
-                    f"PARQUET: {os.path.basename(caminho_parquet)}",
+        pool = _pool()
+        tarefas: List[Tuple["Future[Any]", str]] = []
+
+        for nome_tabela, df in dicionario_dfs.items():
+            if df is None or df.empty:
+                continue
+
+            nome_final = f"{prefixo}_{nome_tabela}" if prefixo else nome_tabela
+            # Ordem do perfil aplicada uma vez: Parquet e CSV com as mesmas linhas
+            tabela, ordenadas = self.perfil_parquet.ordenar(tabela_arrow(df))
+
+            # 1. Parquet (sempre), compactado conforme o perfil
+            caminho_parquet = os.path.join(self.path_saida, f"{nome_final}.parquet")
+            tarefas.append((
+                pool.submit(
+                    self.perfil_parquet.gravar_tabela, tabela, caminho_parquet, ordenadas
+                ),
+                f"PARQUET: {os.path.basename(caminho_parquet)}",
+            ))
+
+            # 2. CSV (seletivo), da mesma tabela Arrow. BP e DRE (pequenas)
+            # trazem VL_* em texto: convertidas para número só no CSV
+            if any(term in nome_tabela for term in self.TERMOS_CSV):
+                caminho_csv = os.path.join(self.path_saida, f"{nome_final}.csv")
+                tabela_csv = (
+                    self.perfil_parquet.ordenar(tabela_arrow(ensure_numeric_vl_cols(df)))[0]
+                    if any(t in nome_tabela for t in ["BP", "DRE"])
+                    else tabela
+                )
+                tarefas.append((
+                    pool.submit(gravar_csv, tabela_csv, caminho_csv),
+                    f"CSV:     {os.path.basename(caminho_csv)}",
                 ))
 
-                # 2. CSV (seletivo)
-                termos_csv = [
-                    "BP", "DRE", "Balancete", "Plano_Contas",
-                    "Lancamentos_Contabeis", "Saldos_Mensais", "baseRFB",
-                ]
-                if any(term in nome_tabela for term in termos_csv):
-                    caminho_csv = os.path.join(self.path_saida, f"{nome_final}.csv")
-                    df_csv = (
-                        ensure_numeric_vl_cols(df)
-                        if any(t in nome_tabela for t in ["BP", "DRE"])
-                        else df
-                    )
-                    futures.append((
-                        pool.submit(
-                            df_csv.to_csv, caminho_csv,
-                            index=False, sep=";", decimal=",", encoding="utf-8-sig",
-                        ),
-                        f"CSV:     {os.path.basename(caminho_csv)}",
-                    ))
-
-            # Coleta resultados e logs
-            for future, log_entry in futures:
-                try:
-                    future.result()
-                    log_gerados.append(log_entry)
-                except Exception as e:
-                    logging.error(f"Erro na escrita de arquivo: {log_entry} — {e}")
-
+        concluido: "Future[List[str]]" = Future()
+        restantes = [len(tarefas)]
+
+        def _concluir() -> None:
+            # Coleta resultados e logs (na thread da última gravação)
+            try:
+                log_gerados = []
+                falhas = []
+                for future, log_entry in tarefas:
+                    try:
+                        future.result()
+                        log_gerados.append(log_entry)
+                    except Exception as e:
+                        logging.error(f"Erro na escrita de arquivo: {log_entry} — {e}")
+                        falhas.append(f"{log_entry.strip()} — {e}")
+                self._registrar_exportacao(
+                    log_gerados + itens_adicionais, start_export, tempo_inicio
+                )
+                concluido.set_result(falhas)
+            except Exception as e:
+                logging.error(f"Erro ao concluir exportação ({self.id_folder}): {e}")
+                concluido.set_exception(e)
+
+        def _gravado(_: "Future[Any]") -> None:
+            with _trava_escrita:
+                restantes[0] -= 1
+                ultimo = restantes[0] == 0
+            if ultimo:
+                _concluir()
+
+        if tarefas:
+            for future, _ in tarefas:
+                future.add_done_callback(_gravado)
+        else:
+            _concluir()
+
+        if em_segundo_plano:
+            with _trava_escrita:
+                _exportacoes_pendentes.append(concluido)
+        else:
+            concluido.result()
+        return concluido
+
+    def _registrar_exportacao(
+        self, lista_arquivos: list, start_export: float, tempo_inicio: Optional[float]
+    ) -> None:
+        """Telemetria das gravações e log centralizado do ECD."""
         end_export = time.time()
         duracao = end_export - (tempo_inicio if tempo_inicio else start_export)
 
@@ -101,12 +192,12 @@ class ECDExporter:
             self.telemetry.record_metric(
                 self.current_ecd_id,
                 "ECDExporter",
-                "exportar_lote",
+                "gravacao_arquivos",
                 end_export - start_export,
             )
 
         self._atualizar_log_centralizado(
-            log_gerados + itens_adicionais,
+            lista_arquivos,
             tempo_inicio=tempo_inicio if tempo_inicio else start_export,
             tempo_fim=end_export,
             duracao=duracao,
@@ -34,6 +34,9 @@ def apply_region_format(df: pd.DataFrame) -> pd.DataFrame:
             mask = df_out[col].notna()
             # Garante que é numérico antes de formatar para evitar quebrar strings acidentais
             if pd.api.types.is_numeric_dtype(df_out[col]):
+                # Colunas Arrow (decimal128/int64) não aceitam texto: vira float64 antes
+                if isinstance(df_out[col].dtype, pd.ArrowDtype):
+                    df_out[col] = df_out[col].astype("float64")
                 df_out.loc[mask, col] = (
                     df_out.loc[mask, col]
                     .round(2)
@@ -0,0 +1,183 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from exporters.csv_writer import tabela_arrow
+
+# Logger local para uso interno do módulo (não configura nível globalmente)
+logger = logging.getLogger(__name__)
+
+Dados = Union[pd.DataFrame, pa.Table]
+
+# Ordenação do perfil interativo: em cada grupo vale a 1ª coluna presente
+# na tabela. CNPJ, depois a data; no Diário, o lançamento e a linha (as
+# partidas de um lançamento continuam contíguas, na ordem do I250); nas
+# demais tabelas, a conta
+ORDENACAO_INTERATIVA: Tuple[Tuple[str, ...], ...] = (
+    ("CNPJ",),
+    ("DT_LCTO", "DT_FIN", "DT_INI", "MES", "PERIODO"),
+    ("NUM_LCTO", "COD_CTA"),
+    ("LINHA_ORIGEM",),
+)
+
+# Chave dos metadados do esquema com o nome do perfil que gravou o arquivo
+CHAVE_PERFIL = b"perfil_parquet"
+
+
+@dataclass(frozen=True)
+class PerfilParquet:
+    """
+    Opções de gravação Parquet com nome, aplicadas igualmente pelo
+    ECDExporter, AuditExporter (evidências inclusive) e ECDConsolidator.
+
+    - padrao (padrão): opções do pyarrow (snappy), linhas na ordem original.
+    - interativo: para PowerBI/DuckDB. Linhas ordenadas por CNPJ, data e
+      lançamento/linha (Diário) ou conta (demais tabelas), ordem declarada
+      nos metadados, row groups menores, estatísticas e índice de páginas:
+      filtros por CNPJ/período pulam row groups e páginas inteiras. Snappy,
+      que todo leitor suporta e descompacta rápido. Os exportadores gravam
+      o CSV da mesma tabela já ordenada (ver `ordenar`).
+    - arquivo: guarda de longo prazo. zstd nível alto e row groups grandes:
+      arquivos bem menores, gravação mais lenta, leitura equivalente.
+
+    A troca entre tamanho, gravação e leitura de cada perfil é medida por
+    tools/benchmark_parquet.py.
+    """
+
+    nome: str
+    compressao: str = "snappy"
+    nivel_compressao: Optional[int] = None
+    linhas_por_grupo: Optional[int] = None  # None = padrão do pyarrow (1 Mi linhas)
+    dicionario: bool = True  # Codificação por dicionário (textos repetidos)
+    estatisticas: bool = True  # Mín/máx por row group
+    indice_paginas: bool = False  # Column/offset index (mín/máx por página)
+    ordenacao: Tuple[Tuple[str, ...], ...] = ()
+
+    def opcoes(self) -> Dict[str, Any]:
+        """Argumentos de pq.ParquetWriter / pq.write_table do perfil."""
+        opcoes: Dict[str, Any] = {
+            "compression": self.compressao,
+            "use_dictionary": self.dicionario,
+            "write_statistics": self.estatisticas,
+            "write_page_index": self.indice_paginas,
+        }
+        if self.nivel_compressao is not None:
+            opcoes["compression_level"] = self.nivel_compressao
+        return opcoes
+
+    def colunas_ordenacao(self, colunas: Sequence[str]) -> List[str]:
+        """Colunas de ordenação presentes em `colunas` (uma por grupo)."""
+        presentes = set(colunas)
+        chaves = []
+        for grupo in self.ordenacao:
+            coluna = next((c for c in grupo if c in presentes), None)
+            if coluna is not None:
+                chaves.append(coluna)
+        return chaves
+
+    def ordenar(self, tabela: pa.Table) -> Tuple[pa.Table, List[str]]:
+        """
+        Tabela na ordem do perfil (ordenação estável do Arrow, nulos no fim)
+        e as colunas usadas. Tipos sem ordenação no Arrow mantêm a tabela
+        na ordem original.
+        """
+        chaves = self.colunas_ordenacao(tabela.column_names)
+        if not chaves or tabela.num_rows < 2:
+            return tabela, chaves
+        try:
+            indices = pc.sort_indices(tabela, sort_keys=[(c, "ascending") for c in chaves])
+        except (pa.ArrowNotImplementedError, pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            logger.warning(f"Parquet '{self.nome}': ordenação por {chaves} ignorada ({e})")
+            return tabela, []
+        return tabela.take(indices), chaves
+
+    def escritor(
+        self, caminho: str, esquema: pa.Schema, colunas_ordenadas: Sequence[str] = ()
+    ) -> pq.ParquetWriter:
+        """
+        ParquetWriter com as opções do perfil (gravação em lotes). O nome do
+        perfil vai nos metadados do esquema (ver `perfil_gravado`).
+        """
+        esquema = esquema.with_metadata({**(esquema.metadata or {}), CHAVE_PERFIL: self.nome.encode()})
+        opcoes = self.opcoes()
+        if colunas_ordenadas:
+            opcoes["sorting_columns"] = pq.SortingColumn.from_ordering(
+                esquema, [(c, "ascending") for c in colunas_ordenadas]
+            )
+        return pq.ParquetWriter(caminho, esquema, **opcoes)
+
+    def gravar_tabela(
+        self, tabela: pa.Table, caminho: str, colunas_ordenadas: Sequence[str] = ()
+    ) -> int:
+        """
+        Grava uma tabela já na ordem do perfil (ver `ordenar`), declarando
+        `colunas_ordenadas` nos metadados. Retorna as linhas.
+        """
+        with self.escritor(caminho, tabela.schema, colunas_ordenadas) as escritor:
+            escritor.write_table(tabela, row_group_size=self.linhas_por_grupo)
+        return tabela.num_rows
+
+    def gravar(self, dados: Dados, caminho: str) -> int:
+        """Ordena e grava `dados` (DataFrame ou tabela Arrow). Retorna as linhas."""
+        tabela = dados if isinstance(dados, pa.Table) else tabela_arrow(dados)
+        tabela, chaves = self.ordenar(tabela)
+        return self.gravar_tabela(tabela, caminho, chaves)
+
+
+PERFIS: Dict[str, PerfilParquet] = {
+    "padrao": PerfilParquet("padrao"),
+    "interativo": PerfilParquet(
+        "interativo",
+        linhas_por_grupo=128 * 1024,
+        indice_paginas=True,
+        ordenacao=ORDENACAO_INTERATIVA,
+    ),
+    "arquivo": PerfilParquet(
+        "arquivo",
+        compressao="zstd",
+        nivel_compressao=15,
+        linhas_por_grupo=4 * 1024 * 1024,
+    ),
+}
+
+SINONIMOS_PERFIL = {
+    "default": "padrao",
+    "padrão": "padrao",
+    "interactive": "interativo",
+    "archive": "arquivo",
+}
+
+PERFIL_PADRAO = "padrao"
+
+Perfil = Union[str, PerfilParquet, None]
+
+
+def obter_perfil(perfil: Perfil = None) -> PerfilParquet:
+    """Perfil pelo nome ("padrao", "interativo" ou "arquivo"); None = PERFIL_PADRAO."""
+    if isinstance(perfil, PerfilParquet):
+        return perfil
+    chave = str(perfil if perfil is not None else PERFIL_PADRAO).strip().lower()
+    chave = SINONIMOS_PERFIL.get(chave, chave)
+    if chave not in PERFIS:
+        raise ValueError(f"Perfil Parquet inválido: {perfil} (use {', '.join(PERFIS)})")
+    return PERFIS[chave]
+
+
+def perfil_gravado(caminho: str) -> Optional[str]:
+    """Nome do perfil que gravou o Parquet (None se ilegível ou anterior aos perfis)."""
+    try:
+        metadados = pq.read_schema(caminho).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    valor = metadados.get(CHAVE_PERFIL)
+    return valor.decode() if valor is not None else None
+
+
+def gravar_parquet(dados: Dados, caminho: str, perfil: Perfil = None) -> int:
+    """Grava `dados` em Parquet com o perfil informado. Retorna as linhas."""
+    return obter_perfil(perfil).gravar(dados, caminho)
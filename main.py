@@ -1,19 +1,30 @@
 import os
 import time
+import argparse
 import glob
 import logging
 import warnings
 import re
 import shutil
-from typing import Optional, cast, Any, Set, Dict
+from typing import Optional, cast, Any, Set, Dict, List
 import pandas as pd
 from core.reader_ecd import ECDReader
 from core.processor import ECDProcessor
 from core.auditor import ECDAuditor
+from core.diferencial import CacheRetificacao, ReprocessadorRetificadora
+from core.cache_auditoria import CacheResultadosAuditoria
+from core.auditoria_portfolio import AuditorPortfolio
+from core.amostragem import METODOS_AMOSTRAGEM, AmostragemAuditoria, criar_amostragem
+from core.anomalias import EscoreAnomalias
+from core.lancamentos_atipicos import ParesIncomuns
+from core.selecao_lote import SeletorArquivosECD
 from core.telemetry import TelemetryCollector
-from exporters.exporter import ECDExporter
+from core.agendador_auditoria import ModeloCustoAuditoria
+from exporters.exporter import ECDExporter, aguardar_exportacoes
 from exporters.consolidator import ECDConsolidator
 from exporters.audit_exporter import AuditExporter
+from exporters.csv_writer import gravar_csv
+from exporters.parquet_writer import obter_perfil
 from intelligence.historical_mapper import HistoricalMapper
 from datetime import datetime, timedelta
 from concurrent.futures import ProcessPoolExecutor, as_completed
@@ -47,12 +58,60 @@ def processar_um_arquivo(
     output_base: str,
     mapper: Optional[HistoricalMapper] = None,
     telemetry: Optional[TelemetryCollector] = None,
+    usar_arrow: bool = False,
+    orcamento_ram_mb: Optional[float] = None,
+    modo_triagem: bool = False,
+    dir_cache_retificacao: Optional[str] = None,
+    modelo_custos: Optional[ModeloCustoAuditoria] = None,
+    auditoria_em_processos: bool = False,
+    dir_cache_auditoria: Optional[str] = None,
+    testes_auditoria: Optional[List[str]] = None,
+    limites_evidencia: Optional[Dict[str, int]] = None,
+    amostragem: Optional[AmostragemAuditoria] = None,
+    arquivo_historico_saldos: Optional[str] = None,
+    arquivo_historico_fluxos: Optional[str] = None,
+    perfil_parquet: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """Executa o ciclo completo de processamento para um único arquivo ECD."""
+    """Executa o ciclo completo de processamento para um único arquivo ECD.
+
+    Args:
+        usar_arrow: Monta os blocos com dtypes Arrow (string[pyarrow], date32,
+            decimal128) em vez de colunas object. Reduz memória e acelera o
+            Parquet; opcional enquanto o modo object segue como padrão.
+        orcamento_ram_mb: Limite de RAM dos blocos do processor. Acima dele,
+            tabelas frias vão para Arrow IPC em disco (None = sem limite).
+        modo_triagem: Lê apenas os blocos 0, I050/I051, I150/I155/I157 e J
+            (sem o Diário). Gera balancetes, baseRFB e um scorecard reduzido
+            com os testes de saldo; os testes do Diário ficam DEFERIDO. Sem
+            os lançamentos 'E', o encerramento não é revertido nos balancetes.
+        dir_cache_retificacao: Pasta do cache de versões processadas. Se o
+            mesmo CNPJ/período já estiver no cache (ex: retificadora), só os
+            meses, tabelas e testes afetados pela diferença são refeitos, e a
+            tabela 09_Alteracoes_Retificacao registra o que mudou.
+        dir_cache_auditoria: Pasta do cache de resultados da auditoria. Testes
+            cujos insumos e versão (código/parâmetros) não mudaram desde a
+            última execução são lidos do cache em vez de executados.
+        testes_auditoria: IDs dos testes a executar (ver
+            ECDAuditor.REGISTRO.selecionar); None = bateria completa.
+        limites_evidencia: Teste -> máximo de linhas gravadas da evidência
+            (dossiê de lançamentos); testes ausentes são gravados inteiros.
+        amostragem: Plano de amostragem do Diário (MUS ou estratificada). Os
+            testes amostráveis (4.1, 4.2) rodam sobre a amostra e reportam a
+            distorção projetada com limites de confiança.
+        arquivo_historico_saldos: Balancetes mensais consolidados de execuções
+            anteriores (CONSOLIDADO_03_Balancetes_Mensais.parquet). Os anos
+            anteriores do mesmo CNPJ dão histórico e sazonalidade ao 6.1.
+        arquivo_historico_fluxos: Fluxos débito -> crédito consolidados
+            (CONSOLIDADO_08_Fluxo_Contas.parquet): pares de contas nunca vistos
+            nos anos anteriores do mesmo CNPJ entram no 7.5.
+        perfil_parquet: Perfil de gravação dos Parquet do ECD e da auditoria
+            ("padrao", "interativo" ou "arquivo"; None = PERFIL_PADRAO).
+    """
     start_proc = time.time()
     nome_arquivo = os.path.basename(caminho_arquivo)
     nome_projeto = nome_arquivo.replace(".txt", "")
 
+    processor: Optional[ECDProcessor] = None
     try:
         reader = ECDReader(caminho_arquivo)
 
@@ -69,7 +128,11 @@ def processar_um_arquivo(
             reader.current_ecd_id = id_folder_temp
 
         # Processamento do Leitor
-        registros = list(reader.processar_arquivo())
+        registros = list(
+            reader.processar_arquivo(
+                blocos_selecionados=ECDReader.BLOCOS_TRIAGEM if modo_triagem else None
+            )
+        )
         if not registros:
             logging.warning(f"Arquivo vazio ou sem registros válidos: {nome_arquivo}")
             return {}
@@ -88,14 +151,32 @@ def processar_um_arquivo(
             cnpj=cnpj_contribuinte,
             layout_versao=reader.layout_versao or "",
             knowledge_base=mapper,
+            usar_arrow=usar_arrow,
+            orcamento_ram_mb=orcamento_ram_mb,
         )
         if telemetry:
             processor.telemetry = telemetry
             processor.current_ecd_id = id_folder
 
         df_plano = processor.processar_plano_contas()
-        df_lancamentos = processor.processar_lancamentos(df_plano)
-        dict_balancetes = processor.gerar_balancetes()
+
+        # Retificadora: compara com a versão anterior em cache e refaz só o que mudou
+        cache_retificacao = None
+        reprocessador = None
+        if dir_cache_retificacao and not modo_triagem:
+            cache_retificacao = CacheRetificacao(dir_cache_retificacao)
+            reprocessador = ReprocessadorRetificadora(
+                processor,
+                cache_retificacao.carregar(cnpj_contribuinte, id_folder, usar_arrow),
+            )
+
+        # Na triagem não há I200/I250: processar_lancamentos devolve vazio
+        if reprocessador:
+            df_lancamentos = reprocessador.lancamentos()
+            dict_balancetes = reprocessador.balancetes()
+        else:
+            df_lancamentos = processor.processar_lancamentos(df_plano)
+            dict_balancetes = processor.gerar_balancetes()
         dict_demos = processor.processar_demonstracoes()
 
         # --- AUDITORIA ---
@@ -106,23 +187,46 @@ def processar_um_arquivo(
             df_plano=df_plano,
             df_naturezas=processor.blocos.get("dfECD_I050"),
             df_mapeamento=processor.blocos.get("dfECD_I051"),
+            tensor_balancete=processor.gerar_tensor_balancete(df_bal_mensal),
         )
         if telemetry:
             auditor.telemetry = telemetry
             auditor.current_ecd_id = id_folder
-
-        resultados_audit = auditor.executar_auditoria_completa()
+        auditor.modelo_custos = modelo_custos
+        auditor.usar_processos = auditoria_em_processos
+        auditor.amostragem = amostragem
+        if arquivo_historico_saldos:
+            auditor.historico_balancete = _historico_consolidado(
+                arquivo_historico_saldos, cnpj_contribuinte, EscoreAnomalias.COLUNAS_HISTORICO
+            )
+        if arquivo_historico_fluxos and not modo_triagem:
+            auditor.historico_fluxos = _historico_consolidado(
+                arquivo_historico_fluxos, cnpj_contribuinte, ParesIncomuns.COLUNAS_HISTORICO
+            )
+        if dir_cache_auditoria:
+            auditor.cache_resultados = CacheResultadosAuditoria(dir_cache_auditoria)
+
+        if modo_triagem:
+            resultados_audit = auditor.executar_triagem()
+        elif testes_auditoria is not None:
+            resultados_audit = auditor.executar_auditoria_completa(testes_auditoria)
+        elif reprocessador:
+            resultados_audit = reprocessador.auditoria(auditor)
+        else:
+            resultados_audit = auditor.executar_auditoria_completa()
 
         # --- EXPORTAÇÃO ---
         pasta_saida = os.path.join(output_base, id_folder)
-        exporter = ECDExporter(pasta_saida)
+        exporter = ECDExporter(pasta_saida, perfil_parquet)
         if telemetry:
             exporter.telemetry = telemetry
             exporter.current_ecd_id = id_folder
 
         itens_log = []
         try:
-            audit_exporter = AuditExporter(pasta_saida)
+            audit_exporter = AuditExporter(
+                pasta_saida, limites_evidencia, perfil_parquet=perfil_parquet
+            )
             itens_log += audit_exporter.exportar_dashboard(
                 resultados_audit, nome_projeto, prefixo=id_folder
             )
@@ -138,32 +242,137 @@ def processar_um_arquivo(
             "03_Balancetes_Mensais": df_bal_mensal,
             "04_Balancete_baseRFB": dict_balancetes.get("04_Balancete_baseRFB"),
             "05_Plano_Contas": df_plano,
-            "06_Lancamentos_Contabeis": df_lancamentos,
         }
-
-        exporter.exportar_lote(
+        if not modo_triagem:
+            matriz_fluxos = (
+                reprocessador.fluxos(df_lancamentos)
+                if reprocessador
+                else processor.gerar_fluxo_contas(df_lancamentos)
+            )
+            tabelas["06_Lancamentos_Contabeis"] = df_lancamentos
+            tabelas["08_Fluxo_Contas"] = matriz_fluxos.para_dataframe(cnpj_contribuinte)
+        if reprocessador and reprocessador.diferenca is not None:
+            tabelas["09_Alteracoes_Retificacao"] = reprocessador.diferenca.tabela
+
+        # Gravação em segundo plano: Parquet e CSV deste ECD saem em threads
+        # enquanto o cache da retificadora é gravado
+        exportacao = exporter.exportar_lote(
             tabelas,
             nome_projeto,
             prefixo=id_folder,
             itens_adicionais=itens_log,
             tempo_inicio=start_proc,
+            em_segundo_plano=True,
         )
 
+        if cache_retificacao and reprocessador:
+            cache_retificacao.salvar(
+                cnpj_contribuinte,
+                id_folder,
+                reprocessador.estado(
+                    cast(Dict[str, pd.DataFrame], tabelas), resultados_audit
+                ),
+            )
+
+        # A telemetria volta ao processo pai no retorno: espera as gravações
+        # (que registram "gravacao_arquivos") antes de entregá-la
+        falhas_gravacao = exportacao.result()
         if telemetry:
+            for falha in falhas_gravacao:
+                telemetry.record_failure(id_folder, f"Gravação: {falha}")
             telemetry.end_ecd(id_folder)
 
-        logging.info(f"Sucesso: {id_folder}")
+        if falhas_gravacao:
+            logging.error(
+                f"Concluído com {len(falhas_gravacao)} arquivo(s) não gravado(s): {id_folder}"
+            )
+        else:
+            logging.info(f"Sucesso: {id_folder}")
         return telemetry.data if telemetry else {}
 
     except Exception as e:
         logging.error(f"Falha ao processar {nome_arquivo}: {e}")
+        # Nenhuma gravação deste ECD pode alterar a telemetria após o retorno
+        aguardar_exportacoes()
         return telemetry.data if telemetry else {}
+    finally:
+        # Spill dos blocos (orcamento_ram_mb): a pasta temporária sai com o ECD
+        if processor is not None:
+            processor.fechar()
+
+
+def _historico_consolidado(
+    caminho: str, cnpj: str, colunas: List[str]
+) -> Optional[pd.DataFrame]:
+    """Tabela consolidada de execuções anteriores, só do CNPJ e das colunas do teste."""
+    try:
+        return pd.read_parquet(
+            caminho,
+            columns=colunas,
+            filters=[("CNPJ", "==", cnpj)] if cnpj else None,
+        )
+    except Exception as e:
+        logging.warning(f"Histórico indisponível ({os.path.basename(caminho)}): {e}")
+        return None
 
 
-def executar_pipeline_batch(telemetry: Optional[TelemetryCollector] = None):
+def executar_pipeline_batch(
+    telemetry: Optional[TelemetryCollector] = None,
+    usar_arrow: bool = False,
+    orcamento_ram_mb: Optional[float] = None,
+    modo_triagem: bool = False,
+    reprocessamento_diferencial: bool = False,
+    politica_versoes: str = "retificadora",
+    auditoria_em_processos: bool = False,
+    cache_auditoria: bool = False,
+    auditoria_portfolio: bool = False,
+    testes: Optional[str] = None,
+    custo_maximo: Optional[str] = None,
+    limites_evidencia: Optional[Dict[str, int]] = None,
+    amostragem: Optional[AmostragemAuditoria] = None,
+    perfil_parquet: Optional[str] = None,
+):
     """
     Localiza todos os arquivos ECD e gerencia o processamento em lote.
+
+    Args:
+        usar_arrow: Repassado a processar_um_arquivo (dtypes Arrow nos blocos).
+        orcamento_ram_mb: Orçamento de RAM dos blocos por worker (spill em disco).
+        modo_triagem: Triagem sem o Diário (scorecard reduzido por arquivo).
+        reprocessamento_diferencial: Mantém em data/cache/retificacoes a última
+            versão de cada CNPJ/período; retificadoras refazem só o que mudou.
+        politica_versoes: Critério do SeletorArquivosECD para escolher, entre
+            versões do mesmo CNPJ/período/livro, a que será processada.
+        auditoria_em_processos: Testes de auditoria pesados (estimativa do
+            modelo de custos) rodam em processos próprios, fora do GIL.
+        cache_auditoria: Guarda em data/cache/auditoria o resultado de cada
+            teste, chaveado pelos insumos e pela versão do teste; reexecuções
+            do lote só refazem os testes que mudaram (ex: ajuste de limiar).
+        auditoria_portfolio: Após a consolidação, roda a auditoria da carteira
+            (DuckDB sobre os CONSOLIDADO_*.parquet, por CNPJ e ano) e grava
+            consolidado/PORTFOLIO_Auditoria_Scorecard.
+        testes: Testes de auditoria a executar, separados por vírgula
+            (código, ID ou curinga, ex: "1.1,3.1,5.*"); None = todos.
+        custo_maximo: Classe de custo máxima dos testes ("barato", "medio"
+            ou "caro"; aceita "cheap"/"medium"/"expensive").
+        limites_evidencia: Repassado ao AuditExporter (linhas por evidência).
+        amostragem: Plano de amostragem do Diário (ver core/amostragem.py),
+            para Diários grandes demais para os testes linha a linha.
+        perfil_parquet: Perfil de gravação Parquet (ver
+            exporters/parquet_writer.py) usado pelo ECDExporter, AuditExporter
+            e ECDConsolidator: "padrao" (padrão, opções do pyarrow),
+            "interativo" (ordenado para PowerBI/DuckDB) ou "arquivo" (zstd, menor).
     """
+    # Seleção validada antes de qualquer leitura (erro de digitação falha cedo)
+    testes_auditoria = (
+        ECDAuditor.REGISTRO.selecionar(testes, custo_maximo)
+        if testes is not None or custo_maximo is not None
+        else None
+    )
+    if testes_auditoria is not None:
+        logging.info(f"Testes de auditoria selecionados: {', '.join(testes_auditoria)}")
+    perfil_parquet = obter_perfil(perfil_parquet).nome
+
     base_dir = os.path.dirname(os.path.abspath(__file__))
     input_dir = os.path.join(base_dir, "data", "input")
     output_dir = os.path.join(base_dir, "data", "output")
@@ -199,6 +408,16 @@ def executar_pipeline_batch(telemetry: Optional[TelemetryCollector] = None):
     # Garante que a pasta de log existe
     os.makedirs(os.path.join(output_dir, "file_logs"), exist_ok=True)
 
+    # --- PASSO -1: SELEÇÃO DE VERSÕES (cópias e livros substituídos) ---
+    arquivos, df_ignorados = SeletorArquivosECD(politica_versoes).selecionar(arquivos)
+    if not df_ignorados.empty:
+        for _, ign in df_ignorados.iterrows():
+            logging.info(
+                f"Ignorado ({ign['MOTIVO']}): {ign['ARQUIVO']} -> mantido {ign['MANTIDO']}"
+            )
+        gravar_csv(df_ignorados, os.path.join(output_dir, "file_logs", "arquivos_ignorados.csv"))
+        print(f"{len(df_ignorados)} arquivo(s) ignorado(s) (duplicados/substituídos).")
+
     print(f"Iniciando processamento de {len(arquivos)} arquivo(s)...")
 
     # --- PASSO 0: LEARNING PASS (Cross-Temporal) ---
@@ -304,11 +523,56 @@ def executar_pipeline_batch(telemetry: Optional[TelemetryCollector] = None):
         f"Iniciando auditoria paralela em {len(arquivos)} arquivos ({num_cpus} núcleos)..."
     )
 
+    dir_cache = (
+        os.path.join(base_dir, "data", "cache", "retificacoes")
+        if reprocessamento_diferencial
+        else None
+    )
+
+    dir_cache_auditoria = (
+        os.path.join(base_dir, "data", "cache", "auditoria") if cache_auditoria else None
+    )
+
+    # Custos dos testes de auditoria aprendidos nas execuções anteriores
+    custos_file = os.path.join(intelligence_dir, "custos_auditoria.json")
+    modelo_custos = ModeloCustoAuditoria.carregar(custos_file)
+
+    # Tabelas consolidadas da execução anterior (preservadas na limpeza):
+    # histórico plurianual do teste de anomalias (6.1)
+    arquivo_historico_saldos: Optional[str] = os.path.join(
+        output_dir, "consolidado", "CONSOLIDADO_03_Balancetes_Mensais.parquet"
+    )
+    if not os.path.exists(arquivo_historico_saldos):
+        arquivo_historico_saldos = None
+    # Pares débito/crédito dos anos anteriores (pares nunca vistos, 7.5)
+    arquivo_historico_fluxos: Optional[str] = os.path.join(
+        output_dir, "consolidado", "CONSOLIDADO_08_Fluxo_Contas.parquet"
+    )
+    if not os.path.exists(arquivo_historico_fluxos):
+        arquivo_historico_fluxos = None
+
     results_data = []
     with ProcessPoolExecutor(max_workers=num_cpus) as executor:
         futures = {
             executor.submit(
-                processar_um_arquivo, arq, output_dir, mapper, telemetry
+                processar_um_arquivo,
+                arq,
+                output_dir,
+                mapper,
+                telemetry,
+                usar_arrow,
+                orcamento_ram_mb,
+                modo_triagem,
+                dir_cache,
+                modelo_custos,
+                auditoria_em_processos,
+                dir_cache_auditoria,
+                testes_auditoria,
+                limites_evidencia,
+                amostragem,
+                arquivo_historico_saldos,
+                arquivo_historico_fluxos,
+                perfil_parquet,
             ): arq
             for arq in arquivos
         }  # type: ignore
@@ -323,14 +587,34 @@ def executar_pipeline_batch(telemetry: Optional[TelemetryCollector] = None):
     if telemetry:
         for d in results_data:
             telemetry.merge(d)  # type: ignore
+        for ecd_id, dados in telemetry.data.items():
+            for falha in dados.get("falhas", []):
+                logging.error(f"[{ecd_id}] {falha}")
+        modelo_custos.aprender(telemetry.data)
+        try:
+            modelo_custos.salvar(custos_file)
+        except OSError as e:
+            logging.warning(f"Modelo de custos da auditoria não persistido: {e}")
 
-    # Consolidação Final
-    consolidator = ECDConsolidator(output_dir)
+    # Consolidação Final: os workers só encerram depois de gravar seus
+    # arquivos; aqui, garante também as exportações feitas neste processo
+    aguardar_exportacoes()
+    consolidator = ECDConsolidator(output_dir, perfil_parquet)
     if telemetry:
         consolidator.telemetry = telemetry
         consolidator.current_ecd_id = "GLOBAL"
     consolidator.consolidar()
 
+    if auditoria_portfolio:
+        portfolio = AuditorPortfolio(consolidator.consolidated_dir)
+        scorecard_portfolio = portfolio.executar()
+        if not scorecard_portfolio.empty:
+            portfolio.salvar(scorecard_portfolio)
+            logging.info(
+                f"Auditoria da carteira: {scorecard_portfolio['CNPJ'].nunique()} CNPJ(s), "
+                f"{len(scorecard_portfolio)} resultado(s)."
+            )
+
 
 def gerar_relatorio_final(
     telemetry: TelemetryCollector, start_time: float, elapsed: float
@@ -463,11 +747,60 @@ def gerar_relatorio_final(
         print(f"Erro ao gravar log de telemetria: {e}")
 
 
+def _argumentos(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Processamento e auditoria de arquivos SPED-ECD.")
+    parser.add_argument(
+        "--tests",
+        dest="testes",
+        help='Testes de auditoria a executar, separados por vírgula (ex: "1.1,3.1,5.*").',
+    )
+    parser.add_argument(
+        "--max-cost",
+        dest="custo_maximo",
+        help="Classe de custo máxima dos testes: barato|medio|caro (ou cheap|medium|expensive).",
+    )
+    parser.add_argument(
+        "--amostragem",
+        choices=sorted(METODOS_AMOSTRAGEM),
+        help="Roda os testes linha a linha sobre uma amostra do Diário (MUS ou estratificada).",
+    )
+    parser.add_argument(
+        "--confianca", type=float, default=0.95, help="Confiança da amostragem (padrão 0,95)."
+    )
+    parser.add_argument(
+        "--erro-toleravel",
+        dest="erro_toleravel",
+        type=float,
+        help="Distorção tolerável em R$ (padrão: 1%% do valor do Diário).",
+    )
+    parser.add_argument(
+        "--perfil-parquet",
+        dest="perfil_parquet",
+        help="Perfil de gravação Parquet: interativo|arquivo|padrao (ou interactive|archive|default).",
+    )
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    args = _argumentos()
     start_time = time.time()
     telemetry = TelemetryCollector()
     try:
-        executar_pipeline_batch(telemetry=telemetry)
+        executar_pipeline_batch(
+            telemetry=telemetry,
+            testes=args.testes,
+            custo_maximo=args.custo_maximo,
+            perfil_parquet=args.perfil_parquet,
+            amostragem=(
+                criar_amostragem(
+                    args.amostragem,
+                    confianca=args.confianca,
+                    erro_toleravel=args.erro_toleravel,
+                )
+                if args.amostragem
+                else None
+            ),
+        )
     except Exception as e:
         logging.critical(f"ERRO NO BATCH: {e}")
     finally:
@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+# Raiz do projeto no sys.path para os imports de 'core' e 'exporters'
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+
+@pytest.fixture
+def ecd_minimo(tmp_path):
+    """
+    ECD sintético pequeno (plano, saldos de 2 meses e diário) para testes
+    de ponta a ponta do processor sem depender de arquivos em data/input.
+    """
+    conteudo = [
+        "|0000|LECD|01012020|31122020|EMPRESA TESTE|12345678000199|SP||3550308||||0|0|||0|0||N|0|0|1|",
+        "|I010|G|9.00|",
+        "|I050|01012020|01|S|1|1||ATIVO|",
+        "|I050|01012020|01|A|2|1.01|1|CAIXA GERAL|",
+        "|I051||1.01.01.01.01|",
+        "|I050|01012020|01|A|2|1.02|1|CLIENTES; DUPLICATAS|",
+        "|I051||1.01.02.01.01|",
+        "|I050|01012020|04|S|1|3||RESULTADO|",
+        "|I050|01012020|04|A|2|3.01|3|RECEITA VENDAS|",
+        "|I051||3.01.01.01.01.01|",
+        "|I150|01012020|31012020|",
+        "|I155|1.01||1000,00|D|500,00|0,00|1500,00|D|",
+        "|I155|3.01||0,00|D|0,00|500,00|500,00|C|",
+        "|I150|01022020|29022020|",
+        "|I155|1.01||1500,00|D|0,00|200,00|1300,00|D|",
+        "|I155|1.02||0,00|D|200,00|0,00|200,00|D|",
+        "|I200|1|15012020|500,00|N|",
+        "|I250|1.01||500,00|D|||VENDA A VISTA NF 10|||",
+        "|I250|3.01||500,00|C|||VENDA A VISTA NF 10|||",
+        "|I200|2|10022020|200,00|N|",
+        "|I250|1.02||200,00|D|||TRANSFERENCIA; CLIENTE|||",
+        "|I250|1.01||200,00|C|||TRANSFERENCIA; CLIENTE|||",
+        "|9999|",
+    ]
+    caminho = tmp_path / "ecd_minimo.txt"
+    caminho.write_text("\n".join(conteudo) + "\n", encoding="latin-1")
+    return str(caminho)
@@ -0,0 +1,100 @@
+import time
+
+import pandas as pd
+
+from core.agendador_auditoria import AgendadorAuditoria, ModeloCustoAuditoria
+from core.auditor import ECDAuditor
+from core.processor import ECDProcessor
+from core.reader_ecd import ECDReader
+from core.telemetry import TelemetryCollector
+
+
+def _auditor(caminho: str) -> ECDAuditor:
+    reader = ECDReader(caminho)
+    proc = ECDProcessor(
+        list(reader.processar_arquivo()),
+        cnpj=reader.cnpj,
+        layout_versao=reader.layout_versao or "",
+    )
+    df_plano = proc.processar_plano_contas()
+    return ECDAuditor(
+        df_diario=proc.processar_lancamentos(df_plano),
+        df_balancete=proc.gerar_balancetes()["03_Balancetes_Mensais"],
+        df_plano=df_plano,
+        df_mapeamento=proc.blocos.get("dfECD_I051"),
+    )
+
+
+def test_modelo_aprende_da_telemetria_e_ordena_mais_caro_primeiro(
+    ecd_minimo, tmp_path, monkeypatch
+):
+    auditor = _auditor(ecd_minimo)
+    auditor.telemetry = TelemetryCollector()
+    auditor.current_ecd_id = "ECD_2020"
+    AgendadorAuditoria(auditor).executar()
+
+    dados = auditor.telemetry.data["ECD_2020"]
+    assert set(dados["metrics"][ModeloCustoAuditoria.COMPONENTE]) == set(ECDAuditor.TESTES)
+    assert dados["volumes"]["diario"] == len(auditor.df_diario)
+
+    # Telemetria sintética: 3.2 passa a ser o teste mais caro
+    dados["metrics"][ModeloCustoAuditoria.COMPONENTE]["3.2_Contas_Orfas"] = 50.0
+    modelo = ModeloCustoAuditoria()
+    modelo.aprender(auditor.telemetry.data)
+    modelo.salvar(str(tmp_path / "custos.json"))
+    modelo = ModeloCustoAuditoria.carregar(str(tmp_path / "custos.json"))
+
+    monkeypatch.setattr(
+        ECDAuditor, "DEPENDENCIAS", {"3.2_Contas_Orfas": ("5.3_Passivo_Ficticio",)}
+    )
+    ordem = [n for n, _ in AgendadorAuditoria(auditor, modelo).plano_execucao(ECDAuditor.TESTES)]
+    # O mais caro sai assim que a dependência termina, antes de todo o resto
+    assert ordem[:2] == ["5.3_Passivo_Ficticio", "3.2_Contas_Orfas"]
+
+
+def test_testes_pesados_em_processos_equivalem_as_threads(ecd_minimo):
+    serial = _auditor(ecd_minimo)
+    serial.executar_testes(ECDAuditor.TESTES)
+
+    auditor = _auditor(ecd_minimo)
+    agendador = AgendadorAuditoria(
+        auditor, usar_processos=True, max_processos=2, limiar_processo=0.0
+    )
+    resultados = agendador.executar()
+
+    assert list(resultados) == list(ECDAuditor.TESTES)
+    for nome, resultado in serial.resultados.items():
+        assert resultados[nome]["status"] == resultado["status"]
+        assert resultados[nome].get("impacto") == resultado.get("impacto")
+        if isinstance(resultado.get("erros"), pd.DataFrame):
+            pd.testing.assert_frame_equal(
+                resultados[nome]["erros"].reset_index(drop=True),
+                resultado["erros"].reset_index(drop=True),
+                check_dtype=False,
+            )
+
+
+def test_duracao_medida_no_worker_sem_espera_na_fila(ecd_minimo, monkeypatch):
+    """Com um único worker, os testes na fila não herdam o tempo do teste lento."""
+    auditor = _auditor(ecd_minimo)
+    auditor.telemetry = TelemetryCollector()
+    auditor.current_ecd_id = "ECD_2020"
+    agendador = AgendadorAuditoria(auditor, max_workers=1)
+
+    # O primeiro despachado fica lento: todos os demais esperam por ele na fila
+    primeiro = agendador.plano_execucao(ECDAuditor.TESTES)[0][0]
+    metodo = ECDAuditor.TESTES[primeiro][0]
+    original = getattr(ECDAuditor, metodo)
+
+    def _lento(self):
+        time.sleep(0.3)
+        return original(self)
+
+    monkeypatch.setattr(ECDAuditor, metodo, _lento)
+    agendador.executar()
+
+    duracoes = auditor.telemetry.data["ECD_2020"]["metrics"][ModeloCustoAuditoria.COMPONENTE]
+    assert duracoes[primeiro] >= 0.3
+    demais = {n: d for n, d in duracoes.items() if n != primeiro}
+    assert max(demais.values()) < 0.25, demais
+    assert agendador.duracoes == duracoes
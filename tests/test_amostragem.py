@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.amostragem import (
+    AmostragemAuditoria,
+    AmostragemEstratificada,
+    AmostragemMonetaria,
+    criar_amostragem,
+)
+from core.auditor import ECDAuditor
+
+
+def test_mus_tamanho_selecao_e_limites_de_stringer():
+    with pytest.raises(TypeError):
+        AmostragemAuditoria()  # type: ignore[abstract]
+
+    valores = np.array([50_000.0] + [100.0] * 9_500)  # V = 1.000.000
+    plano = AmostragemMonetaria(confianca=0.95, erro_toleravel=30_000.0, semente=1)
+    assert plano.fator_poisson(0) == pytest.approx(2.9957, abs=1e-4)
+    assert plano.tamanho(valores.sum()) == 100  # ceil(1e6 × 3,0 / 30.000)
+
+    amostra = plano.selecionar(valores)
+    assert amostra.intervalo == pytest.approx(10_000.0)
+    assert 0 in amostra.unidades  # valor >= intervalo: sempre selecionada
+    assert list(amostra.unidades) == sorted(amostra.unidades)
+
+    # Sem distorção: só a precisão básica (J × F(0) ≈ erro tolerável)
+    limpo = plano.projetar(amostra, np.zeros(len(amostra)))
+    assert limpo["distorcao_projetada"] == 0.0
+    assert limpo["limite_superior"] == pytest.approx(10_000.0 * plano.fator_poisson(0))
+
+    # Uma unidade pequena 100% distorcida + R$ 1.000 na unidade do estrato superior
+    distorcoes = np.zeros(len(amostra))
+    distorcoes[0] = 1_000.0
+    distorcoes[1] = amostra.valores[1]
+    resultado = plano.projetar(amostra, distorcoes)
+    assert resultado["distorcao_projetada"] == pytest.approx(1_000.0 + 10_000.0)
+    assert resultado["limite_inferior"] == pytest.approx(1_000.0)
+    assert resultado["limite_superior"] == pytest.approx(1_000.0 + 10_000.0 * plano.fator_poisson(1))
+    assert resultado["conclusao"] == "NAO_ACEITAVEL"  # 48,4 mil > 30 mil
+
+    # Estratificada em censo (mínimo por faixa >= população): total exato
+    estratificada = AmostragemEstratificada(estratos=3, minimo_estrato=10_000, semente=1)
+    censo = estratificada.selecionar(valores)
+    assert len(censo) == len(valores)
+    distorcoes = np.where(np.arange(len(valores)) % 100 == 0, 10.0, 0.0)
+    total = estratificada.projetar(censo, distorcoes)
+    assert total["distorcao_projetada"] == pytest.approx(distorcoes.sum())
+    assert total["limite_superior"] == pytest.approx(distorcoes.sum())
+
+    with pytest.raises(ValueError, match="amostragem"):
+        criar_amostragem("sistematica")
+
+
+def _diario(dias: int = 60) -> pd.DataFrame:
+    linhas = []
+    for dia in range(dias):
+        data = (pd.Timestamp("2021-01-01") + pd.Timedelta(days=dia)).strftime("%Y-%m-%d")
+        valor = 1_000.0 + dia
+        linhas.append((str(2 * dia), data, "2.01", valor, f"PAGTO NF {dia}"))
+        if dia % 10 == 0:  # duplicata exata a cada 10 dias
+            linhas.append((str(2 * dia + 1), data, "2.01", valor, f"PAGTO NF {dia}"))
+    df = pd.DataFrame(linhas, columns=["NUM_LCTO", "DT_LCTO", "COD_CTA", "VL_D", "HIST"])
+    df["IND_LCTO"] = "N"
+    df["IND_DC"] = "D"
+    df["VL_C"] = 0.0
+    df["VL_SINAL"] = df["VL_D"]
+    return df
+
+
+def test_auditor_em_modo_amostral_projeta_a_distorcao():
+    diario = _diario()
+    plano = pd.DataFrame({"COD_CTA": ["2.01"], "CTA": ["FORNECEDORES"], "COD_NAT": ["02"]})
+    completo = ECDAuditor(diario, pd.DataFrame(), plano)
+    completo.executar_testes(["4.2_Duplicidades"])
+    impacto_total = completo.resultados["4.2_Duplicidades"]["impacto"]
+    assert impacto_total == pytest.approx(2 * sum(1_000.0 + d for d in range(0, 60, 10)))
+
+    # Intervalo menor que qualquer unidade: tudo no estrato superior (exato)
+    auditor = ECDAuditor(diario, pd.DataFrame(), plano)
+    auditor.amostragem = AmostragemMonetaria(erro_toleravel=1.0, tamanho_maximo=10_000)
+    resultado = auditor.executar_auditoria_completa(["4.2_Duplicidades"])["4.2_Duplicidades"]
+    assert resultado["impacto"] == pytest.approx(impacto_total)
+    assert resultado["amostra"]["limite_inferior"] == pytest.approx(impacto_total)
+    assert "Amostra MUS" in resultado["msg"]
+
+    # Teto de unidades: o teste só vê as linhas das unidades sorteadas
+    auditor = ECDAuditor(diario, pd.DataFrame(), plano)
+    auditor.amostragem = AmostragemMonetaria(tamanho_maximo=5, semente=3)
+    resultado = auditor.executar_auditoria_completa(["4.2_Duplicidades"])["4.2_Duplicidades"]
+    assert resultado["amostra"]["unidades_amostra"] <= 5
+    assert resultado["amostra"]["linhas_amostra"] <= 10
+    assert resultado["amostra"]["unidades_populacao"] == 60
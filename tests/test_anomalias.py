@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.agendador_auditoria import AgendadorAuditoria
+from core.anomalias import EscoreAnomalias, escore_robusto
+from core.auditor import ECDAuditor
+from core.tensor_balancete import TensorBalancete
+
+
+def _balancete(ano: int, movimentos: dict) -> pd.DataFrame:
+    """Despesas 3.01.0X (filhas de 3.01) com o movimento (débito) de cada mês."""
+    linhas = []
+    for mes in range(12):
+        dt_fin = (pd.Timestamp(ano, mes + 1, 1) + pd.offsets.MonthEnd(0)).strftime("%Y-%m-%d")
+        for conta, valores in movimentos.items():
+            linhas.append((dt_fin, conta, "3.01", "A", "04", "12345678000199", valores[mes]))
+    df = pd.DataFrame(
+        linhas,
+        columns=["DT_FIN", "COD_CTA", "COD_CTA_SUP", "IND_CTA", "COD_NAT", "CNPJ", "VL_DEB"],
+    )
+    df["CONTA"] = "DESPESA " + df["COD_CTA"]
+    df["VL_CRED"] = 0.0
+    df["VL_SLD_INI_SIG"] = 0.0
+    df["VL_SLD_FIN_SIG"] = df["VL_DEB"]
+    return df
+
+
+def _movimentos(ano: int) -> dict:
+    rng = np.random.default_rng(ano)
+    return {
+        f"3.01.0{i}": 10_000.0 + rng.normal(0, 300, 12) for i in range(1, 7)
+    }
+
+
+def test_escore_proprio_e_choque_comum_aos_pares():
+    movimentos = _movimentos(2021)
+    movimentos["3.01.01"][6] = 40_000.0  # julho fora do padrão só nesta conta
+    for valores in movimentos.values():
+        valores[11] += 25_000.0  # dezembro alto em todas as irmãs (ex: 13º)
+    escores = EscoreAnomalias().pontuar(TensorBalancete.de_balancete(_balancete(2021, movimentos)))
+
+    assert len(escores) == 6 * 12
+    anomalas = escores[escores["ANOMALA"]]
+    assert list(zip(anomalas["COD_CTA"], anomalas["DT_FIN"])) == [("3.01.01", "2021-07-31")]
+    # Dezembro foge do histórico de cada conta, mas não das irmãs
+    dezembro = escores[escores["DT_FIN"] == "2021-12-31"]
+    assert (dezembro["Z_PROPRIO"].abs() > 3.5).all()
+    assert (dezembro["Z_PARES"].abs() < 3.5).all()
+
+    # Escore robusto: 0,6745 × desvio / MAD; MAD nulo usa o desvio médio
+    valores = np.array([1.0, 2.0, 3.0, 4.0, 100.0, 5.0, 5.0, 5.0, 5.0])
+    grupo = np.array([0, 0, 0, 0, 0, 1, 1, 1, 1])
+    z = escore_robusto(valores, grupo)
+    assert z[4] == pytest.approx(0.6745 * 97.0 / 1.0)
+    np.testing.assert_array_equal(z[5:], 0.0)
+
+
+def test_auditor_usa_o_mesmo_mes_dos_anos_anteriores():
+    def _com_pico_em_marco(ano: int) -> dict:
+        movimentos = _movimentos(ano)
+        movimentos["3.01.03"][2] += 30_000.0  # março sempre alto nesta conta
+        return movimentos
+
+    atual = _balancete(2022, _com_pico_em_marco(2022))
+    plano = atual.drop_duplicates("COD_CTA")[["COD_CTA", "COD_CTA_SUP", "IND_CTA", "COD_NAT", "CONTA"]]
+
+    sem_historico = ECDAuditor(pd.DataFrame(), atual, plano)
+    sem_historico.executar_testes(["6.1_Anomalias_Movimento"])
+    resultado = sem_historico.resultados["6.1_Anomalias_Movimento"]
+    assert resultado["status"] == "ALERTA"
+    assert list(resultado["detalhes"]["COD_CTA"]) == ["3.01.03"]
+    assert resultado["impacto"] > 25_000.0
+
+    # Com dois anos anteriores do mesmo CNPJ (e ruído de outro CNPJ), março
+    # é comparado com os marços anteriores: deixa de ser anomalia
+    outro_cnpj = _balancete(2020, _movimentos(1)).assign(CNPJ="99999999000199", VL_DEB=1.0)
+    historico = pd.concat(
+        [_balancete(2020, _com_pico_em_marco(2020)), _balancete(2021, _com_pico_em_marco(2021)), outro_cnpj]
+    )
+    com_historico = ECDAuditor(pd.DataFrame(), atual, plano)
+    com_historico.historico_balancete = historico
+    com_historico.executar_testes(["6.1_Anomalias_Movimento"])
+    assert com_historico.resultados["6.1_Anomalias_Movimento"]["status"] == "APROVADO"
+    assert com_historico.impressao_historico != sem_historico.impressao_historico
+
+    escores = EscoreAnomalias().pontuar(com_historico.tensor_balancete, historico)
+    assert (escores["BASE"] == "SAZONAL").all()
+    marco = escores[(escores["COD_CTA"] == "3.01.03") & (escores["DT_FIN"] == "2022-03-31")]
+    assert abs(marco["ESPERADO"].iloc[0] - 40_000.0) < 1_000.0
+
+
+def test_historico_chega_ao_teste_executado_em_processo():
+    def _com_pico_em_marco(ano: int) -> dict:
+        movimentos = _movimentos(ano)
+        movimentos["3.01.03"][2] += 30_000.0
+        return movimentos
+
+    atual = _balancete(2022, _com_pico_em_marco(2022))
+    plano = atual.drop_duplicates("COD_CTA")[["COD_CTA", "COD_CTA_SUP", "IND_CTA", "COD_NAT", "CONTA"]]
+    auditor = ECDAuditor(pd.DataFrame(), atual, plano)
+    auditor.historico_balancete = pd.concat(
+        [_balancete(2020, _com_pico_em_marco(2020)), _balancete(2021, _com_pico_em_marco(2021))]
+    )
+    # Estimativa acima do limiar: 6.1 roda no pool de processos
+    agendador = AgendadorAuditoria(
+        auditor, usar_processos=True, max_processos=1, limiar_processo=0.0
+    )
+    resultados = agendador.executar(["6.1_Anomalias_Movimento"])
+    # Sem o histórico no filho, março seria anomalia (ver teste acima)
+    assert resultados["6.1_Anomalias_Movimento"]["status"] == "APROVADO"
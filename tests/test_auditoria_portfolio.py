@@ -0,0 +1,104 @@
+import duckdb
+import pandas as pd
+
+from core.auditoria_portfolio import AuditorPortfolio
+from core.regras_auditoria import RegraAuditoria
+from exporters.audit_exporter import AuditExporter
+
+
+def _diario(cnpj: str, origem: str, hist_segundo: str) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "CNPJ": [cnpj, cnpj],
+            "ORIGEM_PERIODO": [origem, origem],
+            "DT_LCTO": pd.to_datetime(["2020-12-10", "2020-12-11"]),
+            "IND_LCTO": ["N", "N"],
+            "COD_CTA": ["2.01", "2.01"],
+            "CONTA": ["FORNECEDORES", "FORNECEDORES"],
+            "HIST": ["PAGTO NF 10", hist_segundo],
+            "VL_D": [5000.0, 700.0],
+            "VL_C": [0.0, 0.0],
+            "VL_SINAL": [5000.0, 700.0],
+        }
+    )
+
+
+def _saldos(cnpj: str) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "CNPJ": [cnpj, cnpj],
+            "ORIGEM_PERIODO": ["20200101_20201231"] * 2,
+            "DT_FIN": pd.to_datetime(["2020-12-31", "2020-12-31"]),
+            "COD_CTA": ["1.01.01.01", "2.01"],
+            "CONTA": ["CAIXA", "FORNECEDORES"],
+            "IND_CTA": ["A", "A"],
+            "COD_NAT": ["01", "02"],
+            "VL_DEB": [0.0, 5700.0],
+            "VL_CRED": [0.0, 0.0],
+            "VL_SLD_FIN_SIG": [-250.0, 5700.0],
+        }
+    )
+
+
+def test_duplicidade_entre_ecds_do_mesmo_cnpj(tmp_path):
+    # CNPJ A: o mesmo lançamento em dois ECDs (retificadora sobreposta)
+    diario = pd.concat(
+        [
+            _diario("A", "20200101_20201231", "PAGTO NF 11"),
+            _diario("A", "20201201_20201231", "PAGTO NF 12"),
+            _diario("B", "20200101_20201231", "PAGTO NF 11"),
+        ],
+        ignore_index=True,
+    )
+    diario.to_parquet(tmp_path / AuditorPortfolio.TABELAS["diario"], index=False)
+    pd.concat([_saldos("A"), _saldos("B")]).to_parquet(
+        tmp_path / AuditorPortfolio.TABELAS["saldos"], index=False
+    )
+
+    portfolio = AuditorPortfolio(str(tmp_path), max_workers=2)
+    scorecard = portfolio.executar()
+
+    assert list(scorecard.columns) == AuditorPortfolio.COLUNAS_SCORECARD
+    assert set(scorecard["Teste"]) == set(AuditorPortfolio.TESTES)
+    por_teste = scorecard.set_index(["CNPJ", "Teste"])
+
+    entre = por_teste.loc[("A", "4.5_Duplicidades_Entre_Periodos")]
+    assert entre["Status"] == "ALERTA"
+    assert entre["Impacto Financeiro Est."] == 5000.0
+    assert por_teste.loc[("B", "4.5_Duplicidades_Entre_Periodos"), "Status"] == "APROVADO"
+
+    # Dentro de cada ECD não há duplicidade; o caixa credor reprova nos dois
+    assert por_teste.loc[("A", "4.2_Duplicidades"), "Status"] == "APROVADO"
+    caixa = por_teste.loc[("B", "5.2_Estouro_Caixa")]
+    assert caixa["Status"] == "REPROVADO"
+    assert caixa["Impacto Financeiro Est."] == 250.0
+
+    arquivos = portfolio.salvar(scorecard)
+    assert pd.read_parquet(arquivos[0]).shape == scorecard.shape
+
+
+def test_testes_sem_insumo_sao_ignorados_e_regra_vira_sql(tmp_path):
+    _saldos("A").to_parquet(tmp_path / AuditorPortfolio.TABELAS["saldos"], index=False)
+
+    scorecard = AuditorPortfolio(str(tmp_path)).executar()
+    assert scorecard["Teste"].tolist() == ["5.2_Estouro_Caixa"]
+    assert scorecard["ANO"].tolist() == [2020]
+
+    # A tradução SQL da regra casa as mesmas linhas que a máscara do pandas
+    regra = RegraAuditoria("R", "3.1", "COD_CTA", "", prefixo_dentro=("1.01",), exceto=("1.01.09",))
+    valores = pd.DataFrame({"COD_CTA": ["1.01.01", "1.01.09.1", "2.01", "", None]})
+    via_sql = duckdb.sql(f"SELECT {regra.para_sql()} AS M FROM valores").df()["M"].tolist()
+    assert via_sql == regra.mascara(valores["COD_CTA"]).tolist()
+
+
+def test_teste_da_carteira_fica_fora_do_scorecard_por_ecd(tmp_path):
+    exporter = AuditExporter(str(tmp_path))
+    exporter.exportar_dashboard({"4.2_Duplicidades": {"status": "APROVADO"}}, "ECD")
+
+    scorecard = pd.read_csv(
+        tmp_path / "07_Auditoria_Scorecard.csv", sep=";", encoding="utf-8-sig", dtype=str
+    )
+    # 4.5 só tem resultado na carteira: no scorecard do ECD sairia sem status
+    assert "4.5_Duplicidades_Entre_Periodos" in AuditorPortfolio.TESTES
+    assert "4.5_Duplicidades_Entre_Periodos" not in set(scorecard["Teste"])
+    assert "4.2_Duplicidades" in set(scorecard["Teste"])
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from core.auditor import ECDAuditor
+from core.benford import AnaliseBenford
+
+
+def test_extracao_de_digitos_em_centavos():
+    digitos = AnaliseBenford.extrair_digitos(
+        np.array([1234.56, 0.5, 9.99, 10.0, 1000.0, 70.07])
+    )
+
+    assert digitos["PRIMEIRO"].tolist() == [1, -1, 9, 1, 1, 7]
+    assert digitos["SEGUNDO"].tolist() == [2, -1, -1, 0, 0, 0]
+    assert digitos["DOIS_PRIMEIROS"].tolist() == [12, -1, -1, 10, 10, 70]
+    assert digitos["ULTIMOS_DOIS"].tolist() == [34, -1, -1, 10, 0, 70]
+    # 0,50 não entra no teste, mas tem dígito para o detalhamento
+    assert digitos["SIGNIFICATIVO"].tolist() == [1, 5, 9, 1, 1, 7]
+
+
+def test_benford_detalha_valores_contas_e_meses():
+    rng = np.random.default_rng(7)
+    # Conta 1.01 segue Benford; 3.02 concentra tudo em 4,90
+    benford = np.round(10 ** rng.uniform(0, 4, 600), 2)
+    valores = np.concatenate([benford, np.full(200, 4.90)])
+    contas = ["1.01"] * 600 + ["3.02"] * 200
+    meses = np.where(np.arange(800) % 2 == 0, "2023-01-15", "2023-02-15")
+    diario = pd.DataFrame(
+        {
+            "DT_LCTO": meses,
+            "COD_CTA": contas,
+            "CONTA": ["BANCO"] * 600 + ["TARIFAS"] * 200,
+            "HIST": ["TARIFA"] * 800,
+            "VL_DC": valores,
+            "VL_D": valores,
+            "VL_C": 0.0,
+            "VL_SINAL": valores,
+        }
+    )
+    plano = pd.DataFrame({"COD_CTA": ["1.01", "3.02"], "CONTA": ["BANCO", "TARIFAS"]})
+
+    auditor = ECDAuditor(diario, pd.DataFrame(), plano)
+    auditor._teste_lei_benford()
+    resultado = auditor.resultados["4.1_Lei_Benford"]
+    detalhes = resultado["detalhes"]
+
+    assert resultado["status"] == "REPROVADO"
+    assert 4 in detalhes["4.1_Benford_Frequencias"].query("DESVIO > 0.01")["DIGITO"].tolist()
+
+    top = detalhes["4.1_Benford_Analise_Valores"].iloc[0]
+    assert (top["DIGITO"], top["VALOR"], top["FREQUENCIA"]) == (4, 4.90, 200)
+    assert top["CONTA_PRINCIPAL"] == "3.02 - TARIFAS"
+    assert top["HISTORICO_PREDOMINANTE"] == "TARIFA"
+
+    por_conta = detalhes["4.1_Benford_Por_Conta"]
+    assert por_conta["COD_CTA"].tolist() == ["3.02", "1.01"]
+    assert por_conta.iloc[0]["CONFORMIDADE"] == "REPROVADO"
+    assert sorted(detalhes["4.1_Benford_Por_Mes"]["MES"]) == ["2023-01", "2023-02"]
+    assert set(detalhes["4.1_Benford_Resumo"]["TESTE"]) == set(AnaliseBenford.TESTES)
@@ -0,0 +1,114 @@
+import pandas as pd
+
+from core.auditor import ECDAuditor
+from core.cache_auditoria import CacheResultadosAuditoria, impressao_dataframe
+
+
+def _insumos():
+    plano = pd.DataFrame(
+        {
+            "COD_CTA": ["1.01", "3.01"],
+            "COD_CTA_SUP": ["", ""],
+            "IND_CTA": ["A", "A"],
+            "COD_NAT": ["01", "04"],
+            "CONTA": ["CAIXA", "RECEITA"],
+        }
+    )
+    balancete = pd.DataFrame(
+        {
+            "DT_FIN": ["2020-01-31", "2020-01-31"],
+            "COD_CTA": ["1.01", "3.01"],
+            "VL_SLD_INI_SIG": [0.0, 0.0],
+            "VL_DEB": [100.0, 0.0],
+            "VL_CRED": [0.0, 100.0],
+            "VL_SLD_FIN_SIG": [100.0, -100.0],
+        }
+    )
+    diario = pd.DataFrame(
+        {
+            "NUM_LCTO": ["1", "1"],
+            "DT_LCTO": ["2020-01-10", "2020-01-10"],
+            "IND_LCTO": ["N", "N"],
+            "COD_CTA": ["1.01", "3.01"],
+            "IND_DC": ["D", "C"],
+            "VL_D": [100.0, 0.0],
+            "VL_C": [0.0, 100.0],
+            "VL_SINAL": [100.0, -100.0],
+            "HIST": ["VENDA", "VENDA"],
+        }
+    )
+    return diario, balancete, plano
+
+
+def _auditor(tmp_path, diario, balancete, plano, classe=ECDAuditor):
+    auditor = classe(diario, balancete, plano)
+    auditor.cache_resultados = CacheResultadosAuditoria(str(tmp_path))
+    return auditor
+
+
+def test_segunda_execucao_le_do_cache(tmp_path, monkeypatch):
+    diario, balancete, plano = _insumos()
+    primeira = _auditor(tmp_path, diario, balancete, plano).executar_auditoria_completa()
+
+    executados = []
+    original = ECDAuditor.executar_testes
+
+    def _espiao(self, nomes):
+        executados.extend(nomes)
+        return original(self, nomes)
+
+    monkeypatch.setattr(ECDAuditor, "executar_testes", _espiao)
+    segunda = _auditor(tmp_path, diario, balancete, plano).executar_auditoria_completa()
+
+    assert executados == []
+    assert list(segunda) == list(primeira)
+    assert {n: r["status"] for n, r in segunda.items()} == {
+        n: r["status"] for n, r in primeira.items()
+    }
+
+    # Colunas técnicas não mudam a impressão; o conteúdo muda
+    com_pk = diario.assign(PK_y=["x1", "x2"])
+    assert impressao_dataframe(com_pk.drop(columns="PK_y")) == impressao_dataframe(diario)
+    assert impressao_dataframe(diario.assign(VL_D=[100.0, 1.0])) != impressao_dataframe(diario)
+
+
+def test_parametro_ou_insumo_alterado_refaz_so_os_testes_afetados(tmp_path):
+    diario, balancete, plano = _insumos()
+    cache = CacheResultadosAuditoria(str(tmp_path))
+    base = cache.chaves(ECDAuditor(diario, balancete, plano), ECDAuditor.TESTES)
+
+    class AuditorAjustado(ECDAuditor):
+        PARAMETROS_QUASE_DUPLICIDADE = {**ECDAuditor.PARAMETROS_QUASE_DUPLICIDADE, "dias": 7}
+
+    ajustado = cache.chaves(AuditorAjustado(diario, balancete, plano), ECDAuditor.TESTES)
+    assert [n for n in base if base[n] != ajustado[n]] == ["4.4_Quase_Duplicidades"]
+
+    # Diário alterado: só os testes que dependem do Diário mudam de chave
+    outro_diario = diario.assign(HIST=["VENDA", "VENDA A PRAZO"])
+    alterado = cache.chaves(ECDAuditor(outro_diario, balancete, plano), ECDAuditor.TESTES)
+    assert [n for n in base if base[n] != alterado[n]] == ECDAuditor.TESTES_DIARIO
+
+
+def test_auxiliares_compartilhados_entram_na_versao_dos_testes(tmp_path):
+    diario, balancete, plano = _insumos()
+    base = CacheResultadosAuditoria.chaves(ECDAuditor(diario, balancete, plano), ECDAuditor.TESTES)
+
+    class AuditorLancamentos(ECDAuditor):
+        def _resultado_lancamentos(self, *args, **kwargs):
+            return super()._resultado_lancamentos(*args, **kwargs)
+
+    ajustado = CacheResultadosAuditoria.chaves(
+        AuditorLancamentos(diario, balancete, plano), ECDAuditor.TESTES
+    )
+    assert [n for n in base if base[n] != ajustado[n]] == [
+        n for n in ECDAuditor.TESTES if n.startswith("7.")
+    ]
+
+    class AuditorLimiar(ECDAuditor):
+        def limiar(self, nome, chave):
+            return self.limiares[nome][chave]
+
+    ajustado = CacheResultadosAuditoria.chaves(
+        AuditorLimiar(diario, balancete, plano), ECDAuditor.TESTES
+    )
+    assert all(base[n] != ajustado[n] for n in base)
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.auditor import ECDAuditor
+from core.contexto_auditoria import ContextoAuditoria
+
+
+def _insumos():
+    plano = pd.DataFrame(
+        {
+            "PK": ["p1", "p2", "p3"],
+            "COD_CTA": ["1", "1.01", "3.01"],
+            "COD_CTA_SUP": ["", "1", ""],
+            "IND_CTA": ["S", "A", "A"],
+            "COD_NAT": ["1", "1", "4"],
+            "CONTA": ["ATIVO", "CAIXA", "RECEITA"],
+        }
+    )
+    mapeamento = pd.DataFrame({"FK_PAI": ["p2"], "COD_CTA_REF": ["1.01.01.01.01"]})
+    balancete = pd.DataFrame(
+        {
+            "DT_FIN": ["2020-01-31", "2020-01-31", "2020-12-31"],
+            "COD_CTA": ["1", "1.01", "3.01"],
+            "VL_SLD_INI_SIG": [0.0, 0.0, -500.0],
+            "VL_DEB": [100.0, 100.0, 0.0],
+            "VL_CRED": [0.0, 0.0, 0.0],
+            "VL_SLD_FIN_SIG": [100.0, 100.0, -500.0],
+        }
+    )
+    diario = pd.DataFrame(
+        {
+            "DT_LCTO": ["2020-01-10", "2020-12-31"],
+            "IND_LCTO": ["N", "e"],
+            "COD_CTA": ["1.01", "3.01"],
+            "VL_D": [100.0, 500.0],
+            "VL_C": [0.0, 0.0],
+            "VL_SINAL": [100.0, 500.0],
+            "HIST": ["VENDA", "ENCERRAMENTO"],
+        }
+    )
+    return diario, balancete, plano, mapeamento
+
+
+def test_contexto_enriquece_sem_alterar_insumos():
+    diario, balancete, plano, mapeamento = _insumos()
+    colunas_diario = list(diario.columns)
+    ctx = ContextoAuditoria.montar(diario, balancete, plano, mapeamento)
+
+    # Diário compartilhado sem cópia; derivados em arrays alinhados
+    assert ctx.diario is diario and list(diario.columns) == colunas_diario
+    assert ctx.natureza_diario.tolist() == ["01", "04"]
+    assert ctx.encerramento.tolist() == [False, True]
+    assert ctx.periodo_diario.astype(str).tolist() == ["2020-01", "2020-12"]
+
+    # Balancete completado com o plano; COD_CTA_REF vindo do I051
+    assert ctx.balancete["CONTA"].tolist() == ["ATIVO", "CAIXA", "RECEITA"]
+    assert ctx.balancete["COD_CTA_REF"].tolist()[1] == "1.01.01.01.01"
+    assert "COD_NAT" not in balancete.columns
+    assert ctx.analitica.tolist() == [False, True, True]
+    assert ctx.natureza_balancete.tolist() == ["01", "01", "04"]
+
+    with pytest.raises(AttributeError):
+        ctx.diario = pd.DataFrame()
+    with pytest.raises(ValueError):
+        ctx.analitica[0] = True
+
+
+def test_testes_leem_do_contexto():
+    diario, balancete, plano, mapeamento = _insumos()
+    auditor = ECDAuditor(diario, balancete, plano, df_mapeamento=mapeamento)
+    auditor.executar_testes(list(ECDAuditor.TESTES))
+
+    orfas = auditor.resultados["3.2_Contas_Orfas"]
+    assert orfas["status"] == "REPROVADO"
+    assert orfas["erros"][["COD_CTA", "CONTA"]].values.tolist() == [["3.01", "RECEITA"]]
+    # Lançamento 'e' (encerramento) fora do cruzamento com o balancete
+    assert auditor.resultados["1.1_Cruzamento_Diario_Balancete"]["status"] == "APROVADO"
+    assert auditor.resultados["1.2_Validacao_Hierarquia"]["status"] == "APROVADO"
+    assert np.array_equal(balancete.columns, _insumos()[1].columns)
@@ -0,0 +1,53 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from core.contrapartidas import ConstrutorContrapartidas, MatrizFluxos
+
+
+@pytest.fixture
+def diario():
+    """Lançamento 1:1 em janeiro e um N:M (2 débitos x 2 créditos) em fevereiro."""
+    linhas = [
+        ("L1", date(2020, 1, 10), "1.01", 100.0, 0.0),
+        ("L1", date(2020, 1, 10), "3.01", 0.0, 100.0),
+        ("L2", date(2020, 2, 5), "3.02", 60.0, 0.0),
+        ("L2", date(2020, 2, 5), "3.03", 40.0, 0.0),
+        ("L2", date(2020, 2, 5), "1.01", 0.0, 75.0),
+        ("L2", date(2020, 2, 5), "2.01", 0.0, 25.0),
+    ]
+    return pd.DataFrame(linhas, columns=["PK_x", "DT_LCTO", "COD_CTA", "VL_D", "VL_C"])
+
+
+def test_contrapartidas_pro_rata(diario):
+    pares = ConstrutorContrapartidas(diario).gerar_contrapartidas()
+
+    l2 = pares[pares["LCTO"] == "L2"].set_index(["COD_CTA_DEB", "COD_CTA_CRED"])
+    assert len(l2) == 4
+    assert l2.loc[("3.02", "1.01"), "VL_FLUXO"] == 45.0
+    assert l2.loc[("3.02", "2.01"), "VL_FLUXO"] == 15.0
+    assert l2.loc[("3.03", "1.01"), "VL_FLUXO"] == 30.0
+    assert l2.loc[("3.03", "2.01"), "VL_FLUXO"] == 10.0
+    assert pares.loc[pares["LCTO"] == "L1", "MES"].tolist() == ["2020-01"]
+
+
+def test_matriz_mensal_e_persistencia(diario):
+    matriz = ConstrutorContrapartidas(diario).gerar_matriz_fluxos()
+
+    assert sorted(matriz.matrizes) == ["2020-01", "2020-02"]
+    assert matriz.fluxo("2020-01", "1.01", "3.01") == 100.0
+    assert matriz.fluxo("2020-02", "3.02", "2.01") == 15.0
+    assert matriz.fluxo("2020-01", "3.02", "2.01") == 0.0
+    assert matriz.matrizes["2020-02"].nnz == 4
+
+    df = matriz.para_dataframe(cnpj="12345678000199")
+    assert list(df.columns) == ["MES", "CNPJ", "COD_CTA_DEB", "COD_CTA_CRED", "VL_FLUXO"]
+    recarregada = MatrizFluxos.de_dataframe(df)
+    assert recarregada.fluxo("2020-02", "3.03", "1.01") == 30.0
+
+
+def test_diario_vazio():
+    construtor = ConstrutorContrapartidas(pd.DataFrame())
+    assert construtor.gerar_contrapartidas().empty
+    assert construtor.gerar_matriz_fluxos().para_dataframe().empty
@@ -0,0 +1,72 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from exporters.csv_writer import EscritorCSV, gravar_csv
+
+
+def _ler(caminho) -> pd.DataFrame:
+    return pd.read_csv(caminho, sep=";", encoding="utf-8-sig", dtype=str, keep_default_na=False)
+
+
+def test_formatacao_ptbr_em_lotes(tmp_path):
+    df = pd.DataFrame(
+        {
+            "COD_CTA": ["1.01", "1.02", "2.01", "3.01", "3.02"],
+            "DT_LCTO": ["2023-01-31", "2023-02-28", None, "31/03/2023", "2023-04-30"],
+            "DT_FIN": pd.to_datetime(["2023-01-31", "2023-02-28", None, "2023-03-31", "2023-04-30"]),
+            "VL_SINAL": [1234.56, -0.5, np.nan, 100.0, 1e-5],
+            "VL_DC": [Decimal("10.10"), Decimal("2"), None, Decimal("0.01"), Decimal("5.55")],
+            "LINHA": [1, 2, 3, 4, 5],
+            "HIST": ['PAGTO; NF "1"', "LINHA 1\r\nLINHA 2", None, "OK", ""],
+            "ENCERRAMENTO": [True, False, True, False, True],
+            "NAT": pd.Categorical(["01", "01", "02", "04", "04"]),
+        }
+    )
+    caminho = tmp_path / "lctos.csv"
+    assert gravar_csv(df, str(caminho), tamanho_lote=2) == 5
+
+    bruto = caminho.read_bytes()
+    assert bruto.startswith(b"\xef\xbb\xbf" + b"COD_CTA;DT_LCTO;DT_FIN;")
+    assert bruto.count(b"\n") == 6  # cabeçalho + 5 linhas, sem quebras dentro dos campos
+    assert b'"' not in bruto  # nada entre aspas, como o to_csv do pandas
+
+    csv = _ler(caminho)
+    assert list(csv.columns) == list(df.columns)
+    assert csv["DT_LCTO"].tolist() == ["31/01/2023", "28/02/2023", "", "31/03/2023", "30/04/2023"]
+    assert csv["DT_FIN"].tolist() == ["31/01/2023", "28/02/2023", "", "31/03/2023", "30/04/2023"]
+    assert csv["VL_SINAL"].tolist() == ["1234,56", "-0,5", "", "100", "0,00001"]
+    assert csv["VL_DC"].tolist() == ["10,10", "2,00", "", "0,01", "5,55"]
+    assert csv["LINHA"].tolist() == ["1", "2", "3", "4", "5"]
+    assert csv["HIST"].tolist() == ["PAGTO  NF '1'", "LINHA 1  LINHA 2", "", "OK", ""]
+    assert csv["ENCERRAMENTO"].tolist() == ["True", "False", "True", "False", "True"]
+    assert csv["NAT"].tolist() == ["01", "01", "02", "04", "04"]
+    # Números voltam com decimal="," do pandas
+    releitura = pd.read_csv(caminho, sep=";", decimal=",", encoding="utf-8-sig")
+    np.testing.assert_allclose(releitura["VL_SINAL"], df["VL_SINAL"])
+
+
+def test_tabela_arrow_lotes_sucessivos_e_sem_linhas(tmp_path):
+    tabela = pa.table(
+        {
+            "DT_INI": pa.array([pd.Timestamp("2023-01-01").date(), None], pa.date32()),
+            "DT_HORA": pa.array([pd.Timestamp("2023-01-01 08:30"), pd.Timestamp("2023-01-02")]),
+            "VL": pa.array([Decimal("1.50"), Decimal("-2.00")], pa.decimal128(18, 2)),
+        }
+    )
+    caminho = tmp_path / "arrow.csv"
+    with EscritorCSV(str(caminho)) as escritor:
+        escritor.escrever(tabela)
+        escritor.escrever(tabela.slice(0, 1))
+    assert escritor.linhas == 3
+    csv = _ler(caminho)
+    assert csv["DT_INI"].tolist() == ["01/01/2023", "", "01/01/2023"]
+    assert csv["DT_HORA"].tolist() == ["01/01/2023 08:30:00", "02/01/2023 00:00:00", "01/01/2023 08:30:00"]
+    assert csv["VL"].tolist() == ["1,50", "-2,00", "1,50"]
+
+    # Sem linhas: só o cabeçalho
+    vazio = tmp_path / "vazio.csv"
+    assert gravar_csv(pd.DataFrame(columns=["COD_CTA", "VL_SINAL"]), str(vazio)) == 0
+    assert vazio.read_bytes() == b"\xef\xbb\xbfCOD_CTA;VL_SINAL\n"
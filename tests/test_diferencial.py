@@ -0,0 +1,119 @@
+import pandas as pd
+
+from core.auditor import ECDAuditor
+from core.diferencial import AssinaturaECD, CacheRetificacao, ReprocessadorRetificadora
+from core.processor import ECDProcessor
+from core.reader_ecd import ECDReader
+
+
+def _processor(caminho: str) -> ECDProcessor:
+    reader = ECDReader(caminho)
+    registros = list(reader.processar_arquivo())
+    return ECDProcessor(registros, cnpj=reader.cnpj, layout_versao=reader.layout_versao or "")
+
+
+def _retificadora(ecd_minimo: str, tmp_path) -> str:
+    """Fevereiro com saldo de 1.01 corrigido e histórico de um lançamento alterado."""
+    with open(ecd_minimo, encoding="latin-1") as f:
+        conteudo = f.read()
+    conteudo = conteudo.replace(
+        "|I155|1.01||1500,00|D|0,00|200,00|1300,00|D|",
+        "|I155|1.01||1500,00|D|0,00|250,00|1250,00|D|",
+    ).replace("TRANSFERENCIA; CLIENTE", "TRANSFERENCIA CLIENTE RETIF")
+    caminho = tmp_path / "ecd_retificadora.txt"
+    caminho.write_text(conteudo, encoding="latin-1")
+    return str(caminho)
+
+
+def _executar(proc: ECDProcessor, reprocessador: ReprocessadorRetificadora):
+    df_lctos = reprocessador.lancamentos()
+    balancetes = reprocessador.balancetes()
+    auditor = ECDAuditor(
+        df_diario=df_lctos,
+        df_balancete=balancetes["03_Balancetes_Mensais"],
+        df_plano=proc.processar_plano_contas(),
+    )
+    resultados = reprocessador.auditoria(auditor)
+    tabelas = dict(balancetes)
+    tabelas["06_Lancamentos_Contabeis"] = df_lctos
+    tabelas["08_Fluxo_Contas"] = reprocessador.fluxos(df_lctos).para_dataframe()
+    return tabelas, resultados
+
+
+def test_assinatura_detecta_alteracoes(ecd_minimo, tmp_path):
+    original = AssinaturaECD.de_blocos(_processor(ecd_minimo).blocos)
+    retificadora = AssinaturaECD.de_blocos(
+        _processor(_retificadora(ecd_minimo, tmp_path)).blocos
+    )
+
+    diferenca = retificadora.comparar(original)
+    assert AssinaturaECD.de_blocos(_processor(ecd_minimo).blocos).comparar(original).vazia
+    assert set(zip(diferenca.tabela["TIPO"], diferenca.tabela["MES"])) == {
+        ("I150", "2020-02"),
+        ("I200", "2020-02"),
+    }
+    assert not diferenca.plano_alterado
+    assert diferenca.meses_saldos == {"2020-02"}
+    assert diferenca.meses_diario == {"2020-02"}
+
+
+def test_reprocessamento_equivale_ao_completo(ecd_minimo, tmp_path):
+    """Retificadora reprocessada a partir do cache == processamento do zero."""
+    cache = CacheRetificacao(str(tmp_path / "cache"))
+    proc_orig = _processor(ecd_minimo)
+    rep_orig = ReprocessadorRetificadora(proc_orig, cache.carregar("X", "2020"))
+    tabelas, resultados = _executar(proc_orig, rep_orig)
+    cache.salvar("X", "2020", rep_orig.estado(tabelas, resultados))
+
+    caminho_retif = _retificadora(ecd_minimo, tmp_path)
+    proc_inc = _processor(caminho_retif)
+    rep_inc = ReprocessadorRetificadora(proc_inc, cache.carregar("X", "2020"))
+    assert rep_inc.diferenca is not None and rep_inc.reaproveita
+    tab_inc, res_inc = _executar(proc_inc, rep_inc)
+
+    proc_full = _processor(caminho_retif)
+    tab_full, res_full = _executar(proc_full, ReprocessadorRetificadora(proc_full, None))
+
+    for nome in ("03_Balancetes_Mensais", "04_Balancete_baseRFB", "08_Fluxo_Contas"):
+        pd.testing.assert_frame_equal(
+            tab_inc[nome].reset_index(drop=True), tab_full[nome].reset_index(drop=True)
+        )
+    assert tab_inc["06_Lancamentos_Contabeis"]["HIST"].tolist() == (
+        tab_full["06_Lancamentos_Contabeis"]["HIST"].tolist()
+    )
+    assert {k: v["status"] for k, v in res_inc.items()} == {
+        k: v["status"] for k, v in res_full.items()
+    }
+
+
+def test_auditoria_reaproveitada_so_com_a_mesma_chave(ecd_minimo, tmp_path, monkeypatch):
+    """Mesmo ECD: reaproveita tudo, salvo o teste cujo limiar mudou (refeito pelo agendador)."""
+    cache = CacheRetificacao(str(tmp_path / "cache"))
+    proc = _processor(ecd_minimo)
+    rep = ReprocessadorRetificadora(proc, None)
+    tabelas, resultados = _executar(proc, rep)
+    cache.salvar("X", "2020", rep.estado(tabelas, resultados))
+
+    refeitos = []
+    completa = ECDAuditor.executar_auditoria_completa
+
+    def _espiar(self, testes=None):
+        refeitos.append(list(testes))
+        return completa(self, testes)
+
+    monkeypatch.setattr(ECDAuditor, "executar_auditoria_completa", _espiar)
+    proc = _processor(ecd_minimo)
+    rep = ReprocessadorRetificadora(proc, cache.carregar("X", "2020"))
+    auditor = ECDAuditor(
+        df_diario=rep.lancamentos(),
+        df_balancete=rep.balancetes()["03_Balancetes_Mensais"],
+        df_plano=proc.processar_plano_contas(),
+    )
+    auditor.limiares["5.3_Passivo_Ficticio"]["saldo_minimo"] = 1.0
+    novos = rep.auditoria(auditor)
+
+    assert refeitos == [["5.3_Passivo_Ficticio"]]
+    assert list(novos) == list(resultados)
+    assert rep.chaves_auditoria["5.3_Passivo_Ficticio"] != (
+        cache.carregar("X", "2020").chaves_auditoria["5.3_Passivo_Ficticio"]
+    )
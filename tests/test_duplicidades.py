@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from core.auditor import ECDAuditor
+from core.duplicidades import DetectorQuaseDuplicidades, hash_linhas, tamanho_grupo
+
+
+def _diario() -> pd.DataFrame:
+    linhas = [
+        # NUM_LCTO, DT_LCTO, COD_CTA, CONTA, IND_DC, VALOR, HIST
+        ("1", "2023-03-01", "2.01", "FORNECEDORES", "D", 5000.0, "PAGTO NF 10"),
+        ("2", "2023-03-01", "2.01", "FORNECEDORES", "D", 5000.0, "PAGTO NF 10"),  # exata
+        ("3", "2023-03-03", "2.01", "FORNECEDORES", "D", 5000.0, "PAGTO NF 11"),  # quase
+        ("4", "2023-03-20", "2.01", "FORNECEDORES", "D", 5000.0, "PAGTO NF 12"),  # longe
+        ("5", "2023-03-05", "4.02", "DESPESA BANCO", "D", 12.5, "TARIFA"),
+        ("6", "2023-03-05", "4.02", "DESPESA BANCO", "D", 12.5, "TARIFA"),  # ruído
+        ("7", "2023-03-10", "1.01", "CLIENTES", "D", 800.0, "VENDA"),
+        ("8", "2023-03-10", "1.01", "CLIENTES", "C", 800.0, "VENDA"),  # outro lado
+    ]
+    df = pd.DataFrame(
+        linhas, columns=["NUM_LCTO", "DT_LCTO", "COD_CTA", "CONTA", "IND_DC", "VL", "HIST"]
+    )
+    debito = df["IND_DC"] == "D"
+    df["VL_D"] = np.where(debito, df["VL"], 0.0)
+    df["VL_C"] = np.where(debito, 0.0, df["VL"])
+    df["VL_SINAL"] = df["VL_D"] - df["VL_C"]
+    df["VL_DC"] = df["VL"]
+    return df.drop(columns="VL")
+
+
+def test_duplicidade_exata_por_hash_filtra_ruido():
+    diario = _diario()
+    chave = hash_linhas(diario, ["DT_LCTO", "COD_CTA", "VL_D", "VL_C", "HIST"])
+    assert tamanho_grupo(chave).tolist() == [2, 2, 1, 1, 2, 2, 1, 1]
+
+    auditor = ECDAuditor(diario, pd.DataFrame(), pd.DataFrame())
+    auditor._teste_duplicidades()
+    resultado = auditor.resultados["4.2_Duplicidades"]
+
+    # A tarifa de R$ 12,50 repetida é ruído bancário
+    assert resultado["erros"]["NUM_LCTO"].tolist() == ["1", "2"]
+    assert resultado["impacto"] == 10000.0
+
+
+def test_quase_duplicidade_por_janela_ordenada():
+    diario = _diario()
+    auditor = ECDAuditor(diario, pd.DataFrame(), pd.DataFrame())
+    auditor._teste_quase_duplicidades()
+    pares = auditor.resultados["4.4_Quase_Duplicidades"]["erros"]
+
+    # A exata (1 x 2) é do 4.2; 1 e 2 casam com a 3 (2 dias), não com a 4
+    assert sorted(zip(pares["NUM_LCTO_A"], pares["NUM_LCTO_B"])) == [("1", "3"), ("2", "3")]
+    assert pares["DIAS"].tolist() == [2, 2]
+    assert auditor.resultados["4.4_Quase_Duplicidades"]["impacto"] == 5000.0
+
+    # Com tolerância de 1%, R$ 5.040,00 no dia seguinte também casa
+    diario.loc[3, ["DT_LCTO", "VL_D", "VL_SINAL", "VL_DC"]] = ["2023-03-04", 5040.0, 5040.0, 5040.0]
+    detector = DetectorQuaseDuplicidades(dias=3, tolerancia_rel=0.01)
+    pares = detector.detectar(diario, pd.to_datetime(diario["DT_LCTO"]))
+    assert ("3", "4") in set(zip(pares["NUM_LCTO_A"], pares["NUM_LCTO_B"]))
+    assert detector.detectar(diario, pd.to_datetime(diario["DT_LCTO"]))["DIF_VALOR"].max() == 40.0
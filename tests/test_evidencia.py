@@ -0,0 +1,117 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.auditor import ECDAuditor
+from core.cache_auditoria import CacheResultadosAuditoria
+from core.evidencia import EvidenciaAuditoria
+from exporters.audit_exporter import AuditExporter
+
+
+def _diario(n: int = 10) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "NUM_LCTO": [str(i) for i in range(n)],
+            "COD_CTA": ["1.01", "3.01"] * (n // 2),
+            "VL_D": np.arange(n, dtype="float64"),
+        }
+    )
+
+
+def test_predicado_materializa_em_lotes_e_serializa_as_linhas():
+    diario = _diario()
+    periodo = np.array(["2020-01"] * 6 + ["2020-02"] * 4)
+    filtro = np.ones(len(diario), dtype=bool)
+    filtro[0] = False  # ex: lançamento de encerramento
+    chaves = pd.DataFrame({"COD_CTA": ["1.01"], "PERIODO": ["2020-01"]})
+
+    evidencia = EvidenciaAuditoria(
+        diario,
+        chaves=chaves,
+        colunas_chave={"COD_CTA": diario["COD_CTA"], "PERIODO": periodo},
+        filtro=filtro,
+        colunas_extras={"PERIODO": periodo},
+    )
+    assert len(evidencia) == 2
+    completo = evidencia.materializar()
+    assert completo["NUM_LCTO"].tolist() == ["2", "4"]
+    assert completo["PERIODO"].tolist() == ["2020-01", "2020-01"]
+
+    lotes = list(evidencia.lotes(tamanho_lote=1))
+    assert [len(lote) for lote in lotes] == [1, 1]
+    pd.testing.assert_frame_equal(pd.concat(lotes, ignore_index=True), completo)
+    assert evidencia.materializar(limite=1)["NUM_LCTO"].tolist() == ["2"]
+
+    # Serializada, leva o predicado (não as linhas) e é religada ao Diário
+    copia = pickle.loads(pickle.dumps(evidencia))
+    assert not copia.vinculada
+    with pytest.raises(ValueError, match="desvinculada"):
+        copia.materializar()
+    with pytest.raises(ValueError, match="linhas"):
+        copia.vincular(diario.iloc[:5], {"PERIODO": periodo[:5]})
+    copia.vincular(diario, {"PERIODO": periodo})
+    pd.testing.assert_frame_equal(copia.materializar(), completo)
+
+    # Restrição (ex: amostra) recalcula as posições, também na cópia
+    for restrita in (evidencia, copia):
+        restrita.restringir(np.arange(len(diario)) != 2)
+        assert restrita.materializar()["NUM_LCTO"].tolist() == ["4"]
+        assert restrita.materializar()["PERIODO"].tolist() == ["2020-01"]
+
+
+def test_exportacao_em_fluxo_com_limite(tmp_path):
+    plano = pd.DataFrame(
+        {"COD_CTA": ["1.01", "3.01"], "IND_CTA": ["A", "A"], "COD_NAT": ["01", "04"]}
+    )
+    balancete = pd.DataFrame(
+        {
+            "DT_FIN": ["2020-01-31", "2020-01-31"],
+            "COD_CTA": ["1.01", "3.01"],
+            "VL_DEB": [999.0, 0.0],
+            "VL_CRED": [0.0, 26.0],
+        }
+    )
+    n = 10
+    diario = pd.DataFrame(
+        {
+            "NUM_LCTO": [str(i // 2) for i in range(n)],
+            "DT_LCTO": ["2020-01-10"] * n,
+            "IND_LCTO": ["N"] * n,
+            "COD_CTA": ["1.01", "3.01"] * (n // 2),
+            "VL_D": [5.0, 0.0] * (n // 2),
+            "VL_C": [0.0, 5.0] * (n // 2),
+        }
+    )
+    diario["VL_SINAL"] = diario["VL_D"] - diario["VL_C"]
+
+    auditor = ECDAuditor(diario, balancete, plano)
+    auditor.executar_testes(["1.1_Cruzamento_Diario_Balancete"])
+    resultado = auditor.resultados["1.1_Cruzamento_Diario_Balancete"]
+    assert isinstance(resultado["evidencia"], EvidenciaAuditoria)
+    assert len(resultado["evidencia"]) == n  # as duas contas divergem
+
+    # Lida do cache de resultados, volta religada ao Diário do novo auditor
+    for _ in range(2):
+        do_cache = ECDAuditor(diario.copy(), balancete, plano)
+        do_cache.cache_resultados = CacheResultadosAuditoria(str(tmp_path / "cache"))
+        do_cache._executar_com_cache(["1.1_Cruzamento_Diario_Balancete"], do_cache.executar_testes)
+    evidencia = do_cache.resultados["1.1_Cruzamento_Diario_Balancete"]["evidencia"]
+    assert evidencia.vinculada and evidencia.fonte is do_cache.contexto.diario
+    pd.testing.assert_frame_equal(evidencia.materializar(), resultado["evidencia"].materializar())
+
+    exporter = AuditExporter(
+        str(tmp_path), {"1.1_Cruzamento_Diario_Balancete": 3}, tamanho_lote=2
+    )
+    arquivos = exporter.exportar_detalhes_parquet(auditor.resultados, prefixo="20201231")
+    arquivos += exporter.exportar_dashboard(auditor.resultados, "ECD", prefixo="20201231")
+    base = os.path.join(str(tmp_path), "20201231_07_Auditoria_1.1_Cruzamento_Diario_Balancete_Evidencia")
+    assert f"PARQUET: {os.path.basename(base)}.parquet" in arquivos
+
+    parquet = pd.read_parquet(f"{base}.parquet")
+    assert parquet["COD_CTA"].tolist() == ["1.01", "3.01", "1.01"]
+    csv = pd.read_csv(f"{base}.csv", sep=";", encoding="utf-8-sig", dtype=str)
+    assert len(csv) == 3 and csv.columns[0] == "NUM_LCTO"
+    assert csv["DT_LCTO"].tolist() == ["10/01/2020"] * 3
@@ -2,7 +2,7 @@ import pytest
 import os
 import pandas as pd
 from decimal import Decimal
-from exporters.exporter import ECDExporter
+from exporters.exporter import ECDExporter, aguardar_exportacoes
 
 
 @pytest.fixture
@@ -55,3 +55,84 @@ def test_geracao_de_log(pasta_teste):
     with open(caminho_log, "r", encoding="utf-8") as f:
         conteudo = f.read()
         assert "Tabela_Log.parquet" in conteudo
+
+
+def test_conversao_unica_para_arrow_em_segundo_plano(pasta_teste, monkeypatch):
+    """Uma conversão Arrow por tabela, compartilhada por Parquet e CSV, gravados em threads."""
+    import exporters.exporter as modulo
+
+    conversoes = []
+    original = modulo.tabela_arrow
+    monkeypatch.setattr(
+        modulo, "tabela_arrow", lambda df: conversoes.append(len(df)) or original(df)
+    )
+    df = pd.DataFrame(
+        {
+            "DT_LCTO": ["2023-01-31", "2023-02-28"],
+            "COD_CTA": ["1.01", "3.01"],
+            "VL_SINAL": [1234.5, -1234.5],
+        }
+    )
+    exporter = ECDExporter(pasta_teste)
+    futuro = exporter.exportar_lote(
+        {"06_Lancamentos_Contabeis": df, "08_Fluxo_Contas": df.head(1)},
+        "Teste",
+        prefixo="2023",
+        em_segundo_plano=True,
+    )
+    aguardar_exportacoes()
+    assert futuro.done() and futuro.exception() is None
+    assert conversoes == [2, 1]
+
+    base = os.path.join(pasta_teste, "2023_06_Lancamentos_Contabeis")
+    pd.testing.assert_frame_equal(pd.read_parquet(f"{base}.parquet"), df)
+    with open(f"{base}.csv", encoding="utf-8-sig") as f:
+        assert f.read().splitlines() == [
+            "DT_LCTO;COD_CTA;VL_SINAL",
+            "31/01/2023;1.01;1234,5",
+            "28/02/2023;3.01;-1234,5",
+        ]
+    # Fluxo de contas só em Parquet
+    assert not os.path.exists(os.path.join(pasta_teste, "2023_08_Fluxo_Contas.csv"))
+
+    log = os.path.join(os.path.dirname(pasta_teste), "file_logs", f"ECD_{os.path.basename(pasta_teste)}.log")
+    with open(log, encoding="utf-8") as f:
+        conteudo = f.read()
+    assert "PARQUET: 2023_08_Fluxo_Contas.parquet" in conteudo
+    assert "CSV:     2023_06_Lancamentos_Contabeis.csv" in conteudo
+
+
+def test_erro_de_gravacao_nao_interrompe_as_demais(pasta_teste, monkeypatch):
+    """Falha em um arquivo é registrada no log de erros; os demais são gravados."""
+    import exporters.exporter as modulo
+
+    def _falha(tabela, caminho):
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(modulo, "gravar_csv", _falha)
+    exporter = ECDExporter(pasta_teste)
+    exporter.exportar_lote({"05_Plano_Contas": pd.DataFrame({"COD_CTA": ["1"]})}, "Teste")
+
+    assert os.path.exists(os.path.join(pasta_teste, "05_Plano_Contas.parquet"))
+    assert not os.path.exists(os.path.join(pasta_teste, "05_Plano_Contas.csv"))
+
+
+def test_falhas_e_telemetria_prontas_ao_concluir_em_segundo_plano(pasta_teste, monkeypatch):
+    """O Future só conclui após registrar a telemetria e traz as gravações que falharam."""
+    import exporters.exporter as modulo
+    from core.telemetry import TelemetryCollector
+
+    def _falha(tabela, caminho):
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(modulo, "gravar_csv", _falha)
+    exporter = ECDExporter(pasta_teste)
+    exporter.telemetry = TelemetryCollector()
+    exporter.current_ecd_id = "2023"
+    futuro = exporter.exportar_lote(
+        {"05_Plano_Contas": pd.DataFrame({"COD_CTA": ["1"]})}, "Teste", em_segundo_plano=True
+    )
+    falhas = futuro.result()
+    assert len(falhas) == 1 and "05_Plano_Contas.csv" in falhas[0] and "disco cheio" in falhas[0]
+    assert "gravacao_arquivos" in exporter.telemetry.data["2023"]["metrics"]["ECDExporter"]
+    aguardar_exportacoes()
@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+
+from core.agendador_auditoria import AgendadorAuditoria
+from core.auditor import ECDAuditor
+from core.lancamentos_atipicos import (
+    ParesIncomuns,
+    centavos,
+    chave_par,
+    dias,
+    mascara_abaixo_alcada,
+    mascara_feriado,
+    mascara_fim_de_semana,
+    mascara_historico_curto,
+    mascara_valor_redondo,
+    pascoa,
+)
+
+
+def test_calendario_valores_e_historicos():
+    # Páscoa 2024: 31/03 -> Carnaval 12-13/02, Sexta-feira Santa 29/03, Corpus Christi 30/05
+    assert pascoa(2024) == pd.Timestamp("2024-03-31").date()
+    datas = dias(
+        pd.Series(
+            ["2024-02-13", "2024-03-29", "2024-05-30", "2024-11-20", "2023-11-20",
+             "2024-06-08", "2024-06-10", "2024-01-25", None]
+        )
+    )
+    np.testing.assert_array_equal(
+        mascara_feriado(datas),
+        [True, True, True, True, False, False, False, False, False],
+    )
+    np.testing.assert_array_equal(
+        mascara_fim_de_semana(datas),
+        [False, False, False, False, False, True, False, False, False],
+    )
+    # Feriado local recorrente (aniversário de São Paulo)
+    assert mascara_feriado(datas, ("01-25",))[7]
+
+    valores = centavos(pd.Series([20_000.0, 20_000.01, 3_000.0, -15_000.0, 9_600.0, 10_000.0, np.nan]))
+    np.testing.assert_array_equal(
+        mascara_valor_redondo(valores, multiplo=1_000.0, valor_minimo=10_000.0),
+        [True, False, False, True, False, True, False],
+    )
+    np.testing.assert_array_equal(
+        mascara_abaixo_alcada(valores, (10_000.0, 50_000.0), faixa=0.05),
+        [False, False, False, False, True, False, False],
+    )
+
+    historicos = pd.Series(["PAGTO NF 123", "  ", None, "AJ", "VENDA A PRAZO", "AJ"])
+    np.testing.assert_array_equal(
+        mascara_historico_curto(historicos, minimo_caracteres=5),
+        [False, True, True, True, False, True],
+    )
+
+
+def _diario() -> pd.DataFrame:
+    """Lançamentos de partida dobrada: (lcto, data, débito, crédito, valor, hist, ind)."""
+    lancamentos = [
+        ("1", "2023-03-06", "1.01", "3.01", 1_234.56, "VENDA NF 1", "N"),
+        ("2", "2023-03-07", "1.01", "3.01", 2_345.67, "VENDA NF 2", "N"),
+        ("3", "2023-03-08", "1.01", "3.01", 3_456.78, "VENDA NF 3", "N"),
+        ("4", "2023-03-11", "1.01", "3.01", 9_800.00, "VENDA NF 4", "N"),  # sábado, abaixo de 10 mil
+        ("5", "2023-04-07", "1.01", "3.01", 20_000.00, "VENDA NF 5", "N"),  # Sexta-feira Santa, redondo
+        ("6", "2023-05-10", "2.01", "1.01", 5_432.10, "", "X"),  # par único, sem histórico, extemporâneo
+        ("7", "2024-01-05", "1.01", "3.01", 1_111.11, "VENDA NF 7", "N"),  # após o encerramento
+        ("8", "2023-12-31", "3.01", "4.01", 100_000.00, "ZERAMENTO", "E"),  # domingo, mas encerramento
+    ]
+    linhas = []
+    for lcto, data, debito, credito, valor, hist, ind in lancamentos:
+        linhas.append((lcto, data, debito, "D", valor, 0.0, hist, ind))
+        linhas.append((lcto, data, credito, "C", 0.0, valor, hist, ind))
+    df = pd.DataFrame(
+        linhas,
+        columns=["PK_x", "DT_LCTO", "COD_CTA", "IND_DC", "VL_D", "VL_C", "HIST", "IND_LCTO"],
+    )
+    df["NUM_LCTO"] = df["PK_x"]
+    df["VL_SINAL"] = df["VL_D"] - df["VL_C"]
+    return df
+
+
+def test_auditor_grupo_7_marca_lancamentos_fora_do_encerramento():
+    plano = pd.DataFrame(
+        {
+            "COD_CTA": ["1.01", "2.01", "3.01", "4.01"],
+            "CTA": ["BANCOS", "FORNECEDORES", "RECEITA", "RESULTADO"],
+            "COD_NAT": ["01", "02", "04", "03"],
+        }
+    )
+    balancete = pd.DataFrame(
+        {
+            "DT_FIN": ["2023-12-31"] * 4,
+            "COD_CTA": plano["COD_CTA"],
+            "VL_DEB": 0.0,
+            "VL_CRED": 0.0,
+        }
+    )
+    auditor = ECDAuditor(_diario(), balancete, plano)
+    auditor.executar_testes(ECDAuditor.REGISTRO.selecionar("7.*"))
+    resultados = auditor.resultados
+
+    def marcados(nome: str) -> list:
+        evidencia = resultados[nome]["evidencia"]
+        return sorted(set(evidencia.materializar()["PK_x"]))
+
+    assert marcados("7.1_Fim_De_Semana_Feriado") == ["4", "5"]
+    motivos = resultados["7.1_Fim_De_Semana_Feriado"]["evidencia"].materializar()["MOTIVO"]
+    assert sorted(set(motivos)) == ["FERIADO", "FIM_DE_SEMANA"]
+    assert marcados("7.2_Lancamento_Apos_Encerramento") == ["7"]
+    assert marcados("7.3_Valores_Redondos") == ["5"]
+    assert marcados("7.4_Abaixo_Alcada") == ["4"]
+    assert marcados("7.5_Pares_Incomuns") == ["6"]
+    assert marcados("7.6_Historico_Vazio") == ["6"]
+    assert marcados("7.7_Lancamento_Extemporaneo") == ["6"]
+
+    redondos = resultados["7.3_Valores_Redondos"]
+    assert redondos["status"] == "ALERTA"
+    assert redondos["impacto"] == 40_000.0  # débito e crédito do lançamento 5
+    assert set(redondos["detalhes"]["COD_CTA"]) == {"1.01", "3.01"}
+
+    # 7.5 marca o lançamento inteiro: impacto pelo lado devedor, uma vez só
+    pares = resultados["7.5_Pares_Incomuns"]
+    assert pares["impacto"] == 5_432.10
+    assert pares["msg"].endswith("nunca vistos em anos anteriores (2 contas).")
+
+    # Todos dependem do Diário: adiados no modo triagem
+    assert all(n in ECDAuditor.TESTES_DIARIO for n in ECDAuditor.REGISTRO.selecionar("7.*"))
+
+
+def test_pares_raros_por_percentil_e_novos_contra_anos_anteriores():
+    chaves = chave_par(["1.01", "3.01", "1.01"], ["3.01", "1.01", "3.01"])
+    assert chaves.dtype == np.uint64
+    assert chaves[0] == chaves[2] and chaves[0] != chaves[1]  # (A, B) != (B, A)
+
+    # Lançamento N:M (2 débitos × 2 créditos) gera os 4 pares, sem self-merge
+    diario = _diario()
+    extra = pd.DataFrame(
+        {
+            "PK_x": ["9"] * 4,
+            "NUM_LCTO": ["9"] * 4,
+            "DT_LCTO": ["2023-06-01"] * 4,
+            "COD_CTA": ["1.01", "5.01", "3.01", "2.01"],
+            "IND_DC": ["D", "D", "C", "C"],
+            "VL_D": [3_000.0, 1_000.0, 0.0, 0.0],
+            "VL_C": [0.0, 0.0, 2_000.0, 2_000.0],
+            "HIST": "VENDA NF 9",
+            "IND_LCTO": "N",
+        }
+    )
+    extra["VL_SINAL"] = extra["VL_D"] - extra["VL_C"]
+    diario = pd.concat([diario, extra], ignore_index=True)
+    encerramento = (diario["IND_LCTO"] == "E").to_numpy()
+
+    detector = ParesIncomuns(percentil=1.0, valor_minimo=1_000.0)
+    mascara, pares = detector.pontuar(diario, encerramento)
+    # Raros: 2.01->1.01 (lcto 6) e os pares de 9 com fluxo >= 1.000 (5.01 rateia 500 + 500)
+    assert set(zip(pares["COD_CTA_DEB"], pares["COD_CTA_CRED"])) == {
+        ("2.01", "1.01"),
+        ("1.01", "2.01"),
+    }
+    assert sorted(set(diario.loc[mascara, "PK_x"])) == ["6", "9"]
+    assert not pares["NOVO"].any()
+
+    # Histórico do mesmo CNPJ: 2.01->1.01 já existia; 1.01->2.01 e o par
+    # frequente 1.01->3.01 são novos (meses do próprio período e de outro
+    # CNPJ não contam como histórico)
+    diario["CNPJ"] = "11111111000111"
+    historico = pd.DataFrame(
+        {
+            "CNPJ": ["11111111000111", "11111111000111", "11111111000111", "22222222000122"],
+            "MES": ["2022-05", "2023-03", "2023-06", "2022-01"],
+            "COD_CTA_DEB": ["2.01", "1.01", "1.01", "1.01"],
+            "COD_CTA_CRED": ["1.01", "3.01", "2.01", "2.01"],
+        }
+    )
+    _, pares = detector.pontuar(diario, encerramento, historico)
+    assert list(zip(pares["COD_CTA_DEB"], pares["COD_CTA_CRED"], pares["NOVO"])) == [
+        ("1.01", "3.01", True),
+        ("2.01", "1.01", False),
+        ("1.01", "2.01", True),
+    ]
+    assert pares["OCORRENCIAS"].tolist() == [7, 1, 1]
+
+
+def test_pares_novos_com_historico_em_processo():
+    diario = _diario().assign(CNPJ="11111111000111")
+    plano = pd.DataFrame(
+        {"COD_CTA": ["1.01", "2.01", "3.01", "4.01"], "COD_NAT": ["01", "02", "04", "03"]}
+    )
+    balancete = pd.DataFrame(
+        {"DT_FIN": ["2023-12-31"] * 4, "COD_CTA": plano["COD_CTA"], "VL_DEB": 0.0, "VL_CRED": 0.0}
+    )
+    # 2.01 -> 1.01 já existia em 2022: só o par frequente 1.01 -> 3.01 é novo
+    historico = pd.DataFrame(
+        {
+            "CNPJ": ["11111111000111"],
+            "MES": ["2022-05"],
+            "COD_CTA_DEB": ["2.01"],
+            "COD_CTA_CRED": ["1.01"],
+        }
+    )
+    resultados = []
+    for usar_processos in (False, True):
+        auditor = ECDAuditor(diario, balancete, plano)
+        auditor.historico_fluxos = historico
+        agendador = AgendadorAuditoria(
+            auditor, usar_processos=usar_processos, max_processos=1, limiar_processo=0.0
+        )
+        resultados.append(agendador.executar(["7.5_Pares_Incomuns"])["7.5_Pares_Incomuns"])
+
+    em_thread, em_processo = resultados
+    assert em_processo["status"] == em_thread["status"] == "ALERTA"
+    assert em_processo["impacto"] == em_thread["impacto"]
+    # A evidência volta do processo como predicado, religada ao Diário do pai
+    assert em_processo["evidencia"].fonte is auditor.contexto.diario
+    pd.testing.assert_frame_equal(
+        em_processo["evidencia"].materializar(), em_thread["evidencia"].materializar()
+    )
+    assert sorted(set(em_processo["evidencia"].materializar()["PK_x"])) == [
+        "1", "2", "3", "4", "5", "6", "7",
+    ]
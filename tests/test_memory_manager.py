@@ -0,0 +1,90 @@
+import os
+from decimal import Decimal
+
+import pandas as pd
+import pyarrow as pa
+
+from core.memory_manager import GerenciadorBlocos
+
+
+def _tabela(n: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "COD_CTA": [f"1.01.{i:04d}" for i in range(n)],
+            "VL_DC": [Decimal(f"{i}.50") for i in range(n)],
+        }
+    )
+
+
+def test_spill_lru_e_recarga(tmp_path):
+    """Tabelas frias vão para Arrow IPC e voltam iguais no próximo acesso."""
+    blocos = GerenciadorBlocos(orcamento_mb=0.05, dir_spill=str(tmp_path))
+    blocos["dfECD_I050"] = _tabela(500)
+    blocos["dfECD_I250"] = _tabela(500)
+
+    # A tabela mais antiga saiu da RAM; a recém-inserida fica protegida
+    assert not blocos.residente("dfECD_I050")
+    assert blocos.residente("dfECD_I250")
+    assert os.path.exists(tmp_path / "dfECD_I050.arrow")
+
+    pd.testing.assert_frame_equal(blocos["dfECD_I050"], _tabela(500))
+    assert blocos.estatisticas == {"spills": 2, "recargas": 1}
+    assert list(blocos) == ["dfECD_I050", "dfECD_I250"]
+    assert blocos.get("dfECD_XXXX") is None
+
+    blocos.fechar()
+    assert not os.path.exists(tmp_path / "dfECD_I050.arrow")
+
+
+def test_sem_orcamento_nao_faz_spill():
+    blocos = GerenciadorBlocos()
+    blocos["dfECD_I250"] = _tabela(5000)
+    assert blocos.residente("dfECD_I250")
+    assert blocos.estatisticas["spills"] == 0
+
+
+def test_recarga_preserva_dtypes_arrow(tmp_path):
+    df = _tabela(200).astype(
+        {"COD_CTA": pd.ArrowDtype(pa.string()), "VL_DC": pd.ArrowDtype(pa.decimal128(10, 2))}
+    )
+    blocos = GerenciadorBlocos(orcamento_mb=0.001, dir_spill=str(tmp_path))
+    blocos["dfECD_I155"] = df
+    blocos["dfECD_I150"] = _tabela(10)
+
+    assert not blocos.residente("dfECD_I155")
+    pd.testing.assert_frame_equal(blocos["dfECD_I155"], df)
+
+
+def test_processor_com_orcamento(ecd_minimo):
+    """Com orçamento mínimo, o processor gera os mesmos balancetes."""
+    from core.reader_ecd import ECDReader
+    from core.processor import ECDProcessor
+
+    reader = ECDReader(ecd_minimo)
+    registros = list(reader.processar_arquivo())
+    normal = ECDProcessor(registros, cnpj=reader.cnpj).gerar_balancetes()
+    proc = ECDProcessor(registros, cnpj=reader.cnpj, orcamento_ram_mb=0.001)
+    com_spill = proc.gerar_balancetes()
+
+    assert proc.df_bruto.empty
+    assert proc.blocos.estatisticas["spills"] > 0  # type: ignore[attr-defined]
+    for nome, df in normal.items():
+        pd.testing.assert_frame_equal(df, com_spill[nome])
+
+
+def test_spill_removido_ao_fim_do_ecd(ecd_minimo, tmp_path, monkeypatch):
+    """processar_um_arquivo fecha os blocos ao fim do ECD (sem esperar o coletor de lixo)."""
+    import main
+
+    fechados = []
+    fechar = GerenciadorBlocos.fechar
+
+    def _fechar(self):
+        fechar(self)
+        fechados.append(self._dir_spill)
+
+    monkeypatch.setattr(GerenciadorBlocos, "fechar", _fechar)
+    main.processar_um_arquivo(ecd_minimo, str(tmp_path / "output"), orcamento_ram_mb=0.0001)
+
+    assert len(fechados) == 1 and fechados[0] is not None
+    assert not os.path.exists(fechados[0])
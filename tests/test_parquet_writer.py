@@ -0,0 +1,139 @@
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from core.evidencia import gravar_evidencia
+from exporters.consolidator import ECDConsolidator
+from exporters.exporter import ECDExporter
+from exporters.parquet_writer import (
+    PERFIL_PADRAO,
+    PerfilParquet,
+    gravar_parquet,
+    obter_perfil,
+    perfil_gravado,
+)
+
+
+def _lancamentos() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "NUM_LCTO": ["3", "1", "2", "4", "5"],
+            "CNPJ": ["22", "11", "11", "11", "22"],
+            "DT_LCTO": pd.to_datetime(
+                ["2023-01-10", "2023-02-01", "2023-01-05", "2023-01-05", "2023-01-10"]
+            ).date,
+            "COD_CTA": ["1.01", "1.01", "3.01", "1.01", "2.01"],
+            "VL_SINAL": [10.0, 20.0, -30.0, 40.0, 50.0],
+        }
+    )
+
+
+def _compressao(caminho: str) -> str:
+    return pq.ParquetFile(caminho).metadata.row_group(0).column(0).compression
+
+
+def test_perfis_ordenacao_indices_e_compressao(tmp_path):
+    assert obter_perfil(None).nome == PERFIL_PADRAO == "padrao"
+    assert obter_perfil("Archive").nome == "arquivo"
+    assert obter_perfil(" interactive ").nome == "interativo"
+    with pytest.raises(ValueError, match="Perfil Parquet inválido"):
+        obter_perfil("rapido")
+
+    df = _lancamentos()
+
+    # Interativo: CNPJ, data e lançamento (estável), ordem declarada nos
+    # metadados, row groups do perfil e índice de páginas
+    perfil = PerfilParquet(
+        "teste", linhas_por_grupo=2, indice_paginas=True,
+        ordenacao=obter_perfil("interativo").ordenacao,
+    )
+    caminho = str(tmp_path / "interativo.parquet")
+    assert perfil.gravar(df, caminho) == 5
+    lido = pd.read_parquet(caminho)
+    assert lido["NUM_LCTO"].tolist() == ["2", "4", "1", "3", "5"]
+    pd.testing.assert_frame_equal(
+        lido, df.set_index("NUM_LCTO").loc[["2", "4", "1", "3", "5"]].reset_index()[df.columns]
+    )
+    metadados = pq.ParquetFile(caminho).metadata
+    assert metadados.num_row_groups == 3
+    grupo = metadados.row_group(0)
+    nomes = [metadados.schema.column(c.column_index).name for c in grupo.sorting_columns]
+    assert nomes == ["CNPJ", "DT_LCTO", "NUM_LCTO"]
+    assert grupo.column(0).has_column_index and grupo.column(0).has_offset_index
+
+    # Sem lançamento (ex: balancete), a conta desempata
+    assert perfil.colunas_ordenacao(["DT_FIN", "COD_CTA", "CNPJ"]) == ["CNPJ", "DT_FIN", "COD_CTA"]
+
+    # Sem as colunas de ordenação, mantém a ordem original
+    so_valores = df[["VL_SINAL"]]
+    gravar_parquet(so_valores, caminho, "interativo")
+    pd.testing.assert_frame_equal(pd.read_parquet(caminho), so_valores)
+
+    # Arquivo: zstd, sem ordenação; padrão: snappy do pyarrow
+    gravar_parquet(df, caminho, "arquivo")
+    assert _compressao(caminho) == "ZSTD"
+    pd.testing.assert_frame_equal(pd.read_parquet(caminho), df)
+    gravar_parquet(df, caminho, "padrao")
+    assert _compressao(caminho) == "SNAPPY"
+    assert not pq.ParquetFile(caminho).metadata.row_group(0).sorting_columns
+
+
+def test_exportador_auditoria_e_consolidador_usam_o_perfil(tmp_path):
+    saida = tmp_path / "output"
+    df = _lancamentos()
+    for periodo, linhas in (("20231231", df.iloc[:3]), ("20221231", df.iloc[3:])):
+        exporter = ECDExporter(str(saida / periodo), perfil_parquet="archive")
+        exporter.exportar_lote({"06_Lancamentos_Contabeis": linhas}, "Teste", prefixo=periodo)
+        caminho = saida / periodo / f"{periodo}_06_Lancamentos_Contabeis.parquet"
+        assert _compressao(str(caminho)) == "ZSTD"
+
+    # Evidência em fluxo: mesmas opções do perfil, na ordem da fonte
+    evidencia = str(tmp_path / "evidencia.parquet")
+    assert gravar_evidencia(df, evidencia, tamanho_lote=2, perfil="arquivo") == 5
+    assert _compressao(evidencia) == "ZSTD"
+    assert pq.ParquetFile(evidencia).metadata.num_row_groups == 3
+    assert pd.read_parquet(evidencia)["NUM_LCTO"].tolist() == df["NUM_LCTO"].tolist()
+
+    consolidador = ECDConsolidator(str(saida), perfil_parquet="interativo")
+    consolidador.consolidar()
+    consolidado = os.path.join(
+        consolidador.consolidated_dir, "CONSOLIDADO_06_Lancamentos_Contabeis.parquet"
+    )
+    assert _compressao(consolidado) == "SNAPPY"
+    lido = pd.read_parquet(consolidado)
+    assert lido["NUM_LCTO"].tolist() == ["2", "4", "1", "3", "5"]
+    assert lido["ORIGEM_PERIODO"].tolist() == ["20231231", "20221231", "20231231", "20231231", "20221231"]
+    assert perfil_gravado(consolidado) == "interativo"
+
+    # Fontes inalteradas: mesmo perfil usa o cache, outro perfil regrava
+    mtime = os.path.getmtime(consolidado)
+    ECDConsolidator(str(saida), perfil_parquet="interativo").consolidar()
+    assert os.path.getmtime(consolidado) == mtime
+    ECDConsolidator(str(saida), perfil_parquet="arquivo").consolidar()
+    assert perfil_gravado(consolidado) == "arquivo"
+    assert _compressao(consolidado) == "ZSTD"
+
+
+def test_partidas_contiguas_e_csv_na_ordem_do_parquet(tmp_path):
+    """Interativo mantém as linhas de cada lançamento juntas, na ordem do I250, também no CSV."""
+    df = pd.DataFrame(
+        {
+            "NUM_LCTO": ["7", "7", "7", "3", "3"],
+            "DT_LCTO": ["2023-01-05"] * 5,
+            "LINHA_ORIGEM": [10, 11, 12, 20, 21],
+            "COD_CTA": ["3.01", "1.01", "2.01", "1.01", "3.01"],
+            "VL_SINAL": [-30.0, 10.0, 20.0, 5.0, -5.0],
+        }
+    )
+    pasta = str(tmp_path / "20231231")
+    exporter = ECDExporter(pasta, perfil_parquet="interativo")
+    exporter.exportar_lote({"06_Lancamentos_Contabeis": df}, "Teste", prefixo="2023")
+
+    base = os.path.join(pasta, "2023_06_Lancamentos_Contabeis")
+    parquet = pd.read_parquet(f"{base}.parquet")
+    assert parquet["LINHA_ORIGEM"].tolist() == [20, 21, 10, 11, 12]
+    csv = pd.read_csv(f"{base}.csv", sep=";", encoding="utf-8-sig", dtype=str)
+    assert csv["LINHA_ORIGEM"].astype(int).tolist() == parquet["LINHA_ORIGEM"].tolist()
+    assert csv["COD_CTA"].tolist() == parquet["COD_CTA"].tolist()
@@ -0,0 +1,53 @@
+import pandas as pd
+
+from core.reader_ecd import ECDReader
+from core.processor import ECDProcessor
+
+
+def _processar(caminho: str, **kwargs):
+    reader = ECDReader(caminho)
+    registros = list(reader.processar_arquivo())
+    proc = ECDProcessor(
+        registros,
+        cnpj=reader.cnpj,
+        layout_versao=reader.layout_versao or "",
+        **kwargs,
+    )
+    df_plano = proc.processar_plano_contas()
+    return proc, df_plano, proc.processar_lancamentos(df_plano), proc.gerar_balancetes()
+
+
+def test_modo_arrow_dtypes(ecd_minimo):
+    """Modo Arrow: blocos com string/date32/decimal128 e sem df_bruto de objetos."""
+    proc, _, df_lctos, _ = _processar(ecd_minimo, usar_arrow=True)
+
+    assert proc.df_bruto.empty
+    i250 = proc.blocos["dfECD_I250"]
+    assert str(i250["HIST"].dtype) == "string[pyarrow]"
+    assert str(i250["VL_DC"].dtype).startswith("decimal128")
+    assert str(df_lctos["DT_LCTO"].dtype) == "date32[day][pyarrow]"
+    assert df_lctos["VL_SINAL"].dtype == "float64"
+
+
+def test_modo_arrow_equivale_ao_object(ecd_minimo):
+    """Balancetes e diário são os mesmos nos dois modos (só muda o dtype)."""
+    _, plano_obj, lctos_obj, bal_obj = _processar(ecd_minimo)
+    _, plano_arr, lctos_arr, bal_arr = _processar(ecd_minimo, usar_arrow=True)
+
+    assert list(lctos_obj.columns) == list(lctos_arr.columns)
+    pd.testing.assert_series_equal(lctos_obj["VL_SINAL"], lctos_arr["VL_SINAL"])
+    assert plano_obj["CONTA"].tolist() == plano_arr["CONTA"].tolist()
+    for nome in ("03_Balancetes_Mensais", "04_Balancete_baseRFB"):
+        pd.testing.assert_frame_equal(
+            bal_obj[nome].reset_index(drop=True),
+            bal_arr[nome].reset_index(drop=True),
+            check_dtype=False,
+        )
+    # Sanitização de ';' também nas colunas string[pyarrow]
+    assert not bal_arr["03_Balancetes_Mensais"]["CTA"].str.contains(";").any()
+
+
+def test_chave_mes():
+    """Chave 'AAAA-MM' usada pelo reprocessamento de retificadoras ('' se inválida)."""
+    chave = ECDProcessor._chave_mes(pd.Series(["2020-01-15", None, "2020-02-10", "xx", "2020-01-31"]))
+    assert chave.tolist() == ["2020-01", "", "2020-02", "", "2020-01"]
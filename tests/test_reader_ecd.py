@@ -79,3 +79,17 @@ def test_hierarquia_com_fake(fake_ecd_file):
         if reader.schema["I155"]["nivel"] > reader.schema["I150"]["nivel"]:
             # Se I155 é filho direto ou descendente, deve ter herdado o pai no contexto
             assert reg_i155["FK_PAI"] == reg_i150["PK"]
+
+
+def test_registros_para_arrow(fake_ecd_file):
+    """Uma tabela Arrow por REG, com tipos nativos e sem passar por objetos."""
+    import pyarrow as pa
+
+    reader = ECDReader(fake_ecd_file)
+    tabelas = ECDReader.registros_para_arrow(reader.processar_arquivo())
+
+    assert set(tabelas) == {"0000", "I010", "I150", "I155", "9999"}
+    i155 = tabelas["I155"]
+    assert pa.types.is_decimal(i155.schema.field("I155_VL_SLD_INI").type)
+    assert pa.types.is_date32(tabelas["I150"].schema.field("I150_DT_FIN").type)
+    assert i155.column("I155_COD_CTA").to_pylist() == ["01.1.1.01.001"]
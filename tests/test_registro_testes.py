@@ -0,0 +1,95 @@
+import pandas as pd
+import pytest
+
+from core.auditor import ECDAuditor
+from core.cache_auditoria import CacheResultadosAuditoria
+
+
+def _insumos():
+    plano = pd.DataFrame(
+        {
+            "COD_CTA": ["1.01", "3.01"],
+            "COD_CTA_SUP": ["", ""],
+            "IND_CTA": ["A", "A"],
+            "COD_NAT": ["01", "04"],
+            "CONTA": ["CAIXA", "RECEITA"],
+        }
+    )
+    balancete = pd.DataFrame(
+        {
+            "DT_FIN": ["2020-01-31", "2020-01-31"],
+            "COD_CTA": ["1.01", "3.01"],
+            "VL_SLD_INI_SIG": [0.0, 0.0],
+            "VL_DEB": [100.5, 0.0],
+            "VL_CRED": [0.0, 100.5],
+            "VL_SLD_FIN_SIG": [100.5, -100.5],
+        }
+    )
+    # Diário 50 centavos abaixo do balancete nas duas contas
+    diario = pd.DataFrame(
+        {
+            "NUM_LCTO": ["1", "1"],
+            "DT_LCTO": ["2020-01-10", "2020-01-10"],
+            "IND_LCTO": ["N", "N"],
+            "COD_CTA": ["1.01", "3.01"],
+            "IND_DC": ["D", "C"],
+            "VL_D": [100.0, 0.0],
+            "VL_C": [0.0, 100.0],
+            "VL_SINAL": [100.0, -100.0],
+            "HIST": ["VENDA", "VENDA"],
+        }
+    )
+    return diario, balancete, plano
+
+
+def test_selecao_por_padrao_e_custo():
+    registro = ECDAuditor.REGISTRO
+    assert registro.selecionar("1.1,3.1,5.*") == [
+        "1.1_Cruzamento_Diario_Balancete",
+        "3.1_Consistencia_Natureza",
+        "5.1_Inversao_Natureza",
+        "5.2_Estouro_Caixa",
+        "5.3_Passivo_Ficticio",
+        "5.4_Consistencia_PL_Resultado",
+    ]
+    # Baratos: nenhum depende do Diário (cabem na triagem de entrada)
+    baratos = registro.selecionar(custo_maximo="cheap")
+    assert baratos and not set(baratos) & set(ECDAuditor.TESTES_DIARIO)
+    assert registro.selecionar("4.*", custo_maximo="medio") == [
+        "4.2_Duplicidades",
+        "4.3_Omissao_Encerramento",
+    ]
+    assert registro.selecionar() == list(ECDAuditor.TESTES)
+
+    with pytest.raises(ValueError, match="9.9"):
+        registro.selecionar("1.1,9.9")
+    with pytest.raises(ValueError, match="Classe de custo"):
+        registro.selecionar(custo_maximo="gratis")
+
+
+def test_execucao_seletiva_ignora_sem_insumo_e_respeita_limiares(tmp_path):
+    diario, balancete, plano = _insumos()
+
+    auditor = ECDAuditor(diario.iloc[0:0], balancete, plano)
+    resultados = auditor.executar_auditoria_completa(
+        ["1.1_Cruzamento_Diario_Balancete", "3.1_Consistencia_Natureza"]
+    )
+    assert list(resultados) == ["1.1_Cruzamento_Diario_Balancete", "3.1_Consistencia_Natureza"]
+    assert resultados["1.1_Cruzamento_Diario_Balancete"]["status"] == "SKIPPED"
+    assert "diario" in resultados["1.1_Cruzamento_Diario_Balancete"]["msg"]
+
+    # Divergência de R$ 0,50: reprova com o limiar padrão, passa com R$ 1,00
+    nome = "1.1_Cruzamento_Diario_Balancete"
+    padrao = ECDAuditor(diario, balancete, plano)
+    assert padrao.executar_auditoria_completa([nome])[nome]["status"] == "REPROVADO"
+
+    tolerante = ECDAuditor(diario, balancete, plano)
+    tolerante.limiares[nome]["tolerancia"] = 1.0
+    assert tolerante.executar_auditoria_completa([nome])[nome]["status"] == "APROVADO"
+    assert ECDAuditor.REGISTRO[nome].limiares["tolerancia"] == 0.01
+
+    # O limiar ajustado muda só a chave de cache do próprio teste
+    cache = CacheResultadosAuditoria(str(tmp_path))
+    base = cache.chaves(padrao, ECDAuditor.TESTES)
+    ajustado = cache.chaves(tolerante, ECDAuditor.TESTES)
+    assert [n for n in base if base[n] != ajustado[n]] == [nome]
@@ -0,0 +1,54 @@
+import pandas as pd
+
+from core.auditor import ECDAuditor
+from core.regras_auditoria import MotorRegras
+
+
+def _plano() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "COD_CTA": ["1.01", "2.01", "2.03", "3.01", "3.02", "3.03", "9.99"],
+            "COD_NAT": ["1", "02", "03", "04", "04", "09", "01"],
+            "COD_CTA_REF": ["2.01.01", "2.01.01", "1.01", "1.02", "2.03.01", "2.01", ""],
+            "CONTA": ["CAIXA", "FORNEC", "CAPITAL", "RECEITA", "LUCROS", "OUTRAS", "SEM REF"],
+        }
+    )
+
+
+def test_consistencia_natureza_pela_tabela_de_regras():
+    auditor = ECDAuditor(pd.DataFrame(), pd.DataFrame(), _plano())
+    auditor._teste_consistencia_natureza()
+    erros = auditor.resultados["3.1_Consistencia_Natureza"]["erros"]
+
+    assert erros[["COD_CTA", "COD_NAT_ECD", "TIPO_ERRO"]].values.tolist() == [
+        ["1.01", "01", "Ativo mapeado fora do Grupo 1"],
+        ["2.03", "03", "Patrimônio Líquido mapeado fora do Grupo 2"],
+        ["3.01", "04", "Resultado/Outros mapeado no Ativo"],
+        # 3.02 -> 2.03.01 é exceção da regra de passivo
+        ["3.03", "09", "Resultado/Outros mapeado no Passivo"],
+    ]
+
+
+def test_regra_nova_sem_codigo_e_selecao_por_prefixo():
+    tabela = pd.DataFrame(
+        [
+            {"ID": "CAIXA", "TESTE": "5.2", "CAMPO": "COD_CTA_REF", "COD_NAT": "",
+             "PREFIXO_DENTRO": "1.01.01|1.01.02", "PREFIXO_FORA": "", "EXCETO": "1.01.02.9",
+             "MENSAGEM": "Disponibilidades"},
+            {"ID": "RES_FORA_G3", "TESTE": "X", "CAMPO": "COD_CTA_REF", "COD_NAT": "4",
+             "PREFIXO_DENTRO": "", "PREFIXO_FORA": "3", "EXCETO": "",
+             "MENSAGEM": "Resultado fora do Grupo 3"},
+        ]
+    )
+    motor = MotorRegras.de_tabela(tabela)
+    refs = pd.Series(["1.01.01.01", "1.01.02.9", "1.01.02.1", None, "3.01"])
+    assert motor.selecionar("CAIXA", refs).tolist() == [True, False, True, False, False]
+
+    plano = _plano()
+    disparos = motor.avaliar("X", plano, natureza=plano["COD_NAT"].str.zfill(2).to_numpy())
+    assert plano["COD_CTA"][disparos["REGRA"] != ""].tolist() == ["3.01", "3.02"]
+
+    # A tabela padrão cobre as seleções dos indicadores 4.2 e 5.2
+    padrao = MotorRegras.padrao()
+    contas = pd.DataFrame({"COD_CTA": ["04.2.3.1", "04.2.1"]})
+    assert padrao.selecionar("DESPESAS_FINANCEIRAS", contas).tolist() == [True, False]
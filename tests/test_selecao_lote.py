@@ -0,0 +1,58 @@
+import os
+
+from core.selecao_lote import SeletorArquivosECD
+
+HASH_ORIGINAL = "A" * 40
+HASH_RETIFICADORA = "B" * 40
+
+
+def _versao(ecd_minimo: str, destino, nome: str, mtime: float, **troca) -> str:
+    with open(ecd_minimo, encoding="latin-1") as f:
+        linhas = f.read().split("\n")
+    partes = linhas[0].split("|")
+    for indice, valor in troca.items():
+        partes[int(indice[1:])] = valor
+    linhas[0] = "|".join(partes)
+    caminho = destino / nome
+    caminho.write_text("\n".join(linhas), encoding="latin-1")
+    os.utime(caminho, (mtime, mtime))
+    return str(caminho)
+
+
+def test_selecao_descarta_copias_e_substituidas(ecd_minimo, tmp_path):
+    original = _versao(ecd_minimo, tmp_path, f"X-{HASH_ORIGINAL}-1-SPED-ECD.txt", 100)
+    copia = _versao(ecd_minimo, tmp_path, f"X-{HASH_ORIGINAL}-1-SPED-ECD (1).txt", 200)
+    # Substituta mais antiga no disco: a política segue o COD_HASH_SUB, não a data
+    retif = _versao(
+        ecd_minimo, tmp_path, f"X-{HASH_RETIFICADORA}-1-SPED-ECD.txt", 50,
+        p14="1", p15=HASH_ORIGINAL,
+    )
+    outro_ano = _versao(
+        ecd_minimo, tmp_path, "outro_ano.txt", 10, p3="01012021", p4="31122021"
+    )
+
+    selecionados, ignorados = SeletorArquivosECD().selecionar(
+        [original, copia, retif, outro_ano]
+    )
+
+    assert selecionados == [retif, outro_ano]
+    motivos = dict(zip(ignorados["ARQUIVO"], ignorados["MOTIVO"]))
+    assert motivos == {
+        os.path.basename(copia): "DUPLICADO",
+        os.path.basename(original): "SUBSTITUIDO",
+    }
+    assert set(ignorados["MANTIDO"]) == {os.path.basename(retif)}
+
+
+def test_politica_modificacao_e_arquivo_sem_cabecalho(ecd_minimo, tmp_path):
+    antigo = _versao(ecd_minimo, tmp_path, "antigo.txt", 100, p14="1")
+    recente = _versao(ecd_minimo, tmp_path, "recente.txt", 200, p5="EMPRESA NOVA")
+    invalido = tmp_path / "invalido.txt"
+    invalido.write_text("sem registro 0000\n", encoding="latin-1")
+
+    selecionados, ignorados = SeletorArquivosECD("modificacao").selecionar(
+        [antigo, recente, str(invalido)]
+    )
+
+    assert selecionados == [recente, str(invalido)]
+    assert ignorados["MOTIVO"].tolist() == ["SUBSTITUIDO"]
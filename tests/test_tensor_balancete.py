@@ -0,0 +1,81 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from core.auditor import ECDAuditor
+from core.tensor_balancete import TensorBalancete
+
+
+def _balancete() -> pd.DataFrame:
+    colunas = [
+        "DT_FIN", "COD_CTA", "COD_NAT", "IND_CTA", "COD_CTA_REF", "CONTA",
+        "VL_SLD_INI_SIG", "VL_DEB", "VL_CRED", "VL_SLD_FIN_SIG",
+    ]
+    jan, fev = date(2020, 1, 31), date(2020, 2, 29)
+    caixa = ("1.01", "01", "A", "1.01.01.01.01", "CAIXA GERAL")
+    fornec = ("2.01", "02", "A", "2.01.01.01.01", "FORNECEDORES")
+    passivo = ("2", "02", "S", "", "PASSIVO")
+    linhas = [
+        (jan, *caixa, 100.0, 50.0, 20.0, 130.0),
+        (jan, *fornec, -5000.0, 0.0, 0.0, -5000.0),
+        (jan, *passivo, -5000.0, 0.0, 0.0, -5000.0),
+        # Caixa com saldo credor em fevereiro (estouro)
+        (fev, *caixa, 130.0, 20.0, 200.0, -50.0),
+        # Fornecedor parado o ano todo com saldo relevante
+        (fev, *fornec, -5000.0, 0.0, 0.0, -5000.0),
+        (fev, *passivo, -5000.0, 0.0, 0.0, -5000.0),
+    ]
+    return pd.DataFrame(linhas, columns=colunas)
+
+
+def test_tensor_forma_e_atributos():
+    tensor = TensorBalancete.de_balancete(_balancete())
+
+    assert tensor.valores.shape == (3, 2, 4)
+    assert list(tensor.contas) == ["1.01", "2", "2.01"]
+    assert tensor.valores[0, 1, TensorBalancete.FIN] == -50.0
+    assert tensor.presente.all()
+    np.testing.assert_array_equal(tensor.analitica, [True, False, True])
+    assert list(tensor.natureza) == ["01", "02", "02"]
+    assert tensor.contas_com_ref("1.01.01").tolist() == [True, False, False]
+
+
+def test_testes_de_saldo_sobre_o_tensor():
+    bal = _balancete()
+    auditor = ECDAuditor(pd.DataFrame(), bal, pd.DataFrame())
+    auditor._teste_estouro_caixa()
+    auditor._teste_passivo_ficticio()
+
+    estouro = auditor.resultados["5.2_Estouro_Caixa"]
+    assert estouro["status"] == "REPROVADO"
+    assert estouro["impacto"] == 50.0
+    # Evidência = linhas originais do balancete (mesmo índice)
+    assert estouro["detalhes"].index.tolist() == [3]
+
+    passivo = auditor.resultados["5.3_Passivo_Ficticio"]
+    assert passivo["status"] == "ALERTA"
+    assert passivo["detalhes"]["COD_CTA"].tolist() == ["2.01"]
+
+    # Saldo mínimo é limiar ajustável do registro
+    assert auditor.limiar("5.3_Passivo_Ficticio", "saldo_minimo") == 1000.0
+    auditor.limiares["5.3_Passivo_Ficticio"]["saldo_minimo"] = 5000.0
+    auditor._teste_passivo_ficticio()
+    assert auditor.resultados["5.3_Passivo_Ficticio"]["status"] == "APROVADO"
+
+
+def test_inversao_natureza_usa_as_linhas_do_proprio_tensor():
+    bal = _balancete()
+    tensor = TensorBalancete.de_balancete(bal)
+    # Balancete do auditor em outra ordem que a do tensor recebido
+    auditor = ECDAuditor(
+        pd.DataFrame(), bal.iloc[::-1].reset_index(drop=True), pd.DataFrame(),
+        tensor_balancete=tensor,
+    )
+    auditor._teste_inversao_natureza()
+
+    inversao = auditor.resultados["5.1_Inversao_Natureza"]
+    assert inversao["status"] == "ALERTA"
+    assert inversao["detalhes"]["COD_CTA"].tolist() == ["1.01"]
+    assert inversao["detalhes"]["VL_SLD_FIN_SIG"].tolist() == [-50.0]
+    assert inversao["impacto"] == 50.0
@@ -0,0 +1,56 @@
+from core.reader_ecd import ECDReader
+from core.processor import ECDProcessor
+from core.auditor import ECDAuditor
+
+
+def test_leitura_triagem_ignora_diario(ecd_minimo):
+    """Triagem: só os blocos de saldo/plano/demonstrações são lidos."""
+    reader = ECDReader(ecd_minimo)
+    registros = list(
+        reader.processar_arquivo(blocos_selecionados=ECDReader.BLOCOS_TRIAGEM)
+    )
+    tipos = {r["REG"] for r in registros}
+
+    assert {"I050", "I051", "I150", "I155"} <= tipos
+    assert not tipos & {"I200", "I250"}
+    # Hierarquia preservada mesmo com linhas puladas
+    i155 = [r for r in registros if r["REG"] == "I155"]
+    pks_i150 = {r["PK"] for r in registros if r["REG"] == "I150"}
+    assert all(r["FK_PAI"] in pks_i150 for r in i155)
+
+
+def test_scorecard_triagem(ecd_minimo):
+    """Testes de saldo executados; testes do Diário marcados como DEFERIDO."""
+    reader = ECDReader(ecd_minimo)
+    registros = list(
+        reader.processar_arquivo(blocos_selecionados=ECDReader.BLOCOS_TRIAGEM)
+    )
+    proc = ECDProcessor(registros, cnpj=reader.cnpj, layout_versao=reader.layout_versao or "")
+    df_plano = proc.processar_plano_contas()
+    df_lctos = proc.processar_lancamentos(df_plano)
+    balancetes = proc.gerar_balancetes()
+
+    assert df_lctos.empty
+    assert not balancetes["03_Balancetes_Mensais"].empty
+    assert "04_Balancete_baseRFB" in balancetes
+
+    auditor = ECDAuditor(
+        df_diario=df_lctos,
+        df_balancete=balancetes["03_Balancetes_Mensais"],
+        df_plano=df_plano,
+        df_naturezas=proc.blocos.get("dfECD_I050"),
+        df_mapeamento=proc.blocos.get("dfECD_I051"),
+    )
+    resultados = auditor.executar_triagem()
+
+    for nome in ECDAuditor.TESTES_DIARIO:
+        assert resultados[nome]["status"] == "DEFERIDO"
+    for nome in (
+        "1.2_Validacao_Hierarquia",
+        "3.1_Consistencia_Natureza",
+        "3.2_Contas_Orfas",
+        "5.1_Inversao_Natureza",
+        "5.2_Estouro_Caixa",
+        "5.3_Passivo_Ficticio",
+    ):
+        assert resultados[nome]["status"] != "DEFERIDO"
@@ -0,0 +1,42 @@
+import pandas as pd
+
+from core.auditor import ECDAuditor
+
+
+def test_hierarquia_todos_os_periodos_de_uma_vez():
+    plano = pd.DataFrame(
+        {
+            "COD_CTA": ["1", "1.01", "1.02", "2"],
+            "COD_CTA_SUP": ["", "1", "1", ""],
+            "IND_CTA": ["S", "A", "A", "S"],
+            "CONTA": ["ATIVO", "CAIXA", "BANCOS", "PASSIVO"],
+        }
+    )
+    linhas = []
+    for dt_fin, ativo, caixa, bancos, passivo in [
+        ("2020-01-31", 300.0, 100.0, 200.0, 0.0),
+        # Fevereiro: sintética não fecha e passivo com saldo sem filhos
+        ("2020-02-29", 350.0, 100.0, 200.0, -80.0),
+    ]:
+        linhas += [
+            (dt_fin, "1", ativo),
+            (dt_fin, "1.01", caixa),
+            (dt_fin, "1.02", bancos),
+            (dt_fin, "2", passivo),
+        ]
+    balancete = pd.DataFrame(linhas, columns=["DT_FIN", "COD_CTA", "VL_SLD_FIN_SIG"])
+
+    auditor = ECDAuditor(pd.DataFrame(), balancete, plano)
+    auditor._teste_validacao_hierarquia()
+    resultado = auditor.resultados["1.2_Validacao_Hierarquia"]
+
+    assert resultado["status"] == "REPROVADO"
+    assert resultado["impacto"] == 130.0
+    erros = resultado["erros"]
+    assert erros[["COD_CTA", "DT_FIN", "TIPO"]].values.tolist() == [
+        ["1", "2020-02-29", "Erro de Soma Hierárquica"],
+        # Sem filhos = soma zero: mesma classificação da versão por período
+        ["2", "2020-02-29", "Erro de Soma Hierárquica"],
+    ]
+    assert erros["VLR_CALCULADO"].tolist() == [300.0, 0.0]
+    assert erros["CONTA"].tolist() == ["ATIVO", "PASSIVO"]
@@ -0,0 +1,176 @@
+"""
+Compara os perfis de gravação Parquet (exporters/parquet_writer.py) sobre
+tabelas reais do pipeline: tamanho em disco, tempo de gravação, leitura
+completa e leitura filtrada (CNPJ + primeiro mês), pelo pyarrow e pelo DuckDB.
+
+Uso:
+    python tools/benchmark_parquet.py                       # Lançamentos e balancetes consolidados
+    python tools/benchmark_parquet.py caminho.parquet ... --perfis interativo,arquivo --repeticoes 5
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, cast
+
+# Ajusta o path para permitir execução de dentro da pasta tools/
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if base_dir not in sys.path:
+    sys.path.append(base_dir)
+
+import duckdb  # noqa: E402
+import pandas as pd  # noqa: E402
+import pyarrow as pa  # noqa: E402
+import pyarrow.compute as pc  # noqa: E402
+import pyarrow.parquet as pq  # noqa: E402
+
+from exporters.parquet_writer import (  # noqa: E402
+    ORDENACAO_INTERATIVA,
+    PERFIS,
+    PerfilParquet,
+    obter_perfil,
+)
+
+if sys.platform == "win32":
+    if hasattr(sys.stdout, "reconfigure"):
+        cast(Any, sys.stdout).reconfigure(encoding="utf-8")
+
+logging.basicConfig(level=logging.ERROR)
+
+TABELAS_PADRAO = [
+    os.path.join(base_dir, "data", "output", "consolidado", f"CONSOLIDADO_{nome}.parquet")
+    for nome in ("06_Lancamentos_Contabeis", "03_Balancetes_Mensais")
+]
+
+Filtro = List[Tuple[str, str, Any]]
+
+
+def _menor_tempo(funcao: Callable[[], Any], repeticoes: int) -> float:
+    tempos = []
+    for _ in range(max(repeticoes, 1)):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def filtro_tipico(tabela: pa.Table) -> Filtro:
+    """
+    Consulta típica de painel: o CNPJ mais frequente e o primeiro mês
+    (1/12 inicial das datas). Usa as mesmas colunas da ordenação do perfil
+    interativo que existirem na tabela.
+    """
+    # Só os grupos de CNPJ e de data da ordenação interativa
+    referencia = PerfilParquet("filtro", ordenacao=ORDENACAO_INTERATIVA[:2])
+    filtro: Filtro = []
+    for coluna in referencia.colunas_ordenacao(tabela.column_names):
+        valores = tabela.column(coluna)
+        if coluna == "CNPJ":
+            contagem = pc.value_counts(valores).to_pylist()
+            if contagem:
+                mais_frequente = max(contagem, key=lambda c: c["counts"])["values"]
+                filtro.append((coluna, "==", mais_frequente))
+        else:
+            ordenados = pc.drop_null(pc.take(valores, pc.sort_indices(valores)))
+            if len(ordenados):
+                filtro.append((coluna, "<=", ordenados[len(ordenados) // 12].as_py()))
+    return filtro
+
+
+def _sql_filtro(filtro: Filtro) -> Tuple[str, List[Any]]:
+    if not filtro:
+        return "", []
+    condicoes = " AND ".join(f'"{coluna}" {"=" if op == "==" else op} ?' for coluna, op, _ in filtro)
+    return f" WHERE {condicoes}", [valor for _, _, valor in filtro]
+
+
+def medir_perfil(
+    tabela: pa.Table, caminho: str, perfil: PerfilParquet, filtro: Filtro, repeticoes: int = 3
+) -> Dict[str, Any]:
+    """Grava `tabela` com o perfil e mede tamanho e tempos de leitura."""
+    inicio = time.perf_counter()
+    perfil.gravar(tabela, caminho)
+    gravacao = time.perf_counter() - inicio
+
+    metadados = pq.ParquetFile(caminho).metadata
+    where, parametros = _sql_filtro(filtro)
+    consulta = f"SELECT * FROM read_parquet('{caminho.replace(chr(39), chr(39) * 2)}'){where}"
+    with duckdb.connect() as conexao:
+
+        def _consultar() -> pa.Table:
+            resultado = conexao.execute(consulta, parametros)
+            # to_arrow_table nas versões novas do DuckDB; fetch_arrow_table nas anteriores
+            return getattr(resultado, "to_arrow_table", resultado.fetch_arrow_table)()
+
+        duckdb_s = _menor_tempo(_consultar, repeticoes)
+    return {
+        "PERFIL": perfil.nome,
+        "LINHAS": tabela.num_rows,
+        "ROW_GROUPS": metadados.num_row_groups,
+        "TAMANHO_MB": os.path.getsize(caminho) / 1024**2,
+        "GRAVACAO_S": gravacao,
+        "LEITURA_S": _menor_tempo(lambda: pq.read_table(caminho), repeticoes),
+        "FILTRO_S": _menor_tempo(
+            lambda: pq.read_table(caminho, filters=filtro or None), repeticoes
+        ),
+        "DUCKDB_FILTRO_S": duckdb_s,
+    }
+
+
+def comparar_perfis(
+    caminho_parquet: str, perfis: Sequence[str], repeticoes: int = 3
+) -> pd.DataFrame:
+    """Uma linha por perfil, com tamanho e tempos relativos ao primeiro perfil."""
+    tabela = pq.read_table(caminho_parquet)
+    filtro = filtro_tipico(tabela)
+    linhas = []
+    with tempfile.TemporaryDirectory() as pasta:
+        for nome in perfis:
+            perfil = obter_perfil(nome)
+            linhas.append(
+                medir_perfil(
+                    tabela, os.path.join(pasta, f"{perfil.nome}.parquet"), perfil, filtro, repeticoes
+                )
+            )
+    resultado = pd.DataFrame(linhas)
+    resultado.insert(0, "TABELA", os.path.basename(caminho_parquet))
+    base = resultado.iloc[0]
+    for coluna in ("TAMANHO_MB", "LEITURA_S", "FILTRO_S", "DUCKDB_FILTRO_S"):
+        resultado[f"{coluna}_REL"] = resultado[coluna] / base[coluna] if base[coluna] else float("nan")
+    return resultado
+
+
+def _argumentos(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark dos perfis de gravação Parquet.")
+    parser.add_argument(
+        "arquivos",
+        nargs="*",
+        default=TABELAS_PADRAO,
+        help="Parquets de origem (padrão: Lançamentos e balancetes consolidados).",
+    )
+    parser.add_argument(
+        "--perfis",
+        default=",".join(PERFIS),
+        help=f"Perfis a comparar, separados por vírgula (padrão: {','.join(PERFIS)}).",
+    )
+    parser.add_argument("--repeticoes", type=int, default=3, help="Leituras por medida (vale a menor).")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _argumentos()
+    perfis = [p.strip() for p in args.perfis.split(",") if p.strip()]
+    resultados = []
+    for arquivo in args.arquivos:
+        if not os.path.exists(arquivo):
+            print(f"[IGNORADO] Arquivo não encontrado: {arquivo}")
+            continue
+        print(f"--- {os.path.basename(arquivo)} ---")
+        resultados.append(comparar_perfis(arquivo, perfis, args.repeticoes))
+
+    if resultados:
+        with pd.option_context("display.width", 200, "display.max_columns", None):
+            print(pd.concat(resultados, ignore_index=True).round(3).to_string(index=False))